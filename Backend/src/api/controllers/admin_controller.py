@@ -1,12 +1,13 @@
 from flask import Blueprint, jsonify, request
 from services.admin_service import AdminService
 from services.admin_profile_service import AdminProfileService
-from services.admin_settings_service import AdminSettingsService
+from services.admin_settings_service import admin_settings_service
+from services.response_cache import response_cache
 
 bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 admin_service = AdminService()
 profile_service = AdminProfileService()
-settings_service = AdminSettingsService()
+settings_service = admin_settings_service
 
 @bp.route('/dashboard/stats', methods=['GET'])
 def get_dashboard_stats():
@@ -252,6 +253,19 @@ def update_performance_settings():
     settings = settings_service.update_performance_settings(data)
     return jsonify(settings), 200
 
+@bp.route('/cache/stats', methods=['GET'])
+def get_response_cache_stats():
+    """Response cache hits, misses, 304s and entry count"""
+    return jsonify(response_cache.snapshot()), 200
+
+@bp.route('/cache/invalidate', methods=['POST'])
+def invalidate_response_cache():
+    """Drop cached responses for the given tags (all when none given)"""
+    data = request.get_json(silent=True) or {}
+    tags = data.get('tags') or []
+    response_cache.invalidate(*tags)
+    return jsonify({'message': 'Cache invalidated', 'tags': tags or 'all'}), 200
+
 
 # --- Mentor Management Endpoints ---
 
@@ -215,56 +215,26 @@ def login():
             if not user:
                 return jsonify({'error': 'Invalid username or password'}), 401
             
-            # Verify password
-            if not AuthService.verify_password(data['password'], user.password):
+            # Verify password (transparently upgrades legacy hashes)
+            is_valid, upgraded_hash = AuthService.verify_and_update_password(data['password'], user.password)
+            if not is_valid:
                 return jsonify({'error': 'Invalid username or password'}), 401
             
+            if upgraded_hash:
+                user.password = upgraded_hash
+            
             # Check if user is active
             if not user.status:
                 return jsonify({'error': 'Account is disabled'}), 403
             
             # Update last login
-            previous_login = user.last_login
             user.last_login = datetime.now()
             
-            # Update streak for learners
+            # Streaks come from learning activity (progress_aggregator); login
+            # only makes sure the row exists and a lapsed streak reads 0
             if user.role == 'learner':
-                from infrastructure.models.progress_model import ProgressModel
-                progress = session.query(ProgressModel).filter_by(user_id=user.id).first()
-                
-                if not progress:
-                    # Create progress record if not exists
-                    progress = ProgressModel(
-                        user_id=user.id,
-                        current_streak=1,
-                        longest_streak=1,
-                        created_at=datetime.now()
-                    )
-                    session.add(progress)
-                else:
-                    # Calculate streak
-                    today = datetime.now().date()
-                    if previous_login:
-                        last_login_date = previous_login.date()
-                        days_diff = (today - last_login_date).days
-                        
-                        if days_diff == 0:
-                            # Same day login - no change
-                            pass
-                        elif days_diff == 1:
-                            # Consecutive day - increase streak
-                            progress.current_streak = (progress.current_streak or 0) + 1
-                            if progress.current_streak > (progress.longest_streak or 0):
-                                progress.longest_streak = progress.current_streak
-                        else:
-                            # Streak broken - reset to 1
-                            progress.current_streak = 1
-                    else:
-                        # First login ever
-                        progress.current_streak = 1
-                        progress.longest_streak = max(progress.longest_streak or 0, 1)
-                    
-                    progress.updated_at = datetime.now()
+                from services.progress_aggregator import progress_aggregator
+                progress_aggregator.touch(session, user.id)
             
             # Generate tokens
             tokens = AuthService.create_access_token(user.id, user.role or 'learner')
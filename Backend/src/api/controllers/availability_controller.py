@@ -7,9 +7,15 @@ from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 
+from services.scheduling_service import scheduling_service, SchedulingError, SlotConflict
+
 availability_bp = Blueprint('availability', __name__, url_prefix='/api/mentor/availability')
 
 
+def _conflict_response(e: SlotConflict):
+    return jsonify({'error': str(e), 'conflicts': e.conflicts}), 409
+
+
 @availability_bp.route('/<int:mentor_id>', methods=['GET'])
 @swag_from({
     'tags': ['Mentor Availability'],
@@ -30,30 +36,28 @@ def get_availability(mentor_id):
         start_date_str = request.args.get('start_date')
         end_date_str = request.args.get('end_date')
         
-        session = get_db_session()
-        query = session.query(AvailabilityModel).filter(
-            AvailabilityModel.mentor_id == mentor_id,
-            AvailabilityModel.is_active == True
-        )
-        
-        if start_date_str:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-            query = query.filter(AvailabilityModel.date >= start_date.date())
-        
-        if end_date_str:
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-            query = query.filter(AvailabilityModel.date <= end_date.date())
-        
-        slots = query.order_by(AvailabilityModel.date, AvailabilityModel.start_time).all()
-        
-        return jsonify({
-            'mentor_id': mentor_id,
-            'slots': [s.to_dict() for s in slots]
-        }), 200
+        with get_db_session() as session:
+            query = session.query(AvailabilityModel).filter(
+                AvailabilityModel.mentor_id == mentor_id,
+                AvailabilityModel.is_active == True
+            )
+            
+            if start_date_str:
+                start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+                query = query.filter(AvailabilityModel.starts_at >= start_date)
+            
+            if end_date_str:
+                end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+                query = query.filter(AvailabilityModel.starts_at < end_date + timedelta(days=1))
+            
+            slots = query.order_by(AvailabilityModel.starts_at).all()
+            
+            return jsonify({
+                'mentor_id': mentor_id,
+                'slots': [s.to_dict() for s in slots]
+            }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        session.close()
 
 
 @availability_bp.route('/', methods=['POST'])
@@ -63,39 +67,21 @@ def get_availability(mentor_id):
     'responses': {'201': {'description': 'Slot created'}}
 })
 def add_availability():
-    """Add a new availability slot"""
+    """Add a new availability slot (409 if it overlaps another)"""
     try:
-        from infrastructure.databases.mssql import get_db_session
-        from infrastructure.models.availability_model import AvailabilityModel
-        
         data = request.get_json()
         
         if not data.get('mentor_id') or not data.get('date'):
             return jsonify({'error': 'mentor_id and date are required'}), 400
         
-        session = get_db_session()
-        
-        slot = AvailabilityModel(
-            mentor_id=data['mentor_id'],
-            date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
-            start_time=datetime.strptime(data.get('start_time', '09:00'), '%H:%M').time(),
-            end_time=datetime.strptime(data.get('end_time', '10:00'), '%H:%M').time(),
-            slot_duration=data.get('slot_duration', 30),
-            is_recurring=data.get('is_recurring', False),
-            recurrence_pattern=data.get('recurrence_pattern'),
-            notes=data.get('notes'),
-            is_active=True
-        )
-        
-        session.add(slot)
-        session.commit()
-        
-        return jsonify(slot.to_dict()), 201
+        slot = scheduling_service.add_slot(data['mentor_id'], data)
+        return jsonify(slot), 201
+    except SlotConflict as e:
+        return _conflict_response(e)
+    except (SchedulingError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        session.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        session.close()
 
 
 @availability_bp.route('/bulk', methods=['POST'])
@@ -105,11 +91,8 @@ def add_availability():
     'responses': {'201': {'description': 'Slots created'}}
 })
 def add_bulk_availability():
-    """Add multiple availability slots at once"""
+    """Add multiple availability slots at once; overlapping ones are skipped"""
     try:
-        from infrastructure.databases.mssql import get_db_session
-        from infrastructure.models.availability_model import AvailabilityModel
-        
         data = request.get_json()
         mentor_id = data.get('mentor_id')
         slots_data = data.get('slots', [])
@@ -117,32 +100,74 @@ def add_bulk_availability():
         if not mentor_id or not slots_data:
             return jsonify({'error': 'mentor_id and slots are required'}), 400
         
-        session = get_db_session()
-        created_slots = []
+        result = scheduling_service.add_slots(mentor_id, slots_data)
         
-        for slot_data in slots_data:
-            slot = AvailabilityModel(
-                mentor_id=mentor_id,
-                date=datetime.strptime(slot_data['date'], '%Y-%m-%d').date(),
-                start_time=datetime.strptime(slot_data.get('start_time', '09:00'), '%H:%M').time(),
-                end_time=datetime.strptime(slot_data.get('end_time', '10:00'), '%H:%M').time(),
-                slot_duration=slot_data.get('slot_duration', 30),
-                is_active=True
-            )
-            session.add(slot)
-            created_slots.append(slot)
+        return jsonify({
+            'message': f"Created {result['created']} slots",
+            'count': result['created'],
+            'conflicts': result['conflicts']
+        }), 201
+    except (SchedulingError, ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@availability_bp.route('/template', methods=['POST'])
+@swag_from({
+    'tags': ['Mentor Availability'],
+    'summary': 'Repeat a weekly availability template',
+    'parameters': [{
+        'name': 'body', 'in': 'body', 'required': True,
+        'schema': {
+            'type': 'object',
+            'properties': {
+                'mentor_id': {'type': 'integer'},
+                'start_date': {'type': 'string', 'description': 'YYYY-MM-DD, defaults to today'},
+                'weeks': {'type': 'integer', 'default': 4},
+                'template': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'weekday': {'type': 'integer', 'description': '0 = Monday .. 6 = Sunday'},
+                            'start_time': {'type': 'string', 'example': '09:00'},
+                            'end_time': {'type': 'string', 'example': '11:00'},
+                            'slot_duration': {'type': 'integer', 'default': 30}
+                        }
+                    }
+                }
+            }
+        }
+    }],
+    'responses': {'201': {'description': 'Slots created; overlapping ones listed in conflicts'}}
+})
+def add_weekly_template():
+    """Create recurring weekly slots for the next N weeks"""
+    try:
+        data = request.get_json()
+        mentor_id = data.get('mentor_id')
+        template = data.get('template', [])
         
-        session.commit()
+        if not mentor_id or not template:
+            return jsonify({'error': 'mentor_id and template are required'}), 400
+        
+        result = scheduling_service.add_weekly_template(
+            mentor_id, template,
+            start_date=data.get('start_date') or datetime.now().date(),
+            weeks=data.get('weeks', 4)
+        )
         
         return jsonify({
-            'message': f'Created {len(created_slots)} slots',
-            'count': len(created_slots)
+            'message': f"Created {result['created']} slots",
+            'count': result['created'],
+            'end_date': result['end_date'],
+            'conflicts': result['conflicts']
         }), 201
+    except (SchedulingError, ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        session.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        session.close()
 
 
 @availability_bp.route('/<int:slot_id>', methods=['PUT'])
@@ -152,39 +177,21 @@ def add_bulk_availability():
     'responses': {'200': {'description': 'Slot updated'}}
 })
 def update_availability(slot_id):
-    """Update an availability slot"""
+    """Update an availability slot (409 if the new time overlaps another)"""
     try:
-        from infrastructure.databases.mssql import get_db_session
-        from infrastructure.models.availability_model import AvailabilityModel
-        
         data = request.get_json()
-        session = get_db_session()
         
-        slot = session.query(AvailabilityModel).get(slot_id)
+        slot = scheduling_service.update_slot(slot_id, data)
         if not slot:
             return jsonify({'error': 'Slot not found'}), 404
         
-        if data.get('date'):
-            slot.date = datetime.strptime(data['date'], '%Y-%m-%d').date()
-        if data.get('start_time'):
-            slot.start_time = datetime.strptime(data['start_time'], '%H:%M').time()
-        if data.get('end_time'):
-            slot.end_time = datetime.strptime(data['end_time'], '%H:%M').time()
-        if data.get('slot_duration'):
-            slot.slot_duration = data['slot_duration']
-        if data.get('notes') is not None:
-            slot.notes = data['notes']
-        if data.get('is_active') is not None:
-            slot.is_active = data['is_active']
-        
-        session.commit()
-        
-        return jsonify(slot.to_dict()), 200
+        return jsonify(slot), 200
+    except SlotConflict as e:
+        return _conflict_response(e)
+    except (SchedulingError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        session.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        session.close()
 
 
 @availability_bp.route('/<int:slot_id>', methods=['DELETE'])
@@ -198,71 +205,68 @@ def delete_availability(slot_id):
     try:
         from infrastructure.databases.mssql import get_db_session
         from infrastructure.models.availability_model import AvailabilityModel
-        
-        session = get_db_session()
-        
-        slot = session.query(AvailabilityModel).get(slot_id)
-        if not slot:
-            return jsonify({'error': 'Slot not found'}), 404
-        
-        session.delete(slot)
-        session.commit()
+        from infrastructure.models.mentor_booking_model import MentorBookingModel
+        
+        with get_db_session() as session:
+            slot = session.query(AvailabilityModel).get(slot_id)
+            if not slot:
+                return jsonify({'error': 'Slot not found'}), 404
+            
+            # Bookings taken from the slot keep their time
+            session.query(MentorBookingModel).filter(
+                MentorBookingModel.availability_id == slot_id
+            ).update({'availability_id': None}, synchronize_session=False)
+            session.delete(slot)
         
         return jsonify({'message': 'Slot deleted'}), 200
     except Exception as e:
-        session.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        session.close()
 
 
 @availability_bp.route('/weekly/<int:mentor_id>', methods=['GET'])
 @swag_from({
     'tags': ['Mentor Availability'],
     'summary': 'Get weekly availability schedule',
-    'responses': {'200': {'description': 'Weekly schedule'}}
+    'parameters': [
+        {'name': 'mentor_id', 'in': 'path', 'type': 'integer', 'required': True},
+        {'name': 'week_start', 'in': 'query', 'type': 'string', 'description': 'YYYY-MM-DD (Monday), defaults to this week'}
+    ],
+    'responses': {'200': {'description': 'Weekly schedule with the free pieces of every slot'}}
 })
 def get_weekly_schedule(mentor_id):
     """Get mentor's weekly availability schedule"""
     try:
-        from infrastructure.databases.mssql import get_db_session
-        from infrastructure.models.availability_model import AvailabilityModel
+        week_start = request.args.get('week_start')
+        if week_start:
+            week_start = datetime.strptime(week_start, '%Y-%m-%d').date()
         
-        # Get current week
-        today = datetime.now().date()
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
-        
-        session = get_db_session()
-        slots = session.query(AvailabilityModel).filter(
-            AvailabilityModel.mentor_id == mentor_id,
-            AvailabilityModel.date >= week_start,
-            AvailabilityModel.date <= week_end,
-            AvailabilityModel.is_active == True
-        ).order_by(AvailabilityModel.date, AvailabilityModel.start_time).all()
-        
-        # Group by day
-        weekly_schedule = {}
-        for i in range(7):
-            day = week_start + timedelta(days=i)
-            day_str = day.strftime('%Y-%m-%d')
-            weekly_schedule[day_str] = {
-                'day_name': ['Thứ 2', 'Thứ 3', 'Thứ 4', 'Thứ 5', 'Thứ 6', 'Thứ 7', 'Chủ nhật'][i],
-                'slots': []
-            }
-        
-        for slot in slots:
-            day_str = slot.date.strftime('%Y-%m-%d')
-            if day_str in weekly_schedule:
-                weekly_schedule[day_str]['slots'].append(slot.to_dict())
+        return jsonify(scheduling_service.weekly_schedule(mentor_id, week_start or None)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@availability_bp.route('/next-free', methods=['GET'])
+@swag_from({
+    'tags': ['Mentor Availability'],
+    'summary': 'Earliest free slots across mentors',
+    'parameters': [
+        {'name': 'specialty', 'in': 'query', 'type': 'string', 'description': 'Match mentors whose specialty contains this'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'default': 20},
+        {'name': 'days', 'in': 'query', 'type': 'integer', 'default': 14, 'description': 'How far ahead to search'}
+    ],
+    'responses': {'200': {'description': 'Free slots ordered by start time'}}
+})
+def get_next_free_slots():
+    """Next bookable slots of all mentors (optionally of one specialty)"""
+    try:
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+        days = max(1, min(request.args.get('days', 14, type=int), 90))
         
-        return jsonify({
-            'mentor_id': mentor_id,
-            'week_start': week_start.strftime('%Y-%m-%d'),
-            'week_end': week_end.strftime('%Y-%m-%d'),
-            'schedule': weekly_schedule
-        }), 200
+        slots = scheduling_service.next_free_slots(
+            specialty=request.args.get('specialty'), limit=limit, days=days
+        )
+        return jsonify({'slots': slots, 'count': len(slots)}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        session.close()
@@ -6,6 +6,7 @@ API endpoints for badges and achievements system
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from services.badge_service import badge_service
+from services.response_cache import cached_response
 
 badge_bp = Blueprint('badges', __name__, url_prefix='/api/badges')
 
@@ -39,6 +40,7 @@ badge_bp = Blueprint('badges', __name__, url_prefix='/api/badges')
         }
     }
 })
+@cached_response('badges')
 def get_all_badges():
     """Get all available badges"""
     category = request.args.get('category', None)
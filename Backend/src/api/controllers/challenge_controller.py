@@ -6,6 +6,7 @@ API endpoints for challenges and gamification
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from services.challenge_service import ChallengeService
+from services.response_cache import cached_response
 
 challenge_bp = Blueprint('challenges', __name__, url_prefix='/api/challenges')
 service = ChallengeService()
@@ -23,6 +24,7 @@ service = ChallengeService()
     ],
     'responses': {'200': {'description': 'List of challenges'}}
 })
+@cached_response('challenges')
 def get_challenges():
     """Get all available challenges"""
     status = request.args.get('status', 'active')
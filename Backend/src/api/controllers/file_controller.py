@@ -3,16 +3,18 @@ File Controller
 API endpoints for file uploads (avatars, documents, etc.)
 """
 import os
-import uuid
-from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app, send_from_directory
 from werkzeug.utils import secure_filename
 
+from services.avatar_store import avatar_store
+
 file_bp = Blueprint('file', __name__, url_prefix='/api/files')
 
 # Allowed extensions
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600  # content-addressed files never change
+FALLBACK_MAX_AGE = 60  # original served while the requested thumbnail is not ready
 
 def get_upload_folder():
     """Get or create upload folder path"""
@@ -25,13 +27,6 @@ def allowed_file(filename, allowed_extensions):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
-def generate_unique_filename(original_filename):
-    """Generate unique filename with timestamp and UUID"""
-    ext = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else 'jpg'
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    unique_id = str(uuid.uuid4())[:8]
-    return f"{timestamp}_{unique_id}.{ext}"
-
 
 @file_bp.route('/upload-avatar', methods=['POST'])
 def upload_avatar():
@@ -95,13 +90,10 @@ def upload_avatar():
         }), 413
     
     try:
-        # Generate unique filename
-        filename = generate_unique_filename(secure_filename(file.filename))
-        
-        # Save file
+        # Stored under its content hash, thumbnails rendered in the worker pool
+        ext = secure_filename(file.filename).rsplit('.', 1)[-1].lower().replace('jpeg', 'jpg')
         upload_folder = get_upload_folder()
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
+        filename, variants = avatar_store.save(file.stream, upload_folder, ext)
         
         # Generate URL
         # Note: In production, this should return a CDN URL or proper static file URL
@@ -111,9 +103,12 @@ def upload_avatar():
         return jsonify({
             'message': 'Upload thành công',
             'url': avatar_url,
-            'filename': filename
+            'filename': filename,
+            'variants': {str(size): f"{avatar_url}?size={size}" for size in variants}
         }), 200
         
+    except ValueError:
+        return jsonify({'error': 'File không phải là ảnh hợp lệ'}), 400
     except Exception as e:
         print(f"Upload error: {e}")
         return jsonify({'error': 'Lỗi khi upload file'}), 500
@@ -131,24 +126,39 @@ def serve_avatar(filename):
         in: path
         type: string
         required: true
+      - name: size
+        in: query
+        type: integer
+        required: false
+        description: Display size in px; serves the closest WebP thumbnail (48, 128 or 256)
     responses:
       200:
         description: Avatar image file
+      304:
+        description: Not modified
       404:
         description: File not found
     """
-    upload_folder = get_upload_folder()
-    
     # Security check - prevent directory traversal
     if '..' in filename or filename.startswith('/'):
         return jsonify({'error': 'Invalid filename'}), 400
     
-    filepath = os.path.join(upload_folder, filename)
-    
-    if not os.path.exists(filepath):
-        return jsonify({'error': 'File không tồn tại'}), 404
+    upload_folder = get_upload_folder()
+    size = request.args.get('size', type=int)
+    variant = avatar_store.variant(upload_folder, filename, size)
+    served = variant or filename
     
-    return send_from_directory(upload_folder, filename)
+    # Cached forever only when the URL got the bytes it names; an original
+    # standing in for a thumbnail still rendering (or failed) is not
+    immutable = avatar_store.content_hash(filename) is not None and (variant is not None or not size)
+    # send_from_directory answers 404 for missing files itself
+    response = send_from_directory(
+        upload_folder, served,
+        max_age=IMMUTABLE_MAX_AGE if immutable else (FALLBACK_MAX_AGE if size else 3600)
+    )
+    if immutable:
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
 
 
 @file_bp.route('/avatars/<filename>', methods=['DELETE'])
@@ -168,6 +178,8 @@ def delete_avatar(filename):
         description: Avatar deleted successfully
       404:
         description: File not found
+      409:
+        description: File is still some user's avatar
     """
     upload_folder = get_upload_folder()
     
@@ -181,7 +193,9 @@ def delete_avatar(filename):
         return jsonify({'error': 'File không tồn tại'}), 404
     
     try:
-        os.remove(filepath)
+        if not avatar_store.delete(upload_folder, filename):
+            # Identical images share one file; another profile still shows it
+            return jsonify({'error': 'File đang được sử dụng'}), 409
         return jsonify({'message': 'Xóa file thành công'}), 200
     except Exception as e:
         print(f"Delete error: {e}")
@@ -443,6 +443,8 @@ def create_booking():
         
         # Check if booking creation failed
         if booking.get('error'):
+            if 'conflicts' in booking:
+                return jsonify(booking), 409
             return jsonify({'error': booking['error']}), 400
         
         # Send real-time notification to mentor via WebSocket
@@ -6,6 +6,7 @@ API endpoints for mentor teaching content and guidance
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from services.mentor_content_service import MentorContentService
+from services.content_catalogue import catalogue_response
 
 mentor_content_bp = Blueprint('mentor_content', __name__, url_prefix='/api/mentor/content')
 service = MentorContentService()
@@ -116,8 +117,7 @@ def provide_expression_feedback():
 })
 def get_common_grammar_errors():
     """Get list of common grammar errors"""
-    errors = service.get_common_grammar_errors()
-    return jsonify(errors), 200
+    return catalogue_response(service.get_catalogue('grammar_errors'))
 
 
 @mentor_content_bp.route('/grammar/analyze', methods=['POST'])
@@ -157,8 +157,7 @@ def get_learner_grammar_errors(learner_id):
 })
 def get_common_pronunciation_errors():
     """Get list of common pronunciation errors"""
-    errors = service.get_common_pronunciation_errors()
-    return jsonify(errors), 200
+    return catalogue_response(service.get_catalogue('pronunciation_errors'))
 
 
 @mentor_content_bp.route('/pronunciation/ipa-guide', methods=['GET'])
@@ -169,8 +168,7 @@ def get_common_pronunciation_errors():
 })
 def get_ipa_guide():
     """Get IPA pronunciation guide"""
-    guide = service.get_ipa_guide()
-    return jsonify(guide), 200
+    return catalogue_response(service.get_catalogue('ipa_guide'))
 
 
 # ==================== VOCABULARY / WORD USAGE ====================
@@ -184,8 +182,7 @@ def get_ipa_guide():
 def get_collocations():
     """Get list of common collocations"""
     category = request.args.get('category', 'all')
-    collocations = service.get_collocations(category)
-    return jsonify(collocations), 200
+    return catalogue_response(service.get_catalogue('collocations', category))
 
 
 @mentor_content_bp.route('/vocabulary/idioms', methods=['GET'])
@@ -197,8 +194,7 @@ def get_collocations():
 def get_idioms():
     """Get list of idioms"""
     level = request.args.get('level', 'all')
-    idioms = service.get_idioms(level)
-    return jsonify(idioms), 200
+    return catalogue_response(service.get_catalogue('idioms', level))
 
 
 @mentor_content_bp.route('/vocabulary/common-mistakes', methods=['GET'])
@@ -209,8 +205,7 @@ def get_idioms():
 })
 def get_word_usage_mistakes():
     """Get common word usage mistakes"""
-    mistakes = service.get_common_word_mistakes()
-    return jsonify(mistakes), 200
+    return catalogue_response(service.get_catalogue('word_mistakes'))
 
 
 # ==================== CONVERSATION TOPICS ====================
@@ -279,3 +274,24 @@ def get_situation_scripts(situation_id):
     """Get practice scripts for a situation"""
     scripts = service.get_situation_scripts(situation_id)
     return jsonify(scripts), 200
+
+
+# ==================== CACHE ====================
+
+@mentor_content_bp.route('/cache/invalidate', methods=['POST'])
+@swag_from({
+    'tags': ['Mentor Content'],
+    'summary': 'Invalidate cached content catalogues',
+    'description': 'Catalogues are refreshed automatically on ORM writes; use this after editing the tables directly',
+    'parameters': [{
+        'name': 'body', 'in': 'body', 'required': False,
+        'schema': {'type': 'object', 'properties': {'catalogues': {'type': 'array', 'items': {'type': 'string'}}}}
+    }],
+    'responses': {'200': {'description': 'Catalogues invalidated'}}
+})
+def invalidate_content_cache():
+    """Bump catalogue versions so the next read reloads them"""
+    data = request.get_json(silent=True) or {}
+    catalogues = data.get('catalogues') or []
+    service.invalidate_catalogues(*catalogues)
+    return jsonify({'message': 'Cache invalidated', 'catalogues': catalogues or 'all'}), 200
@@ -119,7 +119,11 @@ def create_notification():
         action_url=data.get('action_url')
     )
     
-    return jsonify(notification.to_dict()), 201
+    return jsonify({
+        **notification,
+        'type': notification['notification_type'],
+        'created_at': notification['created_at'].isoformat()
+    }), 201
 
 
 @notification_bp.route('/bulk', methods=['POST'])
@@ -168,6 +172,129 @@ def send_bulk_notification():
     }), 201
 
 
+@notification_bp.route('/broadcast', methods=['POST'])
+def send_broadcast():
+    """
+    Broadcast an announcement to all users of a role (Admin only)
+    ---
+    tags:
+      - Notifications
+    parameters:
+      - in: body
+        name: body
+        schema:
+          type: object
+          required:
+            - title
+          properties:
+            admin_id:
+              type: integer
+            target_role:
+              type: string
+              enum: [all, learner, mentor]
+            title:
+              type: string
+            message:
+              type: string
+    responses:
+      202:
+        description: Broadcast queued, poll its status for progress
+    """
+    data = request.get_json()
+    
+    if not data.get('title'):
+        return jsonify({'error': 'title is required'}), 400
+    
+    target_role = data.get('target_role', 'all')
+    if target_role not in ('all', 'learner', 'mentor'):
+        return jsonify({'error': 'target_role must be all, learner or mentor'}), 400
+    
+    broadcast = NotificationService.send_broadcast(
+        admin_id=data.get('admin_id'),
+        target_role=target_role,
+        title=data['title'],
+        message=data.get('message')
+    )
+    
+    return jsonify(broadcast), 202
+
+
+@notification_bp.route('/broadcast', methods=['GET'])
+def get_broadcasts():
+    """
+    List recent broadcasts with their progress
+    ---
+    tags:
+      - Notifications
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        default: 20
+    responses:
+      200:
+        description: List of broadcasts
+    """
+    limit = request.args.get('limit', 20, type=int)
+    broadcasts = NotificationService.get_broadcasts(limit)
+    return jsonify({'broadcasts': broadcasts, 'count': len(broadcasts)}), 200
+
+
+@notification_bp.route('/broadcast/<int:broadcast_id>', methods=['GET'])
+def get_broadcast(broadcast_id: int):
+    """
+    Get broadcast status and progress
+    ---
+    tags:
+      - Notifications
+    parameters:
+      - in: path
+        name: broadcast_id
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Broadcast status
+      404:
+        description: Broadcast not found
+    """
+    broadcast = NotificationService.get_broadcast(broadcast_id)
+    
+    if not broadcast:
+        return jsonify({'error': 'Broadcast not found'}), 404
+    
+    return jsonify(broadcast), 200
+
+
+@notification_bp.route('/broadcast/<int:broadcast_id>/resume', methods=['POST'])
+def resume_broadcast(broadcast_id: int):
+    """
+    Resume a failed or stalled broadcast from where it stopped
+    ---
+    tags:
+      - Notifications
+    parameters:
+      - in: path
+        name: broadcast_id
+        type: integer
+        required: true
+    responses:
+      202:
+        description: Broadcast resumed
+      404:
+        description: Broadcast not found
+    """
+    broadcast = NotificationService.get_broadcast(broadcast_id)
+    
+    if not broadcast:
+        return jsonify({'error': 'Broadcast not found'}), 404
+    
+    if not NotificationService.resume_broadcast(broadcast_id):
+        return jsonify({'error': f"Broadcast is {broadcast['status']}"}), 400
+    
+    return jsonify(NotificationService.get_broadcast(broadcast_id)), 202
+
+
 @notification_bp.route('/<int:notification_id>/read', methods=['PUT'])
 def mark_as_read(notification_id: int):
     """
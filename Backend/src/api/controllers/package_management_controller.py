@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
 from services.package_service import PackageService
+from services.response_cache import cached_response
 
 bp = Blueprint('package_management', __name__, url_prefix='/api/admin/packages')
 package_service = PackageService()
 
 @bp.route('/', methods=['GET'])
+@cached_response('packages')
 def list_packages():
     """
     Get all packages
@@ -28,6 +30,7 @@ def list_packages():
     return jsonify(packages), 200
 
 @bp.route('/<int:package_id>', methods=['GET'])
+@cached_response('packages')
 def get_package(package_id):
     """Get package by ID"""
     package = package_service.get_package(package_id)
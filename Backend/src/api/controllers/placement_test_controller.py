@@ -7,12 +7,12 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 from infrastructure.databases.mssql import get_db_session
 from infrastructure.models.placement_test_model import (
-    PlacementQuestionModel, 
     PlacementTestResultModel,
-    PLACEMENT_QUESTIONS,
     calculate_level
 )
-import random
+from services.question_bank import question_bank, adaptive_engine
+from services.adaptive_placement import ConcurrentAnswer, estimate_ability, level_for_ability
+import json
 
 placement_test_bp = Blueprint('placement_test', __name__, url_prefix='/api/placement-test')
 
@@ -25,52 +25,19 @@ def get_test_questions():
         
         with get_db_session() as session:
             # Check if user already completed the test
-            existing_result = session.query(PlacementTestResultModel).filter_by(
-                user_id=user_id
-            ).order_by(PlacementTestResultModel.completed_at.desc()).first()
-            
-            if existing_result:
-                # Check if can retake
-                if existing_result.can_retake_after and datetime.now() < existing_result.can_retake_after:
-                    return jsonify({
-                        'can_take_test': False,
-                        'message': 'You have already completed the placement test',
-                        'existing_result': existing_result.to_dict(),
-                        'can_retake_after': existing_result.can_retake_after.isoformat()
-                    }), 200
+            blocked = _retake_blocked(session, user_id)
+            if blocked:
+                return jsonify(blocked), 200
             
-            # Get questions from database or use seed data
-            questions = session.query(PlacementQuestionModel).filter_by(
-                is_active=True
-            ).all()
-            
-            if questions:
-                question_list = [q.to_dict(include_answer=False) for q in questions]
-            else:
-                # Use seed data if no questions in database
-                question_list = [{
-                    'id': idx + 1,
-                    'question_text': q['question_text'],
-                    'question_type': 'multiple_choice',
-                    'category': q['category'],
-                    'difficulty_level': q['difficulty_level'],
-                    'points': q['points'],
-                    'options': {
-                        'a': q['option_a'],
-                        'b': q['option_b'],
-                        'c': q['option_c'],
-                        'd': q['option_d']
-                    }
-                } for idx, q in enumerate(PLACEMENT_QUESTIONS)]
-            
-            # Shuffle and limit questions
-            random.shuffle(question_list)
+            # Stratified by category and level from the in-memory bank
+            # (database questions, or seed data when there are none)
+            question_list = question_bank.sample(15)  # Max 15 questions
             
             return jsonify({
                 'can_take_test': True,
-                'questions': question_list[:15],  # Max 15 questions
+                'questions': question_list,
                 'time_limit_minutes': 20,
-                'total_questions': len(question_list[:15])
+                'total_questions': len(question_list)
             }), 200
             
     except Exception as e:
@@ -89,28 +56,16 @@ def submit_test():
         if not user_id or not answers:
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Calculate scores
-        scores = {
-            'grammar': 0,
-            'vocabulary': 0,
-            'reading': 0,
-            'listening': 0
-        }
-        total_score = 0
-        max_score = 0
-        
-        # Use seed data for answer checking
-        for q in PLACEMENT_QUESTIONS:
-            q_id = str(PLACEMENT_QUESTIONS.index(q) + 1)
-            if q_id in answers:
-                max_score += q['points']
-                if answers[q_id].lower() == q['correct_answer'].lower():
-                    total_score += q['points']
-                    scores[q['category']] = scores.get(q['category'], 0) + q['points']
+        # Calculate scores against the same bank the questions came from
+        graded = question_bank.score(answers)
+        scores = graded['scores']
+        total_score = graded['total_score']
+        max_score = graded['max_score']
         
         # Calculate percentage and level
         percentage = int((total_score / max_score * 100)) if max_score > 0 else 0
         assigned_level = calculate_level(percentage)
+        ability, ability_se = estimate_ability((q.irt, ok) for q, ok in graded['graded'])
         
         with get_db_session() as session:
             # Save result
@@ -124,6 +79,9 @@ def submit_test():
                 max_score=max_score,
                 percentage=percentage,
                 assigned_level=assigned_level,
+                ability=ability,
+                ability_se=ability_se,
+                responses=json.dumps(graded['outcomes']),
                 questions_answered=len(answers),
                 time_taken_seconds=time_taken,
                 can_retake_after=datetime.now() + timedelta(days=30)  # Can retake after 30 days
@@ -196,6 +154,195 @@ def check_test_status(user_id):
         return jsonify({'error': str(e)}), 500
 
 
+# ==================== ADAPTIVE TEST ====================
+
+def _retake_blocked(session, user_id):
+    """Response body if the user's last result does not allow a retake yet, else None"""
+    existing_result = session.query(PlacementTestResultModel).filter_by(
+        user_id=user_id
+    ).order_by(PlacementTestResultModel.completed_at.desc()).first()
+    
+    if existing_result and existing_result.can_retake_after and datetime.now() < existing_result.can_retake_after:
+        return {
+            'can_take_test': False,
+            'message': 'You have already completed the placement test',
+            'existing_result': existing_result.to_dict(),
+            'can_retake_after': existing_result.can_retake_after.isoformat()
+        }
+    return None
+
+
+def _adaptive_progress(test):
+    return {
+        'answered': len(test.responses),
+        'max_questions': test.max_items,
+        'ability': round(test.theta, 3),
+        'standard_error': round(test.se, 3),
+        'estimated_level': level_for_ability(test.theta)
+    }
+
+
+@placement_test_bp.route('/adaptive/start', methods=['POST'])
+def start_adaptive_test():
+    """
+    Start an adaptive placement test
+    ---
+    tags:
+      - Placement Test
+    parameters:
+      - in: body
+        name: body
+        schema:
+          type: object
+          required:
+            - user_id
+          properties:
+            user_id:
+              type: integer
+    responses:
+      200:
+        description: Test id and the first question
+    """
+    try:
+        data = request.get_json() or {}
+        user_id = data.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'Missing required fields'}), 400
+        
+        with get_db_session() as session:
+            blocked = _retake_blocked(session, user_id)
+            if blocked:
+                return jsonify(blocked), 200
+        
+        test, question = adaptive_engine.start(user_id)
+        if question is None:
+            adaptive_engine.finish(test)
+            return jsonify({'error': 'No placement questions available'}), 503
+        
+        return jsonify({
+            'can_take_test': True,
+            'test_id': test.id,
+            'question': question.public,
+            'progress': _adaptive_progress(test),
+            'time_limit_minutes': 20
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@placement_test_bp.route('/adaptive/answer', methods=['POST'])
+def answer_adaptive_test():
+    """
+    Answer the current adaptive test question
+    ---
+    tags:
+      - Placement Test
+    parameters:
+      - in: body
+        name: body
+        schema:
+          type: object
+          required:
+            - test_id
+            - question_id
+            - answer
+          properties:
+            test_id:
+              type: string
+            question_id:
+              type: integer
+            answer:
+              type: string
+            time_taken_seconds:
+              type: integer
+    responses:
+      200:
+        description: Next question, or the final result once the estimate is precise enough
+    """
+    try:
+        data = request.get_json() or {}
+        test = adaptive_engine.get(data.get('test_id') or '')
+        if not test:
+            return jsonify({'error': 'Test not found or expired'}), 404
+        
+        question = test.pending
+        if question is None or str(data.get('question_id')) != str(question.id):
+            return jsonify({'error': 'Question is not the current question of this test'}), 400
+        
+        correct = question_bank.is_correct(question, data.get('answer'))
+        try:
+            next_question = adaptive_engine.answer(test, question, data.get('answer'), correct)
+        except ConcurrentAnswer as e:
+            return jsonify({'error': str(e)}), 409
+        
+        if next_question is not None:
+            return jsonify({
+                'finished': False,
+                'question': next_question.public,
+                'progress': _adaptive_progress(test)
+            }), 200
+        
+        adaptive_engine.finish(test)
+        return jsonify({
+            'finished': True,
+            'progress': _adaptive_progress(test),
+            'result': _save_adaptive_result(test, data.get('time_taken_seconds'))
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def _save_adaptive_result(test, time_taken=None):
+    """Persist a finished adaptive test; the level comes from the ability estimate"""
+    scores = {'grammar': 0, 'vocabulary': 0, 'reading': 0, 'listening': 0}
+    total_score = max_score = 0
+    outcomes = {}
+    for question, _, correct in test.responses:
+        max_score += question.points
+        outcomes[question.key] = 1 if correct else 0
+        if correct:
+            total_score += question.points
+            scores[question.category] = scores.get(question.category, 0) + question.points
+    
+    percentage = int((total_score / max_score * 100)) if max_score > 0 else 0
+    assigned_level = level_for_ability(test.theta)
+    time_taken = time_taken or int(datetime.now().timestamp() - test.started_at)
+    
+    with get_db_session() as session:
+        session.add(PlacementTestResultModel(
+            user_id=test.user_id,
+            grammar_score=scores['grammar'],
+            vocabulary_score=scores['vocabulary'],
+            reading_score=scores['reading'],
+            listening_score=scores['listening'],
+            total_score=total_score,
+            max_score=max_score,
+            percentage=percentage,
+            assigned_level=assigned_level,
+            ability=test.theta,
+            ability_se=test.se,
+            responses=json.dumps(outcomes),
+            questions_answered=len(test.responses),
+            time_taken_seconds=time_taken,
+            can_retake_after=datetime.now() + timedelta(days=30)
+        ))
+    
+    return {
+        'total_score': total_score,
+        'max_score': max_score,
+        'percentage': percentage,
+        'assigned_level': assigned_level,
+        'ability': round(test.theta, 3),
+        'standard_error': round(test.se, 3),
+        'scores': scores,
+        'questions_answered': len(test.responses),
+        'time_taken_seconds': time_taken,
+        'level_description': get_level_description(assigned_level)
+    }
+
+
 def get_level_description(level):
     """Get CEFR level description"""
     descriptions = {
@@ -236,7 +383,6 @@ def get_level_description(level):
 # ============= SPEAKING ASSESSMENT ENDPOINTS =============
 
 from infrastructure.models.placement_test_model import SPEAKING_PROMPTS, AI_SPEAKING_GRADING_PROMPT
-import json
 
 
 @placement_test_bp.route('/speaking/prompts', methods=['GET'])
@@ -352,8 +498,7 @@ def evaluate_with_ai(transcription: str, prompt: dict) -> dict:
     Evaluates transcription based on 5 criteria
     """
     from services.ai_service import AIService
-    import json
-    import re
+    from services.structured_output import SPEAKING_EVALUATION
     
     # If transcription is too short or empty, return low scores
     word_count = len(transcription.split())
@@ -380,74 +525,20 @@ You are an expert English speaking examiner. Evaluate the following speaking res
 **Question asked:** {prompt['prompt']}
 **Student's response (transcription):** {transcription}
 
-Evaluate the response based on these 5 criteria (score 0-100 for each):
-
-1. **Pronunciation**: Clarity of speech, word stress, intonation
-2. **Vocabulary**: Range and accuracy of vocabulary used
-3. **Grammar**: Grammatical accuracy and complexity
-4. **Fluency**: Smoothness, pace, natural flow
-5. **Coherence**: Logical organization, relevance to question
-
-Consider:
-- Word count: {word_count} words
-- Topic relevance to the question
-
-Return ONLY a valid JSON object with this exact structure (no markdown, no explanation):
-{{
-    "pronunciation_score": <int 0-100>,
-    "vocabulary_score": <int 0-100>,
-    "grammar_score": <int 0-100>,
-    "fluency_score": <int 0-100>,
-    "coherence_score": <int 0-100>,
-    "overall_score": <int 0-100>,
-    "estimated_level": "<A1|A2|B1|B2|C1|C2>",
-    "feedback": "<feedback in Vietnamese, 1-2 sentences>",
-    "strengths": ["<strength 1 in Vietnamese>", "<strength 2 in Vietnamese>"],
-    "improvements": ["<improvement 1 in Vietnamese>", "<improvement 2 in Vietnamese>"]
-}}
+Score each criterion 0-100: pronunciation, vocabulary, grammar, fluency and coherence
+(logical organisation, relevance to the question), plus an overall score and the CEFR level.
+Consider the word count ({word_count} words) and topic relevance.
+Write feedback, strengths and improvements in Vietnamese.
 '''
         
-        response = ai_service._safe_generate(grading_prompt)
+        # Schema-validated: all scores are 0-100 ints and the level is a CEFR code
+        result = ai_service.generate_structured(SPEAKING_EVALUATION, grading_prompt)
         
-        if response and response.text:
-            # Extract JSON from response
-            text = response.text.strip()
-            # Remove markdown code blocks if present
-            if '```json' in text:
-                text = text.split('```json')[1].split('```')[0]
-            elif '```' in text:
-                text = text.split('```')[1].split('```')[0]
-            
-            # Parse JSON
-            result = json.loads(text.strip())
-            
-            # Validate and ensure all fields exist
-            required_fields = ['pronunciation_score', 'vocabulary_score', 'grammar_score', 
-                             'fluency_score', 'coherence_score', 'overall_score']
-            for field in required_fields:
-                if field not in result:
-                    result[field] = 50
-                result[field] = max(0, min(100, int(result[field])))
-            
-            if 'estimated_level' not in result:
-                overall = result.get('overall_score', 50)
-                if overall >= 85: result['estimated_level'] = 'C1'
-                elif overall >= 70: result['estimated_level'] = 'B2'
-                elif overall >= 55: result['estimated_level'] = 'B1'
-                elif overall >= 40: result['estimated_level'] = 'A2'
-                else: result['estimated_level'] = 'A1'
-            
-            if 'feedback' not in result:
-                result['feedback'] = 'Bạn đã hoàn thành câu trả lời.'
-            if 'strengths' not in result:
-                result['strengths'] = []
-            if 'improvements' not in result:
-                result['improvements'] = []
-                
+        if result:
+            result.setdefault('strengths', [])
+            result.setdefault('improvements', [])
             return result
             
-    except json.JSONDecodeError as e:
-        print(f"JSON parse error: {e}")
     except Exception as e:
         print(f"AI evaluation error: {e}")
     
@@ -7,11 +7,13 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 
 from services.policy_service import PolicyService
+from services.response_cache import cached_response
 
 policy_bp = Blueprint('policies', __name__, url_prefix='/api/policies')
 
 
 @policy_bp.route('/', methods=['GET'])
+@cached_response('policies')
 def get_policies():
     """
     Get all policies with optional filters
@@ -46,6 +48,7 @@ def get_policies():
 
 
 @policy_bp.route('/types', methods=['GET'])
+@cached_response('policies')
 def get_policy_types():
     """Get all policy types"""
     types = PolicyService.get_policy_types()
@@ -53,6 +56,7 @@ def get_policy_types():
 
 
 @policy_bp.route('/<int:policy_id>', methods=['GET'])
+@cached_response('policies')
 def get_policy(policy_id: int):
     """Get a single policy by ID"""
     policy = PolicyService.get_policy_by_id(policy_id)
@@ -64,6 +68,7 @@ def get_policy(policy_id: int):
 
 
 @policy_bp.route('/type/<policy_type>', methods=['GET'])
+@cached_response('policies')
 def get_policy_by_type(policy_type: str):
     """
     Get active policy by type
@@ -6,6 +6,7 @@ Includes session management, chat, and pronunciation analysis
 from flask import Blueprint, request, jsonify
 from services.practice_session_service import PracticeSessionService
 from services.ai_service import AIService
+from services.audio_store import audio_store, mime_for, AudioTooLarge, UploadOffsetMismatch, EXTENSIONS
 
 practice_bp = Blueprint('practice', __name__, url_prefix='/api/practice')
 practice_service = PracticeSessionService()
@@ -30,7 +31,7 @@ def get_vocabulary(topic):
   "collocations": [2 collocations with phrase, vietnamese, example]
 }}"""
                 try:
-                    response = ai_service.model.generate_content(prompt)
+                    response = ai_service._safe_generate(prompt, task='vocabulary')
                     import json
                     import re
                     json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
@@ -48,6 +49,49 @@ def get_vocabulary(topic):
         return jsonify({"error": str(e), "vocabulary": {}}), 500
 
 
+@practice_bp.route('/vocabulary/search', methods=['GET'])
+def search_vocabulary():
+    """
+    Search vocabulary by English headword, Vietnamese translation or meaning
+    Query params: q, topic, level (CEFR), limit
+    """
+    from services.vocabulary_store import vocabulary_store
+    
+    query = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    results = vocabulary_store.search(
+        query, limit=limit,
+        topic=request.args.get('topic'),
+        level=request.args.get('level')
+    )
+    return jsonify({"query": query, "results": results, "total": len(results)})
+
+
+@practice_bp.route('/vocabulary/autocomplete', methods=['GET'])
+def autocomplete_vocabulary():
+    """
+    Headwords starting with a prefix
+    Query params: prefix, limit
+    """
+    from services.vocabulary_store import vocabulary_store
+    
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    return jsonify({"suggestions": vocabulary_store.autocomplete(request.args.get('prefix', ''), limit)})
+
+
+@practice_bp.route('/vocabulary/random', methods=['GET'])
+def random_vocabulary():
+    """
+    Random vocabulary sample, e.g. for warm-up cards
+    Query params: topic, level (CEFR), n
+    """
+    from services.vocabulary_store import vocabulary_store
+    
+    n = max(1, min(request.args.get('n', 5, type=int), 50))
+    words = vocabulary_store.random_sample(n, topic=request.args.get('topic'), level=request.args.get('level'))
+    return jsonify({"words": words})
+
+
 @practice_bp.route('/start', methods=['POST'])
 def start_session():
     """Start a new AI practice session"""
@@ -97,18 +141,22 @@ def complete():
 def analyze_pronunciation():
     """
     Analyze pronunciation of a transcript
-    Provides detailed feedback on pronunciation issues and tips
+    Provides detailed feedback on pronunciation issues and tips; with a
+    session_id the acoustic fluency measures of its recording are included
     """
     data = request.json
     transcript = data.get('transcript')
     expected_text = data.get('expected_text')
+    session_id = data.get('session_id')
     
     if not transcript:
         return jsonify({"error": "transcript is required"}), 400
     
     try:
         ai_service = AIService()
-        result = ai_service.analyze_pronunciation(transcript, expected_text)
+        # Measured speech rate / pauses of the session's recording, when there is one
+        metrics = practice_service.get_fluency_metrics(int(session_id)) if session_id else None
+        result = ai_service.analyze_pronunciation(transcript, expected_text, metrics)
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e), "pronunciation_score": 0}), 500
@@ -160,55 +208,179 @@ def quick_feedback():
         return jsonify({"error": str(e), "score": 0}), 500
 
 
+def _audio_too_large():
+    return request.content_length is not None and request.content_length > audio_store.max_bytes
+
+
 @practice_bp.route('/upload-audio', methods=['POST'])
 def upload_audio():
     """
     Upload audio recording for a practice session
     This allows mentors to later listen to the learner's recordings
+
+    Accepts multipart form data (session_id + audio file) or a raw audio
+    body with ?session_id=. The recording is streamed to disk in chunks
+    and rejected with 413 as soon as it passes AUDIO_MAX_UPLOAD_MB.
     """
     try:
-        session_id = request.form.get('session_id')
-        audio_file = request.files.get('audio')
+        if _audio_too_large():
+            return jsonify({"error": "Audio file is too large", "max_bytes": audio_store.max_bytes}), 413
         
-        if not session_id or not audio_file:
-            return jsonify({"error": "session_id and audio file are required"}), 400
+        if request.mimetype.startswith('audio/') or request.mimetype == 'application/octet-stream':
+            session_id = request.args.get('session_id', type=int)
+            filename = request.args.get('filename') or 'recording.webm'
+            stream, mime = request.stream, mime_for(filename, request.mimetype)
+        else:
+            session_id = request.form.get('session_id', type=int)
+            audio_file = request.files.get('audio')
+            if not audio_file:
+                return jsonify({"error": "session_id and audio file are required"}), 400
+            filename = audio_file.filename or 'recording.webm'
+            stream, mime = audio_file.stream, mime_for(filename, audio_file.mimetype)
         
-        # Read audio data
-        audio_data = audio_file.read()
+        if not session_id:
+            return jsonify({"error": "session_id and audio file are required"}), 400
         
-        # Save to database
-        result = practice_service.save_audio_recording(
-            int(session_id), 
-            audio_data, 
-            audio_file.filename or 'recording.webm'
-        )
+        result = practice_service.save_audio_recording(session_id, stream, filename, mime)
+        if "error" in result:
+            return jsonify(result), 404
         
         return jsonify({
             "success": True,
             "message": "Audio uploaded successfully",
-            "session_id": session_id
+            "session_id": session_id,
+            "size": result["size"],
+            "sha256": result["sha256"]
         })
+    except AudioTooLarge as e:
+        return jsonify({"error": str(e), "max_bytes": audio_store.max_bytes}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@practice_bp.route('/sessions/<int:session_id>/audio/uploads', methods=['POST'])
+def create_audio_upload(session_id):
+    """
+    Start a resumable audio upload for a long session
+
+    Body (optional JSON): filename, mime, total_size. Send the bytes with
+    PATCH /audio/uploads/<upload_id> and an Upload-Offset header, check
+    progress with GET, then POST .../complete.
+    """
+    data = request.get_json(silent=True) or {}
+    if not practice_service.session_exists(session_id):
+        return jsonify({"error": "Session not found"}), 404
+    try:
+        filename = data.get('filename') or 'recording.webm'
+        status = audio_store.create_upload(
+            session_id,
+            filename=filename,
+            mime=mime_for(filename, data.get('mime')),
+            total_size=data.get('total_size')
+        )
+    except AudioTooLarge as e:
+        return jsonify({"error": str(e), "max_bytes": audio_store.max_bytes}), 413
+    return jsonify(status), 201, {'Upload-Offset': str(status['offset'])}
+
+
+@practice_bp.route('/audio/uploads/<upload_id>', methods=['GET'])
+def get_audio_upload(upload_id):
+    """Status (bytes received so far) of a resumable audio upload"""
+    status = audio_store.upload_status(upload_id)
+    if not status:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(status), 200, {'Upload-Offset': str(status['offset']), 'Cache-Control': 'no-store'}
+
+
+@practice_bp.route('/audio/uploads/<upload_id>', methods=['PATCH'])
+def append_audio_upload(upload_id):
+    """
+    Append one chunk (raw request body) to a resumable audio upload
+    The Upload-Offset header must equal the bytes already received (409 otherwise)
+    """
+    offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({"error": "Upload-Offset header is required"}), 400
+    if request.content_length is not None and offset + request.content_length > audio_store.max_bytes:
+        return jsonify({"error": "Audio file is too large", "max_bytes": audio_store.max_bytes}), 413
+    try:
+        status = audio_store.append_chunk(upload_id, offset, request.stream)
+    except UploadOffsetMismatch as e:
+        return jsonify({"error": str(e), "offset": e.expected}), 409, {'Upload-Offset': str(e.expected)}
+    except AudioTooLarge as e:
+        return jsonify({"error": str(e), "max_bytes": audio_store.max_bytes}), 413
+    if not status:
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify(status), 200, {'Upload-Offset': str(status['offset'])}
+
+
+@practice_bp.route('/audio/uploads/<upload_id>/complete', methods=['POST'])
+def complete_audio_upload(upload_id):
+    """Finish a resumable audio upload and attach it to its session"""
+    try:
+        completed = audio_store.complete_upload(upload_id)
+    except UploadOffsetMismatch as e:
+        return jsonify({"error": "Upload is incomplete", "offset": e.expected}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not completed:
+        return jsonify({"error": "Upload not found"}), 404
+    
+    status, stored = completed
+    try:
+        result = practice_service.attach_audio(status['session_id'], stored, status['filename'])
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    if "error" in result:
+        return jsonify(result), 404
+    return jsonify({
+        "success": True,
+        "message": "Audio uploaded successfully",
+        "session_id": status['session_id'],
+        "size": result["size"],
+        "sha256": result["sha256"]
+    })
+
+
+@practice_bp.route('/audio/uploads/<upload_id>', methods=['DELETE'])
+def discard_audio_upload(upload_id):
+    """Abandon a resumable audio upload"""
+    if not audio_store.discard_upload(upload_id):
+        return jsonify({"error": "Upload not found"}), 404
+    return jsonify({"success": True})
 
 
 @practice_bp.route('/sessions/<int:session_id>/audio', methods=['GET'])
 def get_session_audio(session_id):
     """
     Get audio recording for a session (for mentor review)
+    Served from disk with Range and conditional (ETag) request support
     """
-    from flask import Response
+    from flask import send_file
+    from io import BytesIO
     
     try:
-        audio_data = practice_service.get_audio_recording(session_id)
+        audio = practice_service.get_audio_recording(session_id)
         
-        if not audio_data:
+        if not audio:
             return jsonify({"error": "No audio recording found"}), 404
         
-        return Response(
-            audio_data,
-            mimetype='audio/webm',
-            headers={'Content-Disposition': f'inline; filename=session_{session_id}.webm'}
+        extension = EXTENSIONS.get(audio['mime'], 'webm')
+        if 'path' in audio:
+            source, etag = audio['path'], audio['sha256'] or True
+        else:
+            source, etag = BytesIO(audio['data']), False
+        
+        # send_file answers Range / If-None-Match itself (206 / 304)
+        return send_file(
+            source,
+            mimetype=audio['mime'],
+            download_name=f'session_{session_id}.{extension}',
+            conditional=True,
+            etag=etag,
+            max_age=3600
         )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -230,3 +402,33 @@ def get_mentor_sessions(mentor_id):
     except Exception as e:
         return jsonify({"error": str(e), "sessions": []}), 500
 
+
+
+@practice_bp.route('/sessions/<int:session_id>/usage', methods=['GET'])
+def get_session_usage(session_id):
+    """
+    Get token usage of a live practice conversation (per-turn and totals)
+    """
+    from services.conversation_manager import conversation_manager
+    
+    state = conversation_manager.get(session_id)
+    if not state:
+        return jsonify({"error": "No active conversation for this session"}), 404
+    
+    return jsonify(state.to_stats())
+
+
+@practice_bp.route('/ai/structured-stats', methods=['GET'])
+def get_structured_stats():
+    """
+    Get structured-output counters per AI task (calls, parse failures, repairs, tokens)
+    """
+    return jsonify(AIService.get_structured_stats())
+
+
+@practice_bp.route('/ai/scheduler-stats', methods=['GET'])
+def get_scheduler_stats():
+    """
+    Get Gemini key scheduler state (per-key usage, throttling, remaining budget)
+    """
+    return jsonify(AIService.get_scheduler_stats())
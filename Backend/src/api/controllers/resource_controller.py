@@ -231,26 +231,44 @@ def search_resources():
       - in: query
         name: category
         type: string
+      - in: query
+        name: difficulty_level
+        type: string
+      - in: query
+        name: limit
+        type: integer
+        default: 20
+      - in: query
+        name: cursor
+        type: string
+        description: next_cursor from the previous page
     responses:
       200:
-        description: Search results
+        description: Ranked search results with facet counts
     """
     query = request.args.get('q', '')
     category = request.args.get('category')
-    limit = request.args.get('limit', 20, type=int)
+    difficulty = request.args.get('difficulty_level')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    cursor = request.args.get('cursor')
     
     if not query:
         return jsonify({'error': 'Query parameter q is required'}), 400
     
-    resources = ResourceService.search_resources(
+    result = ResourceService.search_resources(
         query=query,
         category=category,
-        limit=limit
+        limit=limit,
+        difficulty_level=difficulty,
+        cursor=cursor
     )
     
     return jsonify({
-        'resources': resources,
-        'count': len(resources),
+        'resources': result['resources'],
+        'count': len(result['resources']),
+        'total': result['total'],
+        'facets': result['facets'],
+        'next_cursor': result['next_cursor'],
         'query': query
     }), 200
 
@@ -4,11 +4,17 @@ AI-powered speaking practice with sentence repetition and conversation modes
 """
 
 from flask import Blueprint, request, jsonify
-import json
 import re
 
+from services.history_compactor import HistoryCompactor
+from services.structured_output import CONVERSATION_REPLY
+
 speaking_drills_bp = Blueprint('speaking_drills', __name__)
 
+# Drill conversations are short-form, so the history budget is smaller than
+# the practice tutor's; AI turns use the 'ai' role here
+_history_compactor = HistoryCompactor(budget_tokens=600, summary_budget_tokens=200, user_roles=('user',))
+
 # Mock drill sentences (in production, these would be in database)
 DRILL_SENTENCES = [
     {"id": 1, "text": "Hello, my name is John.", "level": "A1", "category": "daily"},
@@ -66,6 +72,7 @@ def conversation_respond():
     user_id = data.get('user_id')
     user_text = data.get('user_text', '')
     conversation_history = data.get('conversation_history', [])
+    history_summary = data.get('history_summary') or {}
     topic = data.get('topic', 'General')
     
     if not user_text:
@@ -79,9 +86,19 @@ def conversation_respond():
         from services.ai_service import AIService
         ai_service = AIService()
         
-        # Build conversation context
+        # Build conversation context: rolling summary + token-budgeted tail.
+        # The client echoes back the history_summary from the previous turn,
+        # so only messages after `covered` are new to the compactor.
+        covered = min(int(history_summary.get('covered') or 0), len(conversation_history))
+        compacted = _history_compactor.compact(
+            conversation_history[covered:], history_summary.get('text') or ''
+        )
+        history_summary = {'text': compacted.summary, 'covered': covered + compacted.folded}
+
         conv_text = ""
-        for msg in conversation_history[-5:]:  # Last 5 messages for context
+        if compacted.summary:
+            conv_text += f"(Earlier in this conversation)\n{compacted.summary}\n\n"
+        for msg in compacted.tail:
             role = "AI" if msg.get('role') == 'ai' else "User"
             conv_text += f"{role}: {msg.get('text', '')}\n"
         
@@ -93,60 +110,26 @@ Previous conversation:
 
 User just said: "{user_text}"
 
-CRITICAL INSTRUCTIONS - You MUST follow these rules:
-1. **DIRECTLY REFERENCE what the user just said** - Start your response by acknowledging or commenting on their specific answer
-2. **Build on their answer** - If they mentioned a place, ask about that place. If they mentioned a hobby, ask more about it
-3. **Keep the conversation natural** - Your question should flow naturally from what they said
-4. **DO NOT ask unrelated questions** - Your follow-up MUST connect to their answer
-
-EXAMPLE of good response:
-- User says: "I work as a software developer in Hanoi"
-- Good response: "Oh, a software developer! That sounds interesting. What kind of software do you develop?"
-- Bad response: "Nice! How old are you?" (unrelated)
-
-EXAMPLE 2:
-- User says: "I like playing football on weekends"
-- Good response: "Football is a great sport! Do you play with friends or in a team?"
-- Bad response: "What do you do for work?" (ignores their answer)
-
-Now create your response following these rules. Keep it simple (A2-B1 level), be encouraging.
-
-Return ONLY a valid JSON object:
-{{
-    "response": "Your contextual response that DIRECTLY connects to what user said + follow-up question",
-    "score": <0-100 based on grammar and relevance>,
-    "feedback": "Brief feedback in Vietnamese (1 sentence)",
-    "vocabulary_hints": [
-        {{"word": "relevant_word", "meaning": "nghĩa tiếng Việt", "pronunciation": "/pronunciation/"}}
-    ],
-    "sentence_templates": [
-        "Template 1 to help user respond...",
-        "Template 2 to help user respond..."
-    ]
-}}
-
-The vocabulary and templates should help the user answer YOUR follow-up question.
+Rules:
+1. Start by directly acknowledging what the user just said.
+2. Build on their answer: if they mention a place or hobby, ask about it.
+3. Your follow-up question must connect to their answer, never change the subject.
+4. Keep it simple (A2-B1 level) and encouraging.
+
+Score grammar and relevance. The vocabulary hints and sentence templates should help the user answer YOUR follow-up question.
 '''
         
-        response = ai_service._safe_generate(prompt)
+        result = ai_service.generate_structured(CONVERSATION_REPLY, prompt)
         
-        if response and response.text:
-            text = response.text.strip()
-            # Extract JSON
-            if '```json' in text:
-                text = text.split('```json')[1].split('```')[0]
-            elif '```' in text:
-                text = text.split('```')[1].split('```')[0]
-            
-            result = json.loads(text.strip())
-            
+        if result:
             return jsonify({
                 'success': True,
-                'ai_response': result.get('response', "That's interesting! Tell me more."),
-                'score': min(100, max(0, result.get('score', 70))),
-                'feedback': result.get('feedback', 'Tốt lắm! Tiếp tục nói nhé.'),
+                'ai_response': result['response'],
+                'score': result['score'],
+                'feedback': result['feedback'],
                 'vocabulary_hints': result.get('vocabulary_hints', []),
-                'sentence_templates': result.get('sentence_templates', [])
+                'sentence_templates': result.get('sentence_templates', []),
+                'history_summary': history_summary
             }), 200
             
     except Exception as e:
@@ -161,7 +144,8 @@ The vocabulary and templates should help the user answer YOUR follow-up question
         'score': fallback_data['score'],
         'feedback': fallback_data['feedback'],
         'vocabulary_hints': fallback_data['vocabulary_hints'],
-        'sentence_templates': fallback_data['sentence_templates']
+        'sentence_templates': fallback_data['sentence_templates'],
+        'history_summary': history_summary
     }), 200
 
 
@@ -13,12 +13,13 @@ def find_buddies():
     """Find potential study buddies"""
     user_id = request.args.get('user_id', type=int)
     level = request.args.get('level')
+    topic = request.args.get('topic')
     limit = request.args.get('limit', 10, type=int)
     
     if not user_id:
         return jsonify({'error': 'user_id is required'}), 400
     
-    buddies = study_buddy_service.find_potential_buddies(user_id, level, limit)
+    buddies = study_buddy_service.find_potential_buddies(user_id, level, limit, topic)
     return jsonify(buddies), 200
 
 
@@ -6,6 +6,7 @@ API endpoints for subscription management
 from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 from services.subscription_service import SubscriptionService
+from services.response_cache import cached_response
 
 subscription_bp = Blueprint('subscriptions', __name__, url_prefix='/api/subscriptions')
 service = SubscriptionService()
@@ -19,6 +20,7 @@ service = SubscriptionService()
     'summary': 'Get available subscription plans',
     'responses': {'200': {'description': 'List of plans'}}
 })
+@cached_response('subscription_plans')
 def get_plans():
     """Get all available subscription plans"""
     plans = service.get_all_plans()
@@ -6,11 +6,13 @@ API endpoints for conversation topics and scenarios
 from flask import Blueprint, request, jsonify
 
 from services.topic_service import TopicService
+from services.response_cache import cached_response
 
 topic_bp = Blueprint('topics', __name__, url_prefix='/api/topics')
 
 
 @topic_bp.route('/', methods=['GET'])
+@cached_response('topics')
 def get_topics():
     """
     Get all topics with optional filters
@@ -43,6 +45,7 @@ def get_topics():
 
 
 @topic_bp.route('/categories', methods=['GET'])
+@cached_response('topics')
 def get_categories():
     """Get all topic categories"""
     categories = TopicService.get_categories()
@@ -50,6 +53,7 @@ def get_categories():
 
 
 @topic_bp.route('/<int:topic_id>', methods=['GET'])
+@cached_response('topics')
 def get_topic(topic_id: int):
     """Get a single topic by ID"""
     topic = TopicService.get_topic_by_id(topic_id)
@@ -140,6 +144,7 @@ def delete_topic(topic_id: int):
 # ==================== SCENARIOS ====================
 
 @topic_bp.route('/<int:topic_id>/scenarios', methods=['GET'])
+@cached_response('topics')
 def get_topic_scenarios(topic_id: int):
     """Get all scenarios for a topic"""
     scenarios = TopicService.get_topic_scenarios(topic_id)
@@ -152,6 +157,7 @@ def get_topic_scenarios(topic_id: int):
 
 
 @topic_bp.route('/scenarios/<int:scenario_id>', methods=['GET'])
+@cached_response('topics')
 def get_scenario(scenario_id: int):
     """Get a single scenario by ID"""
     scenario = TopicService.get_scenario_by_id(scenario_id)
@@ -1,3 +1,4 @@
+import threading
 from apispec import APISpec
 from apispec.ext.marshmallow import MarshmallowPlugin
 from apispec_webframeworks.flask import FlaskPlugin
@@ -12,4 +13,24 @@ spec = APISpec(
 
 # Đăng ký schema để tự động sinh model
 spec.components.schema("TodoRequest", schema=TodoRequestSchema)
-spec.components.schema("TodoResponse", schema=TodoResponseSchema)
\ No newline at end of file
+spec.components.schema("TodoResponse", schema=TodoResponseSchema)
+
+# Blueprints whose views are documented in /swagger.json
+DOCUMENTED_ENDPOINTS = ('todo.', 'course.', 'user.', 'admin.', 'user_management.', 'package_management.')
+
+_spec_dict = None
+_spec_lock = threading.Lock()
+
+
+def spec_dict(app):
+    """OpenAPI document of the app, built from its URL map on first use and cached"""
+    global _spec_dict
+    if _spec_dict is None:
+        with _spec_lock:
+            if _spec_dict is None:
+                with app.test_request_context():
+                    for rule in app.url_map.iter_rules():
+                        if rule.endpoint.startswith(DOCUMENTED_ENDPOINTS):
+                            spec.path(view=app.view_functions[rule.endpoint])
+                _spec_dict = spec.to_dict()
+    return _spec_dict
@@ -1,7 +1,12 @@
+import importlib
+import startup_profile
+
+# STARTUP_PROFILE=1: time every import from here on (see startup_profile.py)
+if startup_profile.ENABLED:
+    startup_profile.install()
+
 from flask import Flask, jsonify
 from flask_cors import CORS
-from api.swagger import spec
-from api.controllers.todo_controller import bp as todo_bp
 from api.middleware import middleware
 from api.responses import success_response
 from infrastructure.databases import init_db
@@ -17,34 +22,39 @@ setup_logging()
 # Import WebSocket module
 from api.websocket import socketio, init_socketio
 
-# Import all controllers
-from api.controllers.admin_controller import bp as admin_bp
-from api.controllers.user_management_controller import bp as user_management_bp
-from api.controllers.package_management_controller import bp as package_management_bp
-from api.controllers.learner_controller import learner_bp
-from api.controllers.mentor_controller import mentor_bp
-from api.controllers.purchase_controller import purchase_bp
-from api.controllers.auth_controller import auth_bp
-from api.controllers.notification_controller import notification_bp
-from api.controllers.resource_controller import resource_bp
-from api.controllers.report_controller import report_bp
-from api.controllers.topic_controller import topic_bp
-from api.controllers.policy_controller import policy_bp
-from api.controllers.mentor_content_controller import mentor_content_bp
-from api.controllers.community_controller import community_bp
-from api.controllers.challenge_controller import challenge_bp
-from api.controllers.subscription_controller import subscription_bp
-from api.controllers.user_profile_controller import user_profile_bp
-from api.controllers.practice_controller import practice_bp
-from api.controllers.message_controller import message_bp
-from api.controllers.assignment_controller import assignment_bp
-from api.controllers.feedback_controller import feedback_bp
-from api.controllers.video_controller import video_bp
-from api.controllers.study_buddy_controller import study_buddy_bp
-from api.controllers.note_controller import bp as note_bp
-from api.controllers.speaking_drills_controller import speaking_drills_bp
-from api.controllers.feedback_moderation_controller import feedback_moderation_bp
-from api.controllers.mentor_application_controller import mentor_application_bp
+# Blueprints as (module, attribute, register options), imported by create_app
+BLUEPRINTS = [
+    ('api.controllers.todo_controller', 'bp', {}),
+    ('api.controllers.admin_controller', 'bp', {}),
+    ('api.controllers.user_management_controller', 'bp', {}),
+    ('api.controllers.package_management_controller', 'bp', {}),
+    ('api.controllers.learner_controller', 'learner_bp', {}),
+    ('api.controllers.mentor_controller', 'mentor_bp', {}),
+    ('api.controllers.purchase_controller', 'purchase_bp', {}),
+    ('api.controllers.auth_controller', 'auth_bp', {}),
+    ('api.controllers.notification_controller', 'notification_bp', {}),
+    ('api.controllers.resource_controller', 'resource_bp', {}),
+    ('api.controllers.report_controller', 'report_bp', {}),
+    ('api.controllers.topic_controller', 'topic_bp', {}),
+    ('api.controllers.policy_controller', 'policy_bp', {}),
+    ('api.controllers.mentor_content_controller', 'mentor_content_bp', {}),
+    ('api.controllers.community_controller', 'community_bp', {}),
+    ('api.controllers.challenge_controller', 'challenge_bp', {}),
+    ('api.controllers.subscription_controller', 'subscription_bp', {}),
+    ('api.controllers.user_profile_controller', 'user_profile_bp', {}),
+    ('api.controllers.practice_controller', 'practice_bp', {}),
+    ('api.controllers.placement_test_controller', 'placement_test_bp', {}),
+    # Role connection controllers
+    ('api.controllers.message_controller', 'message_bp', {}),
+    ('api.controllers.assignment_controller', 'assignment_bp', {}),
+    ('api.controllers.feedback_controller', 'feedback_bp', {}),
+    ('api.controllers.video_controller', 'video_bp', {}),
+    ('api.controllers.study_buddy_controller', 'study_buddy_bp', {}),
+    ('api.controllers.note_controller', 'bp', {}),
+    ('api.controllers.speaking_drills_controller', 'speaking_drills_bp', {'url_prefix': '/api/speaking-drills'}),
+    ('api.controllers.feedback_moderation_controller', 'feedback_moderation_bp', {}),
+    ('api.controllers.mentor_application_controller', 'mentor_application_bp', {}),
+]
 
 
 def create_app():
@@ -59,36 +69,9 @@ def create_app():
     Swagger(app)
     
     # Register all blueprints
-    app.register_blueprint(todo_bp)
-    app.register_blueprint(admin_bp)
-    app.register_blueprint(user_management_bp)
-    app.register_blueprint(package_management_bp)
-    app.register_blueprint(learner_bp)
-    app.register_blueprint(mentor_bp)
-    app.register_blueprint(purchase_bp)
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(notification_bp)
-    app.register_blueprint(resource_bp)
-    app.register_blueprint(report_bp)
-    app.register_blueprint(topic_bp)
-    app.register_blueprint(policy_bp)
-    app.register_blueprint(mentor_content_bp)
-    app.register_blueprint(community_bp)
-    app.register_blueprint(challenge_bp)
-    app.register_blueprint(subscription_bp)
-    app.register_blueprint(user_profile_bp)
-    app.register_blueprint(practice_bp)
-    
-    # Role connection controllers
-    app.register_blueprint(message_bp)
-    app.register_blueprint(assignment_bp)
-    app.register_blueprint(feedback_bp)
-    app.register_blueprint(video_bp)
-    app.register_blueprint(study_buddy_bp)
-    app.register_blueprint(note_bp)
-    app.register_blueprint(speaking_drills_bp, url_prefix='/api/speaking-drills')
-    app.register_blueprint(feedback_moderation_bp)
-    app.register_blueprint(mentor_application_bp)
+    for module_name, attribute, options in BLUEPRINTS:
+        blueprint = getattr(importlib.import_module(module_name), attribute)
+        app.register_blueprint(blueprint, **options)
 
     # Swagger UI blueprint
     SWAGGER_URL = '/docs'
@@ -108,17 +91,11 @@ def create_app():
     # Register middleware
     middleware(app)
 
-    # Register routes for swagger
-    with app.test_request_context():
-        for rule in app.url_map.iter_rules():
-            if rule.endpoint.startswith(('todo.', 'course.', 'user.', 'admin.', 'user_management.', 'package_management.')):
-                view_func = app.view_functions[rule.endpoint]
-                print(f"Adding path: {rule.rule} -> {view_func}")
-                spec.path(view=view_func)
-
     @app.route("/swagger.json")
     def swagger_json():
-        return jsonify(spec.to_dict())
+        # Built from the URL map on the first request, then served from cache
+        from api.swagger import spec_dict
+        return jsonify(spec_dict(app))
     
     @app.route("/")
     def home():
@@ -131,6 +108,32 @@ def create_app():
     # Initialize WebSocket
     init_socketio(app)
 
+    # Start write-behind notification flusher (pushes over WebSocket)
+    from services.notification_dispatcher import notification_dispatcher
+    notification_dispatcher.start(socketio)
+
+    # Periodic study buddy matcher (relaxes topic/level with wait time)
+    from services.study_buddy_service import study_buddy_service
+    study_buddy_service.start_matcher(socketio)
+
+    # Coalesced resource download counters
+    from services.download_counter import download_counter
+    download_counter.start(socketio)
+
+    # Background re-encoding of practice recordings (needs ffmpeg)
+    from services.audio_compactor import audio_compactor
+    audio_compactor.start(socketio)
+
+    # Load mentor content catalogues (grammar, idioms, IPA...) before traffic
+    try:
+        from services.mentor_content_service import warm_up_content_catalogues
+        print(f"Content catalogues warmed up: {warm_up_content_catalogues()} payloads")
+    except Exception as e:
+        print(f"Error warming up content catalogues: {e}")
+
+    if startup_profile.ENABLED:
+        startup_profile.report()
+
     return app
 
 # Run the application with SocketIO
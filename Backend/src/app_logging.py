@@ -9,5 +9,3 @@ def setup_logging():
             logging.StreamHandler()
         ]
     )
-
-setup_logging() 
\ No newline at end of file
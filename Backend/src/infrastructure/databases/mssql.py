@@ -11,7 +11,9 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 session = SessionLocal()
 
 def init_mssql(app):
-    Base.metadata.create_all(bind=engine)
+    # Schema creation is opt-in (DB_CREATE_ALL=1) so workers boot without touching the schema
+    if app.config.get('DB_CREATE_ALL'):
+        Base.metadata.create_all(bind=engine)
 
 
 @contextmanager
@@ -4,7 +4,7 @@ Database model for mentor time slot management
 """
 
 from datetime import datetime, date, time
-from sqlalchemy import Column, Integer, Date, Time, Boolean, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, Date, Time, DateTime, Boolean, String, ForeignKey, Text, Index, event
 from sqlalchemy.orm import relationship
 from infrastructure.databases.mssql import Base
 
@@ -12,6 +12,11 @@ from infrastructure.databases.mssql import Base
 class AvailabilityModel(Base):
     """Mentor availability time slots"""
     __tablename__ = 'mentor_availability'
+    __table_args__ = (
+        # Interval lookups: overlap checks and free-slot search scan by start
+        Index('ix_mentor_availability_interval', 'mentor_id', 'starts_at', 'ends_at'),
+        Index('ix_mentor_availability_starts_at', 'starts_at'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     mentor_id = Column(Integer, ForeignKey('flask_user.id'), nullable=False)
@@ -22,6 +27,10 @@ class AvailabilityModel(Base):
     end_time = Column(Time, nullable=False)
     slot_duration = Column(Integer, default=30)  # Minutes per slot
     
+    # The same window as absolute datetimes, kept in sync with date / start_time / end_time
+    starts_at = Column(DateTime)
+    ends_at = Column(DateTime)
+    
     # Recurrence
     is_recurring = Column(Boolean, default=False)
     recurrence_pattern = Column(String(50))  # daily, weekly, monthly
@@ -31,6 +40,7 @@ class AvailabilityModel(Base):
     is_booked = Column(Boolean, default=False)
     booking_id = Column(Integer)
     is_active = Column(Boolean, default=True)
+    version = Column(Integer, nullable=False, default=0)  # bumped by every reservation / edit
     
     # Additional info
     notes = Column(Text)
@@ -48,5 +58,14 @@ class AvailabilityModel(Base):
             'recurrence_pattern': self.recurrence_pattern,
             'is_booked': self.is_booked,
             'is_active': self.is_active,
+            'version': self.version,
             'notes': self.notes
         }
+
+
+@event.listens_for(AvailabilityModel, 'before_insert')
+@event.listens_for(AvailabilityModel, 'before_update')
+def _sync_interval(mapper, connection, slot):
+    if slot.date and slot.start_time and slot.end_time:
+        slot.starts_at = datetime.combine(slot.date, slot.start_time)
+        slot.ends_at = datetime.combine(slot.date, slot.end_time)
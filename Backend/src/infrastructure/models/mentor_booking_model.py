@@ -2,16 +2,21 @@
 Mentor Booking Model
 Database model for booking sessions with mentors
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Time, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Time, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
 from infrastructure.databases.mssql import Base
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 class MentorBookingModel(Base):
     """Model for mentor session bookings"""
     __tablename__ = 'mentor_bookings'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Double-booking checks look up a mentor's / learner's bookings by time
+        Index('ix_mentor_bookings_mentor_interval', 'mentor_id', 'starts_at', 'ends_at'),
+        Index('ix_mentor_bookings_learner_interval', 'learner_id', 'starts_at', 'ends_at'),
+        {'extend_existing': True}
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     learner_id = Column(Integer, ForeignKey('flask_user.id'), nullable=False)
@@ -22,6 +27,11 @@ class MentorBookingModel(Base):
     scheduled_time = Column(Time, nullable=False)
     duration_minutes = Column(Integer, default=30)
     
+    # The booked interval, kept in sync with scheduled_date / scheduled_time / duration
+    starts_at = Column(DateTime)
+    ends_at = Column(DateTime)
+    availability_id = Column(Integer, ForeignKey('mentor_availability.id'))  # slot the booking was taken from
+    
     # Session details
     topic = Column(String(255))
     notes = Column(Text)
@@ -54,3 +64,11 @@ class MentorBookingModel(Base):
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+@event.listens_for(MentorBookingModel, 'before_insert')
+@event.listens_for(MentorBookingModel, 'before_update')
+def _sync_interval(mapper, connection, booking):
+    if booking.scheduled_date and booking.scheduled_time:
+        booking.starts_at = datetime.combine(booking.scheduled_date, booking.scheduled_time)
+        booking.ends_at = booking.starts_at + timedelta(minutes=booking.duration_minutes or 30)
@@ -40,3 +40,46 @@ class NotificationModel(Base):
             'action_url': self.action_url,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+class NotificationBroadcastModel(Base):
+    """Platform-wide announcement fanned out to users in bounded chunks"""
+    
+    __tablename__ = 'notification_broadcasts'
+    __table_args__ = {'extend_existing': True}
+    
+    id = Column(Integer, primary_key=True)
+    admin_id = Column(Integer, ForeignKey('flask_user.id'))
+    target_role = Column(String(20), default='all')  # all, learner, mentor
+    title = Column(String(200), nullable=False)
+    message = Column(Text)
+    notification_type = Column(String(50), default='announcement')
+    status = Column(String(20), default='queued')  # queued, sending, completed, failed
+    total_recipients = Column(Integer, default=0)
+    sent_count = Column(Integer, default=0)
+    last_user_id = Column(Integer, default=0)  # Keyset cursor, lets a failed run resume
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.now)
+    started_at = Column(DateTime)
+    completed_at = Column(DateTime)
+    updated_at = Column(DateTime)  # Set with every committed chunk, a stale one means the run died
+    
+    def to_dict(self):
+        """Convert model to dictionary"""
+        return {
+            'id': self.id,
+            'admin_id': self.admin_id,
+            'target_role': self.target_role,
+            'title': self.title,
+            'message': self.message,
+            'notification_type': self.notification_type,
+            'status': self.status,
+            'total_recipients': self.total_recipients,
+            'sent_count': self.sent_count,
+            'progress': round(self.sent_count / self.total_recipients * 100, 1) if self.total_recipients else 0,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
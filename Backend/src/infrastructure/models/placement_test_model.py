@@ -3,7 +3,7 @@ Placement Test Model
 Database model for storing placement test questions and results
 """
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, Float
 from sqlalchemy.sql import func
 from infrastructure.databases.mssql import Base
 
@@ -29,6 +29,14 @@ class PlacementQuestionModel(Base):
     # Optional explanation
     explanation = Column(Text)
     
+    # Item response theory (3PL) parameters for the adaptive test; NULL
+    # until calibrated (defaults come from difficulty_level)
+    irt_discrimination = Column(Float)  # a
+    irt_difficulty = Column(Float)  # b, on the ability scale
+    irt_guessing = Column(Float)  # c
+    calibrated_responses = Column(Integer, default=0)
+    calibrated_at = Column(DateTime)
+    
     # Metadata
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=func.now())
@@ -54,6 +62,18 @@ class PlacementQuestionModel(Base):
         return data
 
 
+class PlacementAdaptiveSessionModel(Base):
+    """Adaptive placement test in progress, shared by every worker"""
+    __tablename__ = 'placement_adaptive_sessions'
+    
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey('flask_user.id'), nullable=False, index=True)
+    answered = Column(Integer, default=0)  # guards against two answers to the same question
+    state = Column(Text, nullable=False)  # JSON of AdaptiveTest.to_state()
+    started_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), index=True)
+
+
 class PlacementTestResultModel(Base):
     """Model for storing user placement test results"""
     __tablename__ = 'placement_test_results'
@@ -75,6 +95,12 @@ class PlacementTestResultModel(Base):
     # Assigned level
     assigned_level = Column(String(10), nullable=False)  # A1, A2, B1, B2, C1, C2
     
+    # Adaptive test: ability estimate, its standard error and the
+    # per-item outcomes ({question_id: 0/1} JSON) used for calibration
+    ability = Column(Float)
+    ability_se = Column(Float)
+    responses = Column(Text)
+    
     # Test metadata
     questions_answered = Column(Integer, default=0)
     time_taken_seconds = Column(Integer, default=0)
@@ -97,6 +123,8 @@ class PlacementTestResultModel(Base):
                 'percentage': self.percentage
             },
             'assigned_level': self.assigned_level,
+            'ability': self.ability,
+            'ability_se': self.ability_se,
             'questions_answered': self.questions_answered,
             'time_taken_seconds': self.time_taken_seconds,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None
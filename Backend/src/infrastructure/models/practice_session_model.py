@@ -22,6 +22,7 @@ class PracticeSessionModel(Base):
     
     # Transcript & Analysis
     transcript = Column(Text, nullable=True)  # JSON: user & AI messages
+    history_summary = Column(Text, nullable=True)  # JSON: {'text', 'covered'} rolling summary of older turns
     ai_feedback = Column(Text, nullable=True)  # JSON: AI analysis
     
     # Scores (0-100)
@@ -43,8 +44,17 @@ class PracticeSessionModel(Base):
     created_at = Column(DateTime)
     
     # Audio recording storage (for mentor review)
-    audio_recording = Column(LargeBinary, nullable=True)  # Audio blob
+    audio_recording = Column(LargeBinary, nullable=True)  # Legacy audio blob (before on-disk storage)
     audio_filename = Column(String(255), nullable=True)   # Original filename
+    audio_path = Column(String(500), nullable=True)       # Relative to AUDIO_STORAGE_DIR
+    audio_size = Column(Integer, nullable=True)           # Bytes
+    audio_sha256 = Column(String(64), nullable=True)
+    audio_mime = Column(String(100), nullable=True)
+    audio_codec = Column(String(50), nullable=True)       # Set once re-encoded, e.g. opus/24k
+    audio_duration_seconds = Column(Float, nullable=True) # After silence trimming
+    audio_original_size = Column(Integer, nullable=True)  # Bytes as uploaded
+    audio_compacted_at = Column(DateTime, nullable=True)
+    audio_metrics = Column(Text, nullable=True)           # JSON: acoustic fluency measures
 
     # Relationships
     user = relationship("UserModel", foreign_keys=[user_id], back_populates="practice_sessions")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Float, ForeignKey, Text, JSON
 from sqlalchemy.orm import relationship
 from infrastructure.databases.base import Base
 
@@ -25,6 +25,9 @@ class ProgressModel(Base):
     total_sessions = Column(Integer, default=0)
     current_streak = Column(Integer, default=0)  # Số ngày liên tục
     longest_streak = Column(Integer, default=0)
+    last_active_date = Column(Date, nullable=True)  # Last day with practice / assessment / challenge activity
+    activity_bitmap = Column(BigInteger, default=0)  # Bit i: active i days before last_active_date
+    skill_samples = Column(Text, nullable=True)  # JSON {skill: scores averaged into *_score}
     words_learned = Column(Integer, default=0)
     
     # Level & achievements
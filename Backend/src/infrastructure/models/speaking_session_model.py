@@ -23,6 +23,7 @@ class SpeakingSession(Base):
     average_score = Column(Float, default=0)
     total_turns = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
+    history_summary = Column(Text, nullable=True)  # JSON: {'text', 'covered'} rolling summary of older turns
     
     # Relationships
     learner = relationship('UserModel', foreign_keys=[learner_id], backref='speaking_sessions')
@@ -23,6 +23,7 @@ from infrastructure.models.purchase_model import PurchaseModel
 from infrastructure.models.progress_model import ProgressModel
 from infrastructure.models.practice_session_model import PracticeSessionModel
 from infrastructure.models.assessment_model import AssessmentModel
+from infrastructure.models.availability_model import AvailabilityModel
 from infrastructure.models.course_model import CourseModel
 from infrastructure.models.course_register_model import CourseRegisterModel
 from infrastructure.models.feedback_model import FeedbackModel
@@ -0,0 +1,43 @@
+"""
+Add compaction metadata columns to practice_sessions
+(codec, trimmed duration and original size of re-encoded recordings)
+"""
+import sys
+sys.path.insert(0, '.')
+
+from infrastructure.databases.mssql import engine
+from sqlalchemy import text
+
+COLUMNS = [
+    ('practice_sessions', 'audio_codec', 'VARCHAR(50) NULL'),
+    ('practice_sessions', 'audio_duration_seconds', 'FLOAT NULL'),
+    ('practice_sessions', 'audio_original_size', 'INT NULL'),
+    ('practice_sessions', 'audio_compacted_at', 'DATETIME NULL'),
+]
+
+
+def add_audio_compaction_columns():
+    """Add audio codec, duration, original size and compaction time columns"""
+    
+    print("Starting audio compaction columns migration...")
+    print(f"Database: {engine.url}\n")
+    
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+                ))
+                conn.commit()
+                print(f"  ✓ Added column '{table}.{column}'")
+            except Exception as e:
+                if "Duplicate column name" in str(e):
+                    print(f"  - Column '{table}.{column}' already exists, skipping")
+                else:
+                    print(f"  ✗ Error adding '{table}.{column}': {e}")
+    
+    print("\nMigration completed!")
+
+
+if __name__ == "__main__":
+    add_audio_compaction_columns()
@@ -0,0 +1,40 @@
+"""
+Add the audio_metrics column to practice_sessions
+(acoustic fluency measures saved when a session is completed)
+"""
+import sys
+sys.path.insert(0, '.')
+
+from infrastructure.databases.mssql import engine
+from sqlalchemy import text
+
+COLUMNS = [
+    ('practice_sessions', 'audio_metrics', 'TEXT NULL'),
+]
+
+
+def add_audio_metrics_column():
+    """Add the fluency metrics JSON column"""
+    
+    print("Starting audio metrics column migration...")
+    print(f"Database: {engine.url}\n")
+    
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+                ))
+                conn.commit()
+                print(f"  ✓ Added column '{table}.{column}'")
+            except Exception as e:
+                if "Duplicate column name" in str(e):
+                    print(f"  - Column '{table}.{column}' already exists, skipping")
+                else:
+                    print(f"  ✗ Error adding '{table}.{column}': {e}")
+    
+    print("\nMigration completed!")
+
+
+if __name__ == "__main__":
+    add_audio_metrics_column()
@@ -0,0 +1,43 @@
+"""
+Add on-disk audio storage columns to practice_sessions
+(recordings are streamed to AUDIO_STORAGE_DIR instead of the audio_recording blob)
+"""
+import sys
+sys.path.insert(0, '.')
+
+from infrastructure.databases.mssql import engine
+from sqlalchemy import text
+
+COLUMNS = [
+    ('practice_sessions', 'audio_path', 'VARCHAR(500) NULL'),
+    ('practice_sessions', 'audio_size', 'INT NULL'),
+    ('practice_sessions', 'audio_sha256', 'VARCHAR(64) NULL'),
+    ('practice_sessions', 'audio_mime', 'VARCHAR(100) NULL'),
+]
+
+
+def add_audio_storage_columns():
+    """Add audio file path, size, hash and mimetype columns"""
+    
+    print("Starting audio storage columns migration...")
+    print(f"Database: {engine.url}\n")
+    
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+                ))
+                conn.commit()
+                print(f"  ✓ Added column '{table}.{column}'")
+            except Exception as e:
+                if "Duplicate column name" in str(e):
+                    print(f"  - Column '{table}.{column}' already exists, skipping")
+                else:
+                    print(f"  ✗ Error adding '{table}.{column}': {e}")
+    
+    print("\nMigration completed!")
+
+
+if __name__ == "__main__":
+    add_audio_storage_columns()
@@ -0,0 +1,35 @@
+"""
+Add history_summary column to practice_sessions and speaking_sessions tables
+"""
+import sys
+sys.path.insert(0, '.')
+
+from infrastructure.databases.mssql import engine
+from sqlalchemy import text
+
+
+def add_history_summary_columns():
+    """Add history_summary column used by the history compactor"""
+    
+    print("Starting history_summary migration...")
+    print(f"Database: {engine.url}\n")
+    
+    with engine.connect() as conn:
+        for table in ('practice_sessions', 'speaking_sessions'):
+            try:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN history_summary TEXT NULL"
+                ))
+                conn.commit()
+                print(f"  ✓ Added column '{table}.history_summary'")
+            except Exception as e:
+                if "Duplicate column name" in str(e):
+                    print(f"  - Column '{table}.history_summary' already exists, skipping")
+                else:
+                    print(f"  ✗ Error adding '{table}.history_summary': {e}")
+    
+    print("\nMigration completed!")
+
+
+if __name__ == "__main__":
+    add_history_summary_columns()
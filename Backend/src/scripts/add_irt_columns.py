@@ -0,0 +1,47 @@
+"""
+Add item response theory columns to placement_questions and
+placement_test_results for the adaptive placement test
+"""
+import sys
+sys.path.insert(0, '.')
+
+from infrastructure.databases.mssql import engine
+from sqlalchemy import text
+
+COLUMNS = [
+    ('placement_questions', 'irt_discrimination', 'FLOAT NULL'),
+    ('placement_questions', 'irt_difficulty', 'FLOAT NULL'),
+    ('placement_questions', 'irt_guessing', 'FLOAT NULL'),
+    ('placement_questions', 'calibrated_responses', 'INT DEFAULT 0'),
+    ('placement_questions', 'calibrated_at', 'DATETIME NULL'),
+    ('placement_test_results', 'ability', 'FLOAT NULL'),
+    ('placement_test_results', 'ability_se', 'FLOAT NULL'),
+    ('placement_test_results', 'responses', 'TEXT NULL'),
+]
+
+
+def add_irt_columns():
+    """Add IRT parameter and ability columns"""
+    
+    print("Starting IRT columns migration...")
+    print(f"Database: {engine.url}\n")
+    
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+                ))
+                conn.commit()
+                print(f"  ✓ Added column '{table}.{column}'")
+            except Exception as e:
+                if "Duplicate column name" in str(e):
+                    print(f"  - Column '{table}.{column}' already exists, skipping")
+                else:
+                    print(f"  ✗ Error adding '{table}.{column}': {e}")
+    
+    print("\nMigration completed!")
+
+
+if __name__ == "__main__":
+    add_irt_columns()
@@ -0,0 +1,43 @@
+"""
+Add the aggregation columns to learner_progress
+(activity bitmap for streaks and per-skill sample counts); run
+scripts/rebuild_progress.py afterwards to fill them from history
+"""
+import sys
+sys.path.insert(0, '.')
+
+from infrastructure.databases.mssql import engine
+from sqlalchemy import text
+
+COLUMNS = [
+    ('learner_progress', 'last_active_date', 'DATE NULL'),
+    ('learner_progress', 'activity_bitmap', 'BIGINT NOT NULL DEFAULT 0'),
+    ('learner_progress', 'skill_samples', 'TEXT NULL'),
+]
+
+
+def add_progress_aggregate_columns():
+    """Add the progress aggregation columns"""
+    
+    print("Starting progress aggregate column migration...")
+    print(f"Database: {engine.url}\n")
+    
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+                ))
+                conn.commit()
+                print(f"  ✓ Added column '{table}.{column}'")
+            except Exception as e:
+                if "Duplicate column name" in str(e):
+                    print(f"  - Column '{table}.{column}' already exists, skipping")
+                else:
+                    print(f"  ✗ Error adding '{table}.{column}': {e}")
+    
+    print("\nMigration completed!")
+
+
+if __name__ == "__main__":
+    add_progress_aggregate_columns()
@@ -0,0 +1,86 @@
+"""
+Add interval columns and indexes to mentor_availability and mentor_bookings
+(starts_at / ends_at for overlap checks, availability versioning) and
+backfill them from the existing date / time columns
+"""
+import sys
+sys.path.insert(0, '.')
+
+from infrastructure.databases.mssql import engine
+from sqlalchemy import text
+
+COLUMNS = [
+    ('mentor_availability', 'starts_at', 'DATETIME NULL'),
+    ('mentor_availability', 'ends_at', 'DATETIME NULL'),
+    ('mentor_availability', 'version', 'INT NOT NULL DEFAULT 0'),
+    ('mentor_bookings', 'starts_at', 'DATETIME NULL'),
+    ('mentor_bookings', 'ends_at', 'DATETIME NULL'),
+    ('mentor_bookings', 'availability_id', 'INT NULL'),
+]
+
+INDEXES = [
+    ('mentor_availability', 'ix_mentor_availability_interval', 'mentor_id, starts_at, ends_at'),
+    ('mentor_availability', 'ix_mentor_availability_starts_at', 'starts_at'),
+    ('mentor_bookings', 'ix_mentor_bookings_mentor_interval', 'mentor_id, starts_at, ends_at'),
+    ('mentor_bookings', 'ix_mentor_bookings_learner_interval', 'learner_id, starts_at, ends_at'),
+]
+
+BACKFILL = [
+    ('mentor_availability', """
+        UPDATE mentor_availability
+        SET starts_at = TIMESTAMP(date, start_time), ends_at = TIMESTAMP(date, end_time)
+        WHERE starts_at IS NULL
+    """),
+    ('mentor_bookings', """
+        UPDATE mentor_bookings
+        SET starts_at = TIMESTAMP(scheduled_date, scheduled_time),
+            ends_at = TIMESTAMP(scheduled_date, scheduled_time) + INTERVAL COALESCE(duration_minutes, 30) MINUTE
+        WHERE starts_at IS NULL
+    """),
+]
+
+
+def add_schedule_interval_columns():
+    """Add the interval columns, backfill them, then index them"""
+
+    print("Starting schedule interval migration...")
+    print(f"Database: {engine.url}\n")
+
+    with engine.connect() as conn:
+        for table, column, definition in COLUMNS:
+            try:
+                conn.execute(text(
+                    f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+                ))
+                conn.commit()
+                print(f"  ✓ Added column '{table}.{column}'")
+            except Exception as e:
+                if "Duplicate column name" in str(e):
+                    print(f"  - Column '{table}.{column}' already exists, skipping")
+                else:
+                    print(f"  ✗ Error adding '{table}.{column}': {e}")
+
+        for table, statement in BACKFILL:
+            try:
+                result = conn.execute(text(statement))
+                conn.commit()
+                print(f"  ✓ Backfilled {result.rowcount} rows of '{table}'")
+            except Exception as e:
+                print(f"  ✗ Error backfilling '{table}': {e}")
+
+        for table, name, columns in INDEXES:
+            try:
+                conn.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+                conn.commit()
+                print(f"  ✓ Created index '{name}'")
+            except Exception as e:
+                if "Duplicate key name" in str(e):
+                    print(f"  - Index '{name}' already exists, skipping")
+                else:
+                    print(f"  ✗ Error creating '{name}': {e}")
+
+    print("\nMigration completed!")
+
+
+if __name__ == "__main__":
+    add_schedule_interval_columns()
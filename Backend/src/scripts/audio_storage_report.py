@@ -0,0 +1,56 @@
+"""
+Storage report for practice recordings
+Shows how many recordings were re-encoded to the speech profile and the
+bytes reclaimed; --compact first processes the pending backlog (legacy
+blobs included) in the transcoding process pool
+
+Usage:
+    python scripts/audio_storage_report.py
+    python scripts/audio_storage_report.py --compact --batches 20
+"""
+import argparse
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import audio_codec
+from services.audio_compactor import audio_compactor
+
+
+def human(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024 or unit == 'GB':
+            return f"{n:.1f} {unit}" if unit != 'B' else f"{n} B"
+        n /= 1024.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--compact', action='store_true', help='compact pending recordings before reporting')
+    parser.add_argument('--batches', type=int, default=10, help='batches of recordings to compact (with --compact)')
+    args = parser.parse_args()
+
+    if args.compact and not audio_codec.available():
+        print("ffmpeg / ffprobe not found, skipping --compact")
+    elif args.compact:
+        for _ in range(args.batches):
+            results = audio_compactor.compact_pending()
+            if not results:
+                break
+            for r in results:
+                status = 'transcoded' if r['transcoded'] else 'kept original'
+                print(f"  session {r['session_id']}: {human(r['original_size'])} -> {human(r['size'])} ({status})")
+
+    report = audio_compactor.report()
+    print("\nPractice recording storage")
+    print(f"  Compacted recordings : {report['compacted']} ({report['audio_seconds'] / 60:.1f} min of speech)")
+    print(f"  Original size        : {human(report['original_bytes'])}")
+    print(f"  Current size         : {human(report['compacted_bytes'])}")
+    print(f"  Reclaimed            : {human(report['reclaimed_bytes'])} ({report['reclaimed_percent']}%)")
+    print(f"  Pending              : {report['pending']} ({human(report['pending_bytes'])})")
+    print(f"  Legacy DB blobs      : {report['legacy_blobs']} ({human(report['legacy_blob_bytes'])})")
+    print(f"  Failed               : {report['failed']}")
+
+
+if __name__ == "__main__":
+    main()
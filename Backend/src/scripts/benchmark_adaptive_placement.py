@@ -0,0 +1,102 @@
+"""
+Simulation benchmark for the adaptive placement test
+Simulated learners with known ability take the old fixed test (15 random
+questions) and the adaptive test on a synthetic calibrated bank; reports
+questions used, estimation error and level agreement
+
+Usage:
+    python scripts/benchmark_adaptive_placement.py --learners 2000 --per-stratum 10 --target-se 0.35
+"""
+import argparse
+import random
+import statistics
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.adaptive_placement import (
+    AdaptiveEngine, ItemParams, LEVEL_DIFFICULTY, estimate_ability, level_for_ability, probability
+)
+
+CATEGORIES = ('grammar', 'vocabulary', 'reading', 'listening')
+
+
+class SimQuestion:
+    __slots__ = ('id', 'category', 'difficulty_level', 'irt')
+
+    def __init__(self, id, category, level, irt):
+        self.id = id
+        self.category = category
+        self.difficulty_level = level
+        self.irt = irt
+
+
+def build_bank(per_stratum, rng):
+    strata, next_id = {}, 1
+    for category in CATEGORIES:
+        for level, b in LEVEL_DIFFICULTY.items():
+            for _ in range(per_stratum):
+                irt = ItemParams(rng.uniform(0.7, 1.8), b + rng.gauss(0, 0.35), 0.25)
+                strata.setdefault((category, level), []).append(SimQuestion(next_id, category, level, irt))
+                next_id += 1
+    return strata
+
+
+def run_fixed(theta, bank, length, rng):
+    items = rng.sample(bank, length)
+    responses = [(q.irt, rng.random() < probability(theta, q.irt)) for q in items]
+    estimate, se = estimate_ability(responses)
+    return estimate, se, length
+
+
+def run_adaptive(theta, engine, rng):
+    test, question = engine.start(0)
+    while question is not None:
+        question = engine.answer(test, question, None, rng.random() < probability(theta, question.irt))
+    engine.finish(test)
+    return test.theta, test.se, len(test.responses)
+
+
+def summarize(label, runs, thetas):
+    errors = [est - true for (est, _, _), true in zip(runs, thetas)]
+    lengths = [n for _, _, n in runs]
+    agree = sum(level_for_ability(est) == level_for_ability(true) for (est, _, _), true in zip(runs, thetas))
+    print(f"{label:10} questions mean {statistics.mean(lengths):5.2f} "
+          f"(p50 {statistics.median(lengths):4.0f}, max {max(lengths):3d})  "
+          f"RMSE {statistics.mean(e * e for e in errors) ** 0.5:.3f}  "
+          f"mean SE {statistics.mean(se for _, se, _ in runs):.3f}  "
+          f"level agreement {agree / len(thetas) * 100:5.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Adaptive vs fixed placement test simulation')
+    parser.add_argument('--learners', type=int, default=1000)
+    parser.add_argument('--per-stratum', type=int, default=10, help='Questions per (category, level)')
+    parser.add_argument('--fixed-length', type=int, default=15)
+    parser.add_argument('--min-items', type=int, default=5)
+    parser.add_argument('--max-items', type=int, default=15)
+    parser.add_argument('--target-se', type=float, default=0.35)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    strata = build_bank(args.per_stratum, rng)
+    bank = [q for qs in strata.values() for q in qs]
+    engine = AdaptiveEngine(lambda: strata, min_items=args.min_items, max_items=args.max_items,
+                            target_se=args.target_se, rng=random.Random(args.seed))
+    thetas = [rng.gauss(0, 1.2) for _ in range(args.learners)]
+
+    print(f"{len(bank)} questions, {args.learners} learners, target SE {args.target_se}\n")
+    summarize('fixed', [run_fixed(t, bank, args.fixed_length, rng) for t in thetas], thetas)
+    adaptive = [run_adaptive(t, engine, rng) for t in thetas]
+    summarize('adaptive', adaptive, thetas)
+
+    print("\nQuestions to convergence (adaptive):")
+    lengths = [n for _, _, n in adaptive]
+    for n in range(min(lengths), max(lengths) + 1):
+        share = lengths.count(n) / len(lengths) * 100
+        print(f"  {n:3d} {'#' * int(share / 2):50} {share:5.1f}%")
+
+
+if __name__ == '__main__':
+    main()
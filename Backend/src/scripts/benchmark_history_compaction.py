@@ -0,0 +1,93 @@
+"""
+Benchmark of prompt size versus turn count for conversation history
+Compares the fixed "last N messages" windows used before with the
+token-budgeted HistoryCompactor on a synthetic speaking session that mixes
+short replies with long answers and feedback-heavy tutor turns
+
+Usage:
+    python scripts/benchmark_history_compaction.py --turns 60
+"""
+import argparse
+import random
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.history_compactor import HistoryCompactor, estimate_tokens
+
+SHORT_ANSWERS = ["Yes, I do.", "Not really.", "Maybe on Sunday.", "I think so!", "Phở, of course."]
+LONG_ANSWER = (
+    "Well, last summer I travelled with my family to Da Nang and we stayed near the beach "
+    "for almost a week, and every morning we went swimming before breakfast because the water "
+    "was still cool, then in the afternoon we visited the Marble Mountains and Hoi An. "
+)
+TUTOR_REPLY = (
+    "That sounds wonderful! What did you enjoy most about the trip?\n\n---\n"
+    "📝 **Feedback:** Good use of past tense. Try 'travelled to' instead of 'travelled in'.\n"
+    "📊 **Score:** Grammar 80 | Vocabulary 75 | Fluency 78"
+)
+
+
+def synth_session(turns: int, seed: int):
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(turns):
+        if rng.random() < 0.3:
+            answer = LONG_ANSWER * rng.randint(1, 3)
+        else:
+            answer = rng.choice(SHORT_ANSWERS)
+        messages.append({'role': 'user', 'text': answer})
+        messages.append({'role': 'model', 'text': TUTOR_REPLY})
+    return messages
+
+
+def window_tokens(messages, n):
+    return sum(estimate_tokens(m['text']) for m in messages[-n:])
+
+
+def run(turns: int, budget: int, seed: int, every: int):
+    messages = synth_session(turns, seed)
+    compactor = HistoryCompactor(budget_tokens=budget)
+
+    tail, summary = [], ''
+    compact_ns = []
+    stable_prefix = 0
+    prev_summary = None
+
+    print(f"{'turn':>5} {'full':>8} {'last-5':>8} {'last-10':>8} {'compactor':>10} {'summary':>8}")
+    for turn in range(1, turns + 1):
+        tail = tail + messages[(turn - 1) * 2:turn * 2]
+        start = time.perf_counter_ns()
+        result = compactor.compact(tail, summary)
+        compact_ns.append(time.perf_counter_ns() - start)
+        tail, summary = result.tail, result.summary
+        stable_prefix += summary == prev_summary
+        prev_summary = summary
+
+        if turn % every == 0 or turn == turns:
+            history = messages[:turn * 2]
+            print(
+                f"{turn:>5} {window_tokens(history, len(history)):>8} "
+                f"{window_tokens(history, 5):>8} {window_tokens(history, 10):>8} "
+                f"{compactor.prompt_tokens(tail, summary):>10} {estimate_tokens(summary):>8}"
+            )
+
+    print(f"\nBudget: {budget} tokens (+{compactor.summary_budget_tokens} summary)")
+    print(f"  compact():        {sum(compact_ns) / len(compact_ns) / 1000:8.2f} us/turn")
+    print(f"  summary unchanged: {stable_prefix}/{turns} turns (prompt prefix reusable)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='History compaction benchmark')
+    parser.add_argument('--turns', type=int, default=60)
+    parser.add_argument('--budget', type=int, default=1500)
+    parser.add_argument('--every', type=int, default=5, help='Print a row every N turns')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    run(args.turns, args.budget, args.seed, args.every)
+
+
+if __name__ == '__main__':
+    main()
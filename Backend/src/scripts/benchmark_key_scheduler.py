@@ -0,0 +1,134 @@
+"""
+Simulation benchmark for the Gemini key scheduler
+Replays a burst of AI calls against simulated per-key quotas and compares
+the old "stay on one key until it returns 429" rotation with GeminiScheduler
+
+Usage:
+    python scripts/benchmark_key_scheduler.py --keys 4 --rpm 15 --rate 1.5 --duration 300
+"""
+import argparse
+import random
+import statistics
+import sys
+import os
+from collections import deque
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.gemini_scheduler import GeminiScheduler, SchedulerBusy
+
+
+class SimClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class QuotaServer:
+    """Per-key sliding one-minute request window, like the real API quota"""
+
+    def __init__(self, keys, rpm, clock):
+        self.rpm = rpm
+        self.clock = clock
+        self.windows = [deque() for _ in range(keys)]
+        self.rejected = 0
+
+    def call(self, key):
+        window = self.windows[key]
+        while window and window[0] <= self.clock() - 60:
+            window.popleft()
+        if len(window) >= self.rpm:
+            self.rejected += 1
+            return False
+        window.append(self.clock())
+        return True
+
+
+def arrivals(rate, duration, seed):
+    rng = random.Random(seed)
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate)
+        if t > duration:
+            return
+        yield t
+
+
+def run_sticky(keys, rpm, rate, duration, seed):
+    """Old AIService behaviour: rotate only after a 429, ping the next key"""
+    clock = SimClock()
+    server = QuotaServer(keys, rpm, clock)
+    current, ok, failed = 0, 0, 0
+    for at in arrivals(rate, duration, seed):
+        clock.now = at
+        for _ in range(keys):
+            if server.call(current):
+                ok += 1
+                break
+            current = (current + 1) % keys
+            server.call(current)  # _get_active_model ping on the new key
+        else:
+            failed += 1
+    return ok, failed, server.rejected, []
+
+
+def run_scheduler(keys, rpm, rate, duration, seed, max_wait):
+    clock = SimClock()
+    server = QuotaServer(keys, rpm, clock)
+    scheduler = GeminiScheduler(['key'] * keys, rpm=rpm, tpm=10 ** 9, max_wait=max_wait,
+                                clock=clock, sleep=clock.sleep)
+    ok, failed, waits = 0, 0, []
+    for at in arrivals(rate, duration, seed):
+        # Calls are replayed in arrival order; a queued call delays later
+        # ones, which only wait what is left of their own deadline
+        clock.now = max(clock.now, at)
+        scheduler.max_wait = max_wait - (clock.now - at)
+        try:
+            if scheduler.max_wait <= 0:
+                raise SchedulerBusy()
+            slot = scheduler.acquire(500)
+        except SchedulerBusy:
+            failed += 1
+            continue
+        waits.append(clock.now - at)
+        if server.call(slot.index):
+            scheduler.release(slot, 500, 500)
+            ok += 1
+        else:
+            scheduler.penalize(slot)
+            failed += 1
+    return ok, failed, server.rejected, waits
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gemini key scheduler simulation')
+    parser.add_argument('--keys', type=int, default=4)
+    parser.add_argument('--rpm', type=int, default=15, help='Requests per minute per key')
+    parser.add_argument('--rate', type=float, default=1.5, help='Offered calls per second')
+    parser.add_argument('--duration', type=float, default=300.0, help='Simulated seconds')
+    parser.add_argument('--max-wait', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    capacity = args.keys * args.rpm / 60
+    print(f"{args.keys} keys x {args.rpm} rpm = {capacity:.2f} calls/s quota, "
+          f"offered {args.rate:.2f} calls/s for {args.duration:.0f}s\n")
+
+    for name, result in (
+        ('sticky rotation', run_sticky(args.keys, args.rpm, args.rate, args.duration, args.seed)),
+        ('scheduler', run_scheduler(args.keys, args.rpm, args.rate, args.duration, args.seed, args.max_wait)),
+    ):
+        ok, failed, rejected, waits = result
+        line = (f"{name:16} served {ok:5} ({ok / args.duration:.2f}/s)  failed {failed:5}  "
+                f"429s {rejected:5}")
+        if waits:
+            line += f"  queue wait avg {statistics.mean(waits):.2f}s max {max(waits):.2f}s"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Simulation benchmark for the study buddy matchmaking queue
+Drives MatchmakingQueue with thousands of concurrent seekers on a simulated
+clock and reports operation cost, match rate and wait times
+
+Usage:
+    python scripts/benchmark_matchmaking.py --seekers 5000 --duration 120
+"""
+import argparse
+import random
+import statistics
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.matchmaking_queue import MatchmakingQueue, LEVEL_ORDER
+
+TOPICS = ['travel', 'job-interview', 'daily-life', 'technology', 'food', None]
+
+
+class SimClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(seekers: int, duration: float, tick_every: float, cancel_rate: float, seed: int):
+    rng = random.Random(seed)
+    clock = SimClock()
+    queue = MatchmakingQueue(clock=clock)
+
+    # Poisson-ish arrivals spread over the simulated duration
+    arrivals = sorted(
+        (rng.uniform(0, duration), uid, rng.choice(LEVEL_ORDER), rng.choice(TOPICS))
+        for uid in range(1, seekers + 1)
+    )
+    arrived_at = {}
+    waits = []
+    cancelled = 0
+    enqueue_ns, position_ns, cancel_ns, tick_ns = [], [], [], []
+
+    next_tick = tick_every
+    for at, uid, level, topic in arrivals:
+        while next_tick <= at:
+            clock.now = next_tick
+            start = time.perf_counter_ns()
+            pairs = queue.tick()
+            tick_ns.append(time.perf_counter_ns() - start)
+            for a, b in pairs:
+                waits += [clock.now - arrived_at[a.user_id], clock.now - arrived_at[b.user_id]]
+            next_tick += tick_every
+
+        clock.now = at
+        arrived_at[uid] = at
+        start = time.perf_counter_ns()
+        partner = queue.enqueue(uid, level, topic)
+        enqueue_ns.append(time.perf_counter_ns() - start)
+        if partner:
+            waits += [0.0, at - arrived_at[partner.user_id]]
+            continue
+
+        start = time.perf_counter_ns()
+        queue.position(uid)
+        position_ns.append(time.perf_counter_ns() - start)
+
+        if rng.random() < cancel_rate:
+            start = time.perf_counter_ns()
+            queue.cancel(uid)
+            cancel_ns.append(time.perf_counter_ns() - start)
+            cancelled += 1
+
+    # Drain with ticks until relaxation can no longer help
+    end = duration + MatchmakingQueue.ADJACENT_LEVEL_AFTER + tick_every
+    while next_tick <= end:
+        clock.now = next_tick
+        start = time.perf_counter_ns()
+        for a, b in queue.tick():
+            waits += [clock.now - arrived_at[a.user_id], clock.now - arrived_at[b.user_id]]
+        tick_ns.append(time.perf_counter_ns() - start)
+        next_tick += tick_every
+
+    def us(values):
+        return statistics.mean(values) / 1000 if values else 0.0
+
+    print(f"Seekers: {seekers} over {duration:.0f}s simulated, tick every {tick_every:.1f}s")
+    print(f"  matched:     {len(waits)} ({len(waits) / seekers * 100:.1f}%)")
+    print(f"  cancelled:   {cancelled}")
+    print(f"  unmatched:   {len(queue)}")
+    print(f"  wait p50/p95/max: {percentile(waits, 50):.1f}s / {percentile(waits, 95):.1f}s / {max(waits or [0]):.1f}s")
+    print(f"  enqueue:     {us(enqueue_ns):8.2f} us/op")
+    print(f"  position:    {us(position_ns):8.2f} us/op")
+    print(f"  cancel:      {us(cancel_ns):8.2f} us/op")
+    print(f"  tick:        {us(tick_ns):8.2f} us/tick (max {max(tick_ns or [0]) / 1000:.0f} us)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Study buddy matchmaking simulation')
+    parser.add_argument('--seekers', type=int, default=5000)
+    parser.add_argument('--duration', type=float, default=120.0, help='Simulated arrival window in seconds')
+    parser.add_argument('--tick', type=float, default=2.0, help='Matcher tick interval in seconds')
+    parser.add_argument('--cancel-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    run(args.seekers, args.duration, args.tick, args.cancel_rate, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Calibrate the scrypt cost (PASSWORD_HASH_N) for this machine
+Doubles N until one hash takes at least the target latency, then reports
+per-hash latency and pool throughput for the chosen parameters
+
+Usage:
+    python scripts/calibrate_password_hash.py --target-ms 100
+"""
+import argparse
+import statistics
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.password_hasher import PasswordHasher
+
+
+def time_hash(hasher: PasswordHasher, rounds: int) -> float:
+    """Median milliseconds per hash"""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hasher.hash_sync('calibration-password')
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def measure_throughput(hasher: PasswordHasher, workers: int, total: int) -> float:
+    """Verifications per second using a pool of the given size"""
+    stored = hasher.hash_sync('calibration-password')
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda _: hasher.verify_sync('calibration-password', stored), range(total)))
+    return total / (time.perf_counter() - start)
+
+
+def calibrate(target_ms: float, r: int, p: int, rounds: int, max_log_n: int):
+    log_n = 10
+    while True:
+        hasher = PasswordHasher(n=2 ** log_n, r=r, p=p)
+        latency = time_hash(hasher, rounds)
+        print(f"  N=2^{log_n:<2} ({2 ** log_n:>8}) -> {latency:8.2f} ms")
+        if latency >= target_ms or log_n >= max_log_n:
+            return hasher, latency
+        log_n += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calibrate scrypt cost for password hashing')
+    parser.add_argument('--target-ms', type=float, default=100.0, help='Target latency per hash')
+    parser.add_argument('--r', type=int, default=8, help='scrypt block size')
+    parser.add_argument('--p', type=int, default=1, help='scrypt parallelism')
+    parser.add_argument('--rounds', type=int, default=5, help='Samples per candidate N')
+    parser.add_argument('--max-log-n', type=int, default=20, help='Upper bound for log2(N)')
+    parser.add_argument('--workers', type=int, default=2, help='Pool size to measure throughput with')
+    args = parser.parse_args()
+
+    print(f"Calibrating scrypt for ~{args.target_ms:.0f} ms per hash (r={args.r}, p={args.p})")
+    hasher, latency = calibrate(args.target_ms, args.r, args.p, args.rounds, args.max_log_n)
+
+    throughput = measure_throughput(hasher, args.workers, total=args.workers * 10)
+    memory_mb = 128 * hasher.n * hasher.r / (1024 * 1024)
+
+    print()
+    print(f"Chosen: N={hasher.n} r={hasher.r} p={hasher.p}")
+    print(f"  latency:    {latency:.2f} ms/hash")
+    print(f"  memory:     {memory_mb:.1f} MB/hash")
+    print(f"  throughput: {throughput:.1f} logins/s with {args.workers} workers")
+    print()
+    print("Add to .env:")
+    print(f"PASSWORD_HASH_N={hasher.n}")
+    print(f"PASSWORD_HASH_R={hasher.r}")
+    print(f"PASSWORD_HASH_P={hasher.p}")
+    print(f"PASSWORD_HASH_WORKERS={args.workers}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Offline calibration of placement question IRT parameters
+Reads per-item outcomes stored on placement_test_results, fits item
+difficulty (and optionally discrimination) and writes them to
+placement_questions. Saving publishes a new question bank generation
+(services.shared_generations), so running workers reload the bank within
+SharedGenerations.CHECK_INTERVAL seconds, without a restart.
+
+Results saved before per-item outcomes were recorded carry no responses
+and are skipped.
+
+Usage:
+    python scripts/calibrate_placement_items.py --dry-run
+    python scripts/calibrate_placement_items.py --min-responses 50 --discrimination
+"""
+import argparse
+import json
+import sys
+import os
+from datetime import datetime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from infrastructure.databases.mssql import get_db_session
+from infrastructure.models.placement_test_model import PlacementQuestionModel, PlacementTestResultModel
+from services.adaptive_placement import ItemParams, calibrate
+from services.question_bank import question_bank
+
+
+def load_response_sets(session):
+    response_sets = []
+    rows = session.query(PlacementTestResultModel.responses)\
+        .filter(PlacementTestResultModel.responses.isnot(None)).all()
+    for (raw,) in rows:
+        try:
+            outcomes = json.loads(raw)
+        except (TypeError, ValueError):
+            continue
+        # Only database questions are calibrated; seed-bank answers are keyed 'seed:<n>'
+        outcomes = {int(key): bool(ok) for key, ok in (outcomes or {}).items() if str(key).isdigit()}
+        if outcomes:
+            response_sets.append(outcomes)
+    return response_sets
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calibrate placement question IRT parameters')
+    parser.add_argument('--min-responses', type=int, default=30, help='Answers needed before an item is calibrated')
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--discrimination', action='store_true', help='Also fit discrimination (needs more data)')
+    parser.add_argument('--dry-run', action='store_true', help='Print the new parameters without saving')
+    args = parser.parse_args()
+
+    with get_db_session() as session:
+        response_sets = load_response_sets(session)
+        questions = {q.id: q for q in session.query(PlacementQuestionModel).all()}
+        print(f"{len(response_sets)} tests with per-item outcomes, {len(questions)} questions")
+
+        items = {
+            qid: ItemParams.for_level(q.difficulty_level, a=q.irt_discrimination, b=q.irt_difficulty,
+                                      c=q.irt_guessing)
+            for qid, q in questions.items()
+        }
+        fitted = calibrate(
+            response_sets, items,
+            min_responses=args.min_responses,
+            iterations=args.iterations,
+            calibrate_discrimination=args.discrimination
+        )
+
+        print(f"\n{'id':>6} {'level':>5} {'n':>6} {'a':>12} {'b':>14}")
+        for qid in sorted(fitted):
+            old, new = items[qid], fitted[qid]
+            print(f"{qid:>6} {questions[qid].difficulty_level:>5} {new['responses']:>6} "
+                  f"{old.a:>5.2f}->{new['a']:<5.2f} {old.b:>6.2f}->{new['b']:<6.2f}")
+
+        if args.dry_run or not fitted:
+            print(f"\n{len(fitted)} items calibrated, nothing saved")
+            session.rollback()
+            return
+
+        now = datetime.now()
+        for qid, params in fitted.items():
+            q = questions[qid]
+            q.irt_discrimination = params['a']
+            q.irt_difficulty = params['b']
+            q.irt_guessing = params['c']
+            q.calibrated_responses = params['responses']
+            q.calibrated_at = now
+        print(f"\nSaved parameters of {len(fitted)} items")
+
+    # Also done by the commit hook; explicit so the publish does not depend on it
+    question_bank.invalidate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""
+Precompile data/vocabulary_database.json for a faster cold start
+Writes data/vocabulary_database.json.bin, which VocabularyStore memory-maps
+instead of parsing the JSON as long as the JSON file is unchanged
+
+Usage:
+    python scripts/compile_vocabulary.py
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.vocabulary_store import VocabularyStore
+
+
+def main():
+    store = VocabularyStore()
+    out = store.compile()
+    print(f"Wrote {out} ({os.path.getsize(out)} bytes)")
+
+    stat = os.stat(store.path)
+    for label, load in (('json', store._load_json), ('binary', lambda: store._load_binary(stat))):
+        start = time.perf_counter()
+        load()
+        print(f"  load from {label}: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
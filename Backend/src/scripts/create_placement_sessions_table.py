@@ -0,0 +1,47 @@
+"""
+Create placement_adaptive_sessions, where running adaptive placement
+tests are kept so that any worker can serve their next answer
+"""
+import sys
+sys.path.insert(0, '.')
+
+from infrastructure.databases.mssql import engine
+from sqlalchemy import text
+
+
+def create_placement_sessions_table():
+    """Create the placement_adaptive_sessions table if it doesn't exist"""
+
+    print("Creating placement_adaptive_sessions table...")
+    print(f"Database: {engine.url}\n")
+
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS placement_adaptive_sessions (
+        id VARCHAR(32) PRIMARY KEY,
+        user_id INT NOT NULL,
+        answered INT DEFAULT 0,
+        state TEXT NOT NULL,
+        started_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES flask_user(id),
+        INDEX ix_placement_adaptive_sessions_user_id (user_id),
+        INDEX ix_placement_adaptive_sessions_updated_at (updated_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """
+
+    with engine.connect() as conn:
+        try:
+            conn.execute(text(create_table_sql))
+            conn.commit()
+            print("  ✓ placement_adaptive_sessions table created successfully")
+        except Exception as e:
+            if "already exists" in str(e).lower():
+                print("  - placement_adaptive_sessions table already exists, skipping")
+            else:
+                print(f"  ✗ Error creating placement_adaptive_sessions table: {e}")
+
+    print("\nMigration completed!")
+
+
+if __name__ == "__main__":
+    create_placement_sessions_table()
@@ -18,8 +18,8 @@ def fix_admin_password():
         print("Admin user not found!")
         return False
     
-    # Check if password is already hashed (hashed passwords are 64 chars for SHA-256)
-    if len(admin.password) == 64:
+    # Check if password is already hashed (scrypt format or legacy 64-char SHA-256)
+    if admin.password.startswith('scrypt$') or len(admin.password) == 64:
         print("Admin password is already hashed.")
         return True
     
@@ -0,0 +1,262 @@
+"""
+Load test for the AI practice endpoints
+Drives the Flask app over HTTP and Socket.IO with N simulated learners
+and reports throughput, latency percentiles and error rates per endpoint
+
+Each learner goes online over Socket.IO, runs a practice session (start,
+chat turns, complete), a speaking-drill conversation and one placement
+speaking evaluation, then disconnects.
+
+By default the app runs in-process (Flask / Socket.IO test clients) with
+the offline fake Gemini backend, so no network or API quota is used:
+
+    python scripts/load_test_ai.py --learners 50 --turns 5 --latency-ms 600 --error-rate 0.02
+
+Against a running server (start it with AI_BACKEND=fake to stay offline):
+
+    python scripts/load_test_ai.py --url http://localhost:5000 --learners 50
+"""
+import argparse
+import json
+import random
+import sys
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ANSWERS = [
+    "I usually go to the park with my family on weekends.",
+    "I work as a software developer in Hanoi and I like my job.",
+    "Last summer I travelled to Da Nang, the beach was beautiful.",
+    "My favourite food is pho because it is warm and tasty.",
+    "I am learning English because I want to study abroad.",
+]
+
+
+class Recorder:
+    """Latencies and errors per endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, endpoint: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            entry = self.samples.setdefault(endpoint, {'latencies': [], 'errors': 0})
+            entry['latencies'].append(seconds)
+            if not ok:
+                entry['errors'] += 1
+
+    def report(self, wall_seconds: float) -> None:
+        def pct(values, p):
+            return values[min(len(values) - 1, int(len(values) * p / 100))] * 1000
+
+        print(f"\n{'endpoint':44} {'count':>6} {'err%':>6} {'req/s':>7} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for endpoint in sorted(self.samples):
+            entry = self.samples[endpoint]
+            values = sorted(entry['latencies'])
+            count = len(values)
+            print(f"{endpoint:44} {count:>6} {entry['errors'] / count * 100:>5.1f}% "
+                  f"{count / wall_seconds:>7.2f} {pct(values, 50):>8.0f} {pct(values, 95):>8.0f} "
+                  f"{pct(values, 99):>8.0f} {values[-1] * 1000:>8.0f}")
+
+
+# ============ Transports ============
+
+class InProcessClient:
+    """Flask and Socket.IO test clients against an app in this process"""
+
+    def __init__(self, app, socketio):
+        self.http = app.test_client()
+        self._app = app
+        self._socketio = socketio
+        self.sio = None
+
+    def post(self, path, payload):
+        response = self.http.post(path, json=payload)
+        return response.status_code, response.get_json(silent=True) or {}
+
+    def socket_connect(self):
+        self.sio = self._socketio.test_client(self._app)
+        return self.sio.is_connected()
+
+    def socket_emit(self, event, data, expect=None, timeout=5.0):
+        self.sio.get_received()  # drop broadcasts from earlier steps
+        self.sio.emit(event, data)
+        if not expect:
+            return True
+        # Test client delivers synchronously; the reply is already queued
+        return any(msg['name'] == expect for msg in self.sio.get_received())
+
+    def socket_disconnect(self):
+        if self.sio and self.sio.is_connected():
+            self.sio.disconnect()
+        return not (self.sio and self.sio.is_connected())
+
+
+class RemoteClient:
+    """urllib for HTTP and python-socketio's client against a running server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.sio = None
+        self._events = {}
+
+    def post(self, path, payload):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                return response.status, json.loads(response.read() or b'{}')
+        except urllib.error.HTTPError as e:
+            return e.code, {}
+
+    def socket_connect(self):
+        import socketio
+        self.sio = socketio.Client(reconnection=False)
+
+        def make_handler(name):
+            def handler(*args):
+                self._events.setdefault(name, threading.Event()).set()
+            return handler
+        self.sio.on('user_status_update', make_handler('user_status_update'))
+        self.sio.connect(self.base_url, wait_timeout=10)
+        return self.sio.connected
+
+    def socket_emit(self, event, data, expect=None, timeout=5.0):
+        if expect:
+            self._events[expect] = threading.Event()
+        self.sio.emit(event, data)
+        return self._events[expect].wait(timeout) if expect else True
+
+    def socket_disconnect(self):
+        if self.sio and self.sio.connected:
+            self.sio.disconnect()
+        return not (self.sio and self.sio.connected)
+
+
+# ============ Learner scenario ============
+
+def timed(recorder, endpoint, fn):
+    start = time.perf_counter()
+    try:
+        ok, result = fn()
+    except Exception:
+        ok, result = False, None
+    recorder.add(endpoint, time.perf_counter() - start, ok)
+    return result
+
+
+def post_step(recorder, client, path, payload):
+    def call():
+        status, body = client.post(path, payload)
+        return status < 400 and not body.get('error'), body
+    return timed(recorder, f"POST {path}", call)
+
+
+def run_learner(user_id, client, recorder, turns, rng):
+    timed(recorder, 'WS connect', lambda: (client.socket_connect(), None))
+    timed(recorder, 'WS user_online', lambda: (client.socket_emit('user_online', {'userId': user_id}), None))
+    timed(recorder, 'WS check_user_online', lambda: (
+        client.socket_emit('check_user_online', {'userId': user_id}, expect='user_status_update'), None))
+
+    # Practice session with the AI tutor
+    started = post_step(recorder, client, '/api/practice/start', {'user_id': user_id, 'topic': 'travel'})
+    session_id = (started or {}).get('session_id')
+    if session_id:
+        for _ in range(turns):
+            post_step(recorder, client, '/api/practice/chat',
+                      {'session_id': session_id, 'message': rng.choice(ANSWERS)})
+        post_step(recorder, client, '/api/practice/complete', {'session_id': session_id})
+
+    # Speaking drill conversation
+    history, summary = [{'role': 'ai', 'text': "Hi! What do you like to do on weekends?"}], None
+    for _ in range(turns):
+        text = rng.choice(ANSWERS)
+        body = post_step(recorder, client, '/api/speaking-drills/conversation/respond', {
+            'user_id': user_id, 'user_text': text, 'conversation_history': history,
+            'history_summary': summary, 'topic': 'Daily life'
+        }) or {}
+        history = history + [{'role': 'user', 'text': text}, {'role': 'ai', 'text': body.get('ai_response', '')}]
+        summary = body.get('history_summary')
+
+    # Placement speaking evaluation
+    post_step(recorder, client, '/api/placement-test/speaking/evaluate', {
+        'user_id': user_id, 'prompt_id': 1, 'transcription': ' '.join(rng.sample(ANSWERS, 2))
+    })
+
+    timed(recorder, 'WS disconnect', lambda: (client.socket_disconnect(), None))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test for AI practice endpoints')
+    parser.add_argument('--learners', type=int, default=20)
+    parser.add_argument('--turns', type=int, default=4, help='Chat / drill turns per learner')
+    parser.add_argument('--ramp-up', type=float, default=5.0, help='Seconds over which learners start')
+    parser.add_argument('--user-base', type=int, default=900000, help='First simulated user id')
+    parser.add_argument('--url', help='Target a running server instead of an in-process app')
+    parser.add_argument('--keys', type=int, default=2, help='Fake API keys (in-process only)')
+    parser.add_argument('--rpm', type=int, default=60, help='Scheduler rpm per fake key (in-process only)')
+    parser.add_argument('--latency-ms', type=float, default=600)
+    parser.add_argument('--latency-p99-ms', type=float, default=2500)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Random 429 rate of the fake')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Malformed JSON rate of the fake')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    backend = None
+    if args.url:
+        make_client = lambda: RemoteClient(args.url)
+    else:
+        from app import create_app
+        from api.websocket import socketio
+        from services.ai_service import AIService
+        from services.fake_gemini import FakeGeminiBackend
+
+        app = create_app()
+        backend = FakeGeminiBackend(
+            latency_ms=args.latency_ms, latency_p99_ms=args.latency_p99_ms,
+            error_rate=args.error_rate, malformed_rate=args.malformed_rate, seed=args.seed
+        )
+        AIService.use_backend(backend, keys=[f"fake-key-{i}" for i in range(args.keys)], rpm=args.rpm)
+        make_client = lambda: InProcessClient(app, socketio)
+
+    recorder = Recorder()
+    delay = args.ramp_up / max(1, args.learners)
+
+    def learner(i):
+        time.sleep(i * delay)
+        run_learner(args.user_base + i, make_client(), recorder, args.turns, random.Random(args.seed + i))
+
+    print(f"{args.learners} learners, {args.turns} turns each, ramp-up {args.ramp_up:.0f}s, "
+          f"target {'in-process app' if not args.url else args.url}")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.learners) as pool:
+        list(pool.map(learner, range(args.learners)))
+    wall = time.perf_counter() - start
+
+    total = sum(len(e['latencies']) for e in recorder.samples.values())
+    errors = sum(e['errors'] for e in recorder.samples.values())
+    print(f"Wall time {wall:.1f}s, {total} requests ({total / wall:.1f}/s), "
+          f"{errors} errors ({errors / max(1, total) * 100:.1f}%)")
+    recorder.report(wall)
+
+    if backend is not None:
+        from services.ai_service import AIService
+        print(f"\nFake Gemini: {backend.stats}")
+        print(f"Structured output: {json.dumps(AIService.get_structured_stats(), indent=2)}")
+        keys = AIService.get_scheduler_stats()['keys']
+        print("Scheduler: " + ', '.join(f"key {k['index']} served {k['served']} throttled {k['throttled']}" for k in keys))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""
+Rebuild learner_progress aggregates from history
+Replays completed practice sessions, assessments and challenges through the
+same fold() the live events use, in one streaming pass: each history is
+read in (user, time) order on its own connection and the three are merged,
+so memory stays at one learner plus a batch of progress rows.
+
+XP is a balance (rewards spend it) and is left as it is. The longest
+streak never decreases. --decay only zeroes lapsed streaks (cheap enough
+to run daily).
+
+Usage:
+    python scripts/rebuild_progress.py
+    python scripts/rebuild_progress.py --user-id 42 --dry-run
+    python scripts/rebuild_progress.py --decay
+"""
+import argparse
+import heapq
+import json
+import sys
+import os
+from itertools import groupby
+from types import SimpleNamespace
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from infrastructure.databases.mssql import engine, get_db_session
+from infrastructure.models.practice_session_model import PracticeSessionModel
+from infrastructure.models.assessment_model import AssessmentModel
+from infrastructure.models.challenge_models import UserChallengeModel
+from infrastructure.models.progress_model import ProgressModel
+from services.progress_aggregator import (
+    progress_aggregator, fold, current_streak, session_event, assessment_event, challenge_event
+)
+
+SCORE_FIELDS = ('vocabulary_score', 'grammar_score', 'pronunciation_score', 'fluency_score', 'overall_score')
+
+
+def _stream(statement, batch):
+    """Rows of a SELECT fetched batch by batch from a server-side cursor"""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch).execute(statement)
+        for row in result:
+            yield row
+
+
+def _events(user_id, batch):
+    P, A, C = PracticeSessionModel, AssessmentModel, UserChallengeModel
+    ended = func.coalesce(P.ended_at, P.created_at)
+    sessions = select(
+        P.user_id, P.duration_minutes, P.started_at, P.ended_at, P.created_at,
+        P.vocabulary_score, P.grammar_score, P.pronunciation_score, P.fluency_score, P.overall_score
+    ).where(P.is_completed == True, ended.isnot(None)).order_by(P.user_id, ended)
+    assessments = select(
+        A.user_id, A.completed_at, A.determined_level,
+        A.vocabulary_score, A.grammar_score, A.pronunciation_score, A.speaking_score, A.overall_score
+    ).where(A.is_completed == True, A.completed_at.isnot(None)).order_by(A.user_id, A.completed_at)
+    challenges = select(C.user_id, C.completed_at).where(
+        C.status == 'completed', C.completed_at.isnot(None)
+    ).order_by(C.user_id, C.completed_at)
+    if user_id:
+        sessions = sessions.where(P.user_id == user_id)
+        assessments = assessments.where(A.user_id == user_id)
+        challenges = challenges.where(C.user_id == user_id)
+
+    return heapq.merge(
+        (session_event(row) for row in _stream(sessions, batch)),
+        (assessment_event(row) for row in _stream(assessments, batch)),
+        (challenge_event(row.user_id, 0, row.completed_at) for row in _stream(challenges, batch)),
+        key=lambda event: (event['user_id'], event['at'])
+    )
+
+
+def _fresh():
+    return SimpleNamespace(
+        total_sessions=0, total_practice_hours=0.0, xp_points=0, current_streak=0, longest_streak=0,
+        current_level=None, last_active_date=None, activity_bitmap=0, skill_samples=None,
+        **{field: 0 for field in SCORE_FIELDS}
+    )
+
+
+def _write(states, dry_run):
+    """Store a batch of rebuilt aggregates (one SELECT for the batch's rows)"""
+    with get_db_session() as session:
+        rows = {
+            p.user_id: p for p in session.query(ProgressModel).filter(ProgressModel.user_id.in_(list(states)))
+        }
+        for user_id, state in states.items():
+            progress = rows.get(user_id) or progress_aggregator.get_or_create(session, user_id, lock=False)
+            progress.total_sessions = state.total_sessions
+            progress.total_practice_hours = state.total_practice_hours
+            progress.last_active_date = state.last_active_date
+            progress.activity_bitmap = state.activity_bitmap
+            progress.current_streak = current_streak(state)
+            progress.longest_streak = max(progress.longest_streak or 0, state.longest_streak)
+            progress.skill_samples = state.skill_samples
+            sampled = json.loads(state.skill_samples or '{}')
+            for skill in sampled:
+                setattr(progress, f"{skill}_score", getattr(state, f"{skill}_score"))
+            if state.current_level:
+                progress.current_level = state.current_level
+            if dry_run:
+                print(f"  user {user_id}: {state.total_sessions} sessions, "
+                      f"{state.total_practice_hours:.1f} h, streak {progress.current_streak} "
+                      f"(longest {progress.longest_streak}), overall {progress.overall_score}")
+        if dry_run:
+            session.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user-id', type=int, help='only rebuild this learner')
+    parser.add_argument('--batch', type=int, default=500, help='rows fetched / learners written per batch')
+    parser.add_argument('--dry-run', action='store_true', help='print the rebuilt numbers without saving')
+    parser.add_argument('--decay', action='store_true', help='only zero lapsed streaks')
+    args = parser.parse_args()
+
+    if args.decay:
+        with get_db_session() as session:
+            print(f"Reset {progress_aggregator.decay_streaks(session)} lapsed streaks")
+        return
+
+    print("Rebuilding learner progress from history...")
+    pending, learners, events = {}, 0, 0
+    for user_id, user_events in groupby(_events(args.user_id, args.batch), key=lambda e: e['user_id']):
+        state = _fresh()
+        for event in user_events:
+            fold(state, event)
+            events += 1
+        pending[user_id] = state
+        learners += 1
+        if len(pending) >= args.batch:
+            _write(pending, args.dry_run)
+            pending = {}
+            print(f"  {learners} learners, {events} events")
+    if pending:
+        _write(pending, args.dry_run)
+
+    print(f"\nDone: {learners} learners from {events} events{' (dry run)' if args.dry_run else ''}")
+
+
+if __name__ == "__main__":
+    main()
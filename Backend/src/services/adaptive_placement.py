@@ -0,0 +1,361 @@
+"""
+Adaptive Placement Test Engine
+Item response theory (3PL) ability estimation, maximum-information item
+selection and offline item calibration for the placement test
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import math
+import random
+import threading
+import time
+import uuid
+
+D = 1.7  # logistic scaling constant (normal-ogive approximation)
+
+# Default item difficulty per CEFR level until an item is calibrated
+LEVEL_DIFFICULTY = {'A1': -2.0, 'A2': -1.0, 'B1': 0.0, 'B2': 1.0, 'C1': 2.0, 'C2': 2.5}
+DEFAULT_DISCRIMINATION = 1.0
+DEFAULT_GUESSING = 0.25  # four options
+
+# Ability cut points between levels (midway between level difficulties)
+LEVEL_CUTS = (('A1', -1.5), ('A2', -0.5), ('B1', 0.5), ('B2', 1.5))
+TOP_LEVEL = 'C1'  # highest level the placement test assigns
+
+# EAP quadrature grid with a standard normal prior
+GRID = [i / 10.0 for i in range(-40, 41)]
+PRIOR = [math.exp(-t * t / 2) for t in GRID]
+
+
+class ItemParams:
+    """3PL parameters of one question"""
+    __slots__ = ('a', 'b', 'c')
+
+    def __init__(self, a: float = DEFAULT_DISCRIMINATION, b: float = 0.0, c: float = DEFAULT_GUESSING):
+        self.a = a
+        self.b = b
+        self.c = c
+
+    @classmethod
+    def for_level(cls, level: str, a: float = None, b: float = None, c: float = None) -> 'ItemParams':
+        return cls(
+            a if a is not None else DEFAULT_DISCRIMINATION,
+            b if b is not None else LEVEL_DIFFICULTY.get(level, 0.0),
+            c if c is not None else DEFAULT_GUESSING
+        )
+
+
+def probability(theta: float, item: ItemParams) -> float:
+    """Chance that a learner of ability theta answers the item correctly"""
+    z = max(-30.0, min(30.0, D * item.a * (theta - item.b)))
+    return item.c + (1 - item.c) / (1 + math.exp(-z))
+
+
+def information(theta: float, item: ItemParams) -> float:
+    """Fisher information of the item at theta"""
+    p = probability(theta, item)
+    if p <= item.c or p >= 1:
+        return 0.0
+    return (D * item.a) ** 2 * ((1 - p) / p) * ((p - item.c) / (1 - item.c)) ** 2
+
+
+def estimate_ability(responses: Iterable[Tuple[ItemParams, bool]]) -> Tuple[float, float]:
+    """
+    Expected a posteriori ability and its standard error
+
+    EAP over a fixed grid is defined for all-correct / all-wrong patterns,
+    where maximum likelihood runs off to infinity.
+    """
+    posterior = list(PRIOR)
+    for item, correct in responses:
+        for i, theta in enumerate(GRID):
+            p = probability(theta, item)
+            posterior[i] *= p if correct else (1 - p)
+    total = sum(posterior) or 1e-300
+    mean = sum(t * w for t, w in zip(GRID, posterior)) / total
+    variance = sum((t - mean) ** 2 * w for t, w in zip(GRID, posterior)) / total
+    return mean, math.sqrt(variance)
+
+
+def level_for_ability(theta: float) -> str:
+    for level, cut in LEVEL_CUTS:
+        if theta < cut:
+            return level
+    return TOP_LEVEL
+
+
+def nearest_level(theta: float) -> str:
+    return min(LEVEL_DIFFICULTY, key=lambda level: abs(LEVEL_DIFFICULTY[level] - theta))
+
+
+# ============ Test sessions ============
+
+class ConcurrentAnswer(Exception):
+    """The test moved on (another answer was saved) since it was loaded"""
+
+
+class AdaptiveTest:
+    """State of one learner's adaptive test"""
+
+    def __init__(self, user_id: int, min_items: int, max_items: int, target_se: float, test_id: str = None):
+        self.id = test_id or uuid.uuid4().hex
+        self.user_id = user_id
+        self.min_items = min_items
+        self.max_items = max_items
+        self.target_se = target_se
+        self.responses: List[Tuple[object, str, bool]] = []  # (question, answer, correct)
+        self.pending = None  # question served and not yet answered
+        self.theta = 0.0
+        self.se = 1.0
+        self.started_at = time.time()
+        self.touched_at = time.monotonic()
+        self.finished = False
+
+    @property
+    def asked_ids(self):
+        ids = {q.id for q, _, _ in self.responses}
+        if self.pending is not None:
+            ids.add(self.pending.id)
+        return ids
+
+    def should_stop(self) -> bool:
+        answered = len(self.responses)
+        if answered >= self.max_items:
+            return True
+        return answered >= self.min_items and self.se <= self.target_se
+
+    def to_state(self) -> Dict:
+        """JSON-serializable state; questions are stored by id"""
+        return {
+            'user_id': self.user_id,
+            'responses': [[q.id, answer, correct] for q, answer, correct in self.responses],
+            'pending': self.pending.id if self.pending is not None else None,
+            'theta': self.theta,
+            'se': self.se,
+            'started_at': self.started_at,
+        }
+
+    @classmethod
+    def from_state(cls, test_id: str, state: Dict, lookup, min_items: int, max_items: int,
+                   target_se: float) -> Optional['AdaptiveTest']:
+        """Rebuild a test from to_state(); None if one of its questions is gone"""
+        test = cls(state['user_id'], min_items, max_items, target_se, test_id=test_id)
+        for question_id, answer, correct in state['responses']:
+            question = lookup(question_id)
+            if question is None:
+                return None
+            test.responses.append((question, answer, correct))
+        if state.get('pending') is not None:
+            test.pending = lookup(state['pending'])
+            if test.pending is None:
+                return None
+        test.theta = state['theta']
+        test.se = state['se']
+        test.started_at = state['started_at']
+        return test
+
+
+class AdaptiveEngine:
+    """
+    Computerized adaptive placement test
+
+    After each answer the ability estimate (EAP) and its standard error are
+    recomputed. The next item is the most informative at the current
+    estimate, looked up through the (category, difficulty) index: only
+    strata at the nearest CEFR level and its neighbours are scanned, for
+    the category answered least so far. A random pick among the TOP_K most
+    informative items limits over-exposure of the best items. The test
+    stops once the standard error reaches target_se (after min_items) or
+    at max_items.
+
+    Questions are objects with id, category, difficulty_level and irt
+    (ItemParams). strata_source returns {(category, level): [question]}.
+
+    Running tests are kept in this process unless a store is given: an
+    object with question(id), insert(test), update(test, answered_before),
+    load(test_id, ttl), delete(test_id) and expire(ttl) that keeps them
+    where every worker can reach them (see question_bank.AdaptiveTestStore).
+    """
+
+    TOP_K = 3
+    SESSION_TTL = 3600  # seconds
+
+    def __init__(self, strata_source, min_items: int = 5, max_items: int = 15, target_se: float = 0.35,
+                 rng: random.Random = None, store=None):
+        self._strata_source = strata_source
+        self._store = store
+        self.min_items = min_items
+        self.max_items = max_items
+        self.target_se = target_se
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._tests: Dict[str, AdaptiveTest] = {}
+
+    # ============ Sessions ============
+
+    def start(self, user_id: int) -> Tuple[AdaptiveTest, Optional[object]]:
+        self._expire()
+        test = AdaptiveTest(user_id, self.min_items, self.max_items, self.target_se)
+        question = self.next_item(test)
+        test.pending = question
+        if self._store is not None:
+            self._store.insert(test)
+            return test, question
+        with self._lock:
+            self._tests[test.id] = test
+        return test, question
+
+    def get(self, test_id: str) -> Optional[AdaptiveTest]:
+        if self._store is None:
+            return self._tests.get(test_id)
+        state = self._store.load(test_id, self.SESSION_TTL)
+        if state is None:
+            return None
+        return AdaptiveTest.from_state(test_id, state, self._store.question,
+                                       self.min_items, self.max_items, self.target_se)
+
+    def finish(self, test: AdaptiveTest) -> None:
+        test.finished = True
+        if self._store is not None:
+            self._store.delete(test.id)
+            return
+        with self._lock:
+            self._tests.pop(test.id, None)
+
+    def _expire(self) -> None:
+        if self._store is not None:
+            self._store.expire(self.SESSION_TTL)
+            return
+        cutoff = time.monotonic() - self.SESSION_TTL
+        with self._lock:
+            for test_id in [k for k, t in self._tests.items() if t.touched_at < cutoff]:
+                del self._tests[test_id]
+
+    # ============ Answering ============
+
+    def answer(self, test: AdaptiveTest, question, answer: str, correct: bool) -> Optional[object]:
+        """
+        Record an answer; returns the next question, or None when the test
+        is over. With a store, raises ConcurrentAnswer if the stored test
+        was answered since it was loaded.
+        """
+        answered_before = len(test.responses)
+        test.touched_at = time.monotonic()
+        test.pending = None
+        test.responses.append((question, answer, correct))
+        test.theta, test.se = estimate_ability((q.irt, c) for q, _, c in test.responses)
+        if not test.should_stop():
+            test.pending = self.next_item(test)  # None: bank exhausted
+        if self._store is not None:
+            self._store.update(test, answered_before)
+        return test.pending
+
+    # ============ Item selection ============
+
+    def _category_order(self, test: AdaptiveTest, categories: Sequence[str]) -> List[str]:
+        counts = {c: 0 for c in categories}
+        for q, _, _ in test.responses:
+            counts[q.category] = counts.get(q.category, 0) + 1
+        return sorted(categories, key=lambda c: (counts.get(c, 0), self._rng.random()))
+
+    def next_item(self, test: AdaptiveTest):
+        strata = self._strata_source()
+        if not strata:
+            return None
+        asked = test.asked_ids
+        levels = list(LEVEL_DIFFICULTY)
+        centre = levels.index(nearest_level(test.theta))
+        window = [levels[i] for i in range(max(0, centre - 1), min(len(levels), centre + 2))]
+        categories = sorted({category for category, _ in strata})
+
+        # Least-covered category first; widen to every level if the window is used up
+        for level_set in (window, levels):
+            for category in self._category_order(test, categories):
+                candidates = [
+                    q for level in level_set for q in strata.get((category, level), ())
+                    if q.id not in asked
+                ]
+                if candidates:
+                    candidates.sort(key=lambda q: information(test.theta, q.irt), reverse=True)
+                    return self._rng.choice(candidates[:self.TOP_K])
+        return None
+
+
+# ============ Calibration ============
+
+def calibrate(
+    response_sets: Sequence[Dict[object, bool]],
+    items: Dict[object, ItemParams],
+    min_responses: int = 30,
+    iterations: int = 3,
+    calibrate_discrimination: bool = False,
+    prior_sd_b: float = 0.5,
+    prior_sd_a: float = 0.4
+) -> Dict[object, Dict]:
+    """
+    Alternating maximum a posteriori calibration of item parameters
+
+    response_sets holds one {item_id: correct} dict per past test. Each
+    round estimates every learner's ability (EAP with the current
+    parameters), then moves each item's difficulty (and discrimination)
+    with a few Fisher-scoring steps of its posterior given those
+    abilities. Normal priors centred on the starting parameters keep
+    items that few learners can inform (very easy / very hard) from
+    drifting. Guessing stays fixed. Items with fewer than min_responses answers keep
+    their current parameters. Returns {item_id: {'a', 'b', 'c', 'responses'}}
+    for the items that were calibrated.
+    """
+    counts: Dict[object, int] = {}
+    for responses in response_sets:
+        for item_id in responses:
+            if item_id in items:
+                counts[item_id] = counts.get(item_id, 0) + 1
+    targets = {item_id for item_id, n in counts.items() if n >= min_responses}
+    params = {k: ItemParams(v.a, v.b, v.c) for k, v in items.items()}
+
+    for _ in range(iterations):
+        thetas = [
+            estimate_ability((params[i], c) for i, c in responses.items() if i in params)[0]
+            for responses in response_sets
+        ]
+        by_item: Dict[object, List[Tuple[float, bool]]] = {i: [] for i in targets}
+        for theta, responses in zip(thetas, response_sets):
+            for item_id, correct in responses.items():
+                if item_id in by_item:
+                    by_item[item_id].append((theta, correct))
+
+        for item_id, observations in by_item.items():
+            item, prior = params[item_id], items[item_id]
+            for _ in range(3):
+                # Gradient / expected information of the log-posterior in b (and a)
+                grad_b = -(item.b - prior.b) / prior_sd_b ** 2
+                info_b = 1 / prior_sd_b ** 2
+                grad_a = -(item.a - prior.a) / prior_sd_a ** 2
+                info_a = 1 / prior_sd_a ** 2
+                for theta, correct in observations:
+                    p = probability(theta, item)
+                    p = min(max(p, 1e-6), 1 - 1e-6)
+                    p_star = (p - item.c) / (1 - item.c)
+                    weight = p_star / p
+                    residual = (1.0 if correct else 0.0) - p
+                    grad_b += -D * item.a * weight * residual
+                    grad_a += D * (theta - item.b) * weight * residual
+                    common = (D * (1 - item.c) * p_star * (1 - p_star)) ** 2 / (p * (1 - p))
+                    info_b += common * item.a ** 2
+                    info_a += common * (theta - item.b) ** 2
+                if info_b > 0:
+                    item.b = max(-4.0, min(4.0, item.b + grad_b / info_b))
+                if calibrate_discrimination and info_a > 0:
+                    item.a = max(0.3, min(3.0, item.a + grad_a / info_a))
+
+        # Pin the scale: shrunken EAP abilities would otherwise drag every
+        # difficulty the same way round after round
+        if targets:
+            shift = sum(items[i].b - params[i].b for i in targets) / len(targets)
+            for item_id in targets:
+                params[item_id].b += shift
+
+    return {
+        item_id: {'a': round(params[item_id].a, 4), 'b': round(params[item_id].b, 4),
+                  'c': params[item_id].c, 'responses': counts[item_id]}
+        for item_id in targets
+    }
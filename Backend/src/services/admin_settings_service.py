@@ -72,6 +72,10 @@ class AdminSettingsService:
         for key in self.settings['performance']:
             if key in data:
                 self.settings['performance'][key] = data[key]
+        if 'cache_duration_hours' in data:
+            # Cached responses were stored with the old lifetime
+            from services.response_cache import response_cache
+            response_cache.invalidate()
         return self.settings['performance']
     
     def toggle_integration(self, integration_id, active):
@@ -81,3 +85,7 @@ class AdminSettingsService:
                 item['status'] = 'active' if active else 'disconnected'
                 return item
         return None
+
+
+# Singleton instance
+admin_settings_service = AdminSettingsService()
@@ -3,19 +3,48 @@ AI Service for English Speaking Practice
 Provides conversational AI, pronunciation analysis, and session scoring using Gemini
 """
 
-import google.generativeai as genai
 from flask import current_app
 import json
 import re
 import logging
+import threading
+
+from services.conversation_manager import conversation_manager
+from services.gemini_scheduler import GeminiScheduler, SchedulerBusy, DEFAULT_OUTPUT_TOKENS
+from services.history_compactor import estimate_tokens
+from services.structured_output import (
+    StructuredStats, parse_json, PRACTICE_ANALYSIS, PRONUNCIATION_ANALYSIS
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _prompt_text(prompt):
+    """Plain text of a prompt or Gemini contents list, for token estimates"""
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(str(part) for msg in prompt for part in msg.get("parts", []))
+
+
 class AIService:
     _api_keys = []
-    _current_key_index = 0
     _initialized = False
+    # Spreads calls over all keys by request / token budget, see GeminiScheduler
+    _scheduler = None
+    # Models bound to one key's client, with the tutor persona as
+    # system_instruction when given
+    # {(key_index, model_name, persona): GenerativeModel}
+    _models = {}
+    _models_lock = threading.Lock()
+    # Parse-failure / token counters of generate_structured, per task
+    _structured_stats = StructuredStats()
+    # Cleared once if the SDK or model rejects response_schema; JSON mime
+    # type alone is used from then on
+    _schema_mode = True
+    # Model backend: None for Google Gemini, or a stand-in with a
+    # model(model_name, key_index, system_instruction) factory such as
+    # FakeGeminiBackend (AI_BACKEND=fake)
+    _backend = None
 
     def __init__(self):
         if not AIService._initialized:
@@ -23,6 +52,7 @@ class AIService:
             AIService._initialized = True
         
         self.model = self._get_active_model()
+        self.last_turn_usage = None
 
     def _setup_keys(self):
         from config import Config
@@ -32,80 +62,217 @@ class AIService:
             keys = Config.GEMINI_API_KEYS
         
         AIService._api_keys = [k for k in keys if k and k != 'YOUR_GEMINI_API_KEY_HERE']
-        AIService._current_key_index = 0
+        if Config.AI_BACKEND == 'fake':
+            from services.fake_gemini import FakeGeminiBackend
+            AIService._backend = FakeGeminiBackend.from_config(Config)
+            AIService._api_keys = [f"fake-key-{i}" for i in range(Config.FAKE_AI_KEYS)]
+            logger.warning("[AIService] Using the offline fake Gemini backend")
+        AIService._scheduler = GeminiScheduler(
+            AIService._api_keys,
+            rpm=Config.GEMINI_RPM_PER_KEY,
+            tpm=Config.GEMINI_TPM_PER_KEY,
+            max_wait=Config.GEMINI_MAX_QUEUE_WAIT
+        )
         logger.info(f"[AIService] Setup with {len(AIService._api_keys)} API keys")
 
     def _get_active_model(self):
-        """Try to initialize a model using the current API key."""
+        """Default chat model on the first key; calls go through _safe_generate."""
         if not AIService._api_keys:
             logger.error("[AIService] No API keys available")
             return None
+        models = AIService._scheduler.models_for('chat')
+        return self._get_model(0, models[0]) if models else None
 
-        # Try all keys starting from current
-        start_index = AIService._current_key_index
-        for i in range(len(AIService._api_keys)):
-            idx = (start_index + i) % len(AIService._api_keys)
-            AIService._current_key_index = idx
-            current_key = AIService._api_keys[idx]
-            
-            try:
-                genai.configure(api_key=current_key)
-                # Test the key with available models
-                models_to_try = ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-2.0-flash-exp', 'gemini-1.5-flash']
-                for model_name in models_to_try:
-                    try:
-                        m = genai.GenerativeModel(model_name)
-                        m.generate_content("ping", generation_config={"max_output_tokens": 1})
-                        logger.info(f"[AIService] Successfully using key index {idx} with model {model_name}")
-                        return m
-                    except Exception as e:
-                        if "429" in str(e) or "quota" in str(e).lower():
-                            logger.warning(f"[AIService] Quota reached for key index {idx}")
-                            break # Move to next key
-                        continue # Try next model
-            except Exception as e:
-                logger.error(f"[AIService] Error with key index {idx}: {e}")
+    def _get_model(self, key_index, model_name, persona=None):
+        """
+        Model for one (key, model, persona), built once
         
-        return None
+        genai.configure is process-global and the SDK resolves its client
+        lazily, so the client is bound at construction while holding the
+        lock; the model then keeps using its own key whatever is configured
+        later. persona is an optional (scenario, user_level) whose tutor
+        prompt becomes the system instruction.
+        """
+        cache_key = (key_index, model_name, persona)
+        model = AIService._models.get(cache_key)
+        if model is None:
+            with AIService._models_lock:
+                model = AIService._models.get(cache_key)
+                if model is None:
+                    system_instruction = self._build_enhanced_prompt(*persona) if persona else None
+                    if AIService._backend is not None:
+                        model = AIService._backend.model(model_name, key_index, system_instruction)
+                    else:
+                        # The SDK is slow to import; only load it once a real model is needed
+                        import google.generativeai as genai
+                        from google.generativeai import client as genai_client
+                        genai.configure(api_key=AIService._api_keys[key_index])
+                        model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+                        model._client = genai_client.get_default_generative_client()
+                    AIService._models[cache_key] = model
+        return model
+
+    def _safe_generate(self, prompt, persona=None, task='chat', **kwargs):
+        """
+        Generate through the key scheduler.
+        
+        task selects the model tier (see TASK_TIERS): cheap replies use a
+        flash-lite model, session analysis the heavy tier. The scheduler
+        picks the key with the most request / token headroom, queueing
+        briefly when every key is near its limit. A 429 cools the key down
+        and retries on another; a model missing for these keys falls back
+        to the next one in its tier.
+        persona: optional (scenario, user_level) to generate with the tutor
+        persona as system instruction.
+        """
+        scheduler = AIService._scheduler
+        if not scheduler or not len(scheduler):
+            logger.error("[AIService] No API keys available")
+            return None
+
+        estimated = estimate_tokens(_prompt_text(prompt)) + DEFAULT_OUTPUT_TOKENS
+        if persona:
+            estimated += estimate_tokens(self._build_enhanced_prompt(*persona))
 
-    def _safe_generate(self, prompt, **kwargs):
-        """Robust generation with automatic key failover."""
-        for _ in range(len(AIService._api_keys)):
-            if not self.model:
-                self.model = self._get_active_model()
-            if not self.model:
+        for _ in range(len(scheduler) + len(scheduler.models_for(task))):
+            models = scheduler.models_for(task)
+            if not models:
                 break
+            try:
+                slot = scheduler.acquire(estimated)
+            except SchedulerBusy as e:
+                logger.error(f"[AIService] {e}")
+                return None
 
+            model_name = models[0]
             try:
-                return self.model.generate_content(prompt, **kwargs)
+                response = self._get_model(slot.index, model_name, persona).generate_content(prompt, **kwargs)
             except Exception as e:
-                is_quota = "429" in str(e) or "quota" in str(e).lower()
-                if is_quota:
-                    logger.warning(f"[AIService] Quota hit on loop! Rotating key...")
-                    AIService._current_key_index = (AIService._current_key_index + 1) % len(AIService._api_keys)
-                    self.model = self._get_active_model()
-                else:
-                    logger.error(f"[AIService] Non-quota error during generate: {e}")
-                    raise e
+                message = str(e).lower()
+                if "429" in message or "quota" in message or "exhausted" in message:
+                    logger.warning(f"[AIService] Quota hit on key index {slot.index}, cooling it down")
+                    scheduler.penalize(slot)
+                    continue
+                scheduler.release(slot, estimated, used_tokens=0)
+                if "404" in message or "not found" in message:
+                    logger.warning(f"[AIService] Model {model_name} unavailable, trying next in tier")
+                    scheduler.mark_unavailable(model_name)
+                    continue
+                logger.error(f"[AIService] Non-quota error during generate: {e}")
+                raise e
+
+            usage = getattr(response, 'usage_metadata', None)
+            scheduler.release(slot, estimated, getattr(usage, 'total_token_count', None))
+            return response
                     
         logger.error("[AIService] All API keys exhausted or failed.")
         return None
 
-    def get_vocabulary_suggestions(self, topic):
-        """Get vocabulary suggestions from database + AI enhancement"""
-        import os
-        import json
+    @staticmethod
+    def use_backend(backend, keys=None, rpm=None, tpm=None):
+        """
+        Swap the model backend at runtime (load tests, offline demos)
         
-        # Load from database
-        vocab_db_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'vocabulary_database.json')
+        backend: object with model(model_name, key_index, system_instruction),
+        or None to go back to Gemini. Cached models and the scheduler are
+        rebuilt for the new keys.
+        """
+        from config import Config
+        AIService._initialized = True
+        AIService._backend = backend
+        if keys is not None:
+            AIService._api_keys = list(keys)
+        with AIService._models_lock:
+            AIService._models = {}
+        AIService._scheduler = GeminiScheduler(
+            AIService._api_keys,
+            rpm=rpm or Config.GEMINI_RPM_PER_KEY,
+            tpm=tpm or Config.GEMINI_TPM_PER_KEY,
+            max_wait=Config.GEMINI_MAX_QUEUE_WAIT
+        )
+
+    @staticmethod
+    def get_scheduler_stats():
+        """Per-key served / throttled counts and remaining budget"""
+        return AIService._scheduler.stats() if AIService._scheduler else {'keys': [], 'unavailable_models': []}
+
+    def _generate_json(self, schema, prompt):
+        """One JSON-mode generation call, dropping schema mode if unsupported"""
+        config = {"response_mime_type": "application/json"}
+        if AIService._schema_mode:
+            config["response_schema"] = schema.gemini_schema
         try:
-            with open(vocab_db_path, 'r', encoding='utf-8') as f:
-                vocab_db = json.load(f)
-                topic_vocab = vocab_db.get('topics', {}).get(topic, vocab_db['topics'].get('free', {}))
-                return topic_vocab.get('vocabulary', {})
+            return self._safe_generate(prompt, task=schema.name, generation_config=config)
         except Exception as e:
-            logger.warning(f"[AIService] Could not load vocabulary database: {e}")
-            return {}
+            if not AIService._schema_mode or "schema" not in str(e).lower():
+                raise
+            logger.warning(f"[AIService] response_schema not supported, using JSON mime type only: {e}")
+            AIService._schema_mode = False
+            config.pop("response_schema")
+            return self._safe_generate(prompt, task=schema.name, generation_config=config)
+
+    @staticmethod
+    def _parse_structured(schema, response):
+        """Parse and validate a response; returns (result, errors)"""
+        try:
+            result = parse_json(response.text)
+        except ValueError as e:
+            return None, [f"invalid JSON: {e}"]
+        return result, schema.validate(result)
+
+    def generate_structured(self, schema, prompt):
+        """
+        Generate a JSON object matching a ResponseSchema
+        
+        Gemini is asked for application/json with the task's response
+        schema, so prompts only need to describe the task, not the output
+        format. The reply is checked by the schema's compiled validator;
+        on failure a single short repair request (errors + previous reply)
+        is made. Returns the parsed dict, or None if both attempts fail.
+        Counters are kept per task, see get_structured_stats().
+        """
+        stats = AIService._structured_stats
+        stats.add(schema.name, calls=1)
+        try:
+            response = self._generate_json(schema, prompt)
+            if not response:
+                stats.add(schema.name, failures=1)
+                return None
+            stats.add_usage(schema.name, response)
+            result, errors = self._parse_structured(schema, response)
+            if not errors:
+                return result
+
+            logger.warning(f"[AIService] {schema.name}: invalid structured output: {errors[:3]}")
+            stats.add(schema.name, parse_failures=1, repairs=1)
+            repair_prompt = (
+                "Your previous reply did not match the required JSON schema.\n"
+                f"Problems: {'; '.join(errors[:5])}\n"
+                f"Previous reply:\n{getattr(response, 'text', '')[:4000]}\n"
+                "Return only the corrected JSON object."
+            )
+            response = self._generate_json(schema, repair_prompt)
+            if response:
+                stats.add_usage(schema.name, response)
+                result, errors = self._parse_structured(schema, response)
+                if not errors:
+                    stats.add(schema.name, repair_successes=1)
+                    return result
+        except Exception as e:
+            logger.error(f"[AIService] Error in generate_structured({schema.name}): {e}")
+
+        stats.add(schema.name, failures=1)
+        return None
+
+    @staticmethod
+    def get_structured_stats():
+        """Per-task structured generation counters (calls, failures, tokens)"""
+        return AIService._structured_stats.snapshot()
+
+    def get_vocabulary_suggestions(self, topic):
+        """Get vocabulary suggestions for a topic from the in-memory vocabulary store"""
+        from services.vocabulary_store import vocabulary_store
+        return vocabulary_store.get_topic_vocabulary(topic)
 
     def _build_enhanced_prompt(self, scenario, user_level='intermediate'):
         """Build comprehensive system prompt for speaking practice"""
@@ -192,60 +359,83 @@ Based on common Vietnamese learner issues:
 - Keep conversation flowing naturally
 """
 
-    def generate_response(self, user_input, history=None, scenario=None):
+    def generate_response(self, user_input, history=None, scenario=None, session_id=None,
+                          user_level='intermediate', history_summary=None):
         """
         Generate a conversational response for English practice with failover.
+        
+        The tutor prompt is sent as the persona model's system instruction.
+        With a session_id, the conversation state is kept server-side by the
+        conversation manager: only the new turn plus a token-budgeted tail
+        (and a rolling summary of older turns) is sent; `history` and
+        `history_summary` are only used to rebuild that state after a
+        restart. Token usage of the turn is left in self.last_turn_usage.
         """
-        system_prompt = self._build_enhanced_prompt(scenario)
-        full_prompt = f"{system_prompt}\n\nUser: {user_input}"
+        state = None
+        if session_id is not None:
+            state = conversation_manager.get_or_create(
+                session_id, scenario, user_level,
+                seed_history=history, seed_summary=history_summary
+            )
+            contents = conversation_manager.build_contents(state, user_input)
+        else:
+            contents = list(history or []) + [{"role": "user", "parts": [user_input]}]
 
         try:
-            response = self._safe_generate(full_prompt)
-            return response.text if response else "Tôi gặp vấn đề kỹ thuật tạm thời, hãy thử lại nhé!"
+            response = self._safe_generate(contents, persona=(scenario, user_level), task='chat')
+            if not response:
+                return "Tôi gặp vấn đề kỹ thuật tạm thời, hãy thử lại nhé!"
+            
+            reply = response.text
+            usage = getattr(response, 'usage_metadata', None)
+            if state is not None:
+                self.last_turn_usage = conversation_manager.record_turn(state, user_input, reply, usage)
+            return reply
         except Exception as e:
             logger.error(f"[AIService] Error in generate_response: {e}")
             return f"Error communicating with AI: {str(e)}"
 
-    def analyze_pronunciation(self, transcript, expected_text=None):
-        """Analyze pronunciation based on transcript with failover."""
-        prompt = f"Analyze the following transcript for pronunciation issues: {transcript}"
+    def get_conversation_stats(self, session_id):
+        """Token usage and history size of a live practice conversation"""
+        state = conversation_manager.get(session_id)
+        return state.to_stats() if state else None
+
+    def analyze_pronunciation(self, transcript, expected_text=None, fluency_metrics=None):
+        """
+        Pronunciation feedback as a dict matching PRONUNCIATION_ANALYSIS
+
+        Acoustic fluency measures of the learner's recording (see
+        services/speech_metrics.py), when given, are returned alongside as
+        'fluency' and 'fluency_score' - they are measured, not asked of the model.
+        """
+        prompt = f"""Analyze this English transcript spoken by a Vietnamese learner for likely pronunciation issues
+(difficult sounds, word stress, final consonants). Give scores 0-100 and tips in Vietnamese.
+
+Transcript: {transcript}
+"""
+        if expected_text:
+            prompt += f"Expected text: {expected_text}\n"
         try:
-            response = self._safe_generate(prompt)
-            return {"analysis": response.text if response else "No analysis available", "pronunciation_score": 80}
+            result = self.generate_structured(PRONUNCIATION_ANALYSIS, prompt)
+            if result is None:
+                result = {"error": "No analysis available", "pronunciation_score": None}
         except Exception as e:
             logger.error(f"[AIService] Error in analyze_pronunciation: {e}")
-            return {"error": str(e), "score": 0}
+            result = {"error": str(e), "score": 0}
+        if fluency_metrics:
+            result["fluency"] = fluency_metrics
+            result["fluency_score"] = fluency_metrics["fluency_score"]
+        return result
 
     def analyze_practice(self, transcript):
-        """Full session analysis with structured JSON scores and failover."""
-        prompt = f"""
-Analyze the following English speaking practice transcript and provide a detailed evaluation in JSON format.
-Transcript: {transcript}
+        """Full session analysis as a dict matching PRACTICE_ANALYSIS (None on failure)."""
+        prompt = f"""Evaluate this English speaking practice transcript of a Vietnamese learner.
+Give integer scores 0-100, list grammar errors with corrections and suggest better vocabulary.
+Write the analysis and explanations in Vietnamese.
 
-Return ONLY a JSON object with the following structure:
-{{
-  "pronunciation_score": [Numeric score 0-100],
-  "grammar_score": [Numeric score 0-100],
-  "vocabulary_score": [Numeric score 0-100],
-  "fluency_score": [Numeric score 0-100],
-  "overall_score": [Numeric score 0-100],
-  "analysis": "[A detailed summary of the performance in Vietnamese, highlighting strengths and areas for improvement. Keep it under 500 characters.]",
-  "grammar_errors": [
-    {{"error": "incorrect phrase", "correction": "correct phrase", "explanation": "Why it's wrong in Vietnamese"}}
-  ],
-  "vocabulary_suggestions": [
-    {{"word": "better word", "context": "where to use it", "vietnamese": "translation"}}
-  ]
-}}
-
-Ensure all scores are integers between 0 and 100. Provide the analysis and explanations in Vietnamese.
+Transcript: {transcript}
 """
-        try:
-            response = self._safe_generate(prompt)
-            return response.text if response else "{}"
-        except Exception as e:
-            logger.error(f"[AIService] Error in analyze_practice: {e}")
-            return f"Error: {e}"
+        return self.generate_structured(PRACTICE_ANALYSIS, prompt)
 
     def get_pronunciation_exercise(self, difficulty='medium', focus_area=None):
         """Generate practice exercise."""
@@ -254,7 +444,9 @@ Ensure all scores are integers between 0 and 100. Provide the analysis and expla
         
         prompt = f"Create an English pronunciation exercise for {difficulty} level."
         try:
-            response = self.model.generate_content(prompt)
+            response = self._safe_generate(prompt, task='pronunciation')
+            if not response:
+                return {"error": "AI Service is busy, please try again"}
             return {"exercise": response.text}
         except Exception as e:
             logger.error(f"[AIService] Error in get_pronunciation_exercise: {e}")
@@ -0,0 +1,115 @@
+"""
+Audio Codec
+ffmpeg wrappers used by the audio worker processes: speech transcoding
+with silence trimming, PCM decoding and duration probing
+
+Kept free of Flask / database imports so pool workers start quickly.
+"""
+from typing import Dict
+import hashlib
+import os
+import shutil
+import subprocess
+
+# Speech profile: mono 16 kHz Opus in WebM, which every browser plays
+SPEECH_CODEC = 'opus'
+SPEECH_BITRATE = '24k'
+SPEECH_SAMPLE_RATE = 16000
+SPEECH_MIME = 'audio/webm'
+
+# Leading / trailing audio quieter than this for longer than
+# SILENCE_SECONDS is cut (trailing silence is trimmed on the reversed signal)
+SILENCE_THRESHOLD = '-45dB'
+SILENCE_SECONDS = 0.3
+
+# Raw PCM handed to speech analysis: signed 16-bit little endian mono
+PCM_SAMPLE_RATE = 16000
+
+TIMEOUT = 300  # seconds per ffmpeg run
+
+
+class CodecError(Exception):
+    """ffmpeg is missing or could not process the recording"""
+
+
+class CodecUnavailable(CodecError):
+    """ffmpeg / ffprobe could not be started; the recording itself may be fine"""
+
+
+def available() -> bool:
+    return shutil.which('ffmpeg') is not None and shutil.which('ffprobe') is not None
+
+
+def _run(args) -> subprocess.CompletedProcess:
+    try:
+        result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=TIMEOUT)
+    except OSError as e:
+        raise CodecUnavailable(f"{args[0]} could not be started: {e}")
+    except subprocess.TimeoutExpired as e:
+        raise CodecError(f"{args[0]} failed: {e}")
+    if result.returncode != 0:
+        raise CodecError(result.stderr.decode('utf-8', 'replace').strip()[-500:] or f"{args[0]} failed")
+    return result
+
+
+def probe_duration(path: str) -> float:
+    """Duration of a media file in seconds"""
+    result = _run([
+        'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1', path
+    ])
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        raise CodecError(f"No duration for {path}")
+
+
+def decode_pcm(path: str, sample_rate: int = PCM_SAMPLE_RATE) -> bytes:
+    """Decode any recording to mono s16le PCM at sample_rate"""
+    result = _run([
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin',
+        '-i', path, '-vn', '-ac', '1', '-ar', str(sample_rate),
+        '-f', 's16le', '-acodec', 'pcm_s16le', 'pipe:1'
+    ])
+    return result.stdout
+
+
+def _sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def transcode_speech(source: str, target: str, bitrate: str = SPEECH_BITRATE) -> Dict:
+    """
+    Re-encode a recording with the speech profile, trimming silence at both
+    ends. Runs in a pool worker; returns the size, hash and duration of
+    the new file along with the original's size and duration.
+    """
+    trim = f"silenceremove=start_periods=1:start_duration={SILENCE_SECONDS}:start_threshold={SILENCE_THRESHOLD}"
+    _run([
+        'ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin', '-y',
+        '-i', source, '-vn', '-map_metadata', '-1',
+        '-af', f"{trim},areverse,{trim},areverse",
+        '-ac', '1', '-ar', str(SPEECH_SAMPLE_RATE),
+        '-c:a', 'libopus', '-b:a', bitrate, '-application', 'voip',
+        '-f', 'webm', target
+    ])
+    try:
+        duration = probe_duration(target)
+    except CodecError:
+        duration = None
+    try:
+        original_duration = probe_duration(source)
+    except CodecError:
+        # Browser MediaRecorder webm often has no duration header
+        original_duration = None
+    return {
+        'size': os.path.getsize(target),
+        'sha256': _sha256(target),
+        'duration_seconds': duration,
+        'original_size': os.path.getsize(source),
+        'original_duration_seconds': original_duration,
+    }
@@ -0,0 +1,309 @@
+"""
+Audio Compactor
+Background re-encoding of stored practice recordings to a compact speech
+profile in a process pool, with storage reporting
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from typing import Dict, List, Optional
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import uuid
+
+from sqlalchemy import func, or_
+
+from config import Config
+from infrastructure.databases.mssql import get_db_session
+from infrastructure.models.practice_session_model import PracticeSessionModel
+from services import audio_codec
+from services.audio_store import audio_store, StoredAudio, EXTENSIONS
+from services.speech_analyzer import speech_analyzer
+
+logger = logging.getLogger(__name__)
+
+
+class AudioCompactor:
+    """
+    Stored recording compaction
+
+    Browser uploads are webm of whatever bitrate the recorder chose. Each
+    recording is re-encoded once (audio_codec.transcode_speech: mono 16 kHz
+    Opus at 24 kbps, silence trimmed at both ends) in a spawn-context
+    process pool, so ffmpeg work never runs on the request path or the
+    eventlet hub. New uploads are queued by schedule(); a sweep every
+    SWEEP_INTERVAL seconds also picks up anything missed (restarts, other
+    workers) and moves legacy audio_recording blobs onto disk first.
+
+    The new file replaces the original only if it is smaller and the
+    session still points at the recording that was transcoded (a newer
+    upload wins). Original size, duration and codec are recorded for
+    report(). Only recordings ffmpeg fails to decode are marked 'failed';
+    a missing binary or a broken worker leaves them pending for a retry.
+    """
+
+    SWEEP_INTERVAL = 60.0  # seconds
+    BATCH_SIZE = 8
+
+    def __init__(self, workers: int = None):
+        self._workers = workers or Config.AUDIO_TRANSCODE_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued: List[int] = []
+        self._socketio = None
+        self._running = False
+
+    # ============ Lifecycle ============
+
+    def start(self, socketio) -> bool:
+        """Start the background sweep on the SocketIO async loop"""
+        if self._running:
+            return True
+        if not audio_codec.available():
+            logger.warning("[AudioCompactor] ffmpeg / ffprobe not found, recordings stay as uploaded")
+            return False
+        self._socketio = socketio
+        self._running = True
+        socketio.start_background_task(self._run)
+        logger.info(f"[AudioCompactor] Started with {self._workers} worker processes")
+        return True
+
+    def _run(self) -> None:
+        while self._running:
+            self._socketio.sleep(5.0 if self._queued else self.SWEEP_INTERVAL)
+            try:
+                self.compact_pending()
+            except Exception as e:
+                logger.error(f"[AudioCompactor] Sweep failed: {e}")
+
+    def schedule(self, session_id: int) -> None:
+        """Queue a freshly uploaded recording (picked up within seconds)"""
+        if self._running:
+            with self._lock:
+                if session_id not in self._queued:
+                    self._queued.append(session_id)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: workers must not inherit eventlet's patched threads / DB connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    @staticmethod
+    def _wait(future):
+        if 'eventlet' in sys.modules:
+            # Wait on a native thread so the green thread yields
+            from eventlet import tpool
+            return tpool.execute(future.result)
+        return future.result()
+
+    # ============ Selection ============
+
+    def _pending_ids(self, limit: int) -> List[int]:
+        with self._lock:
+            ids, self._queued = self._queued[:limit], self._queued[limit:]
+        if len(ids) < limit:
+            with get_db_session() as session:
+                rows = session.query(PracticeSessionModel.id).filter(
+                    PracticeSessionModel.audio_compacted_at == None,
+                    or_(PracticeSessionModel.audio_path != None, PracticeSessionModel.audio_recording != None),
+                    ~PracticeSessionModel.id.in_(ids or [0])
+                ).order_by(PracticeSessionModel.id).limit(limit - len(ids)).all()
+            ids.extend(r.id for r in rows)
+        return ids
+
+    def _externalize(self, session_id: int) -> None:
+        """Move a legacy in-database blob into the audio store"""
+        with get_db_session() as session:
+            blob = session.query(PracticeSessionModel.audio_recording).filter(
+                PracticeSessionModel.id == session_id,
+                PracticeSessionModel.audio_path == None
+            ).scalar()
+        if not blob:
+            return
+        stored = audio_store.save_stream(BytesIO(blob), session_id)
+        del blob
+        with get_db_session() as session:
+            moved = session.query(PracticeSessionModel).filter(
+                PracticeSessionModel.id == session_id,
+                PracticeSessionModel.audio_path == None
+            ).update({
+                'audio_path': stored.path,
+                'audio_size': stored.size,
+                'audio_sha256': stored.sha256,
+                'audio_mime': stored.mime,
+                'audio_recording': None
+            }, synchronize_session=False)
+        if not moved:
+            audio_store.delete(stored.path)
+
+    def _source(self, session_id: int):
+        with get_db_session() as session:
+            row = session.query(
+                PracticeSessionModel.audio_path,
+                PracticeSessionModel.audio_sha256,
+                PracticeSessionModel.audio_compacted_at
+            ).filter(PracticeSessionModel.id == session_id).first()
+        if row is None or row.audio_compacted_at is not None:
+            return None
+        return row.audio_path, row.audio_sha256
+
+    # ============ Compaction ============
+
+    def compact_pending(self, limit: int = None) -> List[Dict]:
+        """Compact up to limit (BATCH_SIZE) pending recordings; returns their results"""
+        if not audio_codec.available():
+            logger.warning("[AudioCompactor] ffmpeg / ffprobe not found, nothing compacted")
+            return []
+        jobs = []
+        for session_id in self._pending_ids(limit or self.BATCH_SIZE):
+            if speech_analyzer.busy(session_id):
+                # Still being measured; the original must stay until then
+                self.schedule(session_id)
+                continue
+            try:
+                self._externalize(session_id)
+                source = self._source(session_id)
+                if not source:
+                    continue
+                path = audio_store.path_for(source[0])
+                if not path:
+                    logger.warning(f"[AudioCompactor] Recording of session {session_id} is missing on disk")
+                    self._mark_failed(session_id, source)
+                    continue
+                target = os.path.join(audio_store.uploads_dir, f"{uuid.uuid4().hex}.tmp")
+                future = self._get_executor().submit(audio_codec.transcode_speech, path, target)
+                jobs.append((session_id, source, target, future))
+            except Exception as e:
+                logger.error(f"[AudioCompactor] Could not queue session {session_id}: {e}")
+
+        results = []
+        for session_id, source, target, future in jobs:
+            try:
+                result = self._apply(session_id, source, target, self._wait(future))
+                if result:
+                    results.append(result)
+            except audio_codec.CodecUnavailable as e:
+                logger.warning(f"[AudioCompactor] Session {session_id} left pending: {e}")
+            except audio_codec.CodecError as e:
+                logger.error(f"[AudioCompactor] Session {session_id} failed: {e}")
+                self._mark_failed(session_id, source)
+            except Exception as e:
+                # Pool or storage trouble, not the recording: retried next sweep
+                logger.error(f"[AudioCompactor] Session {session_id} left pending: {e}")
+            finally:
+                if os.path.exists(target):
+                    os.remove(target)
+        return results
+
+    def _apply(self, session_id: int, source, target: str, result: Dict) -> Optional[Dict]:
+        source_path, source_sha = source
+        smaller = result['size'] < result['original_size']
+        values = {
+            'audio_original_size': result['original_size'],
+            'audio_duration_seconds': result['duration_seconds'] if smaller else result['original_duration_seconds'],
+            'audio_compacted_at': datetime.now()
+        }
+        stored = None
+        if smaller:
+            stored = StoredAudio(
+                f"session_{session_id}_{result['sha256'][:16]}.{EXTENSIONS[audio_codec.SPEECH_MIME]}",
+                result['size'], result['sha256'], audio_codec.SPEECH_MIME
+            )
+            os.replace(target, os.path.join(audio_store.root, stored.path))
+            values.update({
+                'audio_path': stored.path,
+                'audio_size': stored.size,
+                'audio_sha256': stored.sha256,
+                'audio_mime': stored.mime,
+                'audio_codec': f"{audio_codec.SPEECH_CODEC}/{audio_codec.SPEECH_BITRATE}"
+            })
+
+        # Only if the session still holds the recording that was transcoded
+        with get_db_session() as session:
+            updated = session.query(PracticeSessionModel).filter(
+                PracticeSessionModel.id == session_id,
+                PracticeSessionModel.audio_path == source_path,
+                PracticeSessionModel.audio_sha256 == source_sha
+            ).update(values, synchronize_session=False)
+
+        if not updated:
+            if stored:
+                audio_store.delete(stored.path)
+            return None
+        if stored:
+            speech_analyzer.transcoded(session_id, source_sha, stored.sha256)
+        if stored and stored.path != source_path:
+            audio_store.delete(source_path)
+        return {
+            'session_id': session_id,
+            'original_size': result['original_size'],
+            'size': result['size'] if smaller else result['original_size'],
+            'duration_seconds': values['audio_duration_seconds'],
+            'transcoded': smaller
+        }
+
+    def _mark_failed(self, session_id: int, source) -> None:
+        """Keep an undecodable recording as is instead of retrying it every sweep"""
+        try:
+            with get_db_session() as session:
+                session.query(PracticeSessionModel).filter(
+                    PracticeSessionModel.id == session_id,
+                    PracticeSessionModel.audio_sha256 == source[1]
+                ).update({
+                    'audio_original_size': PracticeSessionModel.audio_size,
+                    'audio_codec': 'failed',
+                    'audio_compacted_at': datetime.now()
+                }, synchronize_session=False)
+        except Exception as e:
+            logger.error(f"[AudioCompactor] Could not mark session {session_id}: {e}")
+
+    # ============ Reporting ============
+
+    @staticmethod
+    def report() -> Dict:
+        """Recording counts and bytes before / after compaction"""
+        model = PracticeSessionModel
+        with get_db_session() as session:
+            compacted = session.query(
+                func.count(model.id),
+                func.coalesce(func.sum(model.audio_original_size), 0),
+                func.coalesce(func.sum(model.audio_size), 0),
+                func.coalesce(func.sum(model.audio_duration_seconds), 0)
+            ).filter(
+                model.audio_compacted_at != None,
+                or_(model.audio_codec == None, model.audio_codec != 'failed')
+            ).one()
+            pending = session.query(
+                func.count(model.id),
+                func.coalesce(func.sum(model.audio_size), 0)
+            ).filter(model.audio_compacted_at == None, model.audio_path != None).one()
+            legacy = session.query(
+                func.count(model.id),
+                func.coalesce(func.sum(func.length(model.audio_recording)), 0)
+            ).filter(model.audio_path == None, model.audio_recording != None).one()
+            failed = session.query(func.count(model.id)).filter(model.audio_codec == 'failed').scalar()
+
+        original, current = int(compacted[1]), int(compacted[2])
+        return {
+            'compacted': compacted[0],
+            'failed': failed or 0,
+            'original_bytes': original,
+            'compacted_bytes': current,
+            'reclaimed_bytes': original - current,
+            'reclaimed_percent': round(100.0 * (original - current) / original, 1) if original else 0.0,
+            'audio_seconds': round(float(compacted[3]), 1),
+            'pending': pending[0],
+            'pending_bytes': int(pending[1]),
+            'legacy_blobs': legacy[0],
+            'legacy_blob_bytes': int(legacy[1])
+        }
+
+
+# Singleton instance
+audio_compactor = AudioCompactor()
@@ -0,0 +1,267 @@
+"""
+Audio Store
+Practice recordings on disk: streamed, hashed and size-capped uploads,
+resumable chunked uploads and files ready for range-capable serving
+"""
+from typing import BinaryIO, Dict, Optional
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024  # bytes read from the request per step
+
+EXTENSIONS = {
+    'audio/webm': 'webm',
+    'audio/ogg': 'ogg',
+    'audio/mp4': 'm4a',
+    'audio/mpeg': 'mp3',
+    'audio/wav': 'wav',
+    'audio/x-wav': 'wav',
+}
+MIMETYPES = {ext: mime for mime, ext in EXTENSIONS.items()}
+
+_UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class AudioTooLarge(Exception):
+    """The recording is larger than the configured cap"""
+
+
+class UploadOffsetMismatch(Exception):
+    """A chunk does not start where the stored upload ends"""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Upload is at offset {expected}")
+        self.expected = expected
+
+
+class StoredAudio:
+    """A recording written to the store"""
+    __slots__ = ('path', 'size', 'sha256', 'mime')
+
+    def __init__(self, path: str, size: int, sha256: str, mime: str):
+        self.path = path  # relative to the store root
+        self.size = size
+        self.sha256 = sha256
+        self.mime = mime
+
+
+def mime_for(filename: str = None, content_type: str = None) -> str:
+    """Audio mimetype from the declared content type, else the file extension"""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    if content_type in EXTENSIONS:
+        return content_type
+    ext = (filename or '').rsplit('.', 1)[-1].lower() if '.' in (filename or '') else ''
+    return MIMETYPES.get(ext, 'audio/webm')
+
+
+class AudioStore:
+    """
+    Streaming recording storage
+
+    Bodies are copied to a temporary file CHUNK_SIZE bytes at a time while
+    being hashed (SHA-256); the upload is aborted as soon as it passes
+    max_bytes, so memory per upload is constant whatever the recording
+    length. The finished file is renamed into place as
+    session_<id>_<hash>.<ext>, and only its relative path, size, hash and
+    mimetype go into the database.
+
+    Resumable uploads keep their bytes in uploads/<id>.part next to a small
+    JSON sidecar; the current offset is the size of the part file, so an
+    interrupted client (or a restarted worker) resumes from what is on disk.
+    """
+
+    UPLOAD_TTL = 24 * 3600  # seconds an unfinished resumable upload is kept
+
+    def __init__(self, root: str = None, max_bytes: int = None):
+        self.root = root or Config.AUDIO_STORAGE_DIR
+        self.max_bytes = max_bytes or Config.AUDIO_MAX_UPLOAD_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        self._upload_locks: Dict[str, threading.Lock] = {}
+
+    # ============ Paths ============
+
+    @property
+    def uploads_dir(self) -> str:
+        return os.path.join(self.root, 'uploads')
+
+    def _ensure_dirs(self) -> None:
+        os.makedirs(self.uploads_dir, exist_ok=True)
+
+    def path_for(self, relative: str) -> Optional[str]:
+        """Absolute path of a stored recording, or None when it is missing"""
+        if not relative:
+            return None
+        path = os.path.abspath(os.path.join(self.root, relative))
+        if not path.startswith(os.path.abspath(self.root) + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    def delete(self, relative: str) -> None:
+        path = self.path_for(relative)
+        if path:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"[AudioStore] Could not delete {relative}: {e}")
+
+    # ============ Streaming ============
+
+    def _copy(self, stream: BinaryIO, out: BinaryIO, already: int = 0, hasher=None) -> int:
+        """Copy stream to out in chunks; returns bytes written, enforcing max_bytes"""
+        written = 0
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                return written
+            written += len(chunk)
+            if already + written > self.max_bytes:
+                raise AudioTooLarge(f"Recording exceeds {self.max_bytes // (1024 * 1024)} MB")
+            if hasher is not None:
+                hasher.update(chunk)
+            out.write(chunk)
+
+    def _place(self, temp_path: str, session_id: int, sha256: str, size: int, mime: str) -> StoredAudio:
+        relative = f"session_{session_id}_{sha256[:16]}.{EXTENSIONS.get(mime, 'webm')}"
+        os.replace(temp_path, os.path.join(self.root, relative))
+        return StoredAudio(relative, size, sha256, mime)
+
+    def save_stream(self, stream: BinaryIO, session_id: int, mime: str = 'audio/webm') -> StoredAudio:
+        """Store a whole recording read from a file-like stream"""
+        self._ensure_dirs()
+        temp_path = os.path.join(self.uploads_dir, f"{uuid.uuid4().hex}.tmp")
+        hasher = hashlib.sha256()
+        try:
+            with open(temp_path, 'wb') as out:
+                size = self._copy(stream, out, hasher=hasher)
+            if not size:
+                raise ValueError("Empty recording")
+            return self._place(temp_path, session_id, hasher.hexdigest(), size, mime)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    # ============ Resumable uploads ============
+
+    def _upload_paths(self, upload_id: str):
+        if not _UPLOAD_ID.match(upload_id or ''):
+            return None, None
+        base = os.path.join(self.uploads_dir, upload_id)
+        return base + '.part', base + '.json'
+
+    def _upload_lock(self, upload_id: str) -> threading.Lock:
+        with self._lock:
+            return self._upload_locks.setdefault(upload_id, threading.Lock())
+
+    def create_upload(self, session_id: int, filename: str = None, mime: str = 'audio/webm',
+                      total_size: int = None) -> Dict:
+        """Open a resumable upload; returns its status"""
+        if total_size and total_size > self.max_bytes:
+            raise AudioTooLarge(f"Recording exceeds {self.max_bytes // (1024 * 1024)} MB")
+        self._ensure_dirs()
+        self.expire_uploads()
+        upload_id = uuid.uuid4().hex
+        part_path, meta_path = self._upload_paths(upload_id)
+        meta = {
+            'session_id': session_id,
+            'filename': filename or 'recording.webm',
+            'mime': mime,
+            'total_size': total_size,
+            'created_at': time.time()
+        }
+        open(part_path, 'wb').close()
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+        return self.upload_status(upload_id)
+
+    def upload_status(self, upload_id: str) -> Optional[Dict]:
+        part_path, meta_path = self._upload_paths(upload_id)
+        if not part_path or not os.path.isfile(meta_path) or not os.path.isfile(part_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return dict(meta, upload_id=upload_id, offset=os.path.getsize(part_path),
+                    chunk_size=CHUNK_SIZE * 16, max_bytes=self.max_bytes)
+
+    def append_chunk(self, upload_id: str, offset: int, stream: BinaryIO) -> Optional[Dict]:
+        """
+        Append the bytes of stream at offset, which must equal the stored
+        size; returns the new status (None for an unknown upload)
+        """
+        part_path, _ = self._upload_paths(upload_id)
+        with self._upload_lock(upload_id):
+            status = self.upload_status(upload_id)
+            if status is None:
+                return None
+            if offset != status['offset']:
+                raise UploadOffsetMismatch(status['offset'])
+            with open(part_path, 'ab') as out:
+                try:
+                    self._copy(stream, out, already=offset)
+                except Exception:
+                    # Drop the partial chunk so the client can resend it
+                    out.truncate(offset)
+                    raise
+        return self.upload_status(upload_id)
+
+    def complete_upload(self, upload_id: str):
+        """Move a finished upload into place; returns (status, StoredAudio) or None"""
+        part_path, meta_path = self._upload_paths(upload_id)
+        with self._upload_lock(upload_id):
+            status = self.upload_status(upload_id)
+            if status is None:
+                return None
+            if not status['offset']:
+                raise ValueError("Empty recording")
+            if status['total_size'] and status['offset'] != status['total_size']:
+                raise UploadOffsetMismatch(status['offset'])
+            hasher = hashlib.sha256()
+            with open(part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    hasher.update(chunk)
+            stored = self._place(part_path, status['session_id'], hasher.hexdigest(),
+                                 status['offset'], status['mime'])
+            os.remove(meta_path)
+        with self._lock:
+            self._upload_locks.pop(upload_id, None)
+        return status, stored
+
+    def discard_upload(self, upload_id: str) -> bool:
+        part_path, meta_path = self._upload_paths(upload_id)
+        if not part_path or not os.path.isfile(meta_path):
+            return False
+        for path in (part_path, meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+        with self._lock:
+            self._upload_locks.pop(upload_id, None)
+        return True
+
+    def expire_uploads(self) -> int:
+        """Remove resumable uploads untouched for UPLOAD_TTL seconds"""
+        if not os.path.isdir(self.uploads_dir):
+            return 0
+        cutoff = time.time() - self.UPLOAD_TTL
+        removed = 0
+        for name in os.listdir(self.uploads_dir):
+            path = os.path.join(self.uploads_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+# Singleton instance
+audio_store = AudioStore()
@@ -4,10 +4,10 @@ Handles JWT tokens, password hashing, and user authentication
 """
 
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-import hashlib
+from typing import Optional, Dict, Any, Tuple
 import secrets
-import os
+
+from services.password_hasher import password_hasher
 
 
 class AuthService:
@@ -23,15 +23,24 @@ class AuthService:
     
     @staticmethod
     def hash_password(password: str) -> str:
-        """Hash password using SHA-256 with salt"""
-        salt = os.environ.get('SECRET_KEY', 'default_salt')
-        salted = f"{password}{salt}"
-        return hashlib.sha256(salted.encode()).hexdigest()
+        """Hash password using scrypt (runs in the password hashing pool)"""
+        return password_hasher.hash(password)
     
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Verify a password against its hash"""
-        return AuthService.hash_password(plain_password) == hashed_password
+        """Verify a password against its hash (scrypt or legacy SHA-256)"""
+        return password_hasher.verify(plain_password, hashed_password)
+    
+    @staticmethod
+    def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and return an upgraded hash if the stored one is
+        legacy SHA-256 or was made with outdated cost parameters
+        
+        Returns:
+            (is_valid, new_hash) - new_hash is None when no rehash is needed
+        """
+        return password_hasher.verify_and_update(plain_password, hashed_password)
     
     @staticmethod
     def generate_token() -> str:
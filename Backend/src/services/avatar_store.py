@@ -0,0 +1,196 @@
+"""
+Avatar Store
+Content-addressed avatar files with fixed-size WebP thumbnails rendered
+in a process pool at upload time
+"""
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Dict, Optional, Tuple
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+from config import Config
+from services.image_variants import render_square_variants
+
+logger = logging.getLogger(__name__)
+
+VARIANT_SIZES = (48, 128, 256)
+
+# <sha256 prefix>.<ext> originals are immutable; older uploads were timestamp_uuid.ext
+_CONTENT_NAME = re.compile(r'^([0-9a-f]{24})\.[a-z0-9]+$')
+
+
+class AvatarStore:
+    """
+    Avatar originals and their thumbnails
+
+    An upload is hashed while it is written, and named after its SHA-256
+    (<hash>.<ext>), so a URL always refers to the same bytes and can be
+    cached forever. VARIANT_SIZES square WebP thumbnails
+    (<hash>_<size>.webp) are rendered in a spawn-context process pool;
+    the upload waits up to RENDER_TIMEOUT seconds for them and otherwise
+    lets them finish in the background, serving the original meanwhile.
+
+    variant() picks the smallest thumbnail at least as large as the
+    requested size (the largest one beyond that) and remembers which
+    thumbnails exist, so serving does not stat the disk on every request.
+    A missing thumbnail is only remembered for MISSING_TTL seconds, as it
+    may still be rendering.
+
+    Identical uploads share one file, so delete() keeps files that a
+    user's avatar_url still points to.
+    """
+
+    RENDER_TIMEOUT = 5.0  # seconds an upload waits for its thumbnails
+    MISSING_TTL = 30.0  # seconds a missing thumbnail is not looked for again
+
+    def __init__(self, workers: int = None):
+        self._workers = workers or Config.AVATAR_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._known: Dict[str, float] = {}  # thumbnail filename -> 0 if it exists, else when to look again
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: workers must not inherit eventlet's patched threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    @staticmethod
+    def _wait(future, timeout: float):
+        if 'eventlet' in sys.modules:
+            # Wait on a native thread so the green thread yields
+            from eventlet import tpool
+            return tpool.execute(future.result, timeout)
+        return future.result(timeout)
+
+    # ============ Naming ============
+
+    @staticmethod
+    def content_hash(filename: str) -> Optional[str]:
+        """Hash part of a content-addressed avatar filename (None for legacy names)"""
+        match = _CONTENT_NAME.match(filename or '')
+        return match.group(1) if match else None
+
+    @staticmethod
+    def variant_name(digest: str, size: int) -> str:
+        return f"{digest}_{size}.webp"
+
+    # ============ Upload ============
+
+    def save(self, stream: BinaryIO, folder: str, extension: str) -> Tuple[str, Dict[int, str]]:
+        """
+        Store an uploaded image; returns (filename, {size: thumbnail filename})
+        with only the thumbnails that are ready. Raises ValueError if the
+        file is not a readable image.
+        """
+        temp_path = os.path.join(folder, f"{uuid.uuid4().hex}.tmp")
+        hasher = hashlib.sha256()
+        try:
+            with open(temp_path, 'wb') as out:
+                for chunk in iter(lambda: stream.read(64 * 1024), b''):
+                    hasher.update(chunk)
+                    out.write(chunk)
+            digest = hasher.hexdigest()[:24]
+            filename = f"{digest}.{extension}"
+            path = os.path.join(folder, filename)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        pattern = os.path.join(folder, f"{digest}_{{size}}.webp")
+        try:
+            future = self._get_executor().submit(render_square_variants, path, pattern, VARIANT_SIZES)
+            sizes = self._wait(future, self.RENDER_TIMEOUT)
+        except (FutureTimeout, TimeoutError):
+            logger.warning(f"[AvatarStore] Thumbnails of {filename} still rendering")
+            future.add_done_callback(lambda f: self._forget(digest))
+            return filename, {}
+        except ValueError:
+            os.remove(path)
+            raise
+        except Exception as e:
+            # Pillow missing or a worker crash: the original is still served
+            logger.error(f"[AvatarStore] Could not render thumbnails of {filename}: {e}")
+            if isinstance(e, BrokenProcessPool):
+                self._executor = None
+            return filename, {}
+
+        with self._lock:
+            for size in sizes:
+                self._known[self.variant_name(digest, size)] = 0
+        return filename, {size: self.variant_name(digest, size) for size in sorted(sizes)}
+
+    def _forget(self, digest: str) -> None:
+        with self._lock:
+            for size in VARIANT_SIZES:
+                self._known.pop(self.variant_name(digest, size), None)
+
+    # ============ Serving ============
+
+    def _exists(self, folder: str, name: str) -> bool:
+        recheck_at = self._known.get(name)
+        if recheck_at == 0:
+            return True
+        now = time.monotonic()
+        if recheck_at is not None and now < recheck_at:
+            return False
+        exists = os.path.isfile(os.path.join(folder, name))
+        with self._lock:
+            if len(self._known) > 10000:
+                self._known.clear()
+            self._known[name] = 0 if exists else now + self.MISSING_TTL
+        return exists
+
+    def variant(self, folder: str, filename: str, size: int) -> Optional[str]:
+        """Thumbnail filename best matching size, or None to serve the original"""
+        digest = self.content_hash(filename)
+        if not digest or not size:
+            return None
+        candidates = [s for s in VARIANT_SIZES if s >= size] or [VARIANT_SIZES[-1]]
+        for s in candidates:
+            name = self.variant_name(digest, s)
+            if self._exists(folder, name):
+                return name
+        return None
+
+    @staticmethod
+    def in_use(filename: str) -> bool:
+        """True if a user's avatar_url refers to the file"""
+        from infrastructure.databases.mssql import get_db_session
+        from infrastructure.models.user_model import UserModel
+        with get_db_session() as session:
+            return session.query(UserModel.id).filter(
+                UserModel.avatar_url.like(f"%/avatars/{filename}%")
+            ).first() is not None
+
+    def delete(self, folder: str, filename: str) -> bool:
+        """
+        Remove an avatar and its thumbnails; False (nothing removed) while a
+        content-addressed file is still some user's avatar
+        """
+        digest = self.content_hash(filename)
+        if digest and self.in_use(filename):
+            return False
+        names = [filename] + ([self.variant_name(digest, s) for s in VARIANT_SIZES] if digest else [])
+        for name in names:
+            path = os.path.join(folder, name)
+            if os.path.exists(path):
+                os.remove(path)
+        if digest:
+            self._forget(digest)
+        return True
+
+
+# Singleton instance
+avatar_store = AvatarStore()
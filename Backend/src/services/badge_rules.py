@@ -0,0 +1,78 @@
+"""
+Badge Rules
+Badge thresholds indexed per requirement type in sorted arrays, so the
+badges a metric change crosses (or the next one to earn) are found by
+binary search instead of evaluating every badge
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+LEVEL_RANKS = {'A1': 1, 'A2': 2, 'B1': 3, 'B2': 4, 'C1': 5, 'C2': 6}
+
+# requirement_type -> learner_progress field it is measured on
+METRIC_FIELDS = {
+    'streak_days': 'current_streak',
+    'practice_sessions': 'total_sessions',
+    'total_score': 'xp_points',
+    'level_reached': 'current_level',
+}
+FIELD_METRICS = {field: requirement_type for requirement_type, field in METRIC_FIELDS.items()}
+
+
+def metric_value(requirement_type: str, raw) -> int:
+    """Comparable value of a progress field for a requirement type"""
+    if requirement_type == 'level_reached':
+        return LEVEL_RANKS.get(raw or 'A1', 1)
+    return int(raw or 0)
+
+
+def metric_values(progress) -> Dict[str, int]:
+    return {
+        requirement_type: metric_value(requirement_type, getattr(progress, field, None))
+        for requirement_type, field in METRIC_FIELDS.items()
+    }
+
+
+class BadgeRuleIndex:
+    """
+    (requirement_value, badge_id) pairs sorted per requirement type
+
+    Badges whose requirement is not a progress metric ('special') are
+    awarded elsewhere and not indexed.
+    """
+
+    def __init__(self, badges: Iterable[Tuple[int, str, int]]):
+        grouped: Dict[str, List[Tuple[int, int]]] = {}
+        for badge_id, requirement_type, requirement_value in badges:
+            if requirement_type in METRIC_FIELDS:
+                grouped.setdefault(requirement_type, []).append((requirement_value or 0, badge_id))
+        self._values: Dict[str, List[int]] = {}
+        self._ids: Dict[str, List[int]] = {}
+        for requirement_type, items in grouped.items():
+            items.sort()
+            self._values[requirement_type] = [value for value, _ in items]
+            self._ids[requirement_type] = [badge_id for _, badge_id in items]
+
+    def types(self) -> List[str]:
+        return [t for t in METRIC_FIELDS if t in self._values]
+
+    def crossed(self, requirement_type: str, old: int, new: int) -> List[int]:
+        """Badges with old < requirement_value <= new"""
+        values = self._values.get(requirement_type)
+        if not values or new <= old:
+            return []
+        return self._ids[requirement_type][bisect_right(values, old):bisect_right(values, new)]
+
+    def reached(self, requirement_type: str, value: int) -> List[int]:
+        """Badges with requirement_value <= value"""
+        values = self._values.get(requirement_type)
+        if not values:
+            return []
+        return self._ids[requirement_type][:bisect_right(values, value)]
+
+    def next_unearned(self, requirement_type: str, earned: Set[int]) -> Optional[Tuple[int, int]]:
+        """(badge_id, requirement_value) of the lowest unearned badge of the type"""
+        for value, badge_id in zip(self._values.get(requirement_type, ()), self._ids.get(requirement_type, ())):
+            if badge_id not in earned:
+                return badge_id, value
+        return None
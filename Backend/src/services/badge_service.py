@@ -4,20 +4,42 @@ Business logic for badges and achievements system
 """
 
 from datetime import datetime
-from typing import List, Dict, Optional
-from sqlalchemy import and_
-from infrastructure.databases.mssql import get_db_session
+from typing import List, Dict, Optional, Tuple
+from sqlalchemy import and_, event
+from infrastructure.databases.mssql import SessionLocal, get_db_session
 from infrastructure.models.badge_model import BadgeModel, UserBadgeModel, DEFAULT_BADGES
 from infrastructure.models.user_model import UserModel
 from infrastructure.models.progress_model import ProgressModel
 from services.notification_service import NotificationService
+from services.response_cache import response_cache, invalidates
+from services.badge_rules import BadgeRuleIndex, FIELD_METRICS, metric_value, metric_values
+
+# session.info key of award notifications waiting for the transaction to commit
+PENDING_NOTIFICATIONS = 'badge_notifications'
 
 
 class BadgeService:
-    """Service for managing badges and achievements"""
+    """
+    Service for managing badges and achievements
+
+    Badges are evaluated through a BadgeRuleIndex of their thresholds, so a
+    check costs a binary search per changed metric rather than a pass over
+    every unearned badge, and is cheap enough to run on every completion.
+    """
     
     def __init__(self):
         self.notification_service = NotificationService()
+        self._rule_index: Optional[BadgeRuleIndex] = None
+        self._badges: Dict[int, Dict] = {}
+
+    def _send_pending(self, session) -> None:
+        pending = session.info.pop(PENDING_NOTIFICATIONS, None)
+        if pending:
+            self.notification_service.create_notifications(pending)
+
+    @staticmethod
+    def _drop_pending(session) -> None:
+        session.info.pop(PENDING_NOTIFICATIONS, None)
     
     def get_all_badges(self, category: str = None) -> List[Dict]:
         """Get all available badges, optionally filtered by category"""
@@ -75,78 +97,97 @@ class BadgeService:
         finally:
             session.close()
     
+    def _rules(self, session) -> BadgeRuleIndex:
+        """Threshold index of the active badges (rebuilt after badges change)"""
+        rules = self._rule_index
+        if rules is None:
+            badges = session.query(BadgeModel).filter(BadgeModel.is_active == True).all()
+            self._badges = {badge.id: badge.to_dict() for badge in badges}
+            rules = BadgeRuleIndex(
+                (badge.id, badge.requirement_type, badge.requirement_value) for badge in badges
+            )
+            self._rule_index = rules
+        return rules
+
+    def invalidate_rules(self, *args) -> None:
+        self._rule_index = None
+
+    def _award(self, session, user_id: int, candidate_ids: List[int]) -> List[Dict]:
+        """
+        Award the candidates the user does not hold yet: one query for the
+        ones already earned, one batched insert, and the notifications queued
+        on the session until it commits
+        """
+        if not candidate_ids:
+            return []
+        earned = {
+            row[0] for row in session.query(UserBadgeModel.badge_id).filter(
+                UserBadgeModel.user_id == user_id,
+                UserBadgeModel.badge_id.in_(candidate_ids)
+            )
+        }
+        new_ids = list(dict.fromkeys(i for i in candidate_ids if i not in earned))
+        if not new_ids:
+            return []
+
+        now = datetime.utcnow()
+        session.execute(
+            UserBadgeModel.__table__.insert(),
+            [{'user_id': user_id, 'badge_id': badge_id, 'earned_at': now} for badge_id in new_ids]
+        )
+        newly_earned = [self._badges[badge_id] for badge_id in new_ids]
+        session.info.setdefault(PENDING_NOTIFICATIONS, []).extend(
+            {
+                'user_id': user_id,
+                'title': f'🏆 Huy hiệu mới: {badge["name"]}',
+                'message': badge['description'],
+                'notification_type': 'achievement',
+                'action_url': '/learner/achievements'
+            }
+            for badge in newly_earned
+        )
+        return newly_earned
+
+    def on_progress_changed(self, session, user_id: int, changes: Dict[str, Tuple]) -> List[Dict]:
+        """
+        Award the badges whose thresholds a progress change crossed
+
+        Called by progress_aggregator.record() with {field: (old, new)} inside
+        the completing transaction; only the thresholds between old and new
+        are looked at.
+        """
+        candidates = []
+        rules = None
+        for field, (old, new) in changes.items():
+            requirement_type = FIELD_METRICS.get(field)
+            if not requirement_type:
+                continue
+            rules = rules or self._rules(session)
+            candidates.extend(rules.crossed(
+                requirement_type,
+                metric_value(requirement_type, old),
+                metric_value(requirement_type, new)
+            ))
+        return self._award(session, user_id, candidates)
+
     def check_and_award_badges(self, user_id: int) -> List[Dict]:
         """Check user's progress and award any earned badges"""
-        session = get_db_session()
-        newly_earned = []
-        
-        try:
-            # Get user's current stats
+        with get_db_session() as session:
             progress = session.query(ProgressModel).filter(
                 ProgressModel.user_id == user_id
             ).first()
-            
+
             if not progress:
                 return []
-            
-            # Get user's already earned badge IDs
-            earned_ids = session.query(UserBadgeModel.badge_id).filter(
-                UserBadgeModel.user_id == user_id
-            ).all()
-            earned_ids = [e[0] for e in earned_ids]
-            
-            # Get all active badges
-            all_badges = session.query(BadgeModel).filter(
-                BadgeModel.is_active == True,
-                ~BadgeModel.id.in_(earned_ids) if earned_ids else True
-            ).all()
-            
-            for badge in all_badges:
-                earned = False
-                
-                if badge.requirement_type == 'streak_days':
-                    earned = (progress.current_streak or 0) >= badge.requirement_value
-                    
-                elif badge.requirement_type == 'practice_sessions':
-                    earned = (progress.total_sessions or 0) >= badge.requirement_value
-                    
-                elif badge.requirement_type == 'total_score':
-                    earned = (progress.total_score or 0) >= badge.requirement_value
-                    
-                elif badge.requirement_type == 'level_reached':
-                    level_map = {'A1': 1, 'A2': 2, 'B1': 3, 'B2': 4, 'C1': 5, 'C2': 6}
-                    user_level = level_map.get(progress.current_level or 'A1', 1)
-                    earned = user_level >= badge.requirement_value
-                
-                if earned:
-                    # Award badge
-                    user_badge = UserBadgeModel(
-                        user_id=user_id,
-                        badge_id=badge.id,
-                        earned_at=datetime.utcnow()
-                    )
-                    session.add(user_badge)
-                    
-                    # Add to newly earned list
-                    newly_earned.append(badge.to_dict())
-                    
-                    # Send notification
-                    self.notification_service.create_notification(
-                        user_id=user_id,
-                        title=f'🏆 Huy hiệu mới: {badge.name}',
-                        message=badge.description,
-                        notification_type='achievement',
-                        action_url='/learner/achievements'
-                    )
-            
-            session.commit()
-            return newly_earned
-            
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
+
+            rules = self._rules(session)
+            values = metric_values(progress)
+            candidates = [
+                badge_id
+                for requirement_type in rules.types()
+                for badge_id in rules.reached(requirement_type, values[requirement_type])
+            ]
+            return self._award(session, user_id, candidates)
     
     def get_recent_achievements(self, user_id: int, limit: int = 5) -> List[Dict]:
         """Get user's recently earned badges"""
@@ -164,8 +205,7 @@ class BadgeService:
     
     def get_badge_progress(self, user_id: int) -> List[Dict]:
         """Get progress toward next badges in each category"""
-        session = get_db_session()
-        try:
+        with get_db_session() as session:
             progress = session.query(ProgressModel).filter(
                 ProgressModel.user_id == user_id
             ).first()
@@ -173,52 +213,32 @@ class BadgeService:
             if not progress:
                 return []
             
-            # Get earned badge IDs
-            earned_ids = session.query(UserBadgeModel.badge_id).filter(
-                UserBadgeModel.user_id == user_id
-            ).all()
-            earned_ids = [e[0] for e in earned_ids]
-            
-            # Find next badge in each category
-            categories = ['streak', 'practice', 'score', 'level']
+            rules = self._rules(session)
+            earned_ids = {
+                row[0] for row in session.query(UserBadgeModel.badge_id).filter(
+                    UserBadgeModel.user_id == user_id
+                )
+            }
+            values = metric_values(progress)
             next_badges = []
             
-            for cat in categories:
-                next_badge = session.query(BadgeModel).filter(
-                    BadgeModel.category == cat,
-                    BadgeModel.is_active == True,
-                    ~BadgeModel.id.in_(earned_ids) if earned_ids else True
-                ).order_by(BadgeModel.requirement_value).first()
-                
-                if next_badge:
-                    current_value = 0
-                    if next_badge.requirement_type == 'streak_days':
-                        current_value = progress.current_streak or 0
-                    elif next_badge.requirement_type == 'practice_sessions':
-                        current_value = progress.total_sessions or 0
-                    elif next_badge.requirement_type == 'total_score':
-                        current_value = progress.total_score or 0
-                    elif next_badge.requirement_type == 'level_reached':
-                        level_map = {'A1': 1, 'A2': 2, 'B1': 3, 'B2': 4, 'C1': 5, 'C2': 6}
-                        current_value = level_map.get(progress.current_level or 'A1', 1)
-                    
-                    percentage = min(100, round(
-                        current_value / next_badge.requirement_value * 100, 1
-                    ))
-                    
-                    next_badges.append({
-                        'badge': next_badge.to_dict(),
-                        'current_value': current_value,
-                        'target_value': next_badge.requirement_value,
-                        'percentage': percentage,
-                        'remaining': max(0, next_badge.requirement_value - current_value)
-                    })
+            for requirement_type in rules.types():
+                upcoming = rules.next_unearned(requirement_type, earned_ids)
+                if not upcoming:
+                    continue
+                badge_id, target = upcoming
+                current_value = values[requirement_type]
+                next_badges.append({
+                    'badge': self._badges[badge_id],
+                    'current_value': current_value,
+                    'target_value': target,
+                    'percentage': min(100, round(current_value / target * 100, 1)) if target else 100,
+                    'remaining': max(0, target - current_value)
+                })
             
             return next_badges
-            
-        finally:
-            session.close()
     
+    @invalidates('badges')
     def seed_badges(self) -> int:
         """Seed default badges into database"""
         session = get_db_session()
@@ -247,3 +267,9 @@ class BadgeService:
 
 # Singleton instance
 badge_service = BadgeService()
+response_cache.invalidate_on_write('badges', BadgeModel)
+for _action in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(BadgeModel, _action, badge_service.invalidate_rules)
+# Award notifications go out in one batch once the awarding transaction commits
+event.listen(SessionLocal, 'after_commit', badge_service._send_pending)
+event.listen(SessionLocal, 'after_rollback', badge_service._drop_pending)
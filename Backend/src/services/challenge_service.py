@@ -10,6 +10,8 @@ from infrastructure.models.progress_model import ProgressModel
 from infrastructure.models.challenge_models import (
     ChallengeModel, UserChallengeModel, LeaderboardEntryModel, RewardModel, UserRewardModel
 )
+from services.response_cache import response_cache
+from services.progress_aggregator import progress_aggregator, challenge_event
 
 
 class ChallengeService:
@@ -132,11 +134,11 @@ class ChallengeService:
                     user_challenge.status = 'completed'
                     user_challenge.completed_at = datetime.now()
                     user_challenge.xp_earned = challenge.xp_reward if challenge else 0
-                    
-                    # Update user's XP
-                    progress = session.query(ProgressModel).filter_by(user_id=user_id).first()
-                    if progress:
-                        progress.xp_points = (progress.xp_points or 0) + user_challenge.xp_earned
+                
+                # Counts toward the streak; completing also adds the XP
+                progress_aggregator.record(
+                    session, challenge_event(user_id, user_challenge.xp_earned if completed else 0)
+                )
                 
                 return {
                     'success': True,
@@ -301,3 +303,7 @@ class ChallengeService:
         except Exception as e:
             print(f"Claim reward error: {e}")
             return False
+
+
+# Challenges are created outside the API; refresh the cached list on any ORM write
+response_cache.invalidate_on_write('challenges', ChallengeModel)
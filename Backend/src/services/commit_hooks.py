@@ -0,0 +1,51 @@
+"""
+Commit Hooks
+Run callbacks once the transaction that wrote rows of given models has
+committed, instead of at flush time while other sessions still see the
+old rows
+"""
+from typing import Callable, Dict
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+# session.info key: {callback id: callback} to run after the session commits
+PENDING_KEY = 'after_commit_callbacks'
+
+
+def _run_pending(session) -> None:
+    pending: Dict[int, Callable[[], None]] = session.info.pop(PENDING_KEY, None) or {}
+    for callback in pending.values():
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"[CommitHooks] Callback failed: {e}")
+
+
+def _drop_pending(session) -> None:
+    session.info.pop(PENDING_KEY, None)
+
+
+def on_commit(session, callback: Callable[[], None]) -> None:
+    """Run callback after session's current transaction commits (once, whatever the number of calls)"""
+    if session is None:
+        callback()
+        return
+    session.info.setdefault(PENDING_KEY, {})[id(callback)] = callback
+
+
+def on_commit_of_writes(callback: Callable[[], None], *models) -> None:
+    """Run callback after each commit that inserted, updated or deleted rows of the models"""
+    def mark(mapper, connection, target):
+        on_commit(object_session(target), callback)
+
+    for model in models:
+        for action in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(model, action, mark)
+
+
+event.listen(Session, 'after_commit', _run_pending)
+event.listen(Session, 'after_rollback', _drop_pending)
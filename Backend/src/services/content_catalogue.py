@@ -0,0 +1,145 @@
+"""
+Content Catalogue Cache
+Versioned read-through cache of preserialized JSON payloads for read-mostly
+reference content, with ETag / If-None-Match support
+"""
+from typing import Any, Callable, Dict, Iterable
+import json
+import logging
+import threading
+import time
+
+from services.etag_response import strong_etag, conditional_response
+from services.shared_generations import shared_generations
+
+logger = logging.getLogger(__name__)
+
+
+class CataloguePayload:
+    """One cached (catalogue, filter) result"""
+    __slots__ = ('data', 'body', 'etag', 'version', 'expires_at')
+
+    def __init__(self, data: Any, version: int, expires_at: float = None):
+        self.data = data  # Shared, treat as read-only
+        self.body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = strong_etag(self.body)
+        self.version = version
+        self.expires_at = expires_at  # only set for fallbacks served after a failure
+
+
+class ContentCatalogueCache:
+    """
+    Read-through cache keyed by (catalogue, filter)
+
+    Each catalogue has a loader (normally a database query, allowed to
+    raise) and an optional fallback built from static seed data. Payloads
+    are serialized once and served as bytes with a strong ETag, so a hit
+    costs neither a query nor a json.dumps. Each catalogue carries a
+    version stamp; bumping it (explicitly, or once a transaction writing
+    the bound models commits) makes every cached filter of that catalogue
+    stale. Bumps are published through shared_generations, so the other
+    workers drop the catalogue within its CHECK_INTERVAL. After a loader failure the fallback is cached for RETRY_SECONDS
+    only, so an unreachable database is retried without being hit per
+    request. Filters come from query strings, so at most
+    MAX_KEYS_PER_CATALOGUE of them are kept per catalogue; further ones
+    are loaded and served without being stored.
+    """
+
+    RETRY_SECONDS = 30
+    MAX_KEYS_PER_CATALOGUE = 64
+    GENERATION_PREFIX = 'catalogue:'  # shared_generations name prefix
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaders: Dict[str, Callable[[Any], Any]] = {}
+        self._fallbacks: Dict[str, Callable[[Any], Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._entries: Dict[str, Dict[Any, CataloguePayload]] = {}
+        self._shared: Dict[str, Any] = {}  # last shared generation stamp seen per catalogue
+
+    def register(self, name: str, loader: Callable[[Any], Any], fallback: Callable[[Any], Any] = None) -> None:
+        self._loaders[name] = loader
+        if fallback:
+            self._fallbacks[name] = fallback
+        self._versions.setdefault(name, 1)
+
+    def version(self, name: str) -> int:
+        return self._versions.get(name, 0)
+
+    def _sync_shared(self, name: str) -> None:
+        """Drop the catalogue if another process invalidated it"""
+        stamp = shared_generations.current(self.GENERATION_PREFIX + name)
+        if stamp != self._shared.get(name):
+            with self._lock:
+                if stamp != self._shared.get(name):
+                    self._shared[name] = stamp
+                    self._drop(name)
+
+    def _drop(self, name: str) -> None:
+        self._versions[name] += 1
+        self._entries.pop(name, None)
+
+    def get(self, name: str, key: Any = 'all') -> CataloguePayload:
+        self._sync_shared(name)
+        version = self._versions[name]
+        entry = self._entries.get(name, {}).get(key)
+        if entry is not None and entry.version == version and \
+                (entry.expires_at is None or time.monotonic() < entry.expires_at):
+            return entry
+
+        expires_at = None
+        try:
+            data = self._loaders[name](key)
+        except Exception as e:
+            logger.error(f"[ContentCatalogue] Loading {name}[{key}] failed: {e}")
+            data, expires_at = None, time.monotonic() + self.RETRY_SECONDS
+        if not data and name in self._fallbacks:
+            data = self._fallbacks[name](key)
+        payload = CataloguePayload(data if data is not None else [], version, expires_at)
+
+        with self._lock:
+            # Do not overwrite with a result computed before a concurrent bump
+            entries = self._entries.setdefault(name, {})
+            if self._versions[name] == version and \
+                    (key in entries or len(entries) < self.MAX_KEYS_PER_CATALOGUE):
+                entries[key] = payload
+        return payload
+
+    def invalidate(self, *names: str) -> None:
+        """Bump the version of the given catalogues (all when none given), in every process"""
+        names = [name for name in names or list(self._versions) if name in self._versions]
+        with self._lock:
+            for name in names:
+                self._drop(name)
+        for name in names:
+            self._shared[name] = shared_generations.bump(self.GENERATION_PREFIX + name)
+
+    def bind_models(self, name: str, *models) -> None:
+        """Invalidate the catalogue after each commit that wrote rows of these models"""
+        from services.commit_hooks import on_commit_of_writes
+
+        def bump():
+            self.invalidate(name)
+
+        on_commit_of_writes(bump, *models)
+
+    def warm_up(self, keys: Dict[str, Iterable[Any]] = None) -> int:
+        """Load every registered catalogue (and the given filters) ahead of traffic"""
+        loaded = 0
+        for name in list(self._loaders):
+            for key in (keys or {}).get(name, ['all']):
+                self.get(name, key)
+                loaded += 1
+        return loaded
+
+
+def catalogue_response(payload: CataloguePayload, max_age: int = 0):
+    """
+    Flask response for a payload: 304 if the client's If-None-Match
+    matches, else the preserialized body with its ETag
+    """
+    return conditional_response(payload.body, payload.etag, 'application/json', max_age)
+
+
+# Singleton instance
+content_catalogue_cache = ContentCatalogueCache()
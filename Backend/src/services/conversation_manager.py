@@ -0,0 +1,158 @@
+"""
+Conversation Manager for AI speaking practice
+Keeps per-session tutor state server-side so each turn only sends the new
+message plus a bounded tail of history
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import threading
+import time
+
+from services.history_compactor import HistoryCompactor
+
+
+class ConversationState:
+    """Server-side state of one practice conversation"""
+
+    def __init__(self, session_id, scenario: str = None, user_level: str = 'intermediate'):
+        self.session_id = session_id
+        self.scenario = scenario
+        self.user_level = user_level
+        self.turns: List[Dict[str, str]] = []  # [{'role': 'user'|'model', 'text': str}]
+        self.summary = ''  # Rolling summary of turns folded out of the tail
+        self.covered = 0  # Number of transcript messages covered by the summary
+        self.usage: List[Dict[str, int]] = []  # Token usage per turn
+        self.last_used = time.monotonic()
+
+    def summary_state(self) -> Dict:
+        """Persistable summary, so a restart does not have to rebuild it"""
+        return {'text': self.summary, 'covered': self.covered}
+
+    def to_stats(self) -> Dict:
+        prompt = [u['prompt_tokens'] for u in self.usage]
+        return {
+            'session_id': self.session_id,
+            'turns': len(self.usage),
+            'history_turns': len(self.turns),
+            'summary_chars': len(self.summary),
+            'total_prompt_tokens': sum(prompt),
+            'total_output_tokens': sum(u['output_tokens'] for u in self.usage),
+            'total_cached_tokens': sum(u['cached_tokens'] for u in self.usage),
+            'avg_prompt_tokens': round(sum(prompt) / len(prompt), 1) if prompt else 0,
+            'last_turn': self.usage[-1] if self.usage else None
+        }
+
+
+class ConversationManager:
+    """
+    Holds ConversationState per practice session (LRU, idle expiry)
+
+    The tutor persona lives in the model's system instruction, so it is not
+    re-sent as part of every user prompt. History is compacted by a
+    HistoryCompactor, which only folds turns once the tail is over budget,
+    so the request prefix stays byte-identical for several turns in a row
+    and Gemini's implicit prefix caching can apply.
+    """
+
+    MAX_SESSIONS = 1000
+    IDLE_TTL = 2 * 3600  # seconds
+    HISTORY_TOKEN_BUDGET = 1500
+
+    def __init__(self):
+        self._states: 'OrderedDict[object, ConversationState]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.compactor = HistoryCompactor(
+            budget_tokens=self.HISTORY_TOKEN_BUDGET,
+            user_roles=('user',)
+        )
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        while self._states:
+            key, state = next(iter(self._states.items()))
+            if len(self._states) > self.MAX_SESSIONS or now - state.last_used > self.IDLE_TTL:
+                del self._states[key]
+            else:
+                break
+
+    def get_or_create(
+        self,
+        session_id,
+        scenario: str = None,
+        user_level: str = 'intermediate',
+        seed_history: List[Dict] = None,
+        seed_summary: Dict = None
+    ) -> ConversationState:
+        """
+        Get the state for a session, creating it on first use
+
+        seed_history (Gemini-style [{'role', 'parts'}], the messages not
+        covered by seed_summary) and seed_summary ({'text', 'covered'}, as
+        stored by summary_state) rebuild the state after a restart or
+        eviction; both are ignored for a live session.
+        """
+        with self._lock:
+            state = self._states.get(session_id)
+            if state is None:
+                state = ConversationState(session_id, scenario, user_level)
+                if seed_summary:
+                    state.summary = seed_summary.get('text') or ''
+                    state.covered = seed_summary.get('covered') or 0
+                for msg in seed_history or []:
+                    parts = msg.get('parts') or ['']
+                    state.turns.append({'role': msg.get('role', 'user'), 'text': str(parts[0])})
+                self._compact(state)
+                self._states[session_id] = state
+            self._states.move_to_end(session_id)
+            state.last_used = time.monotonic()
+            self._evict()
+            return state
+
+    def get(self, session_id) -> Optional[ConversationState]:
+        return self._states.get(session_id)
+
+    def drop(self, session_id) -> None:
+        with self._lock:
+            self._states.pop(session_id, None)
+
+    def _compact(self, state: ConversationState) -> None:
+        """Fold the oldest turns into the rolling summary once over budget"""
+        result = self.compactor.compact(state.turns, state.summary)
+        if result.folded:
+            state.turns = result.tail
+            state.summary = result.summary
+            state.covered += result.folded
+
+    def build_contents(self, state: ConversationState, user_input: str) -> List[Dict]:
+        """Gemini contents for this turn: summary note, history tail, new message"""
+        contents = []
+        if state.summary:
+            contents.append({
+                'role': 'user',
+                'parts': [f"(Earlier in this conversation)\n{state.summary}"]
+            })
+            contents.append({'role': 'model', 'parts': ['OK, I remember.']})
+        for turn in state.turns:
+            contents.append({'role': turn['role'], 'parts': [turn['text']]})
+        contents.append({'role': 'user', 'parts': [user_input]})
+        return contents
+
+    def record_turn(self, state: ConversationState, user_input: str, reply: str, usage=None) -> Dict[str, int]:
+        """Append the exchange, trim history and log token usage for the turn"""
+        with self._lock:
+            state.turns.append({'role': 'user', 'text': user_input})
+            state.turns.append({'role': 'model', 'text': reply})
+            self._compact(state)
+
+            turn_usage = {
+                'prompt_tokens': getattr(usage, 'prompt_token_count', 0) or 0,
+                'output_tokens': getattr(usage, 'candidates_token_count', 0) or 0,
+                'cached_tokens': getattr(usage, 'cached_content_token_count', 0) or 0
+            }
+            state.usage.append(turn_usage)
+            state.last_used = time.monotonic()
+            return turn_usage
+
+
+# Singleton instance
+conversation_manager = ConversationManager()
@@ -0,0 +1,151 @@
+"""
+Download Counter for AESP Platform
+Coalesced, atomic resource download counts and a popularity ranking read model
+"""
+
+from typing import Dict, List, Optional, Tuple
+import atexit
+import logging
+import threading
+import time
+
+from sqlalchemy import bindparam, func
+
+from infrastructure.models.resource_model import ResourceModel
+from infrastructure.databases.mssql import get_db_session
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadCounter:
+    """
+    Write-behind download counters
+
+    Downloads are summed per resource in memory and flushed every
+    FLUSH_INTERVAL seconds as one executemany of
+    UPDATE resources SET download_count = download_count + :n WHERE id = :id.
+    The increment happens inside the database, so any number of workers can
+    flush concurrently without losing counts; updated_at is left untouched.
+
+    Listing public resources by popularity reads a ranking read model
+    instead: (id, category, difficulty, count) of every public resource,
+    loaded with one narrow query and reused for RANKING_TTL seconds, with
+    this worker's unflushed downloads added on top.
+    """
+
+    FLUSH_INTERVAL = 5.0  # seconds
+    RANKING_TTL = 60.0  # seconds
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, int] = {}
+        self._ranking: Optional[List[Tuple[int, Optional[str], Optional[str], int]]] = None
+        self._ranking_loaded_at = 0.0
+        self._socketio = None
+        self._running = False
+
+    # ============ Lifecycle ============
+
+    def start(self, socketio) -> None:
+        """Start the background flusher on the SocketIO async loop"""
+        if self._running:
+            return
+        self._socketio = socketio
+        self._running = True
+        socketio.start_background_task(self._run)
+        atexit.register(self._flush_quietly)
+        logger.info("[DownloadCounter] Background flusher started")
+
+    def _run(self) -> None:
+        while self._running:
+            self._socketio.sleep(self.FLUSH_INTERVAL)
+            self._flush_quietly()
+
+    def _flush_quietly(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"[DownloadCounter] Flush failed: {e}")
+
+    # ============ Counting ============
+
+    def record(self, resource_id: int, count: int = 1) -> None:
+        """Count downloads; written on the next flush (immediately without a flusher)"""
+        with self._lock:
+            self._pending[resource_id] = self._pending.get(resource_id, 0) + count
+        if not self._running:
+            self.flush()
+
+    def pending(self, resource_id: int) -> int:
+        """Downloads of a resource counted here but not yet flushed"""
+        return self._pending.get(resource_id, 0)
+
+    def flush(self) -> int:
+        """Write all pending increments; returns the number of resources updated"""
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+
+        table = ResourceModel.__table__
+        statement = table.update()\
+            .where(table.c.id == bindparam('resource_id'))\
+            .values(
+                download_count=func.coalesce(table.c.download_count, 0) + bindparam('increment'),
+                updated_at=table.c.updated_at  # a download is not an edit
+            )
+        try:
+            with get_db_session() as session:
+                session.execute(statement, [
+                    {'resource_id': rid, 'increment': n} for rid, n in batch.items()
+                ])
+        except Exception:
+            with self._lock:
+                # Merge back so the next flush retries these counts
+                for rid, n in batch.items():
+                    self._pending[rid] = self._pending.get(rid, 0) + n
+            raise
+        return len(batch)
+
+    # ============ Popularity ranking ============
+
+    def invalidate_ranking(self) -> None:
+        """Reload the ranking on next use (after resources are added, edited or removed)"""
+        self._ranking = None
+
+    def _load_ranking(self):
+        ranking = self._ranking
+        if ranking is not None and time.monotonic() - self._ranking_loaded_at < self.RANKING_TTL:
+            return ranking
+
+        with get_db_session() as session:
+            rows = session.query(
+                ResourceModel.id,
+                ResourceModel.category,
+                ResourceModel.difficulty_level,
+                ResourceModel.download_count
+            ).filter(ResourceModel.is_public == True).all()
+        ranking = [(r.id, r.category, r.difficulty_level, r.download_count or 0) for r in rows]
+        self._ranking = ranking
+        self._ranking_loaded_at = time.monotonic()
+        return ranking
+
+    def popular(
+        self,
+        category: str = None,
+        difficulty_level: str = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> List[int]:
+        """Ids of public resources, most downloaded first"""
+        pending = dict(self._pending)
+        ranked = sorted(
+            (-(count + pending.get(rid, 0)), rid)
+            for rid, cat, difficulty, count in self._load_ranking()
+            if (not category or cat == category) and (not difficulty_level or difficulty == difficulty_level)
+        )
+        return [rid for _, rid in ranked[offset:offset + limit]]
+
+
+# Singleton instance
+download_counter = DownloadCounter()
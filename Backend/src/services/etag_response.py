@@ -0,0 +1,27 @@
+"""
+ETag Responses
+Strong ETags for preserialized bodies and the conditional-GET response
+shared by the response cache and the content catalogue cache
+"""
+import hashlib
+
+
+def strong_etag(body: bytes) -> str:
+    """Unquoted strong validator of a body"""
+    return hashlib.sha1(body).hexdigest()[:20]
+
+
+def conditional_response(body: bytes, etag: str, mimetype: str, max_age: int = 0):
+    """
+    Flask response for a cached body: 304 if the client's If-None-Match
+    matches the ETag, else the body. Clients revalidate after max_age.
+    """
+    from flask import request, Response
+
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': f'public, max-age={max_age}, must-revalidate'
+    }
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    return Response(body, status=200, mimetype=mimetype, headers=headers)
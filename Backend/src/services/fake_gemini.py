@@ -0,0 +1,229 @@
+"""
+Fake Gemini backend for offline runs and load tests
+Deterministic stand-in for google.generativeai models with simulated
+latency, streaming, 429 quota errors and malformed JSON
+"""
+from collections import deque
+from typing import Dict, List
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+
+try:
+    # Simulated latency must not block the eventlet hub
+    from eventlet import sleep as _default_sleep
+except ImportError:
+    from time import sleep as _default_sleep
+
+from services.history_compactor import estimate_tokens
+
+_WORDS = ('great', 'practice', 'speaking', 'travel', 'weekend', 'family', 'interesting',
+          'really', 'learn', 'English', 'often', 'favourite', 'because', 'usually')
+
+
+class FakeQuotaError(Exception):
+    """Mimics the SDK's ResourceExhausted message so quota handling kicks in"""
+
+    def __init__(self, key_index: int):
+        super().__init__(f"429 Resource has been exhausted (e.g. check quota). [fake key {key_index}]")
+
+
+class FakeUsage:
+    __slots__ = ('prompt_token_count', 'candidates_token_count', 'total_token_count',
+                 'cached_content_token_count')
+
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+        self.cached_content_token_count = 0
+
+
+class FakeResponse:
+    """Enough of GenerateContentResponse for AIService: text, usage, streaming"""
+
+    def __init__(self, text: str, usage: FakeUsage, chunks: List[str] = None, chunk_delay: float = 0.0,
+                 sleep=_default_sleep):
+        self.text = text
+        self.usage_metadata = usage
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+        self._sleep = sleep
+
+    def __iter__(self):
+        for chunk in self._chunks or [self.text]:
+            if self._chunk_delay:
+                self._sleep(self._chunk_delay)
+            yield FakeResponse(chunk, self.usage_metadata)
+
+    def resolve(self) -> None:
+        for _ in self:
+            pass
+
+
+class FakeGenerativeModel:
+    """Drop-in for genai.GenerativeModel bound to one fake key"""
+
+    def __init__(self, backend: 'FakeGeminiBackend', model_name: str, key_index: int,
+                 system_instruction: str = None):
+        self.backend = backend
+        self.model_name = model_name
+        self.key_index = key_index
+        self.system_instruction = system_instruction
+
+    def generate_content(self, contents, generation_config=None, stream: bool = False, **kwargs):
+        return self.backend.generate(self, contents, generation_config or {}, stream)
+
+
+class FakeGeminiBackend:
+    """
+    Local Gemini stand-in
+
+    - Latency is log-normal, fitted from a median and a p99 (milliseconds),
+      and scales mildly with output length.
+    - quota_rpm enforces a sliding one-minute window per fake key and
+      raises a 429 past it; error_rate adds random 429s on top.
+    - With response_mime_type=application/json the reply is generated from
+      response_schema; malformed_rate of them are wrapped in prose or cut
+      short so repair paths get exercised.
+    - stream=True yields the reply in word chunks.
+
+    Given the same seed, prompt and call order, replies are identical, so
+    runs are reproducible.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800,
+        latency_p99_ms: float = 3000,
+        error_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        quota_rpm: int = 0,
+        seed: int = 42,
+        sleep=_default_sleep
+    ):
+        self.latency_ms = latency_ms
+        self.latency_p99_ms = max(latency_p99_ms, latency_ms)
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.quota_rpm = quota_rpm
+        self.seed = seed
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._windows: Dict[int, deque] = {}
+        self.stats = {'calls': 0, 'quota_errors': 0, 'malformed': 0, 'streamed': 0}
+
+    @classmethod
+    def from_config(cls, config) -> 'FakeGeminiBackend':
+        return cls(
+            latency_ms=config.FAKE_AI_LATENCY_MS,
+            latency_p99_ms=config.FAKE_AI_LATENCY_P99_MS,
+            error_rate=config.FAKE_AI_ERROR_RATE,
+            malformed_rate=config.FAKE_AI_MALFORMED_RATE,
+            quota_rpm=config.FAKE_AI_QUOTA_RPM,
+            seed=config.FAKE_AI_SEED
+        )
+
+    def model(self, model_name: str, key_index: int, system_instruction: str = None) -> FakeGenerativeModel:
+        return FakeGenerativeModel(self, model_name, key_index, system_instruction)
+
+    # ============ Simulation ============
+
+    def _rng(self, prompt_text: str) -> random.Random:
+        with self._lock:
+            self._calls += 1
+            call = self._calls
+        digest = hashlib.sha1(f"{self.seed}:{call}:{prompt_text}".encode('utf-8')).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def _latency(self, rng: random.Random, output_tokens: int) -> float:
+        # log-normal with the given median; sigma so that p99 lands on latency_p99_ms
+        mu = math.log(max(self.latency_ms, 1))
+        sigma = math.log(self.latency_p99_ms / max(self.latency_ms, 1)) / 2.326 if self.latency_p99_ms > self.latency_ms else 0
+        base = rng.lognormvariate(mu, sigma) if sigma else self.latency_ms
+        return (base + output_tokens * 2) / 1000.0
+
+    def _over_quota(self, key_index: int) -> bool:
+        if not self.quota_rpm:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.setdefault(key_index, deque())
+            while window and window[0] <= now - 60:
+                window.popleft()
+            if len(window) >= self.quota_rpm:
+                return True
+            window.append(now)
+            return False
+
+    def _from_schema(self, schema: Dict, rng: random.Random, depth: int = 0):
+        kind = (schema.get('type') or 'string').lower()
+        if 'enum' in schema:
+            return rng.choice(schema['enum'])
+        if kind == 'object':
+            return {name: self._from_schema(sub, rng, depth + 1)
+                    for name, sub in schema.get('properties', {}).items()}
+        if kind == 'array':
+            item = schema.get('items', {'type': 'string'})
+            return [self._from_schema(item, rng, depth + 1) for _ in range(rng.randint(1, 2))]
+        if kind == 'integer':
+            return rng.randint(40, 95)
+        if kind == 'number':
+            return round(rng.uniform(40, 95), 1)
+        if kind == 'boolean':
+            return rng.random() < 0.5
+        return self._sentence(rng, 4 if depth > 1 else 10)
+
+    @staticmethod
+    def _sentence(rng: random.Random, words: int) -> str:
+        text = ' '.join(rng.choice(_WORDS) for _ in range(words))
+        return text[0].upper() + text[1:] + '.'
+
+    def generate(self, model: FakeGenerativeModel, contents, generation_config: Dict, stream: bool):
+        if isinstance(contents, str):
+            prompt_text = contents
+        else:
+            prompt_text = "\n".join(str(p) for msg in contents for p in msg.get('parts', []))
+        rng = self._rng(prompt_text)
+
+        with self._lock:
+            self.stats['calls'] += 1
+        if self._over_quota(model.key_index) or rng.random() < self.error_rate:
+            with self._lock:
+                self.stats['quota_errors'] += 1
+            self._sleep(0.05)
+            raise FakeQuotaError(model.key_index)
+
+        if generation_config.get('response_mime_type') == 'application/json':
+            schema = generation_config.get('response_schema') or {'type': 'object', 'properties': {}}
+            text = json.dumps(self._from_schema(schema, rng), ensure_ascii=False)
+            if rng.random() < self.malformed_rate:
+                with self._lock:
+                    self.stats['malformed'] += 1
+                text = rng.choice([
+                    f"Sure! Here is the evaluation:\n```json\n{text}\n```",
+                    text[:max(1, len(text) // 2)]
+                ])
+        else:
+            text = ' '.join(self._sentence(rng, rng.randint(6, 14)) for _ in range(rng.randint(2, 5)))
+
+        prompt_tokens = estimate_tokens(prompt_text) + estimate_tokens(model.system_instruction or '')
+        output_tokens = estimate_tokens(text)
+        latency = self._latency(rng, output_tokens)
+        usage = FakeUsage(prompt_tokens, output_tokens)
+
+        if stream:
+            with self._lock:
+                self.stats['streamed'] += 1
+            words = text.split(' ')
+            chunks = [' '.join(words[i:i + 8]) + ' ' for i in range(0, len(words), 8)]
+            # First chunk after the time-to-first-token, the rest spread out
+            self._sleep(latency * 0.3)
+            return FakeResponse(text, usage, chunks, latency * 0.7 / max(1, len(chunks)), self._sleep)
+
+        self._sleep(latency)
+        return FakeResponse(text, usage)
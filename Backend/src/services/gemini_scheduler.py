@@ -0,0 +1,215 @@
+"""
+Gemini Key Scheduler
+Token-bucket request / token budgets per API key and model tiers per task
+"""
+from typing import Callable, Dict, List, Optional
+import threading
+import time
+
+try:
+    # Yield to other greenlets while queued when running under eventlet
+    from eventlet import sleep as _default_sleep
+except ImportError:
+    from time import sleep as _default_sleep
+
+
+# Cost classes: cheap replies go to flash-lite models, final analysis to the
+# heavy tier. Each tier lists fallbacks in order of preference.
+MODEL_TIERS = {
+    'flash': ['gemini-2.5-flash-lite', 'gemini-2.0-flash-lite', 'gemini-2.0-flash', 'gemini-1.5-flash'],
+    'standard': ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-2.0-flash-exp', 'gemini-1.5-flash'],
+    'heavy': ['gemini-2.5-pro', 'gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-1.5-flash'],
+}
+
+TASK_TIERS = {
+    'chat': 'standard',
+    'conversation_reply': 'flash',
+    'pronunciation': 'flash',
+    'pronunciation_analysis': 'flash',
+    'vocabulary': 'flash',
+    'speaking_evaluation': 'standard',
+    'practice_analysis': 'heavy',
+}
+
+DEFAULT_OUTPUT_TOKENS = 400  # reserved per call until the real usage is known
+
+
+class SchedulerBusy(Exception):
+    """Raised when no key frees up within the queueing deadline"""
+
+
+class TokenBucket:
+    """
+    Token bucket sized so no one-minute window exceeds per_minute
+
+    The bucket holds a small burst (a tenth of the quota) and refills at
+    the remaining rate, so burst + one minute of refill equals the quota
+    that the API enforces over a sliding minute. May go negative to record
+    debt from underestimated calls.
+    """
+
+    def __init__(self, per_minute: float, clock: Callable[[], float]):
+        self.capacity = float(max(1, per_minute // 10))
+        self.rate = (per_minute - self.capacity) / 60.0 or per_minute / 60.0
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def fraction(self) -> float:
+        self._refill()
+        return max(0.0, self.tokens) / self.capacity
+
+
+class KeySlot:
+    """Budgets and health of one API key"""
+
+    def __init__(self, index: int, key: str, rpm: int, tpm: int, clock):
+        self.index = index
+        self.key = key
+        self.requests = TokenBucket(rpm, clock)
+        self.tokens = TokenBucket(tpm, clock)
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.served = 0
+        self.throttled = 0
+
+    def wait_time(self, estimated_tokens: int, now: float) -> float:
+        return max(
+            self.cooldown_until - now,
+            self.requests.wait_time(1),
+            self.tokens.wait_time(estimated_tokens)
+        )
+
+    def headroom(self) -> float:
+        return min(self.requests.fraction(), self.tokens.fraction())
+
+
+class GeminiScheduler:
+    """
+    Spreads Gemini calls over all API keys before any of them hits a 429
+
+    Each key has a requests-per-minute and a tokens-per-minute bucket. A
+    call reserves one request and its estimated tokens on the key with the
+    most headroom that can admit it now; the reservation is corrected with
+    the real usage afterwards. When every key is near its limit the call
+    waits (up to max_wait seconds) for the first key to free up instead of
+    failing. A 429 puts the key in cooldown and the caller retries on
+    another key. Models that do not exist for a key set are remembered and
+    skipped within their tier.
+    """
+
+    COOLDOWN_SECONDS = 30
+    MIN_SLEEP = 0.01  # avoids spinning on float rounding in bucket refills
+
+    def __init__(
+        self,
+        keys: List[str],
+        rpm: int = 15,
+        tpm: int = 250000,
+        max_wait: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = _default_sleep
+    ):
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.max_wait = max_wait
+        self.slots = [KeySlot(i, k, rpm, tpm, clock) for i, k in enumerate(keys)]
+        self._unavailable_models = set()
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    # ============ Keys ============
+
+    def _try_acquire(self, estimated_tokens: int):
+        """Reserve budget on the best key; returns (slot, 0) or (None, wait)"""
+        now = self._clock()
+        with self._lock:
+            ready, soonest = [], self.max_wait
+            for slot in self.slots:
+                wait = slot.wait_time(estimated_tokens, now)
+                if wait <= 0:
+                    ready.append(slot)
+                else:
+                    soonest = min(soonest, wait)
+            if not ready:
+                return None, soonest
+
+            best = max(ready, key=lambda s: (s.headroom(), -s.in_flight))
+            best.requests.consume(1)
+            best.tokens.consume(estimated_tokens)
+            best.in_flight += 1
+            return best, 0.0
+
+    def acquire(self, estimated_tokens: int = DEFAULT_OUTPUT_TOKENS) -> KeySlot:
+        """Reserve a key for one call, queueing briefly if all are busy"""
+        if not self.slots:
+            raise SchedulerBusy("No API keys configured")
+
+        deadline = self._clock() + self.max_wait
+        while True:
+            slot, wait = self._try_acquire(estimated_tokens)
+            if slot:
+                return slot
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                raise SchedulerBusy(f"All {len(self.slots)} API keys are at their rate limit")
+            self._sleep(min(max(wait, self.MIN_SLEEP), remaining))
+
+    def release(self, slot: KeySlot, estimated_tokens: int, used_tokens: Optional[int] = None) -> None:
+        """Finish a call and settle its token reservation against real usage"""
+        with self._lock:
+            slot.in_flight = max(0, slot.in_flight - 1)
+            slot.served += 1
+            if used_tokens is not None:
+                slot.tokens.consume(used_tokens - estimated_tokens)
+
+    def penalize(self, slot: KeySlot, retry_after: float = None) -> None:
+        """A 429 on this key: stop routing to it for a while"""
+        with self._lock:
+            slot.in_flight = max(0, slot.in_flight - 1)
+            slot.throttled += 1
+            slot.cooldown_until = self._clock() + (retry_after or self.COOLDOWN_SECONDS)
+
+    # ============ Models ============
+
+    def models_for(self, task: str) -> List[str]:
+        """Usable models for a task, best first"""
+        tier = TASK_TIERS.get(task, 'standard')
+        return [m for m in MODEL_TIERS[tier] if m not in self._unavailable_models]
+
+    def mark_unavailable(self, model_name: str) -> None:
+        self._unavailable_models.add(model_name)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'keys': [{
+                    'index': s.index,
+                    'served': s.served,
+                    'throttled': s.throttled,
+                    'in_flight': s.in_flight,
+                    'request_headroom': round(s.requests.fraction(), 3),
+                    'token_headroom': round(s.tokens.fraction(), 3),
+                    'cooling_down': s.cooldown_until > self._clock()
+                } for s in self.slots],
+                'unavailable_models': sorted(self._unavailable_models)
+            }
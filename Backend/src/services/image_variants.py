@@ -0,0 +1,41 @@
+"""
+Image Variants
+Pillow helpers used by the avatar worker processes: validate an upload and
+render square, fixed-size WebP thumbnails
+
+Kept free of Flask / config imports so pool workers start quickly.
+"""
+from typing import Dict, Sequence
+import os
+
+WEBP_QUALITY = 80
+WEBP_METHOD = 4  # encoder effort 0-6
+
+
+def render_square_variants(source: str, target_pattern: str, sizes: Sequence[int]) -> Dict[int, int]:
+    """
+    Centre-crop the image at source to squares of each size and write them
+    as WebP to target_pattern.format(size=...). EXIF orientation is applied
+    and metadata dropped. Returns {size: bytes written}; raises ValueError
+    for files that are not images.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(source) as image:
+            image.seek(0)  # first frame of animated GIF / WebP
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    except (UnidentifiedImageError, OSError) as e:
+        raise ValueError(f"Not a valid image: {e}")
+
+    written = {}
+    # Largest first: each variant is reduced from the previous one
+    for size in sorted(sizes, reverse=True):
+        image = ImageOps.fit(image, (size, size), Image.LANCZOS) if image.size != (size, size) else image
+        target = target_pattern.format(size=size)
+        temp = target + '.tmp'
+        image.save(temp, 'WEBP', quality=WEBP_QUALITY, method=WEBP_METHOD)
+        os.replace(temp, target)
+        written[size] = os.path.getsize(target)
+    return written
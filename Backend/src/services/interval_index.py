@@ -0,0 +1,96 @@
+"""
+Interval Index
+Sorted half-open [start, end) intervals with logarithmic overlap queries,
+used by the scheduling service for mentor availability and bookings
+
+Pure Python (bisect), so it can be built from any query result.
+"""
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+Interval = Tuple[Any, Any, Any]  # (start, end, key)
+
+
+class IntervalIndex:
+    """
+    Intervals sorted by start with a running maximum of their ends
+
+    _max_end[i] is the latest end among the first i + 1 intervals, so the
+    intervals overlapping [start, end) are found by bisecting for the last
+    one starting before `end` and walking back only while _max_end still
+    reaches past `start`. conflicts() is O(log n); overlapping() is
+    O(log n + k) for disjoint intervals, which is what one mentor's
+    availability and bookings are.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple] = ()):
+        items = sorted(
+            ((item[0], item[1], item[2] if len(item) > 2 else None) for item in intervals),
+            key=lambda item: (item[0], item[1])
+        )
+        self._starts = [item[0] for item in items]
+        self._ends = [item[1] for item in items]
+        self._keys = [item[2] for item in items]
+        self._max_end: List[Any] = []
+        self._rebuild(0)
+
+    def _rebuild(self, first: int) -> None:
+        del self._max_end[first:]
+        running = self._max_end[first - 1] if first else None
+        for end in self._ends[first:]:
+            running = end if running is None or end > running else running
+            self._max_end.append(running)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __iter__(self) -> Iterator[Interval]:
+        return iter(zip(self._starts, self._ends, self._keys))
+
+    def add(self, start, end, key=None) -> None:
+        """Insert [start, end); overlapping intervals are allowed"""
+        if not start < end:
+            raise ValueError("Interval must end after it starts")
+        i = bisect_right(self._starts, start)
+        self._starts.insert(i, start)
+        self._ends.insert(i, end)
+        self._keys.insert(i, key)
+        self._rebuild(i)
+
+    def conflicts(self, start, end) -> bool:
+        """True if any interval overlaps [start, end)"""
+        i = bisect_left(self._starts, end) - 1
+        return i >= 0 and self._max_end[i] > start
+
+    def overlapping(self, start, end) -> List[Interval]:
+        """Intervals overlapping [start, end), by start"""
+        found = []
+        i = bisect_left(self._starts, end) - 1
+        while i >= 0 and self._max_end[i] > start:
+            if self._ends[i] > start:
+                found.append((self._starts[i], self._ends[i], self._keys[i]))
+            i -= 1
+        found.reverse()
+        return found
+
+    def covering(self, start, end) -> Optional[Interval]:
+        """An interval containing all of [start, end), or None"""
+        i = bisect_right(self._starts, start) - 1
+        while i >= 0 and self._max_end[i] >= end:
+            if self._ends[i] >= end:
+                return self._starts[i], self._ends[i], self._keys[i]
+            i -= 1
+        return None
+
+    def gaps(self, start, end) -> List[Tuple[Any, Any]]:
+        """Parts of [start, end) no interval covers"""
+        free = []
+        cursor = start
+        for s, e, _ in self.overlapping(start, end):
+            if s > cursor:
+                free.append((cursor, s))
+            if e > cursor:
+                cursor = e
+        if cursor < end:
+            free.append((cursor, end))
+        return free
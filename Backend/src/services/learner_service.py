@@ -4,6 +4,9 @@ from infrastructure.models.assessment_model import AssessmentModel
 from infrastructure.models.user_model import UserModel
 from infrastructure.models.learner_profile_model import LearnerProfileModel
 from infrastructure.databases.mssql import session as db_session, get_db_session
+from services.progress_aggregator import (
+    progress_aggregator, session_event, assessment_event, current_streak, active_days
+)
 from datetime import datetime
 import json
 
@@ -90,6 +93,7 @@ class LearnerService:
         try:
             practice = session.query(PracticeSessionModel).get(session_id)
             if practice:
+                was_completed = practice.is_completed
                 practice.pronunciation_score = scores.get('pronunciation')
                 practice.grammar_score = scores.get('grammar')
                 practice.vocabulary_score = scores.get('vocabulary')
@@ -97,6 +101,8 @@ class LearnerService:
                 practice.overall_score = scores.get('overall')
                 practice.is_completed = True
                 practice.ended_at = datetime.now()
+                if not was_completed:
+                    progress_aggregator.record(session, session_event(practice))
                 session.commit()
             return practice
         finally:
@@ -143,8 +149,11 @@ class LearnerService:
                 assessment.grammar_score = results.get('grammar')
                 assessment.overall_score = results.get('overall')
                 assessment.determined_level = results.get('level')
+                was_completed = assessment.is_completed
                 assessment.is_completed = True
                 assessment.completed_at = datetime.now()
+                if not was_completed:
+                    progress_aggregator.record(session, assessment_event(assessment))
                 session.commit()
             return assessment
         finally:
@@ -169,7 +178,7 @@ class LearnerService:
                         'overall_score': progress.overall_score or 0,
                         'current_level': progress.current_level or 'beginner',
                         'total_sessions': progress.total_sessions or 0,
-                        'current_streak': progress.current_streak or 0,
+                        'current_streak': current_streak(progress),
                         'xp_points': progress.xp_points or 0,
                         'recent_sessions': recent_count,
                         'skills': {
@@ -178,7 +187,7 @@ class LearnerService:
                             'pronunciation': progress.pronunciation_score or 0,
                             'fluency': progress.fluency_score or 0
                         },
-                        'weekly_goal': {'target': 5, 'completed': min(progress.current_streak or 0, 5)},
+                        'weekly_goal': {'target': 5, 'completed': min(active_days(progress, 7), 5)},
                         'next_milestone': {'name': self._get_next_level(progress.current_level), 'progress': progress.overall_score or 0}
                     }
                 else:
@@ -239,7 +248,7 @@ class LearnerService:
                     'email': user.email,
                     'avatar': f'https://api.dicebear.com/7.x/avataaars/svg?seed={user.user_name}',
                     'current_level': progress.current_level if progress else 'beginner',
-                    'current_streak': progress.current_streak if progress else 0,
+                    'current_streak': current_streak(progress) if progress else 0,
                     'xp_points': progress.xp_points if progress else 0,
                     'target_level': profile.target_level if profile else 'C1',
                     'progress_to_target': self._calculate_level_progress(progress) if progress else 0,
@@ -762,28 +771,23 @@ class LearnerService:
     # ==================== ENHANCED BOOKING ====================
     def create_booking(self, data: dict):
         """Create a new mentor booking"""
+        from services.scheduling_service import scheduling_service, SlotConflict
         try:
             with get_db_session() as session:
-                from infrastructure.models.mentor_booking_model import MentorBookingModel
-                from datetime import date, time
-                
                 # Parse date and time
                 scheduled_date = datetime.strptime(data.get('scheduled_date'), '%Y-%m-%d').date()
                 scheduled_time = datetime.strptime(data.get('scheduled_time'), '%H:%M').time()
                 
-                booking = MentorBookingModel(
+                # Checks availability and double-booking under the mentor's row lock
+                booking = scheduling_service.reserve(
+                    session,
                     learner_id=data.get('learner_id'),
                     mentor_id=data.get('mentor_id'),
-                    scheduled_date=scheduled_date,
-                    scheduled_time=scheduled_time,
+                    starts_at=datetime.combine(scheduled_date, scheduled_time),
                     duration_minutes=data.get('duration_minutes', 30),
                     topic=data.get('topic'),
-                    notes=data.get('notes'),
-                    status='pending',
-                    created_at=datetime.now()
+                    notes=data.get('notes')
                 )
-                session.add(booking)
-                session.flush()
                 
                 # Get mentor name
                 mentor = session.query(UserModel).get(data.get('mentor_id'))
@@ -797,9 +801,13 @@ class LearnerService:
                     'mentor_name': mentor.full_name if mentor else None,
                     'scheduled_date': str(scheduled_date),
                     'scheduled_time': str(scheduled_time),
+                    'duration_minutes': booking.duration_minutes,
+                    'availability_id': booking.availability_id,
                     'topic': booking.topic,
                     'status': booking.status
                 }
+        except SlotConflict as e:
+            return {'error': str(e), 'conflicts': e.conflicts}
         except Exception as e:
             print(f"Create booking error: {e}")
             return {'error': str(e)}
@@ -809,6 +817,7 @@ class LearnerService:
         try:
             with get_db_session() as session:
                 from infrastructure.models.mentor_booking_model import MentorBookingModel
+                from services.scheduling_service import scheduling_service, ACTIVE_BOOKING_STATUSES
                 
                 booking = session.query(MentorBookingModel).get(booking_id)
                 if not booking:
@@ -817,6 +826,8 @@ class LearnerService:
                 old_status = booking.status
                 
                 if 'status' in data:
+                    if data['status'] in ('cancelled', 'rejected') and old_status in ACTIVE_BOOKING_STATUSES:
+                        scheduling_service.release(session, booking)
                     booking.status = data['status']
                     if data['status'] == 'confirmed':
                         booking.confirmed_at = datetime.now()
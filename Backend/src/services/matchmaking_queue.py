@@ -0,0 +1,218 @@
+"""
+Matchmaking Queue for Study Buddy pairing
+Per-(level, topic) FIFO buckets with wait-time based relaxation
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import threading
+import time
+
+
+# Ordered so that neighbours in the list are "adjacent" levels
+LEVEL_ORDER = ['beginner', 'elementary', 'intermediate', 'upper-intermediate', 'advanced']
+ANY_TOPIC = '*'
+
+
+class MatchTicket:
+    """A learner waiting in the queue"""
+    __slots__ = ('user_id', 'level', 'topic', 'enqueued_at', 'seq')
+
+    def __init__(self, user_id: int, level: str, topic: str, enqueued_at: float, seq: int):
+        self.user_id = user_id
+        self.level = level
+        self.topic = topic
+        self.enqueued_at = enqueued_at
+        self.seq = seq
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.level, self.topic)
+
+
+class MatchmakingQueue:
+    """
+    Indexed matchmaking queue
+
+    - Each (level, topic) pair has its own FIFO bucket (an OrderedDict keyed
+      by user id), so enqueue, cancel and "oldest waiting" are O(1).
+    - Every ticket carries a sequence number within its bucket; the queue
+      position is its distance from the bucket head. Mid-queue cancels can
+      make positions behind them overestimate until the next tick, which
+      renumbers the bucket.
+    - A request first looks for a partner in its own bucket (or any topic
+      at its level when it has no topic). Waiting tickets are relaxed by
+      the periodic tick: after TOPIC_RELAX_AFTER seconds any topic at the
+      same level is acceptable, after ADJACENT_LEVEL_AFTER seconds the
+      neighbouring levels are too.
+    """
+
+    TOPIC_RELAX_AFTER = 15  # seconds
+    ADJACENT_LEVEL_AFTER = 30  # seconds
+    TICK_BATCH_SIZE = 500  # pairs per bucket per tick
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str], 'OrderedDict[int, MatchTicket]'] = {}
+        self._next_seq: Dict[Tuple[str, str], int] = {}
+        # level -> topics with a non-empty bucket at that level
+        self._topics_by_level: Dict[str, set] = {}
+        self._tickets: Dict[int, MatchTicket] = {}
+
+    # ============ Bucket helpers (caller holds the lock) ============
+
+    def _add(self, ticket: MatchTicket) -> None:
+        bucket = self._buckets.setdefault(ticket.key, OrderedDict())
+        bucket[ticket.user_id] = ticket
+        self._topics_by_level.setdefault(ticket.level, set()).add(ticket.topic)
+        self._tickets[ticket.user_id] = ticket
+
+    def _remove(self, ticket: MatchTicket) -> None:
+        bucket = self._buckets.get(ticket.key)
+        if bucket is not None:
+            bucket.pop(ticket.user_id, None)
+            if not bucket:
+                del self._buckets[ticket.key]
+                self._next_seq.pop(ticket.key, None)
+                topics = self._topics_by_level.get(ticket.level)
+                if topics is not None:
+                    topics.discard(ticket.topic)
+                    if not topics:
+                        del self._topics_by_level[ticket.level]
+        self._tickets.pop(ticket.user_id, None)
+
+    def _oldest(self, key: Tuple[str, str], exclude: int) -> Optional[MatchTicket]:
+        bucket = self._buckets.get(key)
+        if not bucket:
+            return None
+        for user_id, ticket in bucket.items():
+            if user_id != exclude:
+                return ticket
+        return None
+
+    def _candidate_keys(self, ticket: MatchTicket, waited: float) -> List[Tuple[str, str]]:
+        """Buckets a ticket may draw a partner from, best first"""
+        levels = [ticket.level]
+        if waited >= self.ADJACENT_LEVEL_AFTER and ticket.level in LEVEL_ORDER:
+            idx = LEVEL_ORDER.index(ticket.level)
+            levels += [LEVEL_ORDER[i] for i in (idx - 1, idx + 1) if 0 <= i < len(LEVEL_ORDER)]
+
+        any_topic = ticket.topic == ANY_TOPIC or waited >= self.TOPIC_RELAX_AFTER
+        keys = []
+        for level in levels:
+            if any_topic:
+                keys.append((level, ticket.topic))
+                keys += [(level, t) for t in self._topics_by_level.get(level, ()) if t != ticket.topic]
+            else:
+                keys += [(level, ticket.topic), (level, ANY_TOPIC)]
+        return keys
+
+    def _find_partner(self, ticket: MatchTicket, waited: float) -> Optional[MatchTicket]:
+        best = None
+        for key in self._candidate_keys(ticket, waited):
+            candidate = self._oldest(key, exclude=ticket.user_id)
+            if candidate and (best is None or candidate.enqueued_at < best.enqueued_at):
+                best = candidate
+                # Exact bucket wins outright, the rest compete on wait time
+                if key == ticket.key:
+                    break
+        return best
+
+    # ============ Public API ============
+
+    def enqueue(self, user_id: int, level: str, topic: str = None) -> Optional[MatchTicket]:
+        """
+        Add a learner to the queue, or pair them immediately
+
+        Returns:
+            The partner's ticket if matched right away, else None
+        """
+        topic = topic or ANY_TOPIC
+        now = self._clock()
+        with self._lock:
+            existing = self._tickets.get(user_id)
+            if existing:
+                self._remove(existing)
+
+            key = (level, topic)
+            seq = self._next_seq.get(key, 0)
+            self._next_seq[key] = seq + 1
+            ticket = MatchTicket(user_id, level, topic, now, seq)
+
+            partner = self._find_partner(ticket, waited=0)
+            if partner:
+                self._remove(partner)
+                return partner
+
+            self._add(ticket)
+            return None
+
+    def cancel(self, user_id: int) -> bool:
+        with self._lock:
+            ticket = self._tickets.get(user_id)
+            if not ticket:
+                return False
+            self._remove(ticket)
+            return True
+
+    def get_ticket(self, user_id: int) -> Optional[MatchTicket]:
+        return self._tickets.get(user_id)
+
+    def position(self, user_id: int) -> Optional[int]:
+        """1-based position within the learner's bucket, None if not waiting"""
+        with self._lock:
+            ticket = self._tickets.get(user_id)
+            if not ticket:
+                return None
+            bucket = self._buckets[ticket.key]
+            head = next(iter(bucket.values()))
+            return ticket.seq - head.seq + 1
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._tickets
+
+    def tick(self) -> List[Tuple[MatchTicket, MatchTicket]]:
+        """
+        Drain buckets in batches and return the pairs formed
+
+        Pairs inside each bucket first (oldest two at a time), then lets
+        tickets that have waited long enough draw from relaxed buckets,
+        and finally renumbers bucket sequences so positions are exact.
+        """
+        now = self._clock()
+        pairs = []
+        with self._lock:
+            for key in list(self._buckets):
+                for _ in range(self.TICK_BATCH_SIZE):
+                    bucket = self._buckets.get(key)
+                    if not bucket or len(bucket) < 2:
+                        break
+                    first = bucket.popitem(last=False)[1]
+                    second = next(iter(bucket.values()))
+                    self._tickets.pop(first.user_id, None)
+                    self._remove(second)
+                    pairs.append((first, second))
+
+            relaxed_after = min(self.TOPIC_RELAX_AFTER, self.ADJACENT_LEVEL_AFTER)
+            waiting = sorted(self._tickets.values(), key=lambda t: t.enqueued_at)
+            for ticket in waiting:
+                waited = now - ticket.enqueued_at
+                if waited < relaxed_after:
+                    break
+                if ticket.user_id not in self._tickets:
+                    continue
+                partner = self._find_partner(ticket, waited)
+                if partner:
+                    self._remove(ticket)
+                    self._remove(partner)
+                    pairs.append((ticket, partner))
+
+            for key, bucket in self._buckets.items():
+                for seq, ticket in enumerate(bucket.values()):
+                    ticket.seq = seq
+                self._next_seq[key] = len(bucket)
+
+        return pairs
@@ -11,11 +11,34 @@ from infrastructure.models.mentor_content_models import (
     PronunciationErrorModel, VocabularyItemModel, IdiomModel,
     ConversationScenarioModel, RealLifeSituationModel, LearnerActivityAssignmentModel
 )
+from services.content_catalogue import content_catalogue_cache
+from data import mentor_content_data as seed
+
+
+IPA_GUIDE = {
+    'vowels': [
+        {'symbol': '/iː/', 'example': 'see', 'vietnamese_hint': 'như "i" kéo dài'},
+        {'symbol': '/ɪ/', 'example': 'bit', 'vietnamese_hint': 'như "i" ngắn'},
+        {'symbol': '/e/', 'example': 'bed', 'vietnamese_hint': 'như "e"'},
+        {'symbol': '/æ/', 'example': 'cat', 'vietnamese_hint': 'giữa "e" và "a"'}
+    ],
+    'consonants': [
+        {'symbol': '/θ/', 'example': 'think', 'vietnamese_hint': 'đặt lưỡi giữa hai hàm răng'},
+        {'symbol': '/ð/', 'example': 'this', 'vietnamese_hint': 'như /θ/ nhưng có tiếng'}
+    ]
+}
 
 
 class MentorContentService:
     """Service for managing mentor teaching content"""
 
+    def get_catalogue(self, name, key='all'):
+        """Preserialized catalogue payload (body + ETag) for the read-only endpoints"""
+        return content_catalogue_cache.get(name, key)
+
+    def invalidate_catalogues(self, *names):
+        content_catalogue_cache.invalidate(*names)
+
     # ==================== CONFIDENCE BUILDING ====================
 
     def get_confidence_techniques(self):
@@ -173,22 +196,22 @@ class MentorContentService:
     # ==================== GRAMMAR CORRECTION ====================
 
     def get_common_grammar_errors(self):
-        """Get common grammar errors from database"""
-        try:
-            with get_db_session() as session:
-                errors = session.query(GrammarErrorModel)\
-                    .filter_by(is_active=True).all()
-                
-                return [{
-                    'id': e.id,
-                    'type': e.title,
-                    'example_wrong': e.error_pattern,
-                    'example_correct': e.correct_pattern,
-                    'frequency': e.frequency
-                } for e in errors]
-        except Exception as e:
-            print(f"Get grammar errors error: {e}")
-            return []
+        """Get common grammar errors (cached catalogue)"""
+        return content_catalogue_cache.get('grammar_errors').data
+
+    @staticmethod
+    def _query_grammar_errors(key):
+        with get_db_session() as session:
+            errors = session.query(GrammarErrorModel)\
+                .filter_by(is_active=True).all()
+            
+            return [{
+                'id': e.id,
+                'type': e.title,
+                'example_wrong': e.error_pattern,
+                'example_correct': e.correct_pattern,
+                'frequency': e.frequency
+            } for e in errors]
 
     def analyze_grammar(self, text):
         """Analyze text for grammar errors"""
@@ -224,122 +247,111 @@ class MentorContentService:
     # ==================== PRONUNCIATION ====================
 
     def get_common_pronunciation_errors(self):
-        """Get common pronunciation errors for Vietnamese learners from database"""
-        try:
-            with get_db_session() as session:
-                errors = session.query(PronunciationErrorModel)\
-                    .filter_by(is_active=True).all()
-                
-                return [{
-                    'id': e.id,
-                    'sound': e.sound,
-                    'common_mistake': e.common_mistake,
-                    'correct_way': e.correct_way,
-                    'words': [e.word_example] if e.word_example else [],
-                    'tips': e.tips
-                } for e in errors]
-        except Exception as e:
-            print(f"Get pronunciation errors error: {e}")
-            return []
+        """Get common pronunciation errors for Vietnamese learners (cached catalogue)"""
+        return content_catalogue_cache.get('pronunciation_errors').data
+
+    @staticmethod
+    def _query_pronunciation_errors(key):
+        with get_db_session() as session:
+            errors = session.query(PronunciationErrorModel)\
+                .filter_by(is_active=True).all()
+            
+            return [{
+                'id': e.id,
+                'sound': e.sound,
+                'common_mistake': e.common_mistake,
+                'correct_way': e.correct_way,
+                'words': [e.word_example] if e.word_example else [],
+                'tips': e.tips
+            } for e in errors]
 
     def get_ipa_guide(self):
         """Get IPA pronunciation guide - static data, could be moved to DB"""
-        return {
-            'vowels': [
-                {'symbol': '/iː/', 'example': 'see', 'vietnamese_hint': 'như "i" kéo dài'},
-                {'symbol': '/ɪ/', 'example': 'bit', 'vietnamese_hint': 'như "i" ngắn'},
-                {'symbol': '/e/', 'example': 'bed', 'vietnamese_hint': 'như "e"'},
-                {'symbol': '/æ/', 'example': 'cat', 'vietnamese_hint': 'giữa "e" và "a"'}
-            ],
-            'consonants': [
-                {'symbol': '/θ/', 'example': 'think', 'vietnamese_hint': 'đặt lưỡi giữa hai hàm răng'},
-                {'symbol': '/ð/', 'example': 'this', 'vietnamese_hint': 'như /θ/ nhưng có tiếng'}
-            ]
-        }
+        return content_catalogue_cache.get('ipa_guide').data
 
     # ==================== VOCABULARY ====================
 
     def get_collocations(self, category='all'):
-        """Get common collocations from database"""
-        try:
-            with get_db_session() as session:
-                query = session.query(VocabularyItemModel)\
-                    .filter_by(is_active=True)
-                
-                if category != 'all':
-                    query = query.filter_by(category=category)
-                
-                items = query.all()
+        """Get common collocations (cached catalogue per category)"""
+        return content_catalogue_cache.get('collocations', category).data
+
+    @staticmethod
+    def _query_collocations(category):
+        with get_db_session() as session:
+            query = session.query(VocabularyItemModel)\
+                .filter_by(is_active=True)
+            
+            if category != 'all':
+                query = query.filter_by(category=category)
+            
+            items = query.all()
+            
+            result = []
+            for v in items:
+                collocations = []
+                if v.collocations:
+                    try:
+                        collocations = json.loads(v.collocations)
+                    except json.JSONDecodeError:
+                        collocations = []
                 
-                result = []
-                for v in items:
-                    collocations = []
-                    if v.collocations:
-                        try:
-                            collocations = json.loads(v.collocations)
-                        except json.JSONDecodeError:
-                            collocations = []
-                    
-                    for col in collocations:
-                        result.append({
-                            'id': v.id,
-                            'phrase': col,
-                            'category': v.category,
-                            'meaning': v.meaning_vi
-                        })
-                return result
-        except Exception as e:
-            print(f"Get collocations error: {e}")
-            return []
+                for col in collocations:
+                    result.append({
+                        'id': v.id,
+                        'phrase': col,
+                        'category': v.category,
+                        'meaning': v.meaning_vi
+                    })
+            return result
 
     def get_idioms(self, level='all'):
-        """Get idioms from database"""
-        try:
-            with get_db_session() as session:
-                query = session.query(IdiomModel).filter_by(is_active=True)
-                
-                if level != 'all':
-                    query = query.filter_by(difficulty=level)
-                
-                idioms = query.all()
-                
-                return [{
-                    'id': i.id,
-                    'idiom': i.phrase,
-                    'meaning': i.meaning_vi,
-                    'level': i.difficulty,
-                    'example': i.example
-                } for i in idioms]
-        except Exception as e:
-            print(f"Get idioms error: {e}")
-            return []
+        """Get idioms (cached catalogue per level)"""
+        return content_catalogue_cache.get('idioms', level).data
+
+    @staticmethod
+    def _query_idioms(level):
+        with get_db_session() as session:
+            query = session.query(IdiomModel).filter_by(is_active=True)
+            
+            if level != 'all':
+                query = query.filter_by(difficulty=level)
+            
+            idioms = query.all()
+            
+            return [{
+                'id': i.id,
+                'idiom': i.phrase,
+                'meaning': i.meaning_vi,
+                'level': i.difficulty,
+                'example': i.example
+            } for i in idioms]
 
     def get_common_word_mistakes(self):
-        """Get common word usage mistakes from database"""
-        try:
-            with get_db_session() as session:
-                items = session.query(VocabularyItemModel)\
-                    .filter_by(is_active=True, category='confused_words').all()
+        """Get common word usage mistakes (cached catalogue)"""
+        return content_catalogue_cache.get('word_mistakes').data
+
+    @staticmethod
+    def _query_word_mistakes(key):
+        with get_db_session() as session:
+            items = session.query(VocabularyItemModel)\
+                .filter_by(is_active=True, category='confused_words').all()
+            
+            result = []
+            for v in items:
+                synonyms = []
+                if v.synonyms:
+                    try:
+                        synonyms = json.loads(v.synonyms)
+                    except json.JSONDecodeError:
+                        synonyms = []
                 
-                result = []
-                for v in items:
-                    synonyms = []
-                    if v.synonyms:
-                        try:
-                            synonyms = json.loads(v.synonyms)
-                        except json.JSONDecodeError:
-                            synonyms = []
-                    
-                    result.append({
-                        'id': v.id,
-                        'confused_words': synonyms,
-                        'rule': v.meaning_vi,
-                        'examples': [v.example] if v.example else []
-                    })
-                return result
-        except Exception as e:
-            print(f"Get word mistakes error: {e}")
-            return []
+                result.append({
+                    'id': v.id,
+                    'confused_words': synonyms,
+                    'rule': v.meaning_vi,
+                    'examples': [v.example] if v.example else []
+                })
+            return result
 
     # ==================== CONVERSATION TOPICS ====================
 
@@ -454,3 +466,70 @@ class MentorContentService:
         except Exception as e:
             print(f"Get situation scripts error: {e}")
             return []
+
+
+# ==================== CATALOGUE CACHE ====================
+# Seed data from data/mentor_content_data.py, in the API shape, served when
+# the tables are empty or unreachable
+
+def _seed_grammar_errors(key):
+    return [{
+        'id': e['id'],
+        'type': e['category'],
+        'example_wrong': e['error'],
+        'example_correct': e['correct'],
+        'frequency': e['frequency']
+    } for e in seed.COMMON_GRAMMAR_ERRORS]
+
+
+def _seed_pronunciation_errors(key):
+    return [{
+        'id': e['id'],
+        'sound': e['ipa'],
+        'common_mistake': e['wrong'],
+        'correct_way': e['correct'],
+        'words': [e['word']],
+        'tips': None
+    } for e in seed.COMMON_PRONUNCIATION_ERRORS]
+
+
+def _seed_collocations(category):
+    return [{
+        'id': c['id'],
+        'phrase': c['correct'],
+        'category': c['category'],
+        'meaning': c.get('meaning')
+    } for c in seed.COLLOCATIONS if category == 'all' or c['category'] == category]
+
+
+def _seed_idioms(level):
+    return [{
+        'id': i['id'],
+        'idiom': i['idiom'],
+        'meaning': i['meaning'],
+        'level': i['level'],
+        'example': i['example']
+    } for i in seed.IDIOMS if level == 'all' or i['level'] == level]
+
+
+content_catalogue_cache.register('grammar_errors', MentorContentService._query_grammar_errors, _seed_grammar_errors)
+content_catalogue_cache.register('pronunciation_errors', MentorContentService._query_pronunciation_errors,
+                                 _seed_pronunciation_errors)
+content_catalogue_cache.register('ipa_guide', lambda key: IPA_GUIDE)
+content_catalogue_cache.register('collocations', MentorContentService._query_collocations, _seed_collocations)
+content_catalogue_cache.register('idioms', MentorContentService._query_idioms, _seed_idioms)
+content_catalogue_cache.register('word_mistakes', MentorContentService._query_word_mistakes)
+
+content_catalogue_cache.bind_models('grammar_errors', GrammarErrorModel)
+content_catalogue_cache.bind_models('pronunciation_errors', PronunciationErrorModel)
+content_catalogue_cache.bind_models('collocations', VocabularyItemModel)
+content_catalogue_cache.bind_models('word_mistakes', VocabularyItemModel)
+content_catalogue_cache.bind_models('idioms', IdiomModel)
+
+
+def warm_up_content_catalogues():
+    """Load every catalogue, plus the filters the seed data uses, before traffic arrives"""
+    return content_catalogue_cache.warm_up({
+        'collocations': ['all'] + sorted({c['category'] for c in seed.COLLOCATIONS}),
+        'idioms': ['all'] + sorted({i['level'] for i in seed.IDIOMS}),
+    })
@@ -0,0 +1,220 @@
+"""
+Notification Dispatcher for AESP Platform
+Write-behind persistence, real-time push and unread counters for notifications
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, Any
+import logging
+import threading
+import time
+
+from infrastructure.models.notification_model import NotificationModel
+from infrastructure.databases.mssql import get_db_session
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    """
+    In-process notification pipeline
+
+    Notifications are queued in memory and written in batches with a single
+    executemany INSERT per flush. After each flush, online recipients get a
+    'notification' Socket.IO event plus their new unread count, so clients
+    no longer need to poll. Unread counts are kept per user in memory,
+    seeded from the database and refreshed after COUNTER_TTL seconds so
+    several workers do not drift apart for long.
+    """
+
+    BATCH_SIZE = 500
+    FLUSH_INTERVAL = 0.5  # seconds
+    COUNTER_TTL = 60  # seconds
+    MAX_PENDING = 50000  # rows kept for retry if the database is down
+
+    def __init__(self):
+        self._pending: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # {user_id: {'count': int, 'loaded_at': float}}
+        self._unread: Dict[int, Dict[str, float]] = {}
+        self._pending_unread: Dict[int, int] = {}
+        self._socketio = None
+        self._running = False
+
+    # ============ Lifecycle ============
+
+    def start(self, socketio) -> None:
+        """Start the background flusher on the SocketIO async loop"""
+        if self._running:
+            return
+        self._socketio = socketio
+        self._running = True
+        socketio.start_background_task(self._run)
+        logger.info("[NotificationDispatcher] Background flusher started")
+
+    def spawn(self, fn, *args) -> None:
+        """Run fn on the SocketIO async loop, or inline when it is not running"""
+        if self._running:
+            self._socketio.start_background_task(fn, *args)
+        else:
+            fn(*args)
+
+    def _run(self) -> None:
+        while self._running:
+            self._socketio.sleep(self.FLUSH_INTERVAL)
+            try:
+                while self.flush() >= self.BATCH_SIZE:
+                    pass
+            except Exception as e:
+                logger.error(f"[NotificationDispatcher] Flush failed: {e}")
+
+    # ============ Enqueue ============
+
+    @staticmethod
+    def build_row(
+        user_id: int,
+        title: str,
+        message: str = None,
+        notification_type: str = 'system',
+        action_url: str = None,
+        created_at: datetime = None
+    ) -> Dict[str, Any]:
+        return {
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'notification_type': notification_type,
+            'action_url': action_url,
+            'is_read': False,
+            'created_at': created_at or datetime.now()
+        }
+
+    def enqueue_many(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Queue notification rows for the next batch write
+
+        Without a running flusher (scripts, shell) the rows are written
+        immediately so nothing is left in memory.
+        """
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._pending.extend(rows)
+            for row in rows:
+                uid = row['user_id']
+                self._pending_unread[uid] = self._pending_unread.get(uid, 0) + 1
+                if uid in self._unread:
+                    self._unread[uid]['count'] += 1
+            pending = len(self._pending)
+
+        if not self._running:
+            while self.flush():
+                pass
+        elif pending >= self.BATCH_SIZE and self._socketio:
+            self._socketio.start_background_task(self.flush)
+
+        return len(rows)
+
+    def enqueue(self, **kwargs) -> Dict[str, Any]:
+        row = self.build_row(**kwargs)
+        self.enqueue_many([row])
+        return row
+
+    # ============ Flush ============
+
+    def flush(self) -> int:
+        """Write one batch of pending notifications and push it to online users"""
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch = self._pending[:self.BATCH_SIZE]
+            del self._pending[:self.BATCH_SIZE]
+
+        try:
+            with get_db_session() as session:
+                # A list of parameter dicts makes SQLAlchemy use executemany
+                session.execute(NotificationModel.__table__.insert(), batch)
+        except Exception:
+            with self._lock:
+                # Put the batch back in front so ordering is kept for the retry
+                self._pending[:0] = batch
+                del self._pending[self.MAX_PENDING:]
+            raise
+
+        with self._lock:
+            for row in batch:
+                uid = row['user_id']
+                left = self._pending_unread.get(uid, 0) - 1
+                if left > 0:
+                    self._pending_unread[uid] = left
+                else:
+                    self._pending_unread.pop(uid, None)
+
+        self.push(batch)
+        return len(batch)
+
+    def push(self, rows: List[Dict[str, Any]]) -> None:
+        """Emit already persisted notification rows to recipients that are online"""
+        try:
+            from api.websocket import socketio, connected_users
+        except Exception:
+            return
+
+        for row in rows:
+            uid = str(row['user_id'])
+            if uid not in connected_users:
+                continue
+            sid = connected_users[uid]['sid']
+            try:
+                socketio.emit('notification', {
+                    'user_id': row['user_id'],
+                    'title': row['title'],
+                    'message': row['message'],
+                    'type': row['notification_type'],
+                    'notification_type': row['notification_type'],
+                    'is_read': False,
+                    'action_url': row['action_url'],
+                    'created_at': row['created_at'].isoformat(),
+                    'unread_count': self.peek_unread_count(row['user_id'])
+                }, room=sid)
+            except Exception as e:
+                logger.warning(f"[NotificationDispatcher] Push to user {uid} failed: {e}")
+
+    # ============ Unread counters ============
+
+    def get_unread_count(self, user_id: int, load: Callable[[int], int]) -> int:
+        """Cached unread count; `load` returns the persisted count on a miss"""
+        with self._lock:
+            entry = self._unread.get(user_id)
+            if entry and time.monotonic() - entry['loaded_at'] < self.COUNTER_TTL:
+                return int(entry['count'])
+
+        count = load(user_id)
+        with self._lock:
+            count += self._pending_unread.get(user_id, 0)
+            self._unread[user_id] = {'count': count, 'loaded_at': time.monotonic()}
+        return count
+
+    def peek_unread_count(self, user_id: int):
+        """Cached unread count without touching the database (None if unknown)"""
+        with self._lock:
+            entry = self._unread.get(user_id)
+            return int(entry['count']) if entry else None
+
+    def adjust_unread(self, user_id: int, delta: int) -> None:
+        with self._lock:
+            entry = self._unread.get(user_id)
+            if entry:
+                entry['count'] = max(0, entry['count'] + delta)
+
+    def reset_unread(self, user_id: int) -> None:
+        with self._lock:
+            self._unread[user_id] = {
+                'count': self._pending_unread.get(user_id, 0),
+                'loaded_at': time.monotonic()
+            }
+
+
+# Singleton instance
+notification_dispatcher = NotificationDispatcher()
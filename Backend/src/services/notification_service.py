@@ -3,11 +3,14 @@ Notification Service for AESP Platform
 Business logic for managing user notifications
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 
-from infrastructure.models.notification_model import NotificationModel
-from infrastructure.databases.mssql import session
+from sqlalchemy import func, and_, or_
+
+from infrastructure.models.notification_model import NotificationModel, NotificationBroadcastModel
+from infrastructure.databases.mssql import session, get_db_session
+from services.notification_dispatcher import notification_dispatcher
 
 
 class NotificationService:
@@ -20,10 +23,13 @@ class NotificationService:
         message: str = None,
         notification_type: str = 'system',
         action_url: str = None
-    ) -> NotificationModel:
+    ) -> Dict[str, Any]:
         """
         Create a new notification for a user
         
+        The row is queued in the notification dispatcher and written with
+        the next batch; online recipients get it pushed over Socket.IO.
+        
         Args:
             user_id: Target user ID
             title: Notification title
@@ -32,22 +38,41 @@ class NotificationService:
             action_url: URL to navigate when clicked
             
         Returns:
-            Created notification
+            Queued notification data
         """
-        notification = NotificationModel(
+        return notification_dispatcher.enqueue(
             user_id=user_id,
             title=title,
             message=message,
             notification_type=notification_type,
-            action_url=action_url,
-            is_read=False,
-            created_at=datetime.now()
+            action_url=action_url
         )
+    
+    @staticmethod
+    def create_notifications(notifications: List[Dict[str, Any]]) -> int:
+        """
+        Queue several notifications at once (written in one batch)
         
-        session.add(notification)
-        session.commit()
-        
-        return notification
+        Args:
+            notifications: Dicts with user_id, title and optional message,
+                notification_type and action_url
+            
+        Returns:
+            Number of notifications queued
+        """
+        now = datetime.now()
+        rows = [
+            notification_dispatcher.build_row(
+                user_id=n['user_id'],
+                title=n['title'],
+                message=n.get('message'),
+                notification_type=n.get('notification_type', 'system'),
+                action_url=n.get('action_url'),
+                created_at=now
+            )
+            for n in notifications
+        ]
+        return notification_dispatcher.enqueue_many(rows)
     
     @staticmethod
     def get_user_notifications(
@@ -83,7 +108,13 @@ class NotificationService:
     
     @staticmethod
     def get_unread_count(user_id: int) -> int:
-        """Get count of unread notifications for a user"""
+        """Get count of unread notifications for a user (cached per user)"""
+        return notification_dispatcher.get_unread_count(
+            user_id, NotificationService._count_unread
+        )
+    
+    @staticmethod
+    def _count_unread(user_id: int) -> int:
         return session.query(NotificationModel).filter(
             NotificationModel.user_id == user_id,
             NotificationModel.is_read == False
@@ -111,6 +142,8 @@ class NotificationService:
         notification = query.first()
         
         if notification:
+            if not notification.is_read:
+                notification_dispatcher.adjust_unread(notification.user_id, -1)
             notification.is_read = True
             session.commit()
             return True
@@ -134,6 +167,7 @@ class NotificationService:
         ).update({'is_read': True})
         
         session.commit()
+        notification_dispatcher.reset_unread(user_id)
         return count
     
     @staticmethod
@@ -158,6 +192,8 @@ class NotificationService:
         notification = query.first()
         
         if notification:
+            if not notification.is_read:
+                notification_dispatcher.adjust_unread(notification.user_id, -1)
             session.delete(notification)
             session.commit()
             return True
@@ -183,23 +219,15 @@ class NotificationService:
         Returns:
             Number of notifications created
         """
-        now = datetime.now()
-        notifications = [
-            NotificationModel(
-                user_id=uid,
-                title=title,
-                message=message,
-                notification_type=notification_type,
-                is_read=False,
-                created_at=now
-            )
+        return NotificationService.create_notifications([
+            {
+                'user_id': uid,
+                'title': title,
+                'message': message,
+                'notification_type': notification_type
+            }
             for uid in user_ids
-        ]
-        
-        session.bulk_save_objects(notifications)
-        session.commit()
-        
-        return len(notifications)
+        ])
     
     # Predefined notification templates
     @staticmethod
@@ -249,13 +277,23 @@ class NotificationService:
     @staticmethod
     def notify_mentor_practice_started(mentor_id: int, learner_name: str, topic: str, session_id: int):
         """Notify mentor when their assigned learner starts a practice session"""
-        return NotificationService.create_notification(
-            user_id=mentor_id,
-            title="🎙️ Học viên bắt đầu luyện tập",
-            message=f"{learner_name} đã bắt đầu phiên luyện tập chủ đề '{topic}'. Bạn có thể xem và đánh giá sau khi hoàn thành.",
-            notification_type="session",
-            action_url=f"/mentor/feedback"
+        return NotificationService.notify_mentors_practice_started(
+            [mentor_id], learner_name, topic, session_id
         )
+
+    @staticmethod
+    def notify_mentors_practice_started(mentor_ids: List[int], learner_name: str, topic: str, session_id: int) -> int:
+        """Notify several mentors about a learner starting practice in one batch"""
+        return NotificationService.create_notifications([
+            {
+                'user_id': mentor_id,
+                'title': "🎙️ Học viên bắt đầu luyện tập",
+                'message': f"{learner_name} đã bắt đầu phiên luyện tập chủ đề '{topic}'. Bạn có thể xem và đánh giá sau khi hoàn thành.",
+                'notification_type': "session",
+                'action_url': "/mentor/feedback"
+            }
+            for mentor_id in mentor_ids
+        ])
     
     @staticmethod
     def notify_mentor_session_completed(mentor_id: int, learner_name: str, session_id: int, overall_score: float = None):
@@ -269,11 +307,22 @@ class NotificationService:
             action_url=f"/mentor/feedback"
         )
 
+    # Users fanned out per chunk; each chunk is one INSERT and one commit
+    BROADCAST_CHUNK_SIZE = 1000
+    # A 'queued' / 'sending' broadcast without progress for this long is taken as dead and can be resumed
+    BROADCAST_STALL_SECONDS = 300
+
     @staticmethod
-    def send_broadcast(admin_id: int, target_role: str, title: str, message: str) -> int:
+    def send_broadcast(admin_id: int, target_role: str, title: str, message: str) -> Dict[str, Any]:
         """
         Send broadcast notification to all users of a specific role
         
+        A broadcast record is created and the fan-out runs in the background.
+        Recipients are read with keyset pagination (id > last id) in chunks of
+        BROADCAST_CHUNK_SIZE, each chunk inserted with executemany and
+        committed together with the progress counters, so memory and
+        transaction size stay bounded and a failed run can be resumed.
+        
         Args:
             admin_id: Admin who sends the broadcast
             target_role: 'all', 'learner', or 'mentor'
@@ -281,25 +330,165 @@ class NotificationService:
             message: Notification message
             
         Returns:
-            Number of notifications sent
+            Broadcast record (poll get_broadcast for progress)
         """
         from infrastructure.models.user_model import UserModel
         
-        query = session.query(UserModel.id)
-        if target_role != 'all':
-            query = query.filter(UserModel.role == target_role)
+        with get_db_session() as db:
+            query = db.query(func.count(UserModel.id))
+            if target_role != 'all':
+                query = query.filter(UserModel.role == target_role)
+            
+            broadcast = NotificationBroadcastModel(
+                admin_id=admin_id,
+                target_role=target_role,
+                title=title,
+                message=message,
+                notification_type='announcement',
+                status='queued',
+                total_recipients=query.scalar() or 0,
+                sent_count=0,
+                last_user_id=0,
+                created_at=datetime.now()
+            )
+            db.add(broadcast)
+            db.flush()
+            result = broadcast.to_dict()
         
-        user_ids = [u.id for u in query.all()]
+        notification_dispatcher.spawn(NotificationService.run_broadcast, result['id'])
+        return result
+
+    @staticmethod
+    def run_broadcast(broadcast_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Fan out a broadcast chunk by chunk, resuming from its last user id
         
-        if not user_ids:
-            return 0
+        Returns:
+            Final broadcast record, or None if it does not exist
+        """
+        from infrastructure.models.user_model import UserModel
         
-        return NotificationService.send_bulk_notification(
-            user_ids=user_ids,
-            title=title,
-            message=message,
-            notification_type='announcement'
-        )
+        chunk_size = NotificationService.BROADCAST_CHUNK_SIZE
+        insert = NotificationModel.__table__.insert()
+        
+        with get_db_session() as db:
+            broadcast = db.get(NotificationBroadcastModel, broadcast_id)
+            if not broadcast:
+                return None
+            if broadcast.status == 'completed':
+                return broadcast.to_dict()
+            broadcast.status = 'sending'
+            broadcast.started_at = broadcast.started_at or datetime.now()
+            broadcast.updated_at = datetime.now()
+            target_role = broadcast.target_role
+            template = {
+                'title': broadcast.title,
+                'message': broadcast.message,
+                'notification_type': broadcast.notification_type,
+                'action_url': None,
+                'is_read': False
+            }
+            last_user_id = broadcast.last_user_id or 0
+        
+        try:
+            while True:
+                with get_db_session() as db:
+                    query = db.query(UserModel.id).filter(UserModel.id > last_user_id)
+                    if target_role != 'all':
+                        query = query.filter(UserModel.role == target_role)
+                    user_ids = [row.id for row in query.order_by(UserModel.id).limit(chunk_size)]
+                    
+                    if not user_ids:
+                        break
+                    
+                    now = datetime.now()
+                    rows = [{**template, 'user_id': uid, 'created_at': now} for uid in user_ids]
+                    db.execute(insert, rows)
+                    
+                    # Progress is committed with the chunk, so a restart never duplicates it.
+                    # The cursor check fails if a resumed run took over a stalled one.
+                    advanced = db.query(NotificationBroadcastModel).filter(
+                        NotificationBroadcastModel.id == broadcast_id,
+                        NotificationBroadcastModel.last_user_id == last_user_id
+                    ).update({
+                        NotificationBroadcastModel.sent_count: NotificationBroadcastModel.sent_count + len(user_ids),
+                        NotificationBroadcastModel.last_user_id: user_ids[-1],
+                        NotificationBroadcastModel.updated_at: now
+                    }, synchronize_session=False)
+                    if not advanced:
+                        db.rollback()
+                        print(f"[NotificationService] Broadcast {broadcast_id} was taken over, stopping")
+                        return NotificationService.get_broadcast(broadcast_id)
+                    last_user_id = user_ids[-1]
+                
+                for uid in user_ids:
+                    notification_dispatcher.adjust_unread(uid, 1)
+                notification_dispatcher.push(rows)
+        except Exception as e:
+            with get_db_session() as db:
+                db.query(NotificationBroadcastModel).filter(
+                    NotificationBroadcastModel.id == broadcast_id,
+                    NotificationBroadcastModel.last_user_id == last_user_id
+                ).update({'status': 'failed', 'error': str(e)}, synchronize_session=False)
+            print(f"[NotificationService] Broadcast {broadcast_id} failed: {e}")
+            return NotificationService.get_broadcast(broadcast_id)
+        
+        with get_db_session() as db:
+            broadcast = db.get(NotificationBroadcastModel, broadcast_id)
+            broadcast.status = 'completed'
+            broadcast.error = None
+            broadcast.completed_at = datetime.now()
+            return broadcast.to_dict()
+
+    @staticmethod
+    def resume_broadcast(broadcast_id: int) -> bool:
+        """
+        Claim a broadcast for resuming: a failed one, or one still marked
+        'queued' or 'sending' whose run never started or stopped making
+        progress (nothing committed for BROADCAST_STALL_SECONDS since it was
+        created or last sent a chunk). The claim is a conditional UPDATE, so
+        two concurrent resume requests cannot both start a run.
+        
+        Returns:
+            True if claimed and a run was started
+        """
+        stalled_before = datetime.now() - timedelta(seconds=NotificationService.BROADCAST_STALL_SECONDS)
+        with get_db_session() as db:
+            claimed = db.query(NotificationBroadcastModel).filter(
+                NotificationBroadcastModel.id == broadcast_id,
+                or_(
+                    NotificationBroadcastModel.status == 'failed',
+                    and_(
+                        NotificationBroadcastModel.status.in_(('queued', 'sending')),
+                        func.coalesce(
+                            NotificationBroadcastModel.updated_at, NotificationBroadcastModel.created_at
+                        ) < stalled_before
+                    )
+                )
+            ).update({
+                NotificationBroadcastModel.status: 'sending',
+                NotificationBroadcastModel.updated_at: datetime.now()
+            }, synchronize_session=False)
+        
+        if claimed:
+            notification_dispatcher.spawn(NotificationService.run_broadcast, broadcast_id)
+        return bool(claimed)
+
+    @staticmethod
+    def get_broadcast(broadcast_id: int) -> Optional[Dict[str, Any]]:
+        """Get a broadcast record with its progress"""
+        with get_db_session() as db:
+            broadcast = db.get(NotificationBroadcastModel, broadcast_id)
+            return broadcast.to_dict() if broadcast else None
+
+    @staticmethod
+    def get_broadcasts(limit: int = 20) -> List[Dict[str, Any]]:
+        """Get recent broadcasts, newest first"""
+        with get_db_session() as db:
+            broadcasts = db.query(NotificationBroadcastModel).order_by(
+                NotificationBroadcastModel.created_at.desc()
+            ).limit(limit).all()
+            return [b.to_dict() for b in broadcasts]
 
     @staticmethod
     def notify_video_call_invite(user_id: int, caller_name: str, room_name: str):
@@ -5,6 +5,7 @@ Uses database instead of mock data
 from datetime import datetime
 from infrastructure.databases.mssql import get_db_session
 from infrastructure.models.package_model import PackageModel
+from services.response_cache import invalidates
 import json
 
 
@@ -97,6 +98,7 @@ class PackageService:
             print(f"Get package error: {e}")
             return None
     
+    @invalidates('packages')
     def create_package(self, data):
         """Create new package in database"""
         try:
@@ -124,6 +126,7 @@ class PackageService:
             print(f"Create package error: {e}")
             return None
     
+    @invalidates('packages')
     def update_package(self, package_id, data):
         """Update package in database"""
         try:
@@ -162,6 +165,7 @@ class PackageService:
             print(f"Update package error: {e}")
             return None
     
+    @invalidates('packages')
     def delete_package(self, package_id):
         """Soft delete package (set inactive)"""
         try:
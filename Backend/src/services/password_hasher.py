@@ -0,0 +1,148 @@
+"""
+Password Hasher for AESP Platform
+Memory-hard scrypt hashing with tunable cost, legacy SHA-256 upgrade
+and off-loop verification in a small dedicated thread pool
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+
+from config import Config
+
+
+class PasswordHasher:
+    """scrypt password hasher
+
+    Stored format: ``scrypt$<n>$<r>$<p>$<salt_b64>$<hash_b64>``.
+    Legacy hashes (64 hex chars, SHA-256 of password + SECRET_KEY) are still
+    accepted and reported as needing a rehash.
+    """
+
+    ALGORITHM = 'scrypt'
+    SALT_BYTES = 16
+    HASH_BYTES = 32
+
+    def __init__(self, n: int = None, r: int = None, p: int = None, workers: int = None):
+        self.n = n or Config.PASSWORD_HASH_N
+        self.r = r or Config.PASSWORD_HASH_R
+        self.p = p or Config.PASSWORD_HASH_P
+        self._workers = workers or Config.PASSWORD_HASH_WORKERS
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    # ============ Pure hashing (runs on whichever thread calls it) ============
+
+    def _derive(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        # OpenSSL needs roughly 128 * n * r bytes; leave headroom above that
+        maxmem = 128 * n * r * 2 + 1024 * 1024
+        return hashlib.scrypt(
+            password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+            maxmem=maxmem, dklen=self.HASH_BYTES
+        )
+
+    def hash_sync(self, password: str) -> str:
+        """Hash a password on the current thread"""
+        salt = secrets.token_bytes(self.SALT_BYTES)
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return '$'.join([
+            self.ALGORITHM, str(self.n), str(self.r), str(self.p),
+            base64.b64encode(salt).decode('ascii'),
+            base64.b64encode(digest).decode('ascii')
+        ])
+
+    def verify_sync(self, password: str, stored_hash: str) -> bool:
+        """Verify a password on the current thread"""
+        if not stored_hash:
+            return False
+
+        if self.is_legacy(stored_hash):
+            return hmac.compare_digest(self.legacy_hash(password), stored_hash)
+
+        try:
+            algorithm, n, r, p, salt_b64, hash_b64 = stored_hash.split('$')
+            if algorithm != self.ALGORITHM:
+                return False
+            salt = base64.b64decode(salt_b64)
+            expected = base64.b64decode(hash_b64)
+            digest = self._derive(password, salt, int(n), int(r), int(p))
+        except (ValueError, TypeError):
+            return False
+
+        return hmac.compare_digest(digest, expected)
+
+    @staticmethod
+    def legacy_hash(password: str) -> str:
+        """Old SHA-256 scheme, kept only to verify not-yet-upgraded accounts"""
+        salt = os.environ.get('SECRET_KEY', 'default_salt')
+        return hashlib.sha256(f"{password}{salt}".encode()).hexdigest()
+
+    @staticmethod
+    def is_legacy(stored_hash: str) -> bool:
+        if len(stored_hash) != 64:
+            return False
+        try:
+            int(stored_hash, 16)
+        except ValueError:
+            return False
+        return True
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        """True if the hash is legacy or was made with different cost parameters"""
+        if not stored_hash or self.is_legacy(stored_hash):
+            return True
+        parts = stored_hash.split('$')
+        if len(parts) != 6 or parts[0] != self.ALGORITHM:
+            return True
+        return parts[1:4] != [str(self.n), str(self.r), str(self.p)]
+
+    # ============ Off-loop execution ============
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._workers, thread_name_prefix='password-hash'
+            )
+        return self._executor
+
+    def _run(self, fn, *args):
+        """Run fn in the hashing pool without stalling the eventlet hub"""
+        future = self._get_executor().submit(fn, *args)
+        if 'eventlet' in sys.modules:
+            # Park the wait on an eventlet native thread so the green
+            # thread yields and other requests keep being served
+            from eventlet import tpool
+            return tpool.execute(future.result)
+        return future.result()
+
+    def hash(self, password: str) -> str:
+        """Hash a password in the hashing pool"""
+        return self._run(self.hash_sync, password)
+
+    def verify(self, password: str, stored_hash: str) -> bool:
+        """Verify a password in the hashing pool"""
+        return self._run(self.verify_sync, password, stored_hash)
+
+    def verify_and_update(self, password: str, stored_hash: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verify a password and produce an upgraded hash when needed
+
+        Returns:
+            (is_valid, new_hash) - new_hash is None unless the password was
+            valid and the stored hash is legacy or uses outdated parameters
+        """
+        def _verify_and_rehash():
+            if not self.verify_sync(password, stored_hash):
+                return False, None
+            if self.needs_rehash(stored_hash):
+                return True, self.hash_sync(password)
+            return True, None
+
+        return self._run(_verify_and_rehash)
+
+
+password_hasher = PasswordHasher()
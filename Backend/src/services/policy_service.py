@@ -9,6 +9,7 @@ from typing import List, Optional, Dict, Any
 from infrastructure.databases.mssql import session
 from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
 from infrastructure.databases.base import Base
+from services.response_cache import invalidates
 
 
 class PolicyModel(Base):
@@ -80,6 +81,7 @@ class PolicyService:
         return policy.to_dict() if policy else None
     
     @staticmethod
+    @invalidates('policies')
     def create_policy(
         title: str,
         content: str,
@@ -107,6 +109,7 @@ class PolicyService:
         return policy.to_dict()
     
     @staticmethod
+    @invalidates('policies')
     def update_policy(policy_id: int, **kwargs) -> Optional[Dict[str, Any]]:
         """Update a policy"""
         policy = session.query(PolicyModel).filter_by(id=policy_id).first()
@@ -124,6 +127,7 @@ class PolicyService:
         return policy.to_dict()
     
     @staticmethod
+    @invalidates('policies')
     def delete_policy(policy_id: int) -> bool:
         """Soft delete a policy (set inactive)"""
         policy = session.query(PolicyModel).filter_by(id=policy_id).first()
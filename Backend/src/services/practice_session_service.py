@@ -7,9 +7,14 @@ from datetime import datetime
 import json
 import re
 import logging
+from sqlalchemy.orm import defer
 from infrastructure.models.practice_session_model import PracticeSessionModel
 from infrastructure.databases.mssql import get_db_session_context
 from infrastructure.databases.mssql import session as db_session
+from services.audio_store import audio_store, mime_for
+from services.audio_compactor import audio_compactor
+from services.speech_analyzer import speech_analyzer
+from services.progress_aggregator import progress_aggregator, session_event
 
 logger = logging.getLogger(__name__)
 
@@ -66,19 +71,16 @@ class PracticeSessionService:
         
         # Get all mentors (users with role 'mentor')
         # In a real app, you'd filter by mentor assigned to this learner
-        mentors = db_session.query(UserModel).filter_by(role='mentor').limit(5).all()
+        mentor_ids = [m.id for m in db_session.query(UserModel.id).filter_by(role='mentor').limit(5).all()]
         
-        for mentor in mentors:
-            try:
-                NotificationService.notify_mentor_practice_started(
-                    mentor_id=mentor.id,
-                    learner_name=learner_name,
-                    topic=topic,
-                    session_id=session_id
-                )
-                print(f"[PracticeSessionService] Notified mentor {mentor.id} about session {session_id}")
-            except Exception as e:
-                print(f"[PracticeSessionService] Failed to notify mentor {mentor.id}: {e}")
+        # One batched write for all mentors instead of a commit per mentor
+        NotificationService.notify_mentors_practice_started(
+            mentor_ids=mentor_ids,
+            learner_name=learner_name,
+            topic=topic,
+            session_id=session_id
+        )
+        print(f"[PracticeSessionService] Notified mentors {mentor_ids} about session {session_id}")
 
     def process_chat(self, session_id, user_message):
         """Process a user message, get AI response, and update transcript."""
@@ -93,9 +95,13 @@ class PracticeSessionService:
             # Get AI response
             ai_service = self._get_ai_service()
             
-            # Format history for Gemini
+            # Messages already folded into the stored rolling summary are not resent
+            history_summary = json.loads(practice.history_summary) if practice.history_summary else None
+            covered = history_summary.get('covered', 0) if history_summary else 0
+            
+            # Format history for Gemini (only used to rebuild server-side state)
             history = []
-            for msg in transcript[-10:]:
+            for msg in transcript[covered:]:
                 history.append({
                     "role": "user" if msg["role"] == "user" else "model",
                     "parts": [msg["content"]]
@@ -104,7 +110,9 @@ class PracticeSessionService:
             ai_response = ai_service.generate_response(
                 user_message, 
                 history=history,
-                scenario=practice.topic
+                scenario=practice.topic,
+                session_id=session_id,
+                history_summary=history_summary
             )
 
             # Update transcript
@@ -120,11 +128,18 @@ class PracticeSessionService:
             })
             
             practice.transcript = json.dumps(transcript)
+            
+            # Store the rolling summary with the session so it is never regenerated
+            from services.conversation_manager import conversation_manager
+            state = conversation_manager.get(session_id)
+            if state and state.summary:
+                practice.history_summary = json.dumps(state.summary_state())
             db_session.commit()
 
             return {
                 "response": ai_response,
-                "session_id": session_id
+                "session_id": session_id,
+                "usage": ai_service.last_turn_usage
             }
         except Exception as e:
             db_session.rollback()
@@ -134,70 +149,80 @@ class PracticeSessionService:
     def finalize_session(self, session_id):
         """Analyze the session transcript and close it with structured feedback."""
         try:
+            # The AI call and the recording analysis can take many seconds, so
+            # read what they need and release the connection before running them
             with get_db_session_context() as session:
-                practice = session.query(PracticeSessionModel).filter_by(id=session_id).first()
+                practice = session.query(PracticeSessionModel).options(
+                    defer(PracticeSessionModel.audio_recording)
+                ).filter_by(id=session_id).first()
                 if not practice:
                     return {"error": "Session not found"}
 
                 if practice.is_completed:
                     return {"message": "Session already completed", "analysis": practice.ai_feedback}
 
-                # Get AI Analysis
-                ai_service = self._get_ai_service()
-                analysis_raw = ai_service.analyze_practice(practice.transcript)
+                transcript = practice.transcript
+                audio_path = audio_store.path_for(practice.audio_path)
+                audio_sha256 = practice.audio_sha256
+
+            # Get AI Analysis
+            ai_service = self._get_ai_service()
+            # Schema-validated dict, or None when the AI call failed
+            report = ai_service.analyze_practice(transcript) or {}
+            
+            # Measured from the recording (analysed since upload), not guessed from text
+            metrics = speech_analyzer.session_metrics(session_id, audio_path, audio_sha256)
+
+            with get_db_session_context() as session:
+                practice = session.query(PracticeSessionModel).options(
+                    defer(PracticeSessionModel.audio_recording)
+                ).filter_by(id=session_id).with_for_update().first()
+                if not practice:
+                    return {"error": "Session not found"}
+
+                if practice.is_completed:
+                    # Finalized by a concurrent request meanwhile
+                    return {"message": "Session already completed", "analysis": practice.ai_feedback}
+
+                if metrics:
+                    practice.audio_metrics = json.dumps(metrics)
                 
-                # Parse JSON response
-                report = {}
-                try:
-                    # Clean up the response
-                    raw_text = str(analysis_raw).strip()
-                    logger.info(f"[PracticeSessionService] AI Response length: {len(raw_text)}")
-                    
-                    # Remove markdown code blocks if present
-                    json_str = raw_text
-                    if "```json" in json_str:
-                        json_str = json_str.split("```json")[1].split("```")[0].strip()
-                    elif "```" in json_str:
-                        json_str = json_str.split("```")[1].split("```")[0].strip()
+                if report:
+                    # Store numeric scores (0-100)
+                    practice.pronunciation_score = float(report['pronunciation_score'])
+                    practice.grammar_score = float(report['grammar_score'])
+                    practice.vocabulary_score = float(report['vocabulary_score'])
+                    practice.fluency_score = float(report['fluency_score'])
+                    practice.overall_score = float(report['overall_score'])
                     
-                    # If it doesn't look like JSON, try to find the first { and last }
-                    if not (json_str.startswith("{") and json_str.endswith("}")):
-                        start = json_str.find("{")
-                        end = json_str.rfind("}")
-                        if start != -1 and end != -1:
-                            json_str = json_str[start:end+1]
+                    if metrics:
+                        practice.fluency_score = metrics['fluency_score']
+                        practice.overall_score = round((
+                            practice.pronunciation_score + practice.grammar_score +
+                            practice.vocabulary_score + practice.fluency_score
+                        ) / 4, 1)
                     
-                    try:
-                        report = json.loads(json_str)
-                        logger.info("[PracticeSessionService] Successfully parsed JSON")
-                        
-                        # Store numeric scores (0-100)
-                        practice.pronunciation_score = float(report.get('pronunciation_score', 0))
-                        practice.grammar_score = float(report.get('grammar_score', 0))
-                        practice.vocabulary_score = float(report.get('vocabulary_score', 0))
-                        practice.fluency_score = float(report.get('fluency_score', 0))
-                        practice.overall_score = float(report.get('overall_score', 0))
-                        
-                        # Store detailed feedback
-                        practice.ai_feedback = report.get('analysis', "Hoàn thành tốt!")
-                        
-                        # Store errors if present
-                        if 'grammar_errors' in report:
-                            practice.grammar_errors = json.dumps(report['grammar_errors'])
-                        if 'vocabulary_suggestions' in report:
-                            practice.vocabulary_suggestions = json.dumps(report['vocabulary_suggestions'])
-                            
-                    except json.JSONDecodeError as e:
-                        logger.error(f"[PracticeSessionService] JSON Decode Error: {e}")
-                        logger.error(f"[PracticeSessionService] Attempted to parse: {json_str[:200]}...")
-                        practice.ai_feedback = raw_text # Fallback to raw text
+                    # Store detailed feedback
+                    practice.ai_feedback = report.get('analysis') or "Hoàn thành tốt!"
                     
-                except Exception as parse_error:
-                    logger.error(f"[PracticeSessionService] Parse error: {parse_error}")
-                    practice.ai_feedback = str(analysis_raw)
+                    # Store errors if present
+                    if 'grammar_errors' in report:
+                        practice.grammar_errors = json.dumps(report['grammar_errors'])
+                    if 'vocabulary_suggestions' in report:
+                        practice.vocabulary_suggestions = json.dumps(report['vocabulary_suggestions'])
+                else:
+                    logger.error(f"[PracticeSessionService] No valid AI analysis for session {session_id}")
+                    practice.ai_feedback = "Không thể phân tích phiên luyện tập lúc này."
+                    if metrics:
+                        practice.fluency_score = metrics['fluency_score']
 
                 practice.is_completed = True
                 practice.ended_at = datetime.now()
+                progress_aggregator.record(session, session_event(practice))
+                
+                # Conversation is over, release its server-side state
+                from services.conversation_manager import conversation_manager
+                conversation_manager.drop(session_id)
                 
                 # Build response for frontend
                 response_data = {
@@ -208,6 +233,7 @@ class PracticeSessionService:
                     "vocabulary_score": practice.vocabulary_score,
                     "fluency_score": practice.fluency_score,
                     "overall_score": practice.overall_score,
+                    "fluency_metrics": metrics,
                     "report": report
                 }
                 
@@ -228,6 +254,7 @@ class PracticeSessionService:
                 "topic": practice.topic,
                 "transcript": json.loads(practice.transcript or "[]"),
                 "is_completed": practice.is_completed,
+                "fluency_metrics": json.loads(practice.audio_metrics) if practice.audio_metrics else None,
                 "scores": {
                     "pronunciation": practice.pronunciation_score,
                     "grammar": practice.grammar_score,
@@ -240,34 +267,89 @@ class PracticeSessionService:
             print(f"[PracticeSessionService] Error getting session: {e}")
             return None
 
-    def save_audio_recording(self, session_id, audio_data, filename='recording.webm'):
-        """Save audio recording for a session (for mentor review)"""
+    def session_exists(self, session_id):
+        return db_session.query(PracticeSessionModel.id).filter_by(id=session_id).first() is not None
+
+    def save_audio_recording(self, session_id, audio_stream, filename='recording.webm', mime=None):
+        """
+        Save audio recording for a session (for mentor review)
+
+        audio_stream is any file-like object; it is streamed to the audio
+        store in chunks, never read into memory whole.
+        """
+        if not self.session_exists(session_id):
+            return {"error": "Session not found"}
+        stored = audio_store.save_stream(audio_stream, session_id, mime or mime_for(filename))
+        return self.attach_audio(session_id, stored, filename)
+
+    def attach_audio(self, session_id, stored, filename='recording.webm'):
+        """Point a session at a recording written to the audio store"""
         try:
-            practice = db_session.query(PracticeSessionModel).filter_by(id=session_id).first()
+            practice = db_session.query(PracticeSessionModel).options(
+                defer(PracticeSessionModel.audio_recording)
+            ).filter_by(id=session_id).first()
             if not practice:
+                audio_store.delete(stored.path)
                 return {"error": "Session not found"}
             
-            practice.audio_recording = audio_data
+            previous = practice.audio_path
+            practice.audio_path = stored.path
+            practice.audio_size = stored.size
+            practice.audio_sha256 = stored.sha256
+            practice.audio_mime = stored.mime
             practice.audio_filename = filename
+            practice.audio_recording = None
+            practice.audio_codec = None
+            practice.audio_duration_seconds = None
+            practice.audio_original_size = None
+            practice.audio_compacted_at = None
             db_session.commit()
             
-            return {"success": True, "session_id": session_id}
+            speech_analyzer.submit(session_id, audio_store.path_for(stored.path), stored.sha256)
+            if previous and previous != stored.path:
+                audio_store.delete(previous)
+            audio_compactor.schedule(session_id)
+            return {"success": True, "session_id": session_id, "size": stored.size, "sha256": stored.sha256}
         except Exception as e:
             db_session.rollback()
             print(f"[PracticeSessionService] Error saving audio: {e}")
             raise e
 
     def get_audio_recording(self, session_id):
-        """Get audio recording for a session"""
+        """
+        Get audio recording for a session: a dict with the file path (or
+        the legacy in-database blob as data), mimetype and sha256
+        """
         try:
-            practice = db_session.query(PracticeSessionModel).filter_by(id=session_id).first()
-            if not practice or not practice.audio_recording:
+            practice = db_session.query(PracticeSessionModel).options(
+                defer(PracticeSessionModel.audio_recording)
+            ).filter_by(id=session_id).first()
+            if not practice:
                 return None
-            return practice.audio_recording
+            path = audio_store.path_for(practice.audio_path)
+            if path:
+                return {"path": path, "mime": practice.audio_mime or 'audio/webm', "sha256": practice.audio_sha256}
+            # Recorded before on-disk storage
+            if practice.audio_recording:
+                return {"data": practice.audio_recording, "mime": 'audio/webm', "sha256": None}
+            return None
         except Exception as e:
             print(f"[PracticeSessionService] Error getting audio: {e}")
             return None
 
+    def get_fluency_metrics(self, session_id):
+        """Acoustic fluency measures of a session: stored at completion, else measured now"""
+        practice = db_session.query(PracticeSessionModel).options(
+            defer(PracticeSessionModel.audio_recording)
+        ).filter_by(id=session_id).first()
+        if not practice:
+            return None
+        if practice.audio_metrics:
+            return json.loads(practice.audio_metrics)
+        return speech_analyzer.session_metrics(
+            session_id, audio_store.path_for(practice.audio_path), practice.audio_sha256, consume=False
+        )
+
     def get_sessions_for_mentor(self, mentor_id=None):
         """Get practice sessions for mentor review"""
         try:
@@ -297,7 +379,7 @@ class PracticeSessionService:
                     "vocabulary_score": session.vocabulary_score,
                     "fluency_score": session.fluency_score,
                     "overall_score": session.overall_score,
-                    "has_audio": session.audio_recording is not None
+                    "has_audio": session.audio_path is not None or session.audio_recording is not None
                 })
             
             return result
@@ -0,0 +1,255 @@
+"""
+Progress Aggregator
+Keeps learner_progress current from learning events - practice session
+completed, assessment completed, challenge progressed - with running
+totals, per-skill exponential moving averages and streaks from a
+day-bucketed activity bitmap
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Tuple
+import json
+import logging
+
+from infrastructure.models.progress_model import ProgressModel
+
+logger = logging.getLogger(__name__)
+
+SESSION_COMPLETED = 'session_completed'
+ASSESSMENT_COMPLETED = 'assessment_completed'
+CHALLENGE_PROGRESSED = 'challenge_progressed'
+
+SKILLS = ('vocabulary', 'grammar', 'pronunciation', 'fluency', 'overall')
+
+# Weight of a new score in the skill's moving average; assessments are
+# calibrated measurements, so they move it more than a practice session
+SESSION_ALPHA = 0.2
+ASSESSMENT_ALPHA = 0.5
+
+ACTIVITY_DAYS = 63  # days kept in activity_bitmap (fits a signed BIGINT)
+_ACTIVITY_MASK = (1 << ACTIVITY_DAYS) - 1
+
+MAX_SESSION_HOURS = 2.0  # longer sessions were left open, not practised
+
+TRACKED_FIELDS = (
+    'total_sessions', 'total_practice_hours', 'xp_points', 'current_streak', 'longest_streak',
+    'current_level', 'overall_score', 'vocabulary_score', 'grammar_score', 'pronunciation_score',
+    'fluency_score'
+)
+
+
+# ============ Events ============
+
+def session_event(practice) -> Dict:
+    """Event for a completed PracticeSessionModel"""
+    hours = (practice.duration_minutes or 0) / 60.0
+    if not hours and practice.started_at and practice.ended_at:
+        hours = (practice.ended_at - practice.started_at).total_seconds() / 3600.0
+    return {
+        'type': SESSION_COMPLETED,
+        'user_id': practice.user_id,
+        'at': practice.ended_at or practice.created_at or datetime.now(),
+        'hours': min(max(hours, 0.0), MAX_SESSION_HOURS),
+        'scores': {
+            'vocabulary': practice.vocabulary_score,
+            'grammar': practice.grammar_score,
+            'pronunciation': practice.pronunciation_score,
+            'fluency': practice.fluency_score,
+            'overall': practice.overall_score,
+        },
+    }
+
+
+def assessment_event(assessment) -> Dict:
+    """Event for a completed AssessmentModel (speaking counts as fluency)"""
+    return {
+        'type': ASSESSMENT_COMPLETED,
+        'user_id': assessment.user_id,
+        'at': assessment.completed_at or datetime.now(),
+        'level': assessment.determined_level,
+        'scores': {
+            'vocabulary': assessment.vocabulary_score,
+            'grammar': assessment.grammar_score,
+            'pronunciation': assessment.pronunciation_score,
+            'fluency': assessment.speaking_score,
+            'overall': assessment.overall_score,
+        },
+    }
+
+
+def challenge_event(user_id: int, xp: int = 0, at: datetime = None) -> Dict:
+    """Event for progress on a challenge; xp is what completing it earned"""
+    return {'type': CHALLENGE_PROGRESSED, 'user_id': user_id, 'at': at or datetime.now(), 'xp': xp or 0}
+
+
+# ============ Folding ============
+
+def _trailing_ones(bits: int) -> int:
+    return ((bits ^ (bits + 1)) >> 1).bit_length()
+
+
+def mark_active(progress, day: date) -> None:
+    """Record activity on `day` in the bitmap and recompute the streaks"""
+    last = progress.last_active_date
+    bits = progress.activity_bitmap or 0
+    previous = progress.current_streak or 0
+    shift = 0
+    if last is None or not bits:
+        bits, last, previous = 1, day, 0
+    else:
+        shift = (day - last).days
+        if shift > 0:
+            bits = ((bits << shift) | 1) & _ACTIVITY_MASK if shift < ACTIVITY_DAYS else 1
+            last = day
+        elif -shift < ACTIVITY_DAYS:
+            bits |= 1 << -shift  # late event inside the window
+
+    run = _trailing_ones(bits)
+    # Every day in the window active: the streak goes back further than the bitmap
+    streak = run if run < ACTIVITY_DAYS else previous + max(shift, 0)
+    progress.activity_bitmap = bits
+    progress.last_active_date = last
+    progress.current_streak = streak
+    progress.longest_streak = max(progress.longest_streak or 0, streak)
+
+
+def current_streak(progress, today: date = None) -> int:
+    """Streak as of today: 0 once a whole day has passed without activity"""
+    today = today or datetime.now().date()
+    last = progress.last_active_date
+    if last is not None and (today - last).days > 1:
+        return 0
+    return progress.current_streak or 0
+
+
+def active_days(progress, days: int = 7, today: date = None) -> int:
+    """Days with activity among the last `days` (today included)"""
+    today = today or datetime.now().date()
+    last = progress.last_active_date
+    if last is None:
+        return 0
+    shift = (today - last).days
+    if shift >= days or days - shift > ACTIVITY_DAYS:
+        return 0
+    window = (progress.activity_bitmap or 0) & ((1 << (days - max(shift, 0))) - 1)
+    return bin(window).count('1')
+
+
+def fold(progress, event: Dict) -> None:
+    """
+    Apply one event to a progress row (or any object with its attributes)
+    in O(1): counters are running sums, each skill score an exponential
+    moving average seeded by its first sample
+    """
+    kind = event['type']
+    at = event.get('at') or datetime.now()
+    mark_active(progress, at.date() if isinstance(at, datetime) else at)
+
+    if kind == SESSION_COMPLETED:
+        progress.total_sessions = (progress.total_sessions or 0) + 1
+        progress.total_practice_hours = round((progress.total_practice_hours or 0) + event.get('hours', 0), 3)
+    elif kind == CHALLENGE_PROGRESSED:
+        progress.xp_points = (progress.xp_points or 0) + event.get('xp', 0)
+    elif kind == ASSESSMENT_COMPLETED and event.get('level'):
+        progress.current_level = event['level']
+
+    scores = {k: v for k, v in (event.get('scores') or {}).items() if v is not None}
+    if scores:
+        alpha = ASSESSMENT_ALPHA if kind == ASSESSMENT_COMPLETED else SESSION_ALPHA
+        try:
+            samples = json.loads(progress.skill_samples or '{}')
+        except (TypeError, ValueError):
+            samples = {}
+        for skill, value in scores.items():
+            field = f"{skill}_score"
+            n = samples.get(skill, 0)
+            old = getattr(progress, field) or 0
+            setattr(progress, field, round(float(value) if n == 0 else old + alpha * (float(value) - old), 2))
+            samples[skill] = n + 1
+        progress.skill_samples = json.dumps(samples)
+
+
+def snapshot(progress) -> Dict:
+    return {field: getattr(progress, field, None) for field in TRACKED_FIELDS}
+
+
+class ProgressAggregator:
+    """
+    Single writer of learner_progress aggregates
+
+    Services call record() with an event inside the transaction that
+    completed the session / assessment / challenge, so progress moves
+    atomically with it. The learner's progress row is locked for the
+    update (created on first event), so concurrent completions do not lose
+    increments. Streaks count days with any of these activities. The
+    changed fields are handed to the badge engine, which awards whatever
+    thresholds they crossed.
+    """
+
+    @staticmethod
+    def get_or_create(session, user_id: int, lock: bool = True) -> ProgressModel:
+        query = session.query(ProgressModel).filter(ProgressModel.user_id == user_id)
+        progress = (query.with_for_update() if lock else query).first()
+        if not progress:
+            progress = ProgressModel(
+                user_id=user_id,
+                current_level='beginner',
+                overall_score=0,
+                vocabulary_score=0,
+                grammar_score=0,
+                pronunciation_score=0,
+                fluency_score=0,
+                total_practice_hours=0,
+                total_sessions=0,
+                current_streak=0,
+                longest_streak=0,
+                xp_points=0,
+                activity_bitmap=0,
+                created_at=datetime.now()
+            )
+            session.add(progress)
+        return progress
+
+    def record(self, session, event: Dict) -> Dict[str, Tuple]:
+        """Fold an event into the learner's progress; returns {field: (old, new)} of what changed"""
+        progress = self.get_or_create(session, event['user_id'])
+        before = snapshot(progress)
+        fold(progress, event)
+        progress.updated_at = datetime.now()
+        session.flush()
+        after = snapshot(progress)
+        changes = {field: (before[field], after[field]) for field in TRACKED_FIELDS if before[field] != after[field]}
+        if changes:
+            self._award_badges(session, event['user_id'], changes)
+        return changes
+
+    @staticmethod
+    def _award_badges(session, user_id: int, changes: Dict[str, Tuple]) -> None:
+        """Badge awards run in a savepoint so a failure there never loses the completion"""
+        from services.badge_service import badge_service
+        try:
+            with session.begin_nested():
+                badge_service.on_progress_changed(session, user_id, changes)
+        except Exception as e:
+            logger.error(f"Badge check failed for user {user_id}: {e}")
+
+    def touch(self, session, user_id: int, today: date = None) -> ProgressModel:
+        """Make sure a learner has a progress row and a streak that is not stale (on login)"""
+        progress = self.get_or_create(session, user_id, lock=False)
+        streak = current_streak(progress, today)
+        if streak != (progress.current_streak or 0):
+            progress.current_streak = streak
+            progress.updated_at = datetime.now()
+        return progress
+
+    @staticmethod
+    def decay_streaks(session, today: date = None) -> int:
+        """Zero every streak whose last active day is before yesterday; returns rows changed"""
+        yesterday = (today or datetime.now().date()) - timedelta(days=1)
+        return session.query(ProgressModel).filter(
+            ProgressModel.current_streak > 0,
+            ProgressModel.last_active_date < yesterday
+        ).update({'current_streak': 0}, synchronize_session=False)
+
+
+# Singleton instance
+progress_aggregator = ProgressAggregator()
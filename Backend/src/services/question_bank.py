@@ -0,0 +1,291 @@
+"""
+Placement Question Bank
+Placement questions loaded once and indexed by id and by (category,
+difficulty), with an answer-key dict for single-pass scoring
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import json
+import logging
+import random
+import threading
+import time
+
+from infrastructure.databases.mssql import get_db_session
+from infrastructure.models.placement_test_model import (
+    PlacementQuestionModel, PlacementAdaptiveSessionModel, PLACEMENT_QUESTIONS
+)
+from services.adaptive_placement import AdaptiveEngine, ConcurrentAnswer, ItemParams
+from services.shared_generations import shared_generations
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = ('grammar', 'vocabulary', 'reading', 'listening')
+SEED_KEY_PREFIX = 'seed:'
+
+
+class BankQuestion:
+    """One question: answer key, IRT parameters and its preserialized public form"""
+    __slots__ = ('id', 'key', 'category', 'difficulty_level', 'points', 'correct_answer', 'public', 'irt')
+
+    def __init__(self, id: int, category: str, difficulty_level: str, points: int,
+                 correct_answer: str, public: Dict, irt: ItemParams = None, key: str = None):
+        self.id = id
+        # Key of the question in stored outcomes: the database id, or seed-prefixed
+        # for the built-in questions so they are never credited to a database row
+        self.key = key or str(id)
+        self.category = category
+        self.difficulty_level = difficulty_level
+        self.points = points or 1
+        self.correct_answer = (correct_answer or '').strip().lower()
+        self.public = public
+        self.irt = irt or ItemParams.for_level(difficulty_level)
+
+    @classmethod
+    def from_model(cls, q: PlacementQuestionModel) -> 'BankQuestion':
+        irt = ItemParams.for_level(q.difficulty_level, a=q.irt_discrimination, b=q.irt_difficulty,
+                                   c=q.irt_guessing)
+        return cls(q.id, q.category, q.difficulty_level, q.points, q.correct_answer,
+                   q.to_dict(include_answer=False), irt)
+
+    @classmethod
+    def from_seed(cls, idx: int, q: Dict) -> 'BankQuestion':
+        # Seed ids are 1-based list positions, as clients have always used
+        return cls(idx + 1, q['category'], q['difficulty_level'], q['points'], q['correct_answer'], {
+            'id': idx + 1,
+            'question_text': q['question_text'],
+            'question_type': 'multiple_choice',
+            'category': q['category'],
+            'difficulty_level': q['difficulty_level'],
+            'points': q['points'],
+            'options': {
+                'a': q['option_a'],
+                'b': q['option_b'],
+                'c': q['option_c'],
+                'd': q['option_d']
+            }
+        }, key=f"{SEED_KEY_PREFIX}{idx + 1}")
+
+
+class QuestionBank:
+    """
+    In-memory placement question bank
+
+    Active questions are read from the database on first use (seed data
+    when the table is empty or unreachable) and indexed by id and by
+    (category, difficulty). The bank carries a version that a committed
+    write to PlacementQuestionModel bumps, so the next access reloads it.
+    The bump is also published through shared_generations, so other
+    workers and scripts reload within its CHECK_INTERVAL.
+    Sampling picks ids per stratum and only serializes the chosen
+    questions; scoring is one dict lookup per submitted answer.
+    """
+
+    RETRY_SECONDS = 60  # reload delay after a database failure
+    GENERATION = 'question_bank'  # shared_generations name
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._retry_at = None
+        self.version = 1
+        self._loaded_version = 0
+        self._shared_stamp = None
+        self._by_id: Dict[str, BankQuestion] = {}
+        self._by_stratum: Dict[tuple, List[BankQuestion]] = {}
+        self.source = None
+
+    # ============ Loading ============
+
+    def invalidate(self) -> None:
+        """Reload on next access, in this process and every other one"""
+        self.version += 1
+        self._shared_stamp = shared_generations.bump(self.GENERATION)
+
+    def _ensure_loaded(self) -> None:
+        if self._retry_at is not None and time.monotonic() >= self._retry_at:
+            self._retry_at = None
+            self.version += 1
+        stamp = shared_generations.current(self.GENERATION)
+        if stamp != self._shared_stamp:
+            self._shared_stamp = stamp
+            self.version += 1
+        if self._loaded_version == self.version:
+            return
+        with self._lock:
+            version = self.version
+            if self._loaded_version == version:
+                return
+            questions, source = self._load()
+            by_id, by_stratum = {}, {}
+            for q in questions:
+                by_id[str(q.id)] = q
+                by_stratum.setdefault((q.category, q.difficulty_level), []).append(q)
+            self._by_id, self._by_stratum, self.source = by_id, by_stratum, source
+            self._loaded_version = version
+            logger.info(f"[QuestionBank] Loaded {len(by_id)} questions from {source} in {len(by_stratum)} strata")
+
+    def _load(self):
+        try:
+            with get_db_session() as session:
+                rows = session.query(PlacementQuestionModel).filter_by(is_active=True).all()
+                questions = [BankQuestion.from_model(q) for q in rows]
+            if questions:
+                return questions, 'database'
+        except Exception as e:
+            logger.error(f"[QuestionBank] Could not load questions: {e}")
+            self._retry_at = time.monotonic() + self.RETRY_SECONDS
+        return [BankQuestion.from_seed(idx, q) for idx, q in enumerate(PLACEMENT_QUESTIONS)], 'seed'
+
+    def bind_model(self) -> None:
+        """Invalidate after each commit that inserted / updated / deleted a question"""
+        from services.commit_hooks import on_commit_of_writes
+        on_commit_of_writes(self.invalidate, PlacementQuestionModel)
+
+    # ============ Queries ============
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._by_id)
+
+    def get(self, question_id) -> Optional[BankQuestion]:
+        self._ensure_loaded()
+        return self._by_id.get(str(question_id))
+
+    def strata(self) -> Dict[tuple, List[BankQuestion]]:
+        self._ensure_loaded()
+        return self._by_stratum
+
+    def sample(self, n: int = 15, rng: random.Random = None) -> List[Dict]:
+        """
+        n questions spread over (category, difficulty) strata in proportion
+        to their size (largest remainder), shuffled
+        """
+        self._ensure_loaded()
+        rng = rng or random
+        strata = self._by_stratum
+        total = sum(len(qs) for qs in strata.values())
+        n = min(n, total)
+        if not n:
+            return []
+
+        quotas = {key: n * len(qs) / total for key, qs in strata.items()}
+        counts = {key: int(q) for key, q in quotas.items()}
+        leftover = n - sum(counts.values())
+        for key in sorted(quotas, key=lambda k: (counts[k] - quotas[k], rng.random()))[:leftover]:
+            counts[key] += 1
+
+        picked = []
+        for key, count in counts.items():
+            if count:
+                picked.extend(rng.sample(strata[key], count))
+        rng.shuffle(picked)
+        return [q.public for q in picked]
+
+    def score(self, answers: Dict) -> Dict:
+        """
+        Score {question_id: answer} in one pass; unknown ids are ignored
+
+        Returns total_score, max_score, correct, answered, per-category
+        scores (always including the four standard categories) and
+        outcomes ({question key: 1/0}, kept for item calibration) and
+        graded ([(question, correct)]).
+        """
+        self._ensure_loaded()
+        by_id = self._by_id
+        scores = dict.fromkeys(CATEGORIES, 0)
+        outcomes = {}
+        graded = []
+        total = max_score = correct = 0
+        for qid, answer in answers.items():
+            q = by_id.get(str(qid))
+            if q is None:
+                continue
+            max_score += q.points
+            ok = self.is_correct(q, answer)
+            if ok:
+                correct += 1
+                total += q.points
+                scores[q.category] = scores.get(q.category, 0) + q.points
+            outcomes[q.key] = 1 if ok else 0
+            graded.append((q, ok))
+        return {
+            'total_score': total,
+            'max_score': max_score,
+            'correct': correct,
+            'answered': len(outcomes),
+            'scores': scores,
+            'outcomes': outcomes,
+            'graded': graded
+        }
+
+    @staticmethod
+    def is_correct(question: BankQuestion, answer) -> bool:
+        return str(answer or '').strip().lower() == question.correct_answer
+
+
+class AdaptiveTestStore:
+    """
+    Running adaptive tests in placement_adaptive_sessions, so a test
+    survives restarts and each answer may reach a different worker.
+    Saving an answer is a conditional UPDATE on the stored answer count:
+    of two concurrent answers to one question, only the first is kept.
+    """
+
+    def __init__(self, bank: QuestionBank):
+        self.question = bank.get
+
+    @staticmethod
+    def insert(test) -> None:
+        now = datetime.now()
+        with get_db_session() as session:
+            session.add(PlacementAdaptiveSessionModel(
+                id=test.id,
+                user_id=test.user_id,
+                answered=len(test.responses),
+                state=json.dumps(test.to_state()),
+                started_at=now,
+                updated_at=now
+            ))
+
+    @staticmethod
+    def update(test, answered_before: int) -> None:
+        with get_db_session() as session:
+            updated = session.query(PlacementAdaptiveSessionModel).filter(
+                PlacementAdaptiveSessionModel.id == test.id,
+                PlacementAdaptiveSessionModel.answered == answered_before
+            ).update({
+                'answered': len(test.responses),
+                'state': json.dumps(test.to_state()),
+                'updated_at': datetime.now()
+            }, synchronize_session=False)
+        if not updated:
+            raise ConcurrentAnswer('This question was already answered')
+
+    @staticmethod
+    def load(test_id: str, ttl: int) -> Optional[Dict]:
+        with get_db_session() as session:
+            row = session.query(PlacementAdaptiveSessionModel.state).filter(
+                PlacementAdaptiveSessionModel.id == test_id,
+                PlacementAdaptiveSessionModel.updated_at >= datetime.now() - timedelta(seconds=ttl)
+            ).first()
+        return json.loads(row.state) if row else None
+
+    @staticmethod
+    def delete(test_id: str) -> None:
+        with get_db_session() as session:
+            session.query(PlacementAdaptiveSessionModel).filter(
+                PlacementAdaptiveSessionModel.id == test_id
+            ).delete(synchronize_session=False)
+
+    @staticmethod
+    def expire(ttl: int) -> None:
+        with get_db_session() as session:
+            session.query(PlacementAdaptiveSessionModel).filter(
+                PlacementAdaptiveSessionModel.updated_at < datetime.now() - timedelta(seconds=ttl)
+            ).delete(synchronize_session=False)
+
+
+# Singleton instances
+question_bank = QuestionBank()
+question_bank.bind_model()
+adaptive_engine = AdaptiveEngine(question_bank.strata, store=AdaptiveTestStore(question_bank))
@@ -0,0 +1,287 @@
+"""
+Resource Search
+Embedded inverted index over mentor resources with BM25 ranking,
+diacritic-insensitive matching, facets and cursor pagination
+"""
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterable, List, Optional
+import base64
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+    'of', 'on', 'or', 'the', 'to', 'with',
+    'và', 'của', 'các', 'cho', 'là', 'với', 'những', 'trong', 'một',
+))
+
+# Fields and their weight in the term frequency (BM25F-style)
+FIELD_WEIGHTS = (('title', 3), ('category', 1), ('description', 1))
+
+
+def fold(token: str) -> str:
+    """Strip Vietnamese / Latin diacritics: 'tiếng' -> 'tieng', 'đọc' -> 'doc'"""
+    token = token.replace('đ', 'd').replace('Đ', 'D')
+    decomposed = unicodedata.normalize('NFD', token)
+    return ''.join(c for c in decomposed if unicodedata.category(c) != 'Mn')
+
+
+def _stem(token: str) -> str:
+    """Minimal English plural stripping, ASCII words only"""
+    if token.isascii() and len(token) > 3:
+        if token.endswith('ies'):
+            return token[:-3] + 'y'
+        if token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+            return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, NFC-normalized word tokens without stopwords"""
+    text = unicodedata.normalize('NFC', (text or '').lower())
+    return [_stem(t) for t in _TOKEN_RE.findall(text) if t not in STOPWORDS]
+
+
+def index_terms(text: str) -> List[str]:
+    """Terms stored for a document: every token folded, plus its accented form"""
+    terms = []
+    for token in tokenize(text):
+        folded = fold(token)
+        terms.append(folded)
+        if folded != token:
+            terms.append(token)
+    return terms
+
+
+def encode_cursor(score: float, doc_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{score!r}:{doc_id}".encode('ascii')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Optional[tuple]:
+    try:
+        score, doc_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split(':')
+        return float(score), int(doc_id)
+    except (ValueError, UnicodeError):
+        return None
+
+
+class _Doc:
+    __slots__ = ('id', 'length', 'terms', 'category', 'difficulty_level', 'is_public')
+
+    def __init__(self, resource: Dict):
+        self.id = resource['id']
+        self.category = resource.get('category')
+        self.difficulty_level = resource.get('difficulty_level')
+        self.is_public = bool(resource.get('is_public'))
+        counts: Dict[str, float] = {}
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS:
+            for term in index_terms(resource.get(field) or ''):
+                counts[term] = counts.get(term, 0) + weight
+                length += weight
+        self.terms = counts
+        self.length = length
+
+
+class ResourceSearchIndex:
+    """
+    In-process inverted index of resources
+
+    Built from the database on first search, then kept current by
+    upsert()/remove() from ResourceService writes. Every SYNC_INTERVAL
+    seconds rows updated since the last sync are re-read, so resources
+    written by other workers show up too. The index only ranks ids; the
+    caller loads the page rows, which also weeds out deleted resources.
+
+    Query terms without diacritics match accented and unaccented text;
+    terms typed with diacritics match only that exact spelling. The last
+    query term also matches as a prefix ('gram' finds 'grammar'), against
+    at most MAX_PREFIX_TERMS of the indexed terms it starts.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    SYNC_INTERVAL = 30.0
+    MIN_PREFIX_LENGTH = 2
+    MAX_PREFIX_TERMS = 50
+
+    def __init__(self, loader: Callable[[Optional[object]], Iterable[Dict]] = None):
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._docs: Dict[int, _Doc] = {}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._total_length = 0.0
+        self._sorted_terms: Optional[List[str]] = None  # for prefix lookup, rebuilt when terms change
+        self._loaded = False
+        self._synced_at = None  # updated_at watermark of the last sync
+        self._checked_at = 0.0
+
+    # ============ Maintenance ============
+
+    def set_loader(self, loader: Callable[[Optional[object]], Iterable[Dict]]) -> None:
+        self._loader = loader
+
+    def upsert(self, resource: Dict) -> None:
+        doc = _Doc(resource)
+        with self._lock:
+            self._remove(doc.id)
+            self._docs[doc.id] = doc
+            self._total_length += doc.length
+            for term, tf in doc.terms.items():
+                if term not in self._postings:
+                    self._sorted_terms = None
+                self._postings.setdefault(term, {})[doc.id] = tf
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: int) -> None:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc.length
+        for term in doc.terms:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+                    self._sorted_terms = None
+
+    def _sync(self) -> None:
+        now = time.monotonic()
+        if self._loaded and now - self._checked_at < self.SYNC_INTERVAL:
+            return
+        if self._loader is None:
+            return
+        with self._lock:
+            if self._loaded and now - self._checked_at < self.SYNC_INTERVAL:
+                return
+            self._checked_at = now
+            try:
+                rows = list(self._loader(self._synced_at if self._loaded else None))
+            except Exception as e:
+                logger.error(f"[ResourceSearch] Index sync failed: {e}")
+                return
+            for row in rows:
+                self.upsert(row)
+                updated = row.get('updated_at')
+                if updated and (self._synced_at is None or updated > self._synced_at):
+                    self._synced_at = updated
+            if not self._loaded:
+                logger.info(f"[ResourceSearch] Indexed {len(self._docs)} resources, {len(self._postings)} terms")
+            self._loaded = True
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ============ Search ============
+
+    def _prefixed(self, prefix: str) -> List[str]:
+        """Indexed terms starting with prefix, the most frequent first"""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        start = bisect_left(self._sorted_terms, prefix)
+        end = bisect_left(self._sorted_terms, prefix + '\U0010ffff', start)
+        matches = self._sorted_terms[start:end]
+        if len(matches) > self.MAX_PREFIX_TERMS:
+            matches = sorted(matches, key=lambda t: -len(self._postings[t]))[:self.MAX_PREFIX_TERMS]
+        return matches
+
+    def _query_terms(self, query: str) -> List[List[str]]:
+        """One group of alternative index terms per query term"""
+        groups = []
+        seen = set()
+        tokens = tokenize(query)
+        for position, token in enumerate(tokens):
+            term = token if token in self._postings else fold(token)
+            if position == len(tokens) - 1 and len(term) >= self.MIN_PREFIX_LENGTH:
+                groups.append([term] + [t for t in self._prefixed(term) if t != term])
+            elif term not in seen:
+                groups.append([term])
+            seen.add(term)
+        return groups
+
+    def search(
+        self,
+        query: str,
+        category: str = None,
+        difficulty_level: str = None,
+        limit: int = 20,
+        cursor: str = None,
+        public_only: bool = True
+    ) -> Dict:
+        """
+        Ranked ids for a query
+
+        Returns {'ids', 'scores', 'total', 'facets', 'next_cursor'}. Facet
+        counts cover every public match before the category / difficulty
+        filters, so the UI can show what each filter would leave.
+        """
+        self._sync()
+        with self._lock:
+            groups = self._query_terms(query)
+            n_docs = len(self._docs) or 1
+            avg_length = (self._total_length / n_docs) or 1.0
+            scores: Dict[int, float] = {}
+            for group in groups:
+                # A document scores its best alternative of the group
+                best: Dict[int, float] = {}
+                for term in group:
+                    posting = self._postings.get(term)
+                    if not posting:
+                        continue
+                    idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for doc_id, tf in posting.items():
+                        doc = self._docs[doc_id]
+                        norm = tf + self.K1 * (1 - self.B + self.B * doc.length / avg_length)
+                        score = idf * tf * (self.K1 + 1) / norm
+                        if score > best.get(doc_id, 0.0):
+                            best[doc_id] = score
+                for doc_id, score in best.items():
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+
+            facets = {'category': {}, 'difficulty_level': {}}
+            ranked = []
+            for doc_id, score in scores.items():
+                doc = self._docs[doc_id]
+                if public_only and not doc.is_public:
+                    continue
+                for facet in facets:
+                    value = getattr(doc, facet)
+                    if value:
+                        facets[facet][value] = facets[facet].get(value, 0) + 1
+                if category and doc.category != category:
+                    continue
+                if difficulty_level and doc.difficulty_level != difficulty_level:
+                    continue
+                ranked.append((-round(score, 6), doc_id))
+
+        # Order is (-score, id); a cursor is the last (score, id) served
+        ranked.sort()
+        start = 0
+        after = decode_cursor(cursor) if cursor else None
+        if after:
+            start = bisect_right(ranked, (-after[0], after[1]))
+        page = ranked[start:start + limit]
+        next_cursor = encode_cursor(-page[-1][0], page[-1][1]) if len(ranked) > start + limit else None
+        return {
+            'ids': [doc_id for _, doc_id in page],
+            'scores': {doc_id: -neg for neg, doc_id in page},
+            'total': len(ranked),
+            'facets': facets,
+            'next_cursor': next_cursor
+        }
+
+
+# Singleton instance; ResourceService sets the database loader
+resource_search_index = ResourceSearchIndex()
@@ -8,6 +8,32 @@ from typing import List, Optional, Dict, Any
 
 from infrastructure.models.resource_model import ResourceModel
 from infrastructure.databases.mssql import session
+from services.resource_search import resource_search_index
+from services.download_counter import download_counter
+
+
+def _search_document(resource: ResourceModel) -> Dict[str, Any]:
+    """Fields of a resource the search index needs"""
+    return {
+        'id': resource.id,
+        'title': resource.title,
+        'description': resource.description,
+        'category': resource.category,
+        'difficulty_level': resource.difficulty_level,
+        'is_public': resource.is_public,
+        'updated_at': resource.updated_at
+    }
+
+
+def _load_search_documents(since: datetime = None) -> List[Dict[str, Any]]:
+    """All resources, or those updated since the last index sync"""
+    query = session.query(ResourceModel)
+    if since:
+        query = query.filter(ResourceModel.updated_at >= since)
+    return [_search_document(r) for r in query.all()]
+
+
+resource_search_index.set_loader(_load_search_documents)
 
 
 class ResourceService:
@@ -41,6 +67,8 @@ class ResourceService:
         
         session.add(resource)
         session.commit()
+        resource_search_index.upsert(_search_document(resource))
+        download_counter.invalidate_ranking()
         
         return resource
     
@@ -71,22 +99,29 @@ class ResourceService:
         limit: int = 20,
         offset: int = 0
     ) -> List[Dict[str, Any]]:
-        """Get all public resources with optional filters"""
-        query = session.query(ResourceModel).filter(
-            ResourceModel.is_public == True
+        """Get all public resources with optional filters, most downloaded first"""
+        # Order comes from the popularity read model; only the page is loaded
+        ids = download_counter.popular(
+            category=category,
+            difficulty_level=difficulty_level,
+            limit=limit,
+            offset=offset
         )
-        
-        if category:
-            query = query.filter(ResourceModel.category == category)
-        
-        if difficulty_level:
-            query = query.filter(ResourceModel.difficulty_level == difficulty_level)
-        
-        resources = query.order_by(
-            ResourceModel.download_count.desc()
-        ).offset(offset).limit(limit).all()
-        
-        return [r.to_dict() for r in resources]
+        if not ids:
+            return []
+        
+        # populate_existing: counts are incremented in SQL, not through this session
+        rows = {r.id: r for r in session.query(ResourceModel).filter(
+            ResourceModel.id.in_(ids)
+        ).populate_existing().all()}
+        
+        resources = []
+        for resource_id in ids:
+            if resource_id in rows:
+                item = rows[resource_id].to_dict()
+                item['download_count'] = (item['download_count'] or 0) + download_counter.pending(resource_id)
+                resources.append(item)
+        return resources
     
     @staticmethod
     def update_resource(
@@ -109,6 +144,8 @@ class ResourceService:
         
         resource.updated_at = datetime.now()
         session.commit()
+        resource_search_index.upsert(_search_document(resource))
+        download_counter.invalidate_ranking()
         
         return resource
     
@@ -123,41 +160,67 @@ class ResourceService:
         if resource:
             session.delete(resource)
             session.commit()
+            resource_search_index.remove(resource_id)
+            download_counter.invalidate_ranking()
             return True
         
         return False
     
     @staticmethod
     def increment_download_count(resource_id: int) -> bool:
-        """Increment download count for a resource"""
-        resource = session.query(ResourceModel).filter_by(id=resource_id).first()
-        
-        if resource:
-            resource.download_count += 1
-            session.commit()
-            return True
-        
-        return False
+        """Count a download; increments are coalesced and written atomically in batches"""
+        download_counter.record(resource_id)
+        return True
     
     @staticmethod
     def search_resources(
         query: str,
         category: str = None,
-        limit: int = 20
-    ) -> List[Dict[str, Any]]:
-        """Search resources by title or description"""
-        search_query = session.query(ResourceModel).filter(
-            ResourceModel.is_public == True,
-            (ResourceModel.title.ilike(f'%{query}%')) |
-            (ResourceModel.description.ilike(f'%{query}%'))
+        limit: int = 20,
+        difficulty_level: str = None,
+        cursor: str = None
+    ) -> Dict[str, Any]:
+        """
+        Ranked full-text search over public resources
+        
+        Matches title, description and category through the in-memory
+        index (BM25, accent-insensitive); only the page rows are read
+        from the database. Returns resources, total, facets and the
+        cursor of the next page.
+        """
+        result = resource_search_index.search(
+            query,
+            category=category,
+            difficulty_level=difficulty_level,
+            limit=limit,
+            cursor=cursor
         )
         
-        if category:
-            search_query = search_query.filter(ResourceModel.category == category)
-        
-        resources = search_query.limit(limit).all()
-        
-        return [r.to_dict() for r in resources]
+        rows = {}
+        if result['ids']:
+            rows = {r.id: r for r in session.query(ResourceModel).filter(
+                ResourceModel.id.in_(result['ids'])
+            ).all()}
+        
+        resources = []
+        for resource_id in result['ids']:
+            resource = rows.get(resource_id)
+            if resource is None:
+                # Deleted by another worker since the last sync
+                resource_search_index.remove(resource_id)
+                continue
+            if not resource.is_public:
+                continue
+            item = resource.to_dict()
+            item['score'] = result['scores'][resource_id]
+            resources.append(item)
+        
+        return {
+            'resources': resources,
+            'total': result['total'],
+            'facets': result['facets'],
+            'next_cursor': result['next_cursor']
+        }
     
     # ==================== LEARNER RESOURCE ASSIGNMENTS ====================
     
@@ -0,0 +1,228 @@
+"""
+Response Cache
+Route-level cache of GET responses for read-mostly endpoints, with strong
+ETags, conditional GET and tag-based invalidation from service writes
+"""
+from functools import wraps
+from typing import Dict, Iterable, Optional
+import logging
+import threading
+import time
+
+from services.etag_response import strong_etag, conditional_response
+from services.shared_generations import shared_generations
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_HOURS = 12
+
+
+class CachedResponse:
+    """Body and headers of one cached 200 response"""
+    __slots__ = ('body', 'mimetype', 'etag', 'tags', 'expires_at')
+
+    def __init__(self, body: bytes, mimetype: str, tags: tuple, expires_at: float):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = strong_etag(body)
+        self.tags = tags
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    In-process response cache keyed by endpoint + path + query string
+
+    Entries expire after the route's TTL, by default the admin setting
+    performance.cache_duration_hours (0 disables storing). Every entry is
+    tagged ('topics', 'packages'...); invalidate(tag) drops all entries
+    with that tag. A tag generation is captured before the view runs so a
+    response rendered while a write was committing is never stored.
+    Clients always revalidate (max-age=0) and get a 304 when their ETag
+    still matches. An invalidation is visible at once on the worker that
+    made it; it is published through shared_generations, so every other
+    worker drops the tag within its CHECK_INTERVAL (5 s), not after the
+    entry's TTL. A response rendered after a database error (services
+    answer those with an empty fallback) is served but not stored.
+    """
+
+    MAX_ENTRIES = 2000
+    GENERATION_PREFIX = 'response:'  # shared_generations name prefix; 'response:*' is everything
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, CachedResponse] = {}
+        self._by_tag: Dict[str, set] = {}
+        self._generations: Dict[str, int] = {}
+        self._shared: Dict[str, Optional[str]] = {}  # last shared stamp seen per tag ('*': all)
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'invalidations': 0}
+
+    # ============ TTL ============
+
+    @staticmethod
+    def default_ttl() -> float:
+        """Seconds, from the admin performance settings"""
+        from services.admin_settings_service import admin_settings_service
+        hours = admin_settings_service.settings.get('performance', {}).get('cache_duration_hours', DEFAULT_TTL_HOURS)
+        try:
+            return max(0.0, float(hours) * 3600)
+        except (TypeError, ValueError):
+            return DEFAULT_TTL_HOURS * 3600.0
+
+    # ============ Store ============
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry.expires_at:
+            with self._lock:
+                self._drop(key)
+            return None
+        return entry
+
+    def generation(self, tags: Iterable[str]) -> tuple:
+        return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def store(self, key: str, entry: CachedResponse, generation: tuple) -> bool:
+        with self._lock:
+            if self.generation(entry.tags) != generation:
+                return False
+            if key not in self._entries and len(self._entries) >= self.MAX_ENTRIES:
+                # Drop the entry closest to expiry
+                self._drop(min(self._entries, key=lambda k: self._entries[k].expires_at))
+            self._drop(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            return True
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry:
+            for tag in entry.tags:
+                self._by_tag.get(tag, set()).discard(key)
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop entries with any of the tags (everything when none given), in every worker"""
+        self.stats['invalidations'] += 1
+        self._invalidate_local(tags)
+        for tag in tags or ('*',):
+            self._shared[tag] = shared_generations.bump(self.GENERATION_PREFIX + tag)
+
+    def _sync_shared(self, tags: Iterable[str]) -> None:
+        """Drop tags another worker invalidated since this one last looked"""
+        for tag in ('*',) + tuple(tags):
+            stamp = shared_generations.current(self.GENERATION_PREFIX + tag)
+            if stamp != self._shared.get(tag):
+                self._shared[tag] = stamp
+                self._invalidate_local(() if tag == '*' else (tag,))
+
+    def _invalidate_local(self, tags: tuple) -> None:
+        with self._lock:
+            if not tags:
+                tags = tuple(set(self._generations) | set(self._by_tag))
+                self._entries.clear()
+                self._by_tag.clear()
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._by_tag.pop(tag, ())):
+                    self._drop(key)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), ttl_seconds=self.default_ttl())
+
+    # ============ Decorators ============
+
+    def cached(self, *tags: str, ttl: float = None):
+        """
+        Cache a Flask GET view's 200 responses under the given tags
+
+        ttl (seconds) caps the admin cache duration for this route.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                from flask import request, make_response
+
+                if request.method != 'GET':
+                    return view(*args, **kwargs)
+
+                key = f"{request.endpoint}|{request.path}|{request.query_string.decode('latin-1')}"
+                self._sync_shared(tags)
+                entry = self.lookup(key)
+                if entry is not None:
+                    self.stats['hits'] += 1
+                    return self._respond(entry)
+
+                self.stats['misses'] += 1
+                generation = self.generation(tags)
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough or not_storable():
+                    return response
+
+                lifetime = self.default_ttl() if ttl is None else min(ttl, self.default_ttl())
+                entry = CachedResponse(response.get_data(), response.mimetype, tags,
+                                       time.monotonic() + lifetime)
+                if lifetime > 0:
+                    self.store(key, entry, generation)
+                return self._respond(entry)
+            return wrapper
+        return decorator
+
+    def invalidates(self, *tags: str):
+        """Invalidate the tags after the decorated write method returns"""
+        def decorator(method):
+            @wraps(method)
+            def wrapper(*args, **kwargs):
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    self.invalidate(*tags)
+            return wrapper
+        return decorator
+
+    def invalidate_on_write(self, tag: str, *models) -> None:
+        """
+        Invalidate the tag when a transaction that inserted / updated /
+        deleted rows of the models commits (not at flush, when a
+        concurrent reader could still cache the old rows)
+        """
+        from services.commit_hooks import on_commit_of_writes
+
+        def bump():
+            self.invalidate(tag)
+
+        on_commit_of_writes(bump, *models)
+
+    def _respond(self, entry: CachedResponse):
+        response = conditional_response(entry.body, entry.etag, entry.mimetype)
+        if response.status_code == 304:
+            self.stats['not_modified'] += 1
+        return response
+
+
+def not_storable() -> bool:
+    """True if the current request hit a database error (see _flag_db_error)"""
+    from flask import g
+    return bool(g.get('response_cache_db_error'))
+
+
+def _flag_db_error(context) -> None:
+    from flask import g, has_request_context
+    if has_request_context():
+        g.response_cache_db_error = True
+
+
+def _listen_db_errors() -> None:
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    event.listen(Engine, 'handle_error', _flag_db_error)
+
+
+# Singleton instance
+_listen_db_errors()
+response_cache = ResponseCache()
+cached_response = response_cache.cached
+invalidates = response_cache.invalidates
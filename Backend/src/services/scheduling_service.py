@@ -0,0 +1,450 @@
+"""
+Scheduling Service
+Mentor availability and bookings as time intervals: conflict detection,
+atomic reservations, recurring weekly templates and free-slot search
+across mentors
+"""
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Tuple
+import heapq
+
+from sqlalchemy import and_, func, or_
+
+from infrastructure.databases.mssql import get_db_session
+from infrastructure.models.availability_model import AvailabilityModel
+from infrastructure.models.mentor_booking_model import MentorBookingModel
+from infrastructure.models.user_model import UserModel
+from services.interval_index import IntervalIndex
+
+# Bookings in these states hold their time
+ACTIVE_BOOKING_STATUSES = ('pending', 'confirmed')
+
+DAY_NAMES = ['Thứ 2', 'Thứ 3', 'Thứ 4', 'Thứ 5', 'Thứ 6', 'Thứ 7', 'Chủ nhật']
+
+MAX_TEMPLATE_WEEKS = 26
+DEFAULT_SEARCH_DAYS = 14
+
+
+class SchedulingError(Exception):
+    """Invalid scheduling request"""
+
+
+class SlotConflict(SchedulingError):
+    """The requested time overlaps existing availability or bookings"""
+
+    def __init__(self, message: str, conflicts: List[Dict] = None):
+        super().__init__(message)
+        self.conflicts = conflicts or []
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _as_time(value, default: str) -> time:
+    if isinstance(value, time):
+        return value
+    return datetime.strptime(value or default, '%H:%M').time()
+
+
+def _interval(start: datetime, end: datetime, key=None) -> Dict:
+    return {
+        'date': start.strftime('%Y-%m-%d'),
+        'start_time': start.strftime('%H:%M'),
+        'end_time': end.strftime('%H:%M'),
+        'id': key,
+    }
+
+
+class SchedulingService:
+    """
+    Conflict-free mentor schedules
+
+    Availability windows and bookings carry their interval as starts_at /
+    ends_at, indexed on (mentor_id, starts_at, ends_at), so every overlap
+    check is an index range scan. Batch operations load the mentor's
+    intervals for the affected range once into an IntervalIndex and check
+    each new interval in O(log n) instead of one query per slot.
+
+    Writes that change a mentor's schedule first lock the mentor's user row
+    (SELECT ... FOR UPDATE), which serializes them per mentor without
+    blocking other mentors. Reserving from an availability window also
+    bumps the window's version with a conditional UPDATE, so a booking made
+    against a window that changed underneath it fails instead of
+    double-booking.
+    """
+
+    # ============ Helpers ============
+
+    @staticmethod
+    def _lock_mentor(session, mentor_id: int) -> None:
+        locked = session.query(UserModel.id).filter(
+            UserModel.id == mentor_id
+        ).with_for_update().first()
+        if not locked:
+            raise SchedulingError('Mentor not found')
+
+    @staticmethod
+    def _availability_index(session, mentor_id: int, start: datetime, end: datetime,
+                            exclude_id: int = None) -> IntervalIndex:
+        query = session.query(AvailabilityModel.id, AvailabilityModel.starts_at, AvailabilityModel.ends_at).filter(
+            AvailabilityModel.mentor_id == mentor_id,
+            AvailabilityModel.is_active == True,
+            AvailabilityModel.starts_at < end,
+            AvailabilityModel.ends_at > start
+        )
+        if exclude_id:
+            query = query.filter(AvailabilityModel.id != exclude_id)
+        return IntervalIndex((row.starts_at, row.ends_at, row.id) for row in query)
+
+    @staticmethod
+    def _booking_index(session, start: datetime, end: datetime,
+                       mentor_id: int = None, learner_id: int = None) -> IntervalIndex:
+        people = []
+        if mentor_id:
+            people.append(MentorBookingModel.mentor_id == mentor_id)
+        if learner_id:
+            people.append(MentorBookingModel.learner_id == learner_id)
+        query = session.query(MentorBookingModel.id, MentorBookingModel.starts_at, MentorBookingModel.ends_at).filter(
+            or_(*people),
+            MentorBookingModel.status.in_(ACTIVE_BOOKING_STATUSES),
+            MentorBookingModel.starts_at < end,
+            MentorBookingModel.ends_at > start
+        )
+        return IntervalIndex((row.starts_at, row.ends_at, row.id) for row in query)
+
+    @staticmethod
+    def _parse_slot(data: Dict) -> Dict:
+        day = _as_date(data['date'])
+        start_time = _as_time(data.get('start_time'), '09:00')
+        end_time = _as_time(data.get('end_time'), '10:00')
+        starts_at, ends_at = datetime.combine(day, start_time), datetime.combine(day, end_time)
+        if ends_at <= starts_at:
+            raise SchedulingError(f"end_time must be after start_time ({day} {start_time:%H:%M})")
+        slot_duration = int(data.get('slot_duration') or 30)
+        if slot_duration <= 0:
+            raise SchedulingError('slot_duration must be positive')
+        return {
+            'date': day,
+            'start_time': start_time,
+            'end_time': end_time,
+            'starts_at': starts_at,
+            'ends_at': ends_at,
+            'slot_duration': slot_duration,
+            'is_recurring': bool(data.get('is_recurring', False)),
+            'recurrence_pattern': data.get('recurrence_pattern'),
+            'recurrence_end_date': _as_date(data['recurrence_end_date']) if data.get('recurrence_end_date') else None,
+            'notes': data.get('notes'),
+        }
+
+    # ============ Availability ============
+
+    def add_slot(self, mentor_id: int, data: Dict) -> Dict:
+        """Add one availability window; raises SlotConflict if it overlaps another"""
+        values = self._parse_slot(data)
+        with get_db_session() as session:
+            self._lock_mentor(session, mentor_id)
+            index = self._availability_index(session, mentor_id, values['starts_at'], values['ends_at'])
+            clash = index.overlapping(values['starts_at'], values['ends_at'])
+            if clash:
+                raise SlotConflict('Slot overlaps existing availability', [_interval(*c) for c in clash])
+            slot = AvailabilityModel(mentor_id=mentor_id, is_active=True, **values)
+            session.add(slot)
+            session.flush()
+            return slot.to_dict()
+
+    def add_slots(self, mentor_id: int, slots: Iterable[Dict]) -> Dict:
+        """
+        Add many availability windows in one executemany INSERT. Windows
+        overlapping existing availability (or each other) are skipped and
+        reported in 'conflicts'.
+        """
+        parsed = sorted((self._parse_slot(s) for s in slots), key=lambda v: v['starts_at'])
+        if not parsed:
+            return {'created': 0, 'conflicts': []}
+
+        rows, conflicts = [], []
+        with get_db_session() as session:
+            self._lock_mentor(session, mentor_id)
+            index = self._availability_index(
+                session, mentor_id, parsed[0]['starts_at'], max(v['ends_at'] for v in parsed)
+            )
+            for values in parsed:
+                if index.conflicts(values['starts_at'], values['ends_at']):
+                    conflicts.append(_interval(values['starts_at'], values['ends_at']))
+                    continue
+                index.add(values['starts_at'], values['ends_at'])
+                rows.append(dict(
+                    values, mentor_id=mentor_id, is_booked=False, is_active=True, version=0,
+                    created_at=datetime.utcnow().date()
+                ))
+            if rows:
+                session.execute(AvailabilityModel.__table__.insert(), rows)
+        return {'created': len(rows), 'conflicts': conflicts}
+
+    def add_weekly_template(self, mentor_id: int, template: List[Dict],
+                            start_date, weeks: int = 4) -> Dict:
+        """
+        Repeat weekly windows ({'weekday': 0 = Monday .. 6, 'start_time',
+        'end_time', 'slot_duration'}) for `weeks` weeks from start_date
+        """
+        start_date = _as_date(start_date)
+        weeks = max(1, min(int(weeks or 1), MAX_TEMPLATE_WEEKS))
+        end_date = start_date + timedelta(weeks=weeks, days=-1)
+
+        slots = []
+        for entry in template:
+            weekday = int(entry['weekday'])
+            if not 0 <= weekday <= 6:
+                raise SchedulingError('weekday must be 0 (Monday) to 6 (Sunday)')
+            day = start_date + timedelta(days=(weekday - start_date.weekday()) % 7)
+            while day <= end_date:
+                slots.append(dict(
+                    entry, date=day, is_recurring=True, recurrence_pattern='weekly',
+                    recurrence_end_date=end_date
+                ))
+                day += timedelta(weeks=1)
+        result = self.add_slots(mentor_id, slots)
+        result['end_date'] = end_date.strftime('%Y-%m-%d')
+        return result
+
+    def update_slot(self, slot_id: int, data: Dict) -> Optional[Dict]:
+        """Edit an availability window; None if it does not exist"""
+        with get_db_session() as session:
+            slot = session.query(AvailabilityModel).get(slot_id)
+            if not slot:
+                return None
+            self._lock_mentor(session, slot.mentor_id)
+            session.refresh(slot)
+
+            merged = self._parse_slot({
+                'date': data.get('date') or slot.date,
+                'start_time': data.get('start_time') or slot.start_time,
+                'end_time': data.get('end_time') or slot.end_time,
+                'slot_duration': data.get('slot_duration') or slot.slot_duration,
+            })
+            moved = (merged['starts_at'], merged['ends_at']) != (slot.starts_at, slot.ends_at)
+            active = slot.is_active if data.get('is_active') is None else bool(data['is_active'])
+            if moved and slot.is_booked:
+                raise SchedulingError('A booked slot cannot be moved')
+            if moved and slot.starts_at and slot.ends_at:
+                # Partly booked windows (is_booked still False) may move only if they keep their bookings
+                bookings = self._booking_index(session, slot.starts_at, slot.ends_at, mentor_id=slot.mentor_id)
+                stranded = [
+                    b for b in bookings.overlapping(slot.starts_at, slot.ends_at)
+                    if b[0] < merged['starts_at'] or b[1] > merged['ends_at']
+                ]
+                if stranded:
+                    raise SlotConflict('Slot has bookings outside the new time', [_interval(*b) for b in stranded])
+            if active and (moved or not slot.is_active):
+                index = self._availability_index(
+                    session, slot.mentor_id, merged['starts_at'], merged['ends_at'], exclude_id=slot.id
+                )
+                clash = index.overlapping(merged['starts_at'], merged['ends_at'])
+                if clash:
+                    raise SlotConflict('Slot overlaps existing availability', [_interval(*c) for c in clash])
+
+            for field in ('date', 'start_time', 'end_time', 'slot_duration'):
+                setattr(slot, field, merged[field])
+            if data.get('notes') is not None:
+                slot.notes = data['notes']
+            slot.is_active = active
+            slot.version = (slot.version or 0) + 1
+            session.flush()
+            return slot.to_dict()
+
+    @staticmethod
+    def _free_chunks(slot, bookings: IntervalIndex, after: datetime = None) -> List[Tuple[datetime, datetime]]:
+        """slot_duration pieces of a window, on the window's grid, that no booking touches"""
+        step = timedelta(minutes=slot.slot_duration or 30)
+        chunks = []
+        for gap_start, gap_end in bookings.gaps(slot.starts_at, slot.ends_at):
+            if after and gap_start < after:
+                gap_start = after
+            offset = gap_start - slot.starts_at
+            start = slot.starts_at + step * -(-offset // step)  # round up to the grid
+            while start + step <= gap_end:
+                chunks.append((start, start + step))
+                start += step
+        return chunks
+
+    def weekly_schedule(self, mentor_id: int, week_start: date = None) -> Dict:
+        """A mentor's windows for one week by day, with the free pieces of each"""
+        if week_start is None:
+            today = datetime.now().date()
+            week_start = today - timedelta(days=today.weekday())
+        week_end = week_start + timedelta(days=6)
+        start, end = datetime.combine(week_start, time.min), datetime.combine(week_end + timedelta(days=1), time.min)
+
+        with get_db_session() as session:
+            slots = session.query(AvailabilityModel).filter(
+                AvailabilityModel.mentor_id == mentor_id,
+                AvailabilityModel.is_active == True,
+                AvailabilityModel.starts_at >= start,
+                AvailabilityModel.starts_at < end
+            ).order_by(AvailabilityModel.starts_at).all()
+            bookings = self._booking_index(session, start, end, mentor_id=mentor_id)
+
+            schedule = {
+                (week_start + timedelta(days=i)).strftime('%Y-%m-%d'): {'day_name': DAY_NAMES[i], 'slots': []}
+                for i in range(7)
+            }
+            for day, day_slots in groupby(slots, key=lambda s: s.date):
+                entries = schedule[day.strftime('%Y-%m-%d')]['slots']
+                for slot in day_slots:
+                    item = slot.to_dict()
+                    item['free_slots'] = [_interval(s, e) for s, e in self._free_chunks(slot, bookings)]
+                    entries.append(item)
+
+        return {
+            'mentor_id': mentor_id,
+            'week_start': week_start.strftime('%Y-%m-%d'),
+            'week_end': week_end.strftime('%Y-%m-%d'),
+            'schedule': schedule
+        }
+
+    def next_free_slots(self, specialty: str = None, after: datetime = None,
+                        limit: int = 20, days: int = DEFAULT_SEARCH_DAYS) -> List[Dict]:
+        """
+        Earliest bookable slot_duration pieces across all active mentors
+        (optionally only those whose specialty matches), from one query that
+        joins windows with the bookings overlapping them
+        """
+        after = after or datetime.now()
+        horizon = after + timedelta(days=days)
+        Booking = MentorBookingModel
+        specialty_text = func.coalesce(UserModel.specialty, UserModel.description, 'General English')
+
+        with get_db_session() as session:
+            query = session.query(
+                AvailabilityModel,
+                UserModel.full_name, UserModel.user_name, specialty_text.label('specialty'),
+                Booking.id.label('booked_id'), Booking.starts_at.label('booked_from'), Booking.ends_at.label('booked_to')
+            ).join(
+                UserModel, UserModel.id == AvailabilityModel.mentor_id
+            ).outerjoin(Booking, and_(
+                Booking.mentor_id == AvailabilityModel.mentor_id,
+                Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+                Booking.starts_at < AvailabilityModel.ends_at,
+                Booking.ends_at > AvailabilityModel.starts_at
+            )).filter(
+                UserModel.role == 'mentor',
+                UserModel.status == True,
+                AvailabilityModel.is_active == True,
+                AvailabilityModel.is_booked == False,
+                AvailabilityModel.ends_at > after,
+                AvailabilityModel.starts_at < horizon
+            )
+            if specialty and specialty != 'all':
+                query = query.filter(func.lower(specialty_text).contains(specialty.lower(), autoescape=True))
+            rows = query.order_by(AvailabilityModel.starts_at, AvailabilityModel.id).all()
+
+            found: List[Tuple] = []
+            for _, group in groupby(rows, key=lambda row: row[0].id):
+                group = list(group)
+                slot, full_name, user_name, mentor_specialty = group[0][:4]
+                # Windows come by start, so none after this can beat the current top `limit`
+                if len(found) >= limit and slot.starts_at >= heapq.nsmallest(limit, found)[-1][0]:
+                    break
+                bookings = IntervalIndex(
+                    (row.booked_from, row.booked_to, row.booked_id) for row in group if row.booked_id
+                )
+                for start, end in self._free_chunks(slot, bookings, after=after):
+                    found.append((start, slot.mentor_id, end, slot.id, full_name or user_name, mentor_specialty))
+
+        return [
+            dict(_interval(start, end, slot_id), mentor_id=mentor_id, mentor_name=name, specialty=mentor_specialty)
+            for start, mentor_id, end, slot_id, name, mentor_specialty in heapq.nsmallest(limit, found)
+        ]
+
+    # ============ Bookings ============
+
+    def reserve(self, session, learner_id: int, mentor_id: int, starts_at: datetime,
+                duration_minutes: int = 30, **fields) -> MentorBookingModel:
+        """
+        Book [starts_at, starts_at + duration) inside the caller's transaction
+
+        Fails with SlotConflict if the mentor or the learner already has an
+        active booking overlapping it, or if the mentor publishes
+        availability and no active window covers it. Mentors without any
+        upcoming availability can still be booked freely (pending their
+        confirmation), as before.
+        """
+        duration_minutes = int(duration_minutes or 30)
+        if duration_minutes <= 0:
+            raise SchedulingError('duration_minutes must be positive')
+        ends_at = starts_at + timedelta(minutes=duration_minutes)
+        now = datetime.now()
+        if starts_at < now:
+            raise SchedulingError('Cannot book a time in the past')
+
+        self._lock_mentor(session, mentor_id)
+
+        taken = self._booking_index(session, starts_at, ends_at, mentor_id=mentor_id, learner_id=learner_id)
+        clash = taken.overlapping(starts_at, ends_at)
+        if clash:
+            raise SlotConflict('This time overlaps another booking', [_interval(*c) for c in clash])
+
+        slot = session.query(AvailabilityModel).filter(
+            AvailabilityModel.mentor_id == mentor_id,
+            AvailabilityModel.is_active == True,
+            AvailabilityModel.starts_at <= starts_at,
+            AvailabilityModel.ends_at >= ends_at
+        ).order_by(AvailabilityModel.starts_at.desc()).first()
+        if not slot:
+            publishes = session.query(AvailabilityModel.id).filter(
+                AvailabilityModel.mentor_id == mentor_id,
+                AvailabilityModel.is_active == True,
+                AvailabilityModel.ends_at > now
+            ).first()
+            if publishes:
+                raise SlotConflict('Mentor is not available at this time')
+
+        booking = MentorBookingModel(
+            learner_id=learner_id,
+            mentor_id=mentor_id,
+            scheduled_date=starts_at.date(),
+            scheduled_time=starts_at.time(),
+            duration_minutes=duration_minutes,
+            availability_id=slot.id if slot else None,
+            status='pending',
+            created_at=now,
+            **fields
+        )
+        session.add(booking)
+        session.flush()
+
+        if slot:
+            # Mark the window booked once bookings cover all of it; the version
+            # check makes a concurrent change to the window abort this booking
+            window = self._booking_index(session, slot.starts_at, slot.ends_at, mentor_id=mentor_id)
+            full = not window.gaps(slot.starts_at, slot.ends_at)
+            updated = session.query(AvailabilityModel).filter(
+                AvailabilityModel.id == slot.id,
+                AvailabilityModel.version == slot.version,
+                AvailabilityModel.is_active == True
+            ).update({
+                'version': AvailabilityModel.version + 1,
+                'is_booked': full,
+                'booking_id': booking.id if full else None
+            }, synchronize_session=False)
+            if updated != 1:
+                raise SlotConflict('The slot changed while booking, please try again')
+        return booking
+
+    def release(self, session, booking: MentorBookingModel) -> None:
+        """Give a cancelled / rejected booking's time back to its window"""
+        if not booking.availability_id:
+            return
+        session.query(AvailabilityModel).filter(
+            AvailabilityModel.id == booking.availability_id
+        ).update({
+            'version': AvailabilityModel.version + 1,
+            'is_booked': False,
+            'booking_id': None
+        }, synchronize_session=False)
+
+
+# Singleton instance
+scheduling_service = SchedulingService()
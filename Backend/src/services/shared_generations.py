@@ -0,0 +1,82 @@
+"""
+Shared Generations
+Generation stamps of in-memory caches kept in system_settings, so an
+invalidation made by one process (a worker, a script) reaches the caches
+of every other process within CHECK_INTERVAL seconds
+"""
+from typing import Dict, Optional
+import logging
+import threading
+import time
+import uuid
+
+from infrastructure.databases.mssql import get_db_session
+from infrastructure.models.admin_models import SystemSettingModel
+
+logger = logging.getLogger(__name__)
+
+
+class SharedGenerations:
+    """
+    Named generation stamps shared through the database
+
+    bump(name) writes a new random stamp; current(name) returns the stamp
+    from a local copy of all of them, re-read in one query at most every
+    CHECK_INTERVAL seconds. A cache remembers the stamp it was built under
+    and drops its contents when current() returns a different one. If
+    the database cannot be reached the last known stamps are kept.
+    """
+
+    CHECK_INTERVAL = 5.0  # seconds; bounds how stale another process can be
+    KEY_PREFIX = 'cache_generation:'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamps: Dict[str, str] = {}
+        self._checked_at = None
+
+    def current(self, name: str) -> Optional[str]:
+        self._refresh()
+        return self._stamps.get(name)
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.CHECK_INTERVAL:
+            return
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.CHECK_INTERVAL:
+                return
+            self._checked_at = now
+            try:
+                with get_db_session() as session:
+                    rows = session.query(SystemSettingModel.key, SystemSettingModel.value).filter(
+                        SystemSettingModel.key.like(f'{self.KEY_PREFIX}%')
+                    ).all()
+            except Exception as e:
+                logger.error(f"[SharedGenerations] Could not read generations: {e}")
+                return
+            self._stamps = {key[len(self.KEY_PREFIX):]: value for key, value in rows}
+
+    def bump(self, name: str) -> str:
+        """Publish a new generation of name; returns its stamp (seen locally at once)"""
+        stamp = uuid.uuid4().hex
+        key = f'{self.KEY_PREFIX}{name}'
+        try:
+            with get_db_session() as session:
+                updated = session.query(SystemSettingModel).filter(SystemSettingModel.key == key).update(
+                    {'value': stamp}, synchronize_session=False
+                )
+                if not updated:
+                    session.add(SystemSettingModel(
+                        key=key, value=stamp, category='cache',
+                        description='Generation stamp of an in-memory cache'
+                    ))
+        except Exception as e:
+            logger.error(f"[SharedGenerations] Could not publish {name}: {e}")
+        with self._lock:
+            self._stamps = dict(self._stamps, **{name: stamp})
+        return stamp
+
+
+# Singleton instance
+shared_generations = SharedGenerations()
@@ -0,0 +1,140 @@
+"""
+Speech Analyzer
+Runs acoustic fluency analysis of uploaded practice recordings in a
+process pool and combines the results per session
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+
+from config import Config
+from services import audio_codec
+from services.speech_metrics import analyze_file, summarize
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechAnalyzer:
+    """
+    Per-session fluency measurement
+
+    A session's recording is decoded and measured
+    (speech_metrics.analyze_file) in a spawn-context process pool as soon
+    as it is uploaded, so the numbers are usually ready before the learner
+    finishes. Only the session's current recording counts: uploading a
+    new one (a different sha256) supersedes the previous measurement.
+    session_metrics() returns its result through speech_metrics.summarize();
+    sessions whose upload went to another worker (or a restarted one) fall
+    back to measuring the current recording, and that measurement is kept
+    too, so repeated peeks cost one analysis per recording. Results not
+    collected within PENDING_TTL seconds are dropped.
+    """
+
+    RESULT_TIMEOUT = 20.0  # seconds to wait for an outstanding analysis
+    PENDING_TTL = 2 * 3600
+
+    def __init__(self, workers: int = None):
+        self._workers = workers or Config.AUDIO_ANALYSIS_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # session_id -> (recording sha256, submitted at, future)
+        self._pending: Dict[int, Tuple[Optional[str], float, object]] = {}
+        self._available = None
+
+    def available(self) -> bool:
+        if self._available is None:
+            self._available = audio_codec.available()
+            if not self._available:
+                logger.warning("[SpeechAnalyzer] ffmpeg not found, fluency is left to the AI analysis")
+        return self._available
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: workers must not inherit eventlet's patched threads / DB connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    @staticmethod
+    def _wait(future, timeout: float):
+        if 'eventlet' in sys.modules:
+            # Wait on a native thread so the green thread yields
+            from eventlet import tpool
+            return tpool.execute(future.result, timeout)
+        return future.result(timeout)
+
+    # ============ Submission ============
+
+    def submit(self, session_id: int, path: str, sha256: str = None) -> bool:
+        """Start measuring the session's new recording (replacing any earlier one)"""
+        if not path or not self.available():
+            return False
+        try:
+            future = self._get_executor().submit(analyze_file, path)
+        except Exception as e:
+            logger.error(f"[SpeechAnalyzer] Could not queue session {session_id}: {e}")
+            return False
+        self._remember(session_id, sha256, future)
+        return True
+
+    def _remember(self, session_id: int, sha256: Optional[str], future) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for sid in [s for s, entry in self._pending.items() if entry[1] < now - self.PENDING_TTL]:
+                del self._pending[sid]
+            previous = self._pending.get(session_id)
+            self._pending[session_id] = (sha256, now, future)
+        if previous is not None and previous[2] is not future:
+            previous[2].cancel()  # no-op once running; its result is just never used
+
+    def transcoded(self, session_id: int, source_sha256: str, sha256: str) -> None:
+        """The recording was re-encoded (same speech); keep its measurement under the new hash"""
+        with self._lock:
+            entry = self._pending.get(session_id)
+            if entry is not None and entry[0] == source_sha256:
+                self._pending[session_id] = (sha256,) + entry[1:]
+
+    def busy(self, session_id: int) -> bool:
+        """True while a recording of the session is still being measured"""
+        entry = self._pending.get(session_id)
+        return entry is not None and not entry[2].done()
+
+    # ============ Results ============
+
+    def session_metrics(self, session_id: int, current_path: str = None, sha256: str = None,
+                        timeout: float = None, consume: bool = True) -> Optional[Dict]:
+        """
+        Fluency measures of the session's recording (sha256, at current_path);
+        None without audio. consume=False keeps the result for later calls
+        (mid-session peeks).
+        """
+        with self._lock:
+            entry = self._pending.pop(session_id, None) if consume else self._pending.get(session_id)
+        if entry is not None and sha256 and entry[0] and entry[0] != sha256:
+            entry = None  # measured a recording the session no longer has
+        if entry is None:
+            if not current_path or not self.available():
+                return None
+            try:
+                entry = (sha256, time.monotonic(), self._get_executor().submit(analyze_file, current_path))
+            except Exception as e:
+                logger.error(f"[SpeechAnalyzer] Could not queue session {session_id}: {e}")
+                return None
+            if not consume:
+                self._remember(session_id, sha256, entry[2])
+
+        try:
+            recording = self._wait(entry[2], timeout or self.RESULT_TIMEOUT)
+        except Exception as e:
+            logger.error(f"[SpeechAnalyzer] Session {session_id}: analysis failed: {e}")
+            return None
+        return summarize([recording])
+
+
+# Singleton instance
+speech_analyzer = SpeechAnalyzer()
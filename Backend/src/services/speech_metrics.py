@@ -0,0 +1,184 @@
+"""
+Speech Metrics
+Acoustic fluency measures of a recording from vectorized frame energy and
+zero-crossing analysis: speech rate, pauses and voiced ratio
+
+Pure NumPy (decoding goes through audio_codec), so it runs in pool
+workers without Flask or the database.
+"""
+from typing import Dict, List, Optional, Sequence
+import math
+import numpy as np
+
+from services import audio_codec
+
+FRAME_SECONDS = 0.02  # 20 ms analysis frames
+MIN_PAUSE_SECONDS = 0.25  # silent gaps shorter than this are articulation, not pauses
+LONG_PAUSE_SECONDS = 1.0
+MIN_SPEECH_SECONDS = 0.06  # energy bursts shorter than this are clicks / noise
+
+SPEECH_MARGIN_DB = 12.0  # speech is this far above the noise floor
+SPEECH_FLOOR_DBFS = -55.0  # ... and never quieter than this
+VOICED_MAX_ZCR = 0.25  # zero crossings per sample; fricatives / noise cross more often
+NUCLEUS_PROMINENCE_DB = 2.0
+NUCLEUS_SPACING_SECONDS = 0.1  # syllable nuclei are at least this far apart
+
+PAUSE_BUCKETS = ((0.25, 0.5), (0.5, 1.0), (1.0, 2.0), (2.0, None))
+
+# Fluency score anchors (np.interp): value -> sub-score 0..1
+RATE_ANCHORS = ((1.0, 2.0, 3.0, 4.5, 5.5, 6.5), (0.0, 0.4, 0.8, 1.0, 1.0, 0.7))  # syllables / second
+PHONATION_ANCHORS = ((0.3, 0.5, 0.7, 0.85), (0.0, 0.4, 0.8, 1.0))  # speaking time / span
+MEAN_PAUSE_ANCHORS = ((0.4, 0.7, 1.2, 2.0), (1.0, 0.8, 0.4, 0.0))  # seconds
+LONG_PAUSE_ANCHORS = ((0.0, 2.0, 6.0, 12.0), (1.0, 0.8, 0.4, 0.0))  # per minute
+SCORE_WEIGHTS = (0.35, 0.25, 0.2, 0.2)
+
+
+def _runs(mask: np.ndarray):
+    """(starts, lengths) of the True runs of a boolean array"""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return edges[0::2], edges[1::2] - edges[0::2]
+
+
+def _fill_runs(mask: np.ndarray, value: bool, max_length: int, interior: bool = False) -> np.ndarray:
+    """Set runs of `not value` no longer than max_length frames to value"""
+    mask = mask.copy()
+    starts, lengths = _runs(mask != value)
+    short = lengths <= max_length
+    if interior:
+        short &= (starts > 0) & (starts + lengths < len(mask))
+    for start, length in zip(starts[short], lengths[short]):
+        mask[start:start + length] = value
+    return mask
+
+
+def _window(values: np.ndarray, radius: int, reducer) -> np.ndarray:
+    padded = np.pad(values, radius, mode='edge')
+    return reducer(np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1), axis=1)
+
+
+def frame_features(samples: np.ndarray, sample_rate: int):
+    """Per-frame energy (dBFS) and zero-crossing rate of float samples in [-1, 1]"""
+    frame = int(sample_rate * FRAME_SECONDS)
+    n = len(samples) // frame
+    frames = samples[:n * frame].reshape(n, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    energy = 20 * np.log10(np.maximum(rms, 1e-6))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame
+    return energy, zcr
+
+
+def analyze_pcm(samples: np.ndarray, sample_rate: int) -> Dict:
+    """
+    Fluency measures of one recording
+
+    Frames above an adaptive threshold (noise floor + SPEECH_MARGIN_DB)
+    are speech; silent gaps of at least MIN_PAUSE_SECONDS between the first
+    and last speech frame are pauses. Voiced frames are speech frames with
+    a low zero-crossing rate. Syllables are estimated as prominent energy
+    peaks in voiced frames (syllable nuclei).
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    energy, zcr = frame_features(samples, sample_rate)
+    metrics = {
+        'duration_seconds': round(len(samples) / sample_rate, 2),
+        'speech_seconds': 0.0,
+        'span_seconds': 0.0,
+        'voiced_seconds': 0.0,
+        'syllables': 0,
+        'pauses': [],
+    }
+    if not len(energy):
+        return metrics
+
+    floor = np.percentile(energy, 10)
+    threshold = max(floor + SPEECH_MARGIN_DB, SPEECH_FLOOR_DBFS)
+    speech = energy > threshold
+    speech = _fill_runs(speech, False, int(MIN_SPEECH_SECONDS / FRAME_SECONDS))
+    # Gaps shorter than MIN_PAUSE_SECONDS are bridged, so every remaining pause lands in a histogram bucket
+    speech = _fill_runs(speech, True, math.ceil(MIN_PAUSE_SECONDS / FRAME_SECONDS) - 1, interior=True)
+    active = np.flatnonzero(speech)
+    if not len(active):
+        return metrics
+
+    first, last = active[0], active[-1] + 1
+    span = speech[first:last]
+    voiced = span & (zcr[first:last] < VOICED_MAX_ZCR)
+
+    # Syllable nuclei: voiced local maxima of the smoothed envelope that
+    # stand out from their surroundings
+    envelope = np.convolve(energy[first:last], np.ones(3) / 3, mode='same')
+    spacing = max(1, int(NUCLEUS_SPACING_SECONDS / FRAME_SECONDS / 2))
+    peaks = (envelope >= _window(envelope, spacing, np.max)) & voiced
+    prominence = envelope - _window(envelope, 2 * spacing, np.min)
+    nuclei = int(np.count_nonzero(peaks & (prominence >= NUCLEUS_PROMINENCE_DB)))
+
+    _, gaps = _runs(~span)
+    metrics.update({
+        'speech_seconds': round(float(np.count_nonzero(span)) * FRAME_SECONDS, 2),
+        'span_seconds': round(float(last - first) * FRAME_SECONDS, 2),
+        'voiced_seconds': round(float(np.count_nonzero(voiced)) * FRAME_SECONDS, 2),
+        'syllables': nuclei,
+        'pauses': [round(float(g) * FRAME_SECONDS, 2) for g in gaps],
+    })
+    return metrics
+
+
+def analyze_file(path: str) -> Dict:
+    """Decode a recording and measure it (pool worker entry point)"""
+    pcm = audio_codec.decode_pcm(path)
+    samples = np.frombuffer(pcm, dtype='<i2').astype(np.float32) / 32768.0
+    del pcm
+    return analyze_pcm(samples, audio_codec.PCM_SAMPLE_RATE)
+
+
+def summarize(recordings: Sequence[Dict]) -> Optional[Dict]:
+    """
+    Combine the measures of a session's recordings into rates, pause
+    statistics and a 0-100 fluency score (None without any speech)
+    """
+    speech = sum(r['speech_seconds'] for r in recordings)
+    span = sum(r['span_seconds'] for r in recordings)
+    if speech <= 0 or span <= 0:
+        return None
+    voiced = sum(r['voiced_seconds'] for r in recordings)
+    syllables = sum(r['syllables'] for r in recordings)
+    pauses = np.array([p for r in recordings for p in r['pauses']], dtype=np.float64)
+
+    minutes = span / 60.0
+    speech_rate = syllables / span
+    articulation_rate = syllables / speech
+    phonation_ratio = speech / span
+    mean_pause = float(pauses.mean()) if len(pauses) else 0.0
+    long_pauses = int(np.count_nonzero(pauses >= LONG_PAUSE_SECONDS))
+
+    parts = (
+        np.interp(speech_rate, *RATE_ANCHORS),
+        np.interp(phonation_ratio, *PHONATION_ANCHORS),
+        np.interp(mean_pause, *MEAN_PAUSE_ANCHORS) if len(pauses) else 1.0,
+        np.interp(long_pauses / minutes, *LONG_PAUSE_ANCHORS),
+    )
+    buckets: List[Dict] = []
+    for low, high in PAUSE_BUCKETS:
+        in_bucket = (pauses >= low) & (pauses < high) if high else pauses >= low
+        buckets.append({'min': low, 'max': high, 'count': int(np.count_nonzero(in_bucket))})
+
+    return {
+        'recordings': len(recordings),
+        'speaking_time_seconds': round(speech, 2),
+        'span_seconds': round(span, 2),
+        'speech_rate_syllables_per_second': round(speech_rate, 2),
+        'articulation_rate_syllables_per_second': round(articulation_rate, 2),
+        'phonation_time_ratio': round(phonation_ratio, 3),
+        'voiced_ratio': round(voiced / span, 3),
+        'pause_count': int(len(pauses)),
+        'pauses_per_minute': round(len(pauses) / minutes, 1),
+        'long_pause_count': long_pauses,
+        'pause_mean_seconds': round(mean_pause, 2),
+        'pause_median_seconds': round(float(np.median(pauses)), 2) if len(pauses) else 0.0,
+        'pause_p90_seconds': round(float(np.percentile(pauses, 90)), 2) if len(pauses) else 0.0,
+        'pause_max_seconds': round(float(pauses.max()), 2) if len(pauses) else 0.0,
+        'pause_histogram': buckets,
+        'fluency_score': round(100.0 * float(np.dot(SCORE_WEIGHTS, parts)), 1),
+    }
@@ -0,0 +1,259 @@
+"""
+Structured Output for Gemini calls
+Response schemas per task, a compiled validator and parse / token statistics
+"""
+from typing import Any, Callable, Dict, List
+import json
+import re
+import threading
+
+# Keys Gemini's response_schema understands; anything else (minimum,
+# maximum, ...) is only enforced by the local validator
+_GEMINI_SCHEMA_KEYS = {'type', 'format', 'description', 'nullable', 'enum', 'properties', 'required', 'items'}
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+_TYPE_CHECKS = {
+    'object': lambda v: isinstance(v, dict),
+    'array': lambda v: isinstance(v, list),
+    'string': lambda v: isinstance(v, str),
+    'integer': lambda v: isinstance(v, int) and not isinstance(v, bool),
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'boolean': lambda v: isinstance(v, bool),
+}
+
+
+def compile_validator(schema: Dict) -> Callable[[Any, str], List[str]]:
+    """
+    Compile a JSON-schema subset into a validator function
+
+    The schema is walked once here; the returned closure only runs the
+    checks, so validating a response costs no schema interpretation.
+    Returns a list of "path: problem" strings, empty when valid.
+    """
+    checks: List[Callable[[Any, str], List[str]]] = []
+    type_name = schema.get('type')
+
+    if type_name:
+        is_type = _TYPE_CHECKS[type_name]
+        checks.append(lambda v, p: [] if is_type(v) else [f"{p}: expected {type_name}"])
+
+    if 'enum' in schema:
+        allowed = set(schema['enum'])
+        checks.append(lambda v, p: [] if v in allowed else [f"{p}: must be one of {sorted(allowed)}"])
+
+    low, high = schema.get('minimum'), schema.get('maximum')
+    if low is not None or high is not None:
+        def check_range(v, p):
+            if not _TYPE_CHECKS['number'](v):
+                return []
+            if (low is not None and v < low) or (high is not None and v > high):
+                return [f"{p}: must be between {low} and {high}"]
+            return []
+        checks.append(check_range)
+
+    if type_name == 'object':
+        required = list(schema.get('required', []))
+        props = {name: compile_validator(sub) for name, sub in schema.get('properties', {}).items()}
+
+        def check_object(v, p):
+            if not isinstance(v, dict):
+                return []
+            errors = [f"{p}.{name}: missing" for name in required if name not in v]
+            for name, validate in props.items():
+                if name in v:
+                    errors += validate(v[name], f"{p}.{name}")
+            return errors
+        checks.append(check_object)
+
+    if type_name == 'array' and 'items' in schema:
+        validate_item = compile_validator(schema['items'])
+
+        def check_array(v, p):
+            if not isinstance(v, list):
+                return []
+            errors = []
+            for i, item in enumerate(v):
+                errors += validate_item(item, f"{p}[{i}]")
+            return errors
+        checks.append(check_array)
+
+    def validate(value, path='$'):
+        errors = []
+        for check in checks:
+            errors += check(value, path)
+            if errors:
+                break
+        return errors
+
+    return validate
+
+
+def to_gemini_schema(schema: Dict) -> Dict:
+    """Strip the schema down to the fields Gemini's response_schema accepts"""
+    out = {}
+    for key, value in schema.items():
+        if key not in _GEMINI_SCHEMA_KEYS:
+            continue
+        if key == 'properties':
+            value = {name: to_gemini_schema(sub) for name, sub in value.items()}
+        elif key == 'items':
+            value = to_gemini_schema(value)
+        out[key] = value
+    return out
+
+
+def parse_json(text: str) -> Any:
+    """Parse model output, tolerating code fences and prose around the object"""
+    text = _FENCE_RE.sub('', (text or '').strip())
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find('{'), text.rfind('}')
+        if start == -1 or end <= start:
+            raise
+        return json.loads(text[start:end + 1])
+
+
+class ResponseSchema:
+    """Schema of one structured-generation task, compiled once"""
+
+    def __init__(self, name: str, schema: Dict):
+        self.name = name
+        self.schema = schema
+        self.gemini_schema = to_gemini_schema(schema)
+        self.validate = compile_validator(schema)
+
+
+class StructuredStats:
+    """Per-task counters for structured generation"""
+
+    FIELDS = ('calls', 'parse_failures', 'repairs', 'repair_successes', 'failures',
+              'prompt_tokens', 'output_tokens')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, Dict[str, int]] = {}
+
+    def add(self, task: str, **counts) -> None:
+        with self._lock:
+            entry = self._tasks.setdefault(task, dict.fromkeys(self.FIELDS, 0))
+            for key, value in counts.items():
+                entry[key] += value or 0
+
+    def add_usage(self, task: str, response) -> None:
+        usage = getattr(response, 'usage_metadata', None)
+        self.add(
+            task,
+            prompt_tokens=getattr(usage, 'prompt_token_count', 0),
+            output_tokens=getattr(usage, 'candidates_token_count', 0)
+        )
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            result = {}
+            for task, entry in self._tasks.items():
+                calls = entry['calls'] or 1
+                result[task] = dict(
+                    entry,
+                    parse_failure_rate=round(entry['parse_failures'] / calls, 4),
+                    avg_prompt_tokens=round(entry['prompt_tokens'] / calls, 1),
+                    avg_output_tokens=round(entry['output_tokens'] / calls, 1)
+                )
+            return result
+
+
+def _score(description: str) -> Dict:
+    return {'type': 'integer', 'minimum': 0, 'maximum': 100, 'description': description}
+
+
+PRACTICE_ANALYSIS = ResponseSchema('practice_analysis', {
+    'type': 'object',
+    'properties': {
+        'pronunciation_score': _score('Pronunciation 0-100'),
+        'grammar_score': _score('Grammar 0-100'),
+        'vocabulary_score': _score('Vocabulary 0-100'),
+        'fluency_score': _score('Fluency 0-100'),
+        'overall_score': _score('Overall 0-100'),
+        'analysis': {'type': 'string', 'description': 'Vietnamese summary of strengths and weaknesses, under 500 characters'},
+        'grammar_errors': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'error': {'type': 'string'},
+                    'correction': {'type': 'string'},
+                    'explanation': {'type': 'string', 'description': 'In Vietnamese'}
+                },
+                'required': ['error', 'correction']
+            }
+        },
+        'vocabulary_suggestions': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'word': {'type': 'string'},
+                    'context': {'type': 'string'},
+                    'vietnamese': {'type': 'string'}
+                },
+                'required': ['word']
+            }
+        }
+    },
+    'required': ['pronunciation_score', 'grammar_score', 'vocabulary_score',
+                 'fluency_score', 'overall_score', 'analysis']
+})
+
+CONVERSATION_REPLY = ResponseSchema('conversation_reply', {
+    'type': 'object',
+    'properties': {
+        'response': {'type': 'string', 'description': "Reply that builds on the user's answer, ending with a follow-up question"},
+        'score': _score('Grammar and relevance 0-100'),
+        'feedback': {'type': 'string', 'description': 'One sentence in Vietnamese'},
+        'vocabulary_hints': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'word': {'type': 'string'},
+                    'meaning': {'type': 'string', 'description': 'Vietnamese meaning'},
+                    'pronunciation': {'type': 'string', 'description': 'IPA'}
+                },
+                'required': ['word', 'meaning']
+            }
+        },
+        'sentence_templates': {'type': 'array', 'items': {'type': 'string'}}
+    },
+    'required': ['response', 'score', 'feedback']
+})
+
+PRONUNCIATION_ANALYSIS = ResponseSchema('pronunciation_analysis', {
+    'type': 'object',
+    'properties': {
+        'pronunciation_score': _score('Likely pronunciation accuracy 0-100'),
+        'clarity_score': _score('Clarity 0-100'),
+        'problem_sounds': {'type': 'array', 'items': {'type': 'string'},
+                           'description': 'Sounds or words likely to be mispronounced, e.g. /θ/ in "think"'},
+        'improvement_suggestions': {'type': 'array', 'items': {'type': 'string'}, 'description': 'In Vietnamese'},
+        'analysis': {'type': 'string', 'description': 'Vietnamese summary, under 300 characters'}
+    },
+    'required': ['pronunciation_score', 'clarity_score', 'problem_sounds', 'analysis']
+})
+
+SPEAKING_EVALUATION = ResponseSchema('speaking_evaluation', {
+    'type': 'object',
+    'properties': {
+        'pronunciation_score': _score('Clarity, word stress, intonation'),
+        'vocabulary_score': _score('Range and accuracy'),
+        'grammar_score': _score('Accuracy and complexity'),
+        'fluency_score': _score('Smoothness, pace, natural flow'),
+        'coherence_score': _score('Organisation and relevance to the question'),
+        'overall_score': _score('Overall 0-100'),
+        'estimated_level': {'type': 'string', 'enum': ['A1', 'A2', 'B1', 'B2', 'C1', 'C2']},
+        'feedback': {'type': 'string', 'description': '1-2 sentences in Vietnamese'},
+        'strengths': {'type': 'array', 'items': {'type': 'string'}, 'description': 'In Vietnamese'},
+        'improvements': {'type': 'array', 'items': {'type': 'string'}, 'description': 'In Vietnamese'}
+    },
+    'required': ['pronunciation_score', 'vocabulary_score', 'grammar_score', 'fluency_score',
+                 'coherence_score', 'overall_score', 'estimated_level', 'feedback']
+})
@@ -4,53 +4,83 @@ Matching learners with similar levels for practice together
 """
 from datetime import datetime
 from typing import List, Dict, Optional
+import time
 from sqlalchemy import and_, or_, func
 from infrastructure.databases.mssql import get_db_session
 from infrastructure.models.user_model import UserModel
 from infrastructure.models.progress_model import ProgressModel
+from services.matchmaking_queue import MatchmakingQueue, ANY_TOPIC
 
 
 class StudyBuddyModel:
     """In-memory model for study buddy requests (can be persisted later)"""
-    _requests = {}  # {user_id: {'level': str, 'topic': str, 'created_at': datetime}}
+    _queue = MatchmakingQueue()  # waiting learners, bucketed by (level, topic)
     _matches = {}   # {user_id: {'buddy_id': int, 'room_name': str, 'created_at': datetime}}
+    _buddy_cache = {}  # {(level, topic): (loaded_at, [candidate dicts])}, oldest load first
 
 
 class StudyBuddyService:
     """Service for matching learners for study sessions"""
     
+    # Adjacent levels allowed as buddies
+    LEVEL_MAP = {
+        'beginner': ['beginner', 'elementary'],
+        'elementary': ['beginner', 'elementary', 'intermediate'],
+        'intermediate': ['elementary', 'intermediate', 'upper-intermediate'],
+        'upper-intermediate': ['intermediate', 'upper-intermediate', 'advanced'],
+        'advanced': ['upper-intermediate', 'advanced']
+    }
+    
+    # Candidate pools are shared by everyone asking for the same (level, topic)
+    BUDDY_CACHE_TTL = 30  # seconds
+    BUDDY_CACHE_MAX_ENTRIES = 256  # topics are free text; the oldest pools are evicted beyond this
+    BUDDY_POOL_SIZE = 200
+    
+    # Ranking weights (score out of 100)
+    WEIGHT_LEVEL = 40
+    WEIGHT_TOPIC = 25
+    WEIGHT_ONLINE = 25
+    WEIGHT_STREAK = 10
+    STREAK_CAP = 30
+    
     @staticmethod
-    def find_potential_buddies(user_id: int, level: str = None, limit: int = 10) -> List[Dict]:
-        """Find potential study buddies based on similar level"""
-        session = get_db_session()
-        try:
-            # Get current user's progress
-            current_progress = session.query(ProgressModel).filter_by(user_id=user_id).first()
-            current_level = current_progress.current_level if current_progress else 'beginner'
-            
-            if level:
-                current_level = level
-            
-            # Find learners with similar levels
-            query = session.query(UserModel, ProgressModel).join(
-                ProgressModel, UserModel.id == ProgressModel.user_id, isouter=True
+    def _load_buddy_pool(level: str, topic: str = None, user_ids: List[int] = None) -> List[Dict]:
+        """
+        One query: learners at or next to `level`, with topic overlap flag.
+        Capped at BUDDY_POOL_SIZE unless restricted to the given user_ids.
+        """
+        from sqlalchemy import case, literal
+        from infrastructure.models.learner_profile_model import LearnerProfileModel
+        
+        if topic:
+            shares_topic = case(
+                (LearnerProfileModel.learning_goals.contains(topic, autoescape=True), 1),
+                else_=0
+            )
+        else:
+            shares_topic = literal(0)
+        
+        with get_db_session() as session:
+            query = session.query(
+                UserModel.id,
+                UserModel.full_name,
+                UserModel.avatar_url,
+                ProgressModel.current_level,
+                ProgressModel.xp_points,
+                ProgressModel.current_streak,
+                ProgressModel.total_sessions,
+                shares_topic.label('shares_topic')
+            ).outerjoin(
+                ProgressModel, UserModel.id == ProgressModel.user_id
+            ).outerjoin(
+                LearnerProfileModel, UserModel.id == LearnerProfileModel.user_id
             ).filter(
                 UserModel.role == 'learner',
-                UserModel.id != user_id,
                 UserModel.status == True
             )
             
-            # Filter by similar level
-            if current_level:
-                # Allow adjacent levels for variety
-                level_map = {
-                    'beginner': ['beginner', 'elementary'],
-                    'elementary': ['beginner', 'elementary', 'intermediate'],
-                    'intermediate': ['elementary', 'intermediate', 'upper-intermediate'],
-                    'upper-intermediate': ['intermediate', 'upper-intermediate', 'advanced'],
-                    'advanced': ['upper-intermediate', 'advanced']
-                }
-                allowed_levels = level_map.get(current_level, [current_level])
+            if level:
+                allowed_levels = StudyBuddyService.LEVEL_MAP.get(level, [level])
                 query = query.filter(
                     or_(
                         ProgressModel.current_level.in_(allowed_levels),
@@ -58,78 +88,152 @@ class StudyBuddyService:
                     )
                 )
             
-            results = query.limit(limit).all()
+            if user_ids is not None:
+                rows = query.filter(UserModel.id.in_(user_ids)).all()
+            else:
+                rows = query.order_by(
+                    shares_topic.desc(),
+                    func.coalesce(ProgressModel.current_streak, 0).desc()
+                ).limit(StudyBuddyService.BUDDY_POOL_SIZE).all()
+        
+        return [
+            {
+                'id': row.id,
+                'full_name': row.full_name,
+                'avatar_url': row.avatar_url,
+                'level': row.current_level or 'beginner',
+                'xp_points': row.xp_points or 0,
+                'current_streak': row.current_streak or 0,
+                'total_sessions': row.total_sessions or 0,
+                'shares_topic': bool(row.shares_topic),
+                '_has_level': row.current_level is not None
+            }
+            for row in rows
+        ]
+    
+    @staticmethod
+    def _get_buddy_pool(level: str, topic: str = None) -> List[Dict]:
+        key = (level, topic)
+        cached = StudyBuddyModel._buddy_cache.get(key)
+        now = time.monotonic()
+        if cached and now - cached[0] < StudyBuddyService.BUDDY_CACHE_TTL:
+            return cached[1]
+        
+        pool = StudyBuddyService._load_buddy_pool(level, topic)
+        cache = StudyBuddyModel._buddy_cache
+        cache.pop(key, None)
+        while len(cache) >= StudyBuddyService.BUDDY_CACHE_MAX_ENTRIES:
+            cache.pop(next(iter(cache)), None)
+        cache[key] = (now, pool)
+        return pool
+    
+    @staticmethod
+    def _score_buddy(candidate: Dict, level: str, is_online: bool) -> float:
+        if candidate['level'] == level:
+            level_fit = 1.0
+        elif candidate['_has_level']:
+            level_fit = 0.5  # adjacent level (pool only holds allowed levels)
+        else:
+            level_fit = 0.25  # no progress record yet
+        
+        streak = min(candidate['current_streak'], StudyBuddyService.STREAK_CAP)
+        return round(
+            StudyBuddyService.WEIGHT_LEVEL * level_fit
+            + StudyBuddyService.WEIGHT_TOPIC * candidate['shares_topic']
+            + StudyBuddyService.WEIGHT_ONLINE * is_online
+            + StudyBuddyService.WEIGHT_STREAK * streak / StudyBuddyService.STREAK_CAP,
+            1
+        )
+    
+    @staticmethod
+    def find_potential_buddies(user_id: int, level: str = None, limit: int = 10, topic: str = None) -> List[Dict]:
+        """
+        Find potential study buddies ranked by level proximity, shared topic,
+        streak and live online state (from the WebSocket presence registry)
+        
+        Online learners are loaded by id on every call, so none is lost to
+        the cap of the cached pool, which only fills in offline candidates.
+        """
+        from api.websocket import connected_users
+        
+        try:
+            current_level = level
+            if not current_level:
+                with get_db_session() as session:
+                    current_level = session.query(ProgressModel.current_level).filter_by(
+                        user_id=user_id
+                    ).scalar() or 'beginner'
+            
+            online_ids = [int(uid) for uid in list(connected_users) if str(uid).isdigit() and int(uid) != user_id]
+            online = StudyBuddyService._load_buddy_pool(current_level, topic, online_ids) if online_ids else []
+            online_set = {candidate['id'] for candidate in online}
+            pool = online + [
+                candidate for candidate in StudyBuddyService._get_buddy_pool(current_level, topic)
+                if candidate['id'] not in online_set
+            ]
             
             buddies = []
-            for user, progress in results:
-                buddies.append({
-                    'id': user.id,
-                    'full_name': user.full_name,
-                    'avatar_url': user.avatar_url,
-                    'level': progress.current_level if progress else 'beginner',
-                    'xp_points': progress.xp_points if progress else 0,
-                    'current_streak': progress.current_streak if progress else 0,
-                    'total_sessions': progress.total_sessions if progress else 0,
-                    'is_online': self._is_user_online(user.id)
-                })
+            for candidate in pool:
+                if candidate['id'] == user_id:
+                    continue
+                is_online = candidate['id'] in online_set
+                buddy = {k: v for k, v in candidate.items() if not k.startswith('_')}
+                buddy['is_online'] = is_online
+                buddy['match_score'] = StudyBuddyService._score_buddy(candidate, current_level, is_online)
+                buddies.append(buddy)
             
-            return buddies
+            buddies.sort(key=lambda b: b['match_score'], reverse=True)
+            return buddies[:limit]
         except Exception as e:
             print(f"[StudyBuddy] Error finding buddies: {e}")
             return []
-        finally:
-            session.close()
     
     @staticmethod
-    def _is_user_online(user_id: int) -> bool:
-        """Check if user is online (logged in recently)"""
-        session = get_db_session()
-        try:
-            user = session.query(UserModel).filter_by(id=user_id).first()
-            if user and user.last_login:
-                # Consider online if logged in within last 10 minutes
-                diff = (datetime.now() - user.last_login).total_seconds()
-                return diff < 600
-            return False
-        finally:
-            session.close()
+    def _record_match(user_id: int, buddy_id: int, topic: str = None) -> Dict:
+        """Store a match for both users and return the shared room info"""
+        room_name = f"aesp-study-{buddy_id}-{user_id}-{int(datetime.now().timestamp())}"
+        now = datetime.now()
+        StudyBuddyModel._matches[buddy_id] = {
+            'buddy_id': user_id,
+            'room_name': room_name,
+            'topic': topic,
+            'created_at': now
+        }
+        StudyBuddyModel._matches[user_id] = {
+            'buddy_id': buddy_id,
+            'room_name': room_name,
+            'topic': topic,
+            'created_at': now
+        }
+        return {'room_name': room_name, 'topic': topic}
+    
+    @staticmethod
+    def _match_topic(*topics) -> Optional[str]:
+        """First concrete topic of a pair (None if both were open to anything)"""
+        for topic in topics:
+            if topic and topic != ANY_TOPIC:
+                return topic
+        return None
     
     @staticmethod
     def request_buddy_match(user_id: int, topic: str = None, level: str = None) -> Dict:
         """Submit a request to find a study buddy"""
-        session = get_db_session()
         try:
-            # Get user's level if not specified
-            if not level:
-                progress = session.query(ProgressModel).filter_by(user_id=user_id).first()
-                level = progress.current_level if progress else 'beginner'
-            
-            # Check if there's an existing match request
-            for req_user_id, req_data in StudyBuddyModel._requests.items():
-                if req_user_id != user_id and req_data['level'] == level:
+            with get_db_session() as session:
+                # Get user's level if not specified
+                if not level:
+                    progress = session.query(ProgressModel).filter_by(user_id=user_id).first()
+                    level = progress.current_level if progress else 'beginner'
+                
+                partner = StudyBuddyModel._queue.enqueue(user_id, level, topic)
+                
+                if partner:
                     # Found a match!
-                    room_name = f"aesp-study-{req_user_id}-{user_id}-{int(datetime.now().timestamp())}"
-                    
-                    # Create match for both users
-                    match_data = {
-                        'buddy_id': user_id,
-                        'room_name': room_name,
-                        'topic': req_data.get('topic') or topic,
-                        'created_at': datetime.now()
-                    }
-                    StudyBuddyModel._matches[req_user_id] = match_data
-                    StudyBuddyModel._matches[user_id] = {
-                        'buddy_id': req_user_id,
-                        'room_name': room_name,
-                        'topic': req_data.get('topic') or topic,
-                        'created_at': datetime.now()
-                    }
-                    
-                    # Remove the waiting request
-                    del StudyBuddyModel._requests[req_user_id]
+                    match_topic = StudyBuddyService._match_topic(partner.topic, topic)
+                    match = StudyBuddyService._record_match(user_id, partner.user_id, match_topic)
                     
                     # Get buddy info
-                    buddy = session.query(UserModel).filter_by(id=req_user_id).first()
+                    buddy = session.query(UserModel).filter_by(id=partner.user_id).first()
                     
                     return {
                         'matched': True,
@@ -138,35 +242,26 @@ class StudyBuddyService:
                             'full_name': buddy.full_name,
                             'avatar_url': buddy.avatar_url
                         } if buddy else None,
-                        'room_name': room_name,
-                        'topic': req_data.get('topic') or topic
+                        'room_name': match['room_name'],
+                        'topic': match['topic']
                     }
             
-            # No immediate match, add to waiting list
-            StudyBuddyModel._requests[user_id] = {
-                'level': level,
-                'topic': topic,
-                'created_at': datetime.now()
-            }
-            
+            # No immediate match, user is waiting in their (level, topic) bucket
             return {
                 'matched': False,
                 'message': 'Đang tìm kiếm bạn học phù hợp...',
-                'position': len(StudyBuddyModel._requests)
+                'position': StudyBuddyModel._queue.position(user_id)
             }
         except Exception as e:
             print(f"[StudyBuddy] Error requesting match: {e}")
             return {'error': str(e)}
-        finally:
-            session.close()
     
     @staticmethod
     def check_match_status(user_id: int) -> Dict:
         """Check if user has been matched"""
         if user_id in StudyBuddyModel._matches:
             match = StudyBuddyModel._matches[user_id]
-            session = get_db_session()
-            try:
+            with get_db_session() as session:
                 buddy = session.query(UserModel).filter_by(id=match['buddy_id']).first()
                 return {
                     'matched': True,
@@ -178,14 +273,13 @@ class StudyBuddyService:
                     'room_name': match['room_name'],
                     'topic': match.get('topic')
                 }
-            finally:
-                session.close()
         
-        if user_id in StudyBuddyModel._requests:
+        position = StudyBuddyModel._queue.position(user_id)
+        if position is not None:
             return {
                 'matched': False,
                 'waiting': True,
-                'position': list(StudyBuddyModel._requests.keys()).index(user_id) + 1
+                'position': position
             }
         
         return {'matched': False, 'waiting': False}
@@ -193,10 +287,53 @@ class StudyBuddyService:
     @staticmethod
     def cancel_request(user_id: int) -> bool:
         """Cancel a pending buddy request"""
-        if user_id in StudyBuddyModel._requests:
-            del StudyBuddyModel._requests[user_id]
-            return True
-        return False
+        return StudyBuddyModel._queue.cancel(user_id)
+    
+    @staticmethod
+    def run_matcher_tick() -> int:
+        """
+        Pair waiting learners whose criteria have relaxed with wait time
+        
+        Both sides were waiting, so both get a match_found push.
+        
+        Returns:
+            Number of pairs formed
+        """
+        from api.websocket import notify_match_found
+        
+        pairs = StudyBuddyModel._queue.tick()
+        if not pairs:
+            return 0
+        
+        user_ids = {t.user_id for pair in pairs for t in pair}
+        with get_db_session() as session:
+            users = {
+                u.id: {'id': u.id, 'full_name': u.full_name, 'avatar_url': u.avatar_url}
+                for u in session.query(UserModel).filter(UserModel.id.in_(user_ids)).all()
+            }
+        
+        for first, second in pairs:
+            topic = StudyBuddyService._match_topic(first.topic, second.topic)
+            match = StudyBuddyService._record_match(first.user_id, second.user_id, topic)
+            notify_match_found(first.user_id, users.get(second.user_id), match['room_name'], topic)
+            notify_match_found(second.user_id, users.get(first.user_id), match['room_name'], topic)
+        
+        return len(pairs)
+    
+    MATCHER_TICK_SECONDS = 2
+    
+    @staticmethod
+    def start_matcher(socketio) -> None:
+        """Run the matcher tick periodically on the SocketIO async loop"""
+        def _loop():
+            while True:
+                socketio.sleep(StudyBuddyService.MATCHER_TICK_SECONDS)
+                try:
+                    StudyBuddyService.run_matcher_tick()
+                except Exception as e:
+                    print(f"[StudyBuddy] Matcher tick error: {e}")
+        
+        socketio.start_background_task(_loop)
     
     @staticmethod
     def end_session(user_id: int) -> bool:
@@ -238,14 +375,7 @@ class StudyBuddyService:
             
             # Filter by level if specified
             if level:
-                level_map = {
-                    'beginner': ['beginner', 'elementary'],
-                    'elementary': ['beginner', 'elementary', 'intermediate'],
-                    'intermediate': ['elementary', 'intermediate', 'upper-intermediate'],
-                    'upper-intermediate': ['intermediate', 'upper-intermediate', 'advanced'],
-                    'advanced': ['upper-intermediate', 'advanced']
-                }
-                allowed_levels = level_map.get(level, [level])
+                allowed_levels = StudyBuddyService.LEVEL_MAP.get(level, [level])
                 query = query.filter(
                     or_(
                         ProgressModel.current_level.in_(allowed_levels),
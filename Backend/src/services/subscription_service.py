@@ -9,6 +9,7 @@ from infrastructure.models.user_model import UserModel
 from infrastructure.models.subscription_models import (
     SubscriptionPlanModel, UserSubscriptionModel, PaymentHistoryModel
 )
+from services.response_cache import response_cache
 
 
 class SubscriptionService:
@@ -271,3 +272,7 @@ class SubscriptionService:
         except Exception as e:
             print(f"Subscription history error: {e}")
             return {'user_id': user_id, 'history': [], 'total_spent': 0}
+
+
+# Plans have no write endpoints; refresh cached /plans on any ORM write
+response_cache.invalidate_on_write('subscription_plans', SubscriptionPlanModel)
@@ -7,6 +7,7 @@ from datetime import datetime
 from typing import List, Optional, Dict, Any
 
 from infrastructure.databases.mssql import session, get_db_session
+from services.response_cache import invalidates
 
 
 class TopicService:
@@ -68,6 +69,7 @@ class TopicService:
             return None
     
     @staticmethod
+    @invalidates('topics')
     def create_topic(
         name: str,
         category: str = None,
@@ -103,6 +105,7 @@ class TopicService:
             return {'error': str(e)}
     
     @staticmethod
+    @invalidates('topics')
     def update_topic(topic_id: int, **kwargs) -> Optional[Dict[str, Any]]:
         """Update a topic in database"""
         try:
@@ -139,6 +142,7 @@ class TopicService:
             return None
     
     @staticmethod
+    @invalidates('topics')
     def delete_topic(topic_id: int) -> bool:
         """Soft delete a topic (set inactive)"""
         try:
@@ -198,6 +202,7 @@ class TopicService:
             return None
     
     @staticmethod
+    @invalidates('topics')
     def create_scenario(
         topic_id: int,
         name: str,
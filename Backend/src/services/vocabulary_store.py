@@ -0,0 +1,227 @@
+"""
+Vocabulary Store
+data/vocabulary_database.json parsed once into in-memory indexes by topic,
+CEFR level and headword, with prefix lookup for autocomplete
+"""
+from bisect import bisect_left
+from typing import Dict, List, Optional
+import json
+import logging
+import marshal
+import mmap
+import os
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'vocabulary_database.json')
+# Precompiled form written by scripts/compile_vocabulary.py
+BINARY_SUFFIX = '.bin'
+BINARY_VERSION = 1
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class VocabularyStore:
+    """
+    Read-mostly vocabulary index
+
+    The JSON file is parsed on first use and again only when its mtime
+    changes (checked at most every CHECK_INTERVAL seconds). A fresh
+    precompiled .bin next to it (marshal, memory-mapped) is preferred for
+    a faster cold start. Every entry gets 'headword', 'topic' and
+    'category' fields; lookups are dictionary hits and prefix search is a
+    bisect over the sorted headwords (autocomplete) or the sorted index
+    tokens (search).
+    """
+
+    CHECK_INTERVAL = 2.0  # seconds between mtime checks
+    FALLBACK_TOPIC = 'free'
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        self._mtime_ns = None
+        self._checked_at = 0.0
+        self._topics: Dict[str, Dict] = {}
+        self._entries: List[Dict] = []
+        self._by_topic_level: Dict[tuple, List[Dict]] = {}
+        self._by_level: Dict[str, List[Dict]] = {}
+        self._by_headword: Dict[str, List[Dict]] = {}
+        self._by_token: Dict[str, List[Dict]] = {}
+        self._sorted_headwords: List[str] = []
+        self._sorted_tokens: List[str] = []
+
+    # ============ Loading ============
+
+    def _ensure_loaded(self) -> None:
+        now = time.monotonic()
+        if self._mtime_ns is not None and now - self._checked_at < self.CHECK_INTERVAL:
+            return
+        with self._lock:
+            if self._mtime_ns is not None and now - self._checked_at < self.CHECK_INTERVAL:
+                return
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+            except OSError as e:
+                if self._mtime_ns is None:
+                    logger.warning(f"[VocabularyStore] Could not load vocabulary database: {e}")
+                    self._mtime_ns = 0
+                return
+            if stat.st_mtime_ns == self._mtime_ns:
+                return
+
+            topics = self._load_binary(stat) or self._load_json()
+            self._build(topics)
+            self._mtime_ns = stat.st_mtime_ns
+            logger.info(f"[VocabularyStore] Loaded {len(self._entries)} entries in {len(self._topics)} topics")
+
+    def _load_json(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('topics', {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"[VocabularyStore] Could not load vocabulary database: {e}")
+            return {}
+
+    def _load_binary(self, stat) -> Optional[Dict]:
+        """Topics from the precompiled file if it was built from this exact JSON"""
+        try:
+            with open(self.path + BINARY_SUFFIX, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                payload = marshal.loads(data)
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+        if payload.get('version') != BINARY_VERSION or payload.get('source_mtime_ns') != stat.st_mtime_ns \
+                or payload.get('source_size') != stat.st_size:
+            return None
+        return payload['topics']
+
+    def compile(self) -> str:
+        """Write the precompiled form next to the JSON file; returns its path"""
+        stat = os.stat(self.path)
+        payload = {
+            'version': BINARY_VERSION,
+            'source_mtime_ns': stat.st_mtime_ns,
+            'source_size': stat.st_size,
+            'topics': self._load_json()
+        }
+        out = self.path + BINARY_SUFFIX
+        with open(out, 'wb') as f:
+            marshal.dump(payload, f)
+        return out
+
+    def _build(self, topics: Dict) -> None:
+        entries, by_topic_level, by_level, by_headword, by_token = [], {}, {}, {}, {}
+        for topic, data in topics.items():
+            for category, items in (data.get('vocabulary') or {}).items():
+                for item in items:
+                    headword = (item.get('word') or item.get('phrase') or '').strip()
+                    if not headword:
+                        continue
+                    entry = dict(item, headword=headword, topic=topic, category=category)
+                    level = item.get('cefr')
+                    entries.append(entry)
+                    by_topic_level.setdefault((topic, None), []).append(entry)
+                    if level:
+                        by_topic_level.setdefault((topic, level), []).append(entry)
+                        by_level.setdefault(level, []).append(entry)
+                    by_headword.setdefault(headword.lower(), []).append(entry)
+                    text = ' '.join([headword, item.get('vietnamese') or '', item.get('meaning') or ''])
+                    for token in set(_TOKEN_RE.findall(text.lower())):
+                        by_token.setdefault(token, []).append(entry)
+
+        # Swap in all indexes together so readers never see a half-built state
+        self._topics = topics
+        self._entries = entries
+        self._by_topic_level = by_topic_level
+        self._by_level = by_level
+        self._by_headword = by_headword
+        self._by_token = by_token
+        self._sorted_headwords = sorted(by_headword)
+        self._sorted_tokens = sorted(by_token)
+
+    # ============ Queries ============
+
+    def topics(self) -> List[Dict]:
+        self._ensure_loaded()
+        return [{'id': topic, 'name': data.get('name', topic)} for topic, data in self._topics.items()]
+
+    def get_topic_vocabulary(self, topic: str) -> Dict:
+        """Vocabulary of a topic grouped by category (falls back to 'free')"""
+        self._ensure_loaded()
+        data = self._topics.get(topic) or self._topics.get(self.FALLBACK_TOPIC, {})
+        return data.get('vocabulary', {})
+
+    def by_topic_and_level(self, topic: str = None, level: str = None) -> List[Dict]:
+        self._ensure_loaded()
+        if topic:
+            return list(self._by_topic_level.get((topic, level), []))
+        if level:
+            return list(self._by_level.get(level, []))
+        return list(self._entries)
+
+    def lookup(self, word: str) -> List[Dict]:
+        """All entries for a headword (case-insensitive), one per topic/category"""
+        self._ensure_loaded()
+        return list(self._by_headword.get((word or '').strip().lower(), []))
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> List[str]:
+        """Headwords starting with prefix, alphabetically"""
+        self._ensure_loaded()
+        prefix = (prefix or '').strip().lower()
+        if not prefix:
+            return []
+        words = self._sorted_headwords
+        results = []
+        for i in range(bisect_left(words, prefix), len(words)):
+            if not words[i].startswith(prefix) or len(results) >= limit:
+                break
+            results.append(self._by_headword[words[i]][0]['headword'])
+        return results
+
+    def search(self, query: str, limit: int = 20, topic: str = None, level: str = None) -> List[Dict]:
+        """
+        Entries matching every word of the query in the headword, Vietnamese
+        translation or meaning; the last word may be a prefix. Exact
+        headword matches come first.
+        """
+        self._ensure_loaded()
+        tokens = _TOKEN_RE.findall((query or '').lower())
+        if not tokens:
+            return []
+
+        *complete, last = tokens
+        last_matches = {}
+        # Prefix on the last word, through the token index ('travel lig' -> 'light')
+        words = self._sorted_tokens
+        for i in range(bisect_left(words, last), len(words)):
+            if not words[i].startswith(last):
+                break
+            for entry in self._by_token[words[i]]:
+                last_matches[id(entry)] = entry
+
+        candidates = last_matches
+        for token in complete:
+            ids = {id(e) for e in self._by_token.get(token, ())}
+            candidates = {k: e for k, e in candidates.items() if k in ids}
+
+        exact = (query or '').strip().lower()
+        results = [
+            e for e in candidates.values()
+            if (not topic or e['topic'] == topic) and (not level or e.get('cefr') == level)
+        ]
+        results.sort(key=lambda e: (e['headword'].lower() != exact, e['headword'].lower()))
+        return results[:limit]
+
+    def random_sample(self, n: int = 5, topic: str = None, level: str = None, rng=None) -> List[Dict]:
+        pool = self.by_topic_and_level(topic, level)
+        return (rng or random).sample(pool, min(n, len(pool)))
+
+
+# Singleton instance
+vocabulary_store = VocabularyStore()
@@ -0,0 +1,102 @@
+"""
+Startup profile
+With STARTUP_PROFILE=1, app.py installs an import timer before anything
+else is imported and create_app() prints how long each module took to
+import (own time and including its imports) and how long the app took
+to build.
+
+    STARTUP_PROFILE=1 python app.py
+    STARTUP_PROFILE=1 STARTUP_PROFILE_TOP=50 python app.py
+"""
+import importlib.abc
+import os
+import sys
+import time
+
+ENABLED = os.environ.get('STARTUP_PROFILE', 'False').lower() in ['true', '1']
+
+
+class _TimedLoader:
+    """Loader wrapper timing exec_module; the module keeps the real loader"""
+
+    def __init__(self, loader, timer):
+        self._loader = loader
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        self._timer.enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer.leave()
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """Meta path finder recording the import time of every module loaded after it"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # module -> [seconds including its imports, seconds of its own code]
+        self.times = {}
+        self._stack = []
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def leave(self):
+        name, started, nested = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.times[name] = [elapsed, elapsed - nested]
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def report(self, top: int = 25) -> None:
+        total = time.perf_counter() - self.started
+        imported = sum(own for _, own in self.times.values())
+        print(f"[Startup] {total * 1000:.0f} ms to build the app, "
+              f"{imported * 1000:.0f} ms importing {len(self.times)} modules")
+        print(f"[Startup] {'own ms':>8} {'total ms':>9}  module")
+        ranked = sorted(self.times.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (inclusive, own) in ranked[:top]:
+            print(f"[Startup] {own * 1000:8.1f} {inclusive * 1000:9.1f}  {name}")
+
+
+_timer = None
+
+
+def install() -> None:
+    """Start timing imports (call before the imports to measure)"""
+    global _timer
+    if _timer is None:
+        _timer = ImportTimer()
+        sys.meta_path.insert(0, _timer)
+
+
+def report() -> None:
+    """Print the profile and stop timing"""
+    global _timer
+    if _timer is None:
+        return
+    sys.meta_path.remove(_timer)
+    _timer.report(int(os.environ.get('STARTUP_PROFILE_TOP', 25)))
+    _timer = None
@@ -2,6 +2,7 @@ import { useState, useEffect, useRef } from 'react';
 import { messageService } from '../services/messageService';
 import { useAuth } from '../context/AuthContext';
 import { io, Socket } from 'socket.io-client';
+import { avatarThumbnail } from '../services/fileService';
 
 interface ChatModalProps {
     otherUser: {
@@ -122,7 +123,7 @@ export default function ChatModal({ otherUser, onClose }: ChatModalProps) {
                 <div className="p-4 border-b border-border-dark flex items-center justify-between shrink-0">
                     <div className="flex items-center gap-3">
                         <img
-                            src={otherUser.avatar || `https://api.dicebear.com/7.x/avataaars/svg?seed=${otherUser.name || otherUser.full_name}`}
+                            src={avatarThumbnail(otherUser.avatar, 40) || `https://api.dicebear.com/7.x/avataaars/svg?seed=${otherUser.name || otherUser.full_name}`}
                             className="size-10 rounded-full border-2 border-primary"
                             alt="Avatar"
                         />
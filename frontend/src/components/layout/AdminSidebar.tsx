@@ -2,6 +2,7 @@ import React from 'react';
 import { Link, useLocation } from 'react-router-dom';
 import { useAuth } from '../../context/AuthContext';
 import { ADMIN_ROUTES } from '../../routes/paths';
+import { avatarThumbnail } from '../../services/fileService';
 
 interface NavItem {
     path: string;
@@ -89,7 +90,7 @@ const AdminSidebar: React.FC = () => {
                         {user?.avatar ? (
                             <div
                                 className="bg-center bg-no-repeat bg-cover rounded-full size-10 shrink-0 border-2 border-[#283039]"
-                                style={{ backgroundImage: `url("${user.avatar}")` }}
+                                style={{ backgroundImage: `url("${avatarThumbnail(user.avatar, 40)}")` }}
                             />
                         ) : (
                             <div className="size-10 rounded-full bg-primary/20 flex items-center justify-center text-primary font-bold border-2 border-[#283039]">
@@ -2,6 +2,7 @@ import React from 'react';
 import { Link } from 'react-router-dom';
 import NotificationDropdown from './NotificationDropdown';
 import { useAuth } from '../../context/AuthContext';
+import { avatarThumbnail } from '../../services/fileService';
 
 type RoleTheme = 'admin' | 'mentor' | 'learner';
 
@@ -123,7 +124,7 @@ const Header: React.FC<HeaderProps> = ({
                             className="size-full rounded-full bg-cover bg-center"
                             style={{
                                 backgroundImage: user?.avatar
-                                    ? `url("${user.avatar}")`
+                                    ? `url("${avatarThumbnail(user.avatar, 40)}")`
                                     : `url("https://api.dicebear.com/7.x/avataaars/svg?seed=${user?.name || 'User'}")`
                             }}
                         />
@@ -7,6 +7,7 @@ import { socketService } from '../../services/socketService';
 import api from '../../services/api';
 import BookingRequestsModal from '../mentor/BookingRequestsModal';
 import VideoCallModal from '../VideoCallModal';
+import { avatarThumbnail } from '../../services/fileService';
 
 interface Notification {
     id: string;
@@ -88,18 +89,9 @@ const NotificationDropdown: React.FC = () => {
 
     useEffect(() => {
         fetchNotifications();
-
-        // Poll for new notifications every 30 seconds
-        const interval = setInterval(() => {
-            if (authUser?.id) {
-                fetchNotifications();
-            }
-        }, 30000);
-
-        return () => clearInterval(interval);
     }, [authUser?.id]);
 
-    // Listen for real-time video call invites via WebSocket
+    // Listen for real-time video call invites and notifications via WebSocket
     useEffect(() => {
         if (!authUser?.id) return;
 
@@ -127,10 +119,17 @@ const NotificationDropdown: React.FC = () => {
             } catch (e) { }
         };
 
+        // New notifications are pushed over WebSocket - no polling needed
+        const handleNotification = () => {
+            fetchNotifications();
+        };
+
         socketService.on('video_call_invite', handleVideoInvite);
+        socketService.on('notification', handleNotification);
 
         return () => {
             socketService.off('video_call_invite', handleVideoInvite);
+            socketService.off('notification', handleNotification);
         };
     }, [authUser?.id]);
 
@@ -313,7 +312,7 @@ const NotificationDropdown: React.FC = () => {
                                         {notification.avatar ? (
                                             <div
                                                 className="size-10 rounded-full bg-cover bg-center shrink-0 ring-2 ring-[#3b4754]"
-                                                style={{ backgroundImage: `url("${notification.avatar}")` }}
+                                                style={{ backgroundImage: `url("${avatarThumbnail(notification.avatar, 40)}")` }}
                                             />
                                         ) : (
                                             <div className={`size-10 rounded-full ${styles.bg} flex items-center justify-center shrink-0`}>
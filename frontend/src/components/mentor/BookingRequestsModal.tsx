@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { mentorService } from '../../services/mentorService';
 import LearnerProfileModal from './LearnerProfileModal';
+import { avatarThumbnail } from '../../services/fileService';
 
 interface Booking {
     id: number;
@@ -184,7 +185,7 @@ export default function BookingRequestsModal({
                                             <div className="flex items-center gap-3">
                                                 {booking.learner_avatar ? (
                                                     <img
-                                                        src={booking.learner_avatar}
+                                                        src={avatarThumbnail(booking.learner_avatar, 48)}
                                                         alt={booking.learner_name}
                                                         className="size-12 rounded-full object-cover"
                                                     />
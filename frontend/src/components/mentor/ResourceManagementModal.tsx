@@ -6,6 +6,7 @@
 import { useState, useEffect } from 'react';
 import { resourceService, type Resource } from '../../services/resourceService';
 import { assignmentService } from '../../services/assignmentService';
+import { avatarThumbnail } from '../../services/fileService';
 
 interface LearnerItem {
     id: number;
@@ -436,7 +437,7 @@ export default function ResourceManagementModal({ mentorId, isOpen, onClose, onS
                                             >
                                                 {learner.learner_avatar ? (
                                                     <img
-                                                        src={learner.learner_avatar}
+                                                        src={avatarThumbnail(learner.learner_avatar, 40)}
                                                         alt={learner.learner_name}
                                                         className="size-10 rounded-full object-cover"
                                                     />
@@ -3,6 +3,7 @@ import AdminLayout from '../../components/layout/AdminLayout';
 import { useAuth } from '../../context/AuthContext';
 import { userProfileService } from '../../services/userProfileService';
 import type { ProfileData, UserProfile } from '../../services/userProfileService';
+import { avatarThumbnail } from '../../services/fileService';
 
 const AdminProfile = () => {
     useAuth(); // Just to verify auth
@@ -183,7 +184,7 @@ const AdminProfile = () => {
                             <div className="flex flex-col items-center mb-6">
                                 <div className="size-28 rounded-full bg-primary/30 flex items-center justify-center mb-4 border-4 border-primary/50 relative group">
                                     {profile?.avatar_url ? (
-                                        <img src={profile.avatar_url} alt="Avatar" className="size-28 rounded-full object-cover" />
+                                        <img src={avatarThumbnail(profile.avatar_url, 112)} alt="Avatar" className="size-28 rounded-full object-cover" />
                                     ) : (
                                         <span className="text-5xl font-bold text-primary">
                                             {formData.first_name?.charAt(0) || 'A'}
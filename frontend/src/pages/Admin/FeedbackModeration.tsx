@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { AdminLayout } from '../../components/layout';
 import { adminService } from '../../services/adminService';
+import { avatarThumbnail } from '../../services/fileService';
 
 interface Feedback {
     id: string;
@@ -229,7 +230,7 @@ const FeedbackModeration: React.FC = () => {
                             <div key={fb.id} className="rounded-xl bg-[#283039] border border-[#3b4754] p-5 hover:border-primary/30 transition-colors">
                                 <div className="flex items-start gap-4">
                                     {fb.user.avatar ? (
-                                        <div className="size-10 rounded-full bg-cover bg-center" style={{ backgroundImage: `url("${fb.user.avatar}")` }} />
+                                        <div className="size-10 rounded-full bg-cover bg-center" style={{ backgroundImage: `url("${avatarThumbnail(fb.user.avatar, 40)}")` }} />
                                     ) : (
                                         <div className="size-10 rounded-full bg-primary/20 text-primary flex items-center justify-center font-bold text-sm">
                                             {getInitials(fb.user.name)}
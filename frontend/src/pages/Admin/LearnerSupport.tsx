@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { AdminLayout } from '../../components/layout';
 import { adminService } from '../../services/adminService';
+import { avatarThumbnail } from '../../services/fileService';
 
 interface SupportTicket {
     id: string;
@@ -238,7 +239,7 @@ const LearnerSupport: React.FC = () => {
                                         <td className="p-4">
                                             <div className="flex items-center gap-3">
                                                 {ticket.user.avatar ? (
-                                                    <div className="size-10 rounded-full bg-cover bg-center" style={{ backgroundImage: `url("${ticket.user.avatar}")` }} />
+                                                    <div className="size-10 rounded-full bg-cover bg-center" style={{ backgroundImage: `url("${avatarThumbnail(ticket.user.avatar, 40)}")` }} />
                                                 ) : (
                                                     <div className="size-10 rounded-full bg-primary/20 text-primary flex items-center justify-center font-bold text-sm">
                                                         {getInitials(ticket.user.name)}
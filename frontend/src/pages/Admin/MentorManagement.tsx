@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { AdminLayout } from '../../components/layout';
 import { adminService } from '../../services/adminService';
+import { avatarThumbnail } from '../../services/fileService';
 
 // Types
 interface Mentor {
@@ -349,7 +350,7 @@ const MentorManagement: React.FC = () => {
                                                     {mentor.avatar ? (
                                                         <div
                                                             className="size-10 rounded-full bg-cover bg-center bg-gray-600"
-                                                            style={{ backgroundImage: `url("${mentor.avatar}")` }}
+                                                            style={{ backgroundImage: `url("${avatarThumbnail(mentor.avatar, 40)}")` }}
                                                         />
                                                     ) : (
                                                         <div className="size-10 rounded-full bg-purple-500/20 text-purple-400 flex items-center justify-center font-bold text-sm">
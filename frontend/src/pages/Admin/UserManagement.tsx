@@ -3,6 +3,7 @@ import { AdminLayout } from '../../components/layout';
 import { adminService } from '../../services/adminService';
 import { useWebSocket } from '../../hooks/useWebSocket';
 import type { WebSocketMessage, OnlineStatus, UserStatusChangePayload } from '../../types/websocket';
+import { avatarThumbnail } from '../../services/fileService';
 
 // Socket.IO configuration - connects to Flask-SocketIO backend
 const WS_URL = import.meta.env.VITE_WS_URL || 'http://localhost:5000';
@@ -40,7 +41,7 @@ const UserRow = memo(({ user, onToggleStatus, onEdit, onDelete, onViewDetail, ge
                         {user.avatar ? (
                             <div
                                 className="size-10 rounded-full bg-cover bg-center bg-gray-600"
-                                style={{ backgroundImage: `url("${user.avatar}")` }}
+                                style={{ backgroundImage: `url("${avatarThumbnail(user.avatar, 40)}")` }}
                             />
                         ) : (
                             <div className="size-10 rounded-full bg-primary/20 text-primary flex items-center justify-center font-bold text-sm">
@@ -694,7 +695,7 @@ const UserManagement: React.FC = () => {
                                 <div className="size-24 rounded-full bg-primary/20 flex items-center justify-center overflow-hidden">
                                     {selectedUser.avatar ? (
                                         <img
-                                            src={selectedUser.avatar}
+                                            src={avatarThumbnail(selectedUser.avatar, 96)}
                                             alt={selectedUser.name}
                                             className="size-24 rounded-full object-cover"
                                         />
@@ -8,6 +8,7 @@ import { socketService } from '../../services/socketService';
 import type { MatchFoundData, PracticeInviteData } from '../../services/socketService';
 import BookingModal from '../../components/BookingModal';
 import ChatModal from '../../components/ChatModal';
+import { avatarThumbnail } from '../../services/fileService';
 
 export default function Community() {
     const { user: authUser } = useAuth();
@@ -358,7 +359,7 @@ export default function Community() {
                                                 <div className="flex items-center gap-3">
                                                     <div className="relative">
                                                         <img
-                                                            src={learner.avatar || `https://ui-avatars.com/api/?name=${encodeURIComponent(learner.full_name || 'User')}&background=2b8cee&color=fff`}
+                                                            src={avatarThumbnail(learner.avatar, 48) || `https://ui-avatars.com/api/?name=${encodeURIComponent(learner.full_name || 'User')}&background=2b8cee&color=fff`}
                                                             className="size-12 rounded-full border-2 border-primary object-cover"
                                                             alt={learner.full_name}
                                                         />
@@ -479,7 +480,7 @@ export default function Community() {
                                 <div key={mentor.id} className="bg-surface-dark border border-border-dark rounded-xl p-6 hover:border-primary/50 transition-all flex flex-col h-full">
                                     <div className="flex items-center gap-4 mb-4">
                                         <img
-                                            src={mentor.avatar || "https://ui-avatars.com/api/?name=" + encodeURIComponent(mentor.full_name || mentor.name) + "&background=2b8cee&color=fff"}
+                                            src={avatarThumbnail(mentor.avatar, 64) || "https://ui-avatars.com/api/?name=" + encodeURIComponent(mentor.full_name || mentor.name) + "&background=2b8cee&color=fff"}
                                             className="size-16 rounded-full border-2 border-primary object-cover"
                                             alt={mentor.full_name}
                                         />
@@ -655,7 +656,7 @@ export default function Community() {
                         <div className="text-center">
                             <div className="size-20 rounded-full bg-primary/20 border-4 border-primary mx-auto mb-4 flex items-center justify-center">
                                 <img
-                                    src={pendingInvite.fromUserAvatar || `https://ui-avatars.com/api/?name=${encodeURIComponent(pendingInvite.fromUserName)}&background=2b8cee&color=fff`}
+                                    src={avatarThumbnail(pendingInvite.fromUserAvatar, 80) || `https://ui-avatars.com/api/?name=${encodeURIComponent(pendingInvite.fromUserName)}&background=2b8cee&color=fff`}
                                     className="size-full rounded-full object-cover"
                                     alt={pendingInvite.fromUserName}
                                 />
@@ -707,7 +708,7 @@ export default function Community() {
                             <div className="flex items-center justify-center gap-4 mb-6">
                                 <div className="size-16 rounded-full bg-primary/20 border-2 border-primary overflow-hidden">
                                     <img
-                                        src={authUser?.avatar || `https://ui-avatars.com/api/?name=${encodeURIComponent(authUser?.name || 'User')}&background=2b8cee&color=fff`}
+                                        src={avatarThumbnail(authUser?.avatar, 64) || `https://ui-avatars.com/api/?name=${encodeURIComponent(authUser?.name || 'User')}&background=2b8cee&color=fff`}
                                         className="size-full object-cover"
                                         alt="You"
                                     />
@@ -715,7 +716,7 @@ export default function Community() {
                                 <div className="text-2xl text-primary animate-pulse">⚡</div>
                                 <div className="size-16 rounded-full bg-primary/20 border-2 border-primary overflow-hidden">
                                     <img
-                                        src={matchedBuddy.avatar_url || `https://ui-avatars.com/api/?name=${encodeURIComponent(matchedBuddy.full_name || 'User')}&background=2b8cee&color=fff`}
+                                        src={avatarThumbnail(matchedBuddy.avatar_url, 64) || `https://ui-avatars.com/api/?name=${encodeURIComponent(matchedBuddy.full_name || 'User')}&background=2b8cee&color=fff`}
                                         className="size-full object-cover"
                                         alt={matchedBuddy.full_name}
                                     />
@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import LearnerLayout from '../../layouts/LearnerLayout';
 import { useAuth } from '../../context/AuthContext';
 import api from '../../services/api';
+import { avatarThumbnail } from '../../services/fileService';
 
 interface LeaderboardEntry {
     rank: number;
@@ -212,7 +213,7 @@ export default function Leaderboard() {
                                     {/* Avatar & Name */}
                                     <div className="flex items-center flex-1 ml-4">
                                         <img
-                                            src={entry.avatar || `https://ui-avatars.com/api/?name=${entry.username}&background=random`}
+                                            src={avatarThumbnail(entry.avatar, 40) || `https://ui-avatars.com/api/?name=${entry.username}&background=random`}
                                             alt={entry.username}
                                             className="w-10 h-10 rounded-full object-cover"
                                         />
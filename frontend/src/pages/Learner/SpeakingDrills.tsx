@@ -117,6 +117,8 @@ export default function SpeakingDrills() {
     // Speech recognition ref
     const recognitionRef = useRef<ISpeechRecognition | null>(null);
     const transcriptRef = useRef<string>('');
+    // Rolling summary of older turns, computed server-side and echoed back each turn
+    const historySummaryRef = useRef<{ text: string; covered: number } | null>(null);
 
     // Filter sentences
     const filteredSentences = DRILL_SENTENCES.filter(
@@ -280,9 +282,14 @@ export default function SpeakingDrills() {
                     user_id: user?.id,
                     user_text: userText,
                     conversation_history: updatedConversation.slice(0, -1), // Exclude the just-added user message
+                    history_summary: historySummaryRef.current,
                     topic: selectedTopic?.title
                 });
 
+                if (response.data.history_summary) {
+                    historySummaryRef.current = response.data.history_summary;
+                }
+
                 console.log('[AI] Response:', response.data);
 
                 // Check if we got a valid response from the AI
@@ -450,6 +457,7 @@ export default function SpeakingDrills() {
     const startConversation = async (topic: typeof CONVERSATION_TOPICS[0]) => {
         setSelectedTopic(topic);
         setConversation([{ role: 'ai', text: topic.starter }]);
+        historySummaryRef.current = null;
         setIsConversationActive(true);
         setSessionScore([]);
         setCurrentSessionId(null);
@@ -3,6 +3,7 @@ import LearnerLayout from '../../layouts/LearnerLayout';
 import { useAuth } from '../../context/AuthContext';
 import { studyBuddyService } from '../../services/studyBuddyService';
 import type { PotentialBuddy, MatchResult } from '../../services/studyBuddyService';
+import { avatarThumbnail } from '../../services/fileService';
 
 type MatchingState = 'idle' | 'searching' | 'waiting' | 'matched';
 
@@ -146,7 +147,7 @@ export default function StudyBuddy() {
                             <p className="text-green-100 mb-2">🎉 Đã tìm được bạn học!</p>
                             <div className="flex items-center justify-center gap-4 my-4">
                                 <img
-                                    src={matchResult.buddy.avatar_url || `https://ui-avatars.com/api/?name=${matchResult.buddy.full_name}`}
+                                    src={avatarThumbnail(matchResult.buddy.avatar_url, 80) || `https://ui-avatars.com/api/?name=${matchResult.buddy.full_name}`}
                                     alt={matchResult.buddy.full_name}
                                     className="w-20 h-20 rounded-full border-4 border-white"
                                 />
@@ -266,7 +267,7 @@ export default function StudyBuddy() {
                                 >
                                     <div className="relative">
                                         <img
-                                            src={buddy.avatar_url || `https://ui-avatars.com/api/?name=${buddy.full_name}`}
+                                            src={avatarThumbnail(buddy.avatar_url, 56) || `https://ui-avatars.com/api/?name=${buddy.full_name}`}
                                             alt={buddy.full_name}
                                             className="w-14 h-14 rounded-full object-cover"
                                         />
@@ -9,6 +9,7 @@ import { useAuth } from '../../context/AuthContext';
 import ErrorBoundary from '../../components/ErrorBoundary';
 import BookingRequestsModal from '../../components/mentor/BookingRequestsModal';
 import ResourceManagementModal from '../../components/mentor/ResourceManagementModal';
+import { avatarThumbnail } from '../../services/fileService';
 
 interface DashboardStats {
     label: string;
@@ -356,7 +357,7 @@ export default function MentorDashboard() {
                                         <div className="flex items-center gap-4">
                                             {booking.learner_avatar ? (
                                                 <img
-                                                    src={booking.learner_avatar}
+                                                    src={avatarThumbnail(booking.learner_avatar, 48)}
                                                     alt={booking.learner_name}
                                                     className="size-12 rounded-full object-cover"
                                                 />
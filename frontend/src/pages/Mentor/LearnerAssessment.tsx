@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import MentorLayout from '../../layouts/MentorLayout';
 import { mentorService } from '../../services/mentorService';
 import { useAuth } from '../../context/AuthContext';
+import { avatarThumbnail } from '../../services/fileService';
 
 interface Learner {
     id: number;
@@ -380,7 +381,7 @@ export default function LearnerAssessment() {
                                 <div className="size-24 rounded-full bg-purple-600/20 flex items-center justify-center">
                                     {selectedLearner.avatar_url ? (
                                         <img
-                                            src={selectedLearner.avatar_url}
+                                            src={avatarThumbnail(selectedLearner.avatar_url, 96)}
                                             alt={selectedLearner.full_name}
                                             className="size-24 rounded-full object-cover"
                                         />
@@ -3,6 +3,7 @@ import MentorLayout from '../../layouts/MentorLayout';
 import { useAuth } from '../../context/AuthContext';
 import { messageService } from '../../services/messageService';
 import { io, Socket } from 'socket.io-client';
+import { avatarThumbnail } from '../../services/fileService';
 
 interface Conversation {
     user_id: number;
@@ -185,7 +186,7 @@ export default function MentorMessages() {
                                     <div className="flex items-center gap-3">
                                         <div className="relative">
                                             <img
-                                                src={conv.avatar || `https://api.dicebear.com/7.x/avataaars/svg?seed=${conv.user_name}`}
+                                                src={avatarThumbnail(conv.avatar, 48) || `https://api.dicebear.com/7.x/avataaars/svg?seed=${conv.user_name}`}
                                                 className="size-12 rounded-full"
                                                 alt=""
                                             />
@@ -223,7 +224,7 @@ export default function MentorMessages() {
                             {/* Header */}
                             <div className="p-4 border-b border-[#3e4854]/30 flex items-center gap-3">
                                 <img
-                                    src={selectedConversation.avatar || `https://api.dicebear.com/7.x/avataaars/svg?seed=${selectedConversation.user_name}`}
+                                    src={avatarThumbnail(selectedConversation.avatar, 40) || `https://api.dicebear.com/7.x/avataaars/svg?seed=${selectedConversation.user_name}`}
                                     className="size-10 rounded-full"
                                     alt=""
                                 />
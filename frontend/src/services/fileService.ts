@@ -1,5 +1,25 @@
 import api from './api';
 
+/**
+ * Avatar URL for a given display size
+ * Uploaded avatars are served as the closest WebP thumbnail (48, 128 or 256 px)
+ * instead of the full image; other URLs (generated placeholders, external
+ * images) are returned unchanged.
+ * @param url - Avatar URL, may be empty
+ * @param displayPx - Rendered width in CSS pixels
+ * @returns Thumbnail URL, or undefined without an avatar
+ */
+export const avatarThumbnail = (url: string | null | undefined, displayPx: number): string | undefined => {
+    if (!url) {
+        return undefined;
+    }
+    if (!url.includes('/files/avatars/') || /[?&]size=/.test(url)) {
+        return url;
+    }
+    const px = Math.ceil(displayPx * (window.devicePixelRatio || 1));
+    return `${url}${url.includes('?') ? '&' : '?'}size=${px}`;
+};
+
 export const fileService = {
     /**
      * Upload avatar image